@@ -10,7 +10,9 @@ import sys
 import json
 import glob
 import re
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator
+
+import json_stream
 
 __author__ = 'Jose J Palacios-Perez'
 
@@ -59,6 +61,24 @@ def load_json(json_fname: str) -> Any: #List[Dict[str, Any]]:
     except IOError as e:
         raise argparse.ArgumentTypeError(str(e))
 
+def iter_json(json_fname: str) -> Iterator[Any]:
+    """
+    Stream a .json file containing a list of samples (eg. the dump_metrics
+    snapshots of a run), yielding one sample at a time instead of loading
+    the whole list; a file that is not a list is yielded whole.
+    """
+    try:
+        with open(json_fname, "r") as json_data:
+            # check for empty file
+            f_info = os.fstat(json_data.fileno())
+            if f_info.st_size == 0:
+                logger.error(f"JSON input file {json_fname} is empty")
+                return
+            yield from json_stream.iter_elements(json_data)
+            logger.info(f"{json_fname} loaded")
+    except IOError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
 def save_json(name=None, data=None, sort_keys=False):
     """
     Save the data in a <name>.json file 
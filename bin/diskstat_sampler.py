@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Native ``/proc/diskstats`` sampler.
+
+Replaces the ``jc --pretty /proc/diskstats | diskstat_diff.py`` pipeline: the
+counters of the selected devices are parsed straight from ``/proc/diskstats``
+(plus ``/sys/class/block/<dev>/inflight``) into preallocated NumPy arrays, at
+sub-second cadence, without launching any process.  From the samples it
+derives per-interval IOPS, bandwidth, await, average queue size (aqu-sz) and
+utilisation per device, so the dynamics of a run are visible instead of only
+the start/end difference.
+
+The counter names follow ``jc --pretty /proc/diskstats`` so the first/last
+difference can still be fed to ``diskstat_diff.DiskStatEntry``.
+
+Usage: import diskstat_sampler
+
+    sampler = DiskStatSampler(r"nvme\\d+n1p2")
+    sampler.sample()
+    ...
+    sampler.sample()
+    stats = sampler.interval_stats()   # dict of (num_intervals, num_devices) arrays
+    sampler.save_json("run_diskstats.json")
+"""
+
+import json
+import logging
+import os
+import re
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+__author__ = "Jose J Palacios-Perez"
+
+logger = logging.getLogger(__name__)
+
+PROC_DISKSTATS = "/proc/diskstats"
+SYS_CLASS_BLOCK = "/sys/class/block"
+SECTOR_SIZE = 512  # /proc/diskstats always counts 512-byte sectors
+
+# Counter columns after "major minor device", named as jc does
+DISKSTAT_FIELDS: List[str] = [
+    "reads_completed",
+    "reads_merged",
+    "sectors_read",
+    "read_time_ms",
+    "writes_completed",
+    "writes_merged",
+    "sectors_written",
+    "write_time_ms",
+    "io_in_progress",
+    "io_time_ms",
+    "weighted_io_time_ms",
+    "discards_completed_successfully",
+    "discards_merged",
+    "sectors_discarded",
+    "discarding_time_ms",
+    "flush_requests_completed_successfully",
+    "flushing_time_ms",
+]
+_FIELD = {name: i for i, name in enumerate(DISKSTAT_FIELDS)}
+
+# Default device selection, same as diskstat_diff.py
+DEFAULT_DEVICE_REGEX = r"nvme\d+n1p2"
+
+
+def parse_diskstats(
+    text: str, device_regex: Optional[str] = None
+) -> Dict[str, List[int]]:
+    """
+    Parse the content of ``/proc/diskstats``.
+
+    Returns a dict keyed by device name with the counters in
+    :data:`DISKSTAT_FIELDS` order (older kernels report fewer columns: the
+    missing ones are zero).
+    """
+    regex = re.compile(device_regex) if device_regex else None
+    result: Dict[str, List[int]] = {}
+    nfields = len(DISKSTAT_FIELDS)
+    for line in text.splitlines():
+        cols = line.split()
+        if len(cols) < 7:
+            continue
+        dev = cols[2]
+        if regex is not None and not regex.search(dev):
+            continue
+        values = [int(v) for v in cols[3 : 3 + nfields]]
+        values.extend([0] * (nfields - len(values)))
+        result[dev] = values
+    return result
+
+
+class DiskStatSampler:
+    """
+    Sample the diskstats counters of a fixed set of devices into NumPy arrays.
+
+    Parameters
+    ----------
+    device_regex : str
+        Regex selecting the devices (matched with ``re.search``).
+    capacity : int
+        Number of samples preallocated; the arrays double when full.
+    proc_path, sys_block : str
+        Overridable for testing.
+    """
+
+    def __init__(
+        self,
+        device_regex: str = DEFAULT_DEVICE_REGEX,
+        capacity: int = 1024,
+        proc_path: str = PROC_DISKSTATS,
+        sys_block: str = SYS_CLASS_BLOCK,
+    ) -> None:
+        self.device_regex = device_regex
+        self.proc_path = proc_path
+        self.sys_block = sys_block
+        self.devices: List[str] = []
+        self.num_samples = 0
+        self._capacity = max(2, capacity)
+        self._fd: Optional[int] = None
+        self._inflight_fds: List[Optional[int]] = []
+        self.timestamps = np.zeros(0, dtype=np.float64)
+        self.counters = np.zeros((0, 0, len(DISKSTAT_FIELDS)), dtype=np.int64)
+        self.inflight = np.zeros((0, 0, 2), dtype=np.int64)
+
+    # ------------------------------------------------------------------
+    # Raw reads
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _pread(fd: int) -> bytes:
+        """Re-read a procfs/sysfs file from the start through an open fd."""
+        chunks = []
+        offset = 0
+        while True:
+            chunk = os.pread(fd, 65536, offset)
+            if not chunk:
+                break
+            chunks.append(chunk)
+            offset += len(chunk)
+        return b"".join(chunks)
+
+    def open(self) -> None:
+        """Open the files; the first time, fix the device list and array shapes."""
+        if self._fd is not None:
+            return
+        self._fd = os.open(self.proc_path, os.O_RDONLY)
+        if self.timestamps.size == 0:
+            stats = parse_diskstats(self._pread(self._fd).decode(), self.device_regex)
+            self.devices = sorted(stats)
+            if not self.devices:
+                logger.warning(
+                    f"== diskstats: no device matches {self.device_regex} =="
+                )
+            ndev = len(self.devices)
+            self.timestamps = np.zeros(self._capacity, dtype=np.float64)
+            self.counters = np.zeros(
+                (self._capacity, ndev, len(DISKSTAT_FIELDS)), dtype=np.int64
+            )
+            self.inflight = np.zeros((self._capacity, ndev, 2), dtype=np.int64)
+        self._inflight_fds = []
+        for dev in self.devices:
+            try:
+                path = os.path.join(self.sys_block, dev, "inflight")
+                fd = os.open(path, os.O_RDONLY)
+            except OSError:
+                fd = None
+            self._inflight_fds.append(fd)
+
+    def close(self) -> None:
+        """Close the open file descriptors (the samples are kept)."""
+        for fd in [self._fd] + self._inflight_fds:
+            if fd is not None:
+                os.close(fd)
+        self._fd = None
+        self._inflight_fds = []
+
+    def _grow(self) -> None:
+        self._capacity *= 2
+        for name in ("timestamps", "counters", "inflight"):
+            arr = getattr(self, name)
+            grown = np.zeros((self._capacity,) + arr.shape[1:], dtype=arr.dtype)
+            grown[: self.num_samples] = arr[: self.num_samples]
+            setattr(self, name, grown)
+
+    def sample(self, ts: Optional[float] = None) -> None:
+        """Take one sample, timestamped *ts* (Unix seconds, default now)."""
+        self.open()
+        if self.num_samples == self._capacity:
+            self._grow()
+        i = self.num_samples
+        self.timestamps[i] = time.time() if ts is None else ts
+        stats = parse_diskstats(self._pread(self._fd).decode(), self.device_regex)
+        for d, dev in enumerate(self.devices):
+            values = stats.get(dev)
+            if values is not None:
+                self.counters[i, d] = values
+            fd = self._inflight_fds[d]
+            if fd is not None:
+                self.inflight[i, d] = [int(v) for v in self._pread(fd).split()[:2]]
+        self.num_samples += 1
+
+    # ------------------------------------------------------------------
+    # Derived metrics
+    # ------------------------------------------------------------------
+
+    def counter(self, name: str) -> np.ndarray:
+        """Samples of counter *name*, shape ``(num_samples, num_devices)``."""
+        return self.counters[: self.num_samples, :, _FIELD[name]]
+
+    def interval_stats(self) -> Dict[str, np.ndarray]:
+        """
+        Per-interval metrics between consecutive samples.
+
+        Every array has shape ``(num_samples - 1, num_devices)``, except
+        ``timestamp`` (end of each interval) and ``interval_s``.  Await is NaN
+        for intervals without completed I/O.
+        """
+        n = self.num_samples
+        if n < 2:
+            return {}
+        ts = self.timestamps[:n]
+        dt = np.diff(ts)[:, None]
+        dt[dt <= 0] = np.nan
+
+        def delta(name: str) -> np.ndarray:
+            return np.diff(self.counter(name), axis=0).astype(np.float64)
+
+        reads, writes = delta("reads_completed"), delta("writes_completed")
+        with np.errstate(divide="ignore", invalid="ignore"):
+            stats = {
+                "timestamp": ts[1:],
+                "interval_s": dt[:, 0],
+                "read_iops": reads / dt,
+                "write_iops": writes / dt,
+                "read_bw_bytes": delta("sectors_read") * SECTOR_SIZE / dt,
+                "write_bw_bytes": delta("sectors_written") * SECTOR_SIZE / dt,
+                "read_await_ms": np.where(
+                    reads > 0, delta("read_time_ms") / reads, np.nan
+                ),
+                "write_await_ms": np.where(
+                    writes > 0, delta("write_time_ms") / writes, np.nan
+                ),
+                # Same definitions as iostat's aqu-sz and %util
+                "queue_depth": delta("weighted_io_time_ms") / (dt * 1000.0),
+                "util": delta("io_time_ms") / (dt * 1000.0),
+                "inflight": self.inflight[1:n].sum(axis=2).astype(np.float64),
+            }
+        return stats
+
+    def first_last_diff(self, measurements: Optional[List[str]] = None) -> Dict:
+        """
+        Difference between the last and first samples per device, in the
+        format of ``diskstat_diff.DiskStatEntry.filter_metrics``.
+        """
+        if self.num_samples == 0:
+            return {}
+        measurements = measurements or [
+            "reads_completed",
+            "read_time_ms",
+            "writes_completed",
+            "write_time_ms",
+        ]
+        first, last = self.counters[0], self.counters[self.num_samples - 1]
+        return {
+            dev: {
+                m: int(last[d, _FIELD[m]] - first[d, _FIELD[m]]) for m in measurements
+            }
+            for d, dev in enumerate(self.devices)
+        }
+
+    def snapshot(self, index: int = -1) -> Dict[str, Dict[str, int]]:
+        """Counters of sample *index* per device, keyed by field name."""
+        if index < 0:
+            index += self.num_samples
+        return {
+            dev: dict(zip(DISKSTAT_FIELDS, self.counters[index, d].tolist()))
+            for d, dev in enumerate(self.devices)
+        }
+
+    def to_dict(self) -> Dict:
+        """Columnar representation: one list per metric, one column per device."""
+        stats = self.interval_stats()
+        out: Dict = {
+            "devices": self.devices,
+            "sample_timestamp": self.timestamps[: self.num_samples].tolist(),
+        }
+        for name, arr in stats.items():
+            out[name] = np.where(np.isnan(arr), None, arr).tolist()
+        return out
+
+    def save_json(self, path: str) -> None:
+        """Save the per-interval metrics as columnar JSON."""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f)
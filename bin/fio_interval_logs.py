@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Load the per-interval logs of FIO into IOPS/latency time series.
+
+The end-of-run JSON of FIO only has a single number per workload.  The FIO
+job files also write per-interval logs (``write_iops_log``,
+``write_lat_log``, with ``log_avg_msec=1000`` and ``log_unix_epoch=1``):
+one file per job and kind, named ``<LOG_NAME>_<kind>.<job>.log``, each
+line being::
+
+    time (ms), value, data direction, block size, offset[, priority]
+
+where the value is the IOPS of the interval for the ``iops`` logs, and the
+mean latency (ns) for the ``lat``/``clat``/``slat`` logs.
+
+This module loads those logs with pandas (no per-line Python loop), buckets
+them per second and merges every job of every FIO process (``num_procs``,
+each with its own ``LOG_NAME``) into a single series:
+
+  - ``iops``: the sum of the IOPS of the jobs,
+  - ``clat_ms``: the completion latency, the mean of the jobs weighted by
+    their IOPS,
+  - ``clat_max_ms``: the highest latency of any job in that second.
+
+The series is indexed by the second since the epoch, with a ``timestamp``
+column in the format of the telemetry snapshots
+(:func:`telemetry_store.format_timestamp`), so latency spikes can be lined
+up with the OSD dump_metrics and diskstat samples.  Logs with zero-based
+times (no ``log_unix_epoch``) are shifted by the start of the job, when
+given.
+
+Usage: import fio_interval_logs
+
+    series = load_fio_logs(find_fio_logs("/tmp/run"))
+
+    python3 fio_interval_logs.py -d /tmp/run -o fio_series.csv
+"""
+
+import argparse
+import glob
+import io
+import logging
+import os
+import re
+import sys
+import tempfile
+from typing import Dict, List, Optional, Union
+
+import pandas as pd
+
+from telemetry_store import format_timestamp
+
+__author__ = "Jose J Palacios-Perez"
+
+logger = logging.getLogger(__name__)
+
+# <LOG_NAME>_<kind>.<job>.log, possibly compressed
+LOG_RE = re.compile(r"^(?P<prefix>.+)_(?P<kind>iops|bw|lat|clat|slat)\.(?P<job>\d+)\.log(?:\.gz)?$")
+
+# Latency logs, by preference: completion, then total
+LAT_KINDS = ("clat", "lat")
+
+# Times below this (ms) are relative to the start of the job
+EPOCH_MS = 10**12
+
+SERIES_COLUMNS = ["timestamp", "iops", "clat_ms", "clat_max_ms"]
+
+Source = Union[str, bytes]
+
+
+def read_fio_log(source: Source, name: str = "") -> pd.DataFrame:
+    """
+    The samples of a FIO log, from a path or its contents (*name* tells
+    whether the contents are gzipped): columns ``time_ms``, ``value`` and
+    ``ddir``.
+    """
+    if isinstance(source, bytes):
+        compression = "gzip" if name.endswith(".gz") else None
+        source = io.BytesIO(source)
+    else:
+        compression = "infer"
+    try:
+        return pd.read_csv(
+            source,
+            header=None,
+            usecols=[0, 1, 2],
+            names=["time_ms", "value", "ddir"],
+            skipinitialspace=True,
+            compression=compression,
+            dtype="int64",
+        )
+    except pd.errors.EmptyDataError:
+        return pd.DataFrame(columns=["time_ms", "value", "ddir"], dtype="int64")
+
+
+def find_fio_logs(directory: str, prefix: str = "") -> Dict[str, str]:
+    """The FIO logs in *directory* (of *prefix*): base name -> path."""
+    paths = glob.glob(os.path.join(directory, f"{prefix}*.log*"))
+    return {os.path.basename(p): p for p in sorted(paths) if LOG_RE.match(os.path.basename(p))}
+
+
+def _per_second(df: pd.DataFrame, start_ms: Optional[int]) -> pd.DataFrame:
+    """Mean of the samples per (second, data direction)."""
+    time_ms = df["time_ms"]
+    if start_ms is not None and len(time_ms) and time_ms.max() < EPOCH_MS:
+        time_ms = time_ms + start_ms
+    return (
+        df.assign(time=time_ms // 1000)
+        .groupby(["time", "ddir"])["value"]
+        .mean()
+    )
+
+
+def job_samples(
+    iops: Optional[pd.DataFrame], lat: Optional[pd.DataFrame], start_ms: Optional[int] = None
+) -> pd.DataFrame:
+    """
+    The per-second ``iops`` and ``lat_ns`` of a job, per data direction,
+    from its iops and latency logs (either may be missing).
+    """
+    parts = {}
+    if iops is not None:
+        parts["iops"] = _per_second(iops, start_ms)
+    if lat is not None:
+        parts["lat_ns"] = _per_second(lat, start_ms)
+    if not parts:
+        return pd.DataFrame(columns=["time", "ddir", "iops", "lat_ns"])
+    df = pd.concat(parts, axis=1).reset_index()
+    for col in ("iops", "lat_ns"):
+        if col not in df:
+            df[col] = float("nan")
+    return df
+
+
+def merge_samples(samples: List[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Merge the per-second samples of every job into a single series (see
+    the module docstring); the index is the second since the epoch.
+    """
+    samples = [s for s in samples if not s.empty]
+    if not samples:
+        return pd.DataFrame(columns=SERIES_COLUMNS)
+    df = pd.concat(samples, ignore_index=True)
+    weighted = df["lat_ns"] * df["iops"]
+    df = df.assign(
+        weighted=weighted,
+        weight=df["iops"].where(weighted.notna()),
+    )
+    grouped = df.groupby("time")
+    iops = grouped["iops"].sum(min_count=1)
+    weight = grouped["weight"].sum(min_count=1)
+    clat = grouped["weighted"].sum(min_count=1) / weight.where(weight > 0)
+    # Without IOPS to weight them, the plain mean of the jobs
+    clat = clat.fillna(grouped["lat_ns"].mean())
+    series = pd.DataFrame(
+        {
+            "iops": iops,
+            "clat_ms": clat / 1e6,
+            "clat_max_ms": grouped["lat_ns"].max() / 1e6,
+        }
+    )
+    series.index = series.index.astype("int64")
+    series.insert(0, "timestamp", [format_timestamp(t) for t in series.index])
+    return series
+
+
+def load_fio_logs(
+    sources: Dict[str, Source], start_ms: Optional[Dict[str, int]] = None
+) -> pd.DataFrame:
+    """
+    The IOPS/latency series of all the jobs of the FIO logs in *sources*
+    (base name -> path or contents).  *start_ms* gives the start of the
+    job of each ``LOG_NAME``, for logs with zero-based times.
+    """
+    jobs: Dict[tuple, Dict[str, str]] = {}
+    for name in sources:
+        m = LOG_RE.match(os.path.basename(name))
+        if m:
+            key = (m.group("prefix"), int(m.group("job")))
+            jobs.setdefault(key, {})[m.group("kind")] = name
+    samples = []
+    for (prefix, job), kinds in sorted(jobs.items()):
+        start = (start_ms or {}).get(prefix)
+        iops = read_fio_log(sources[kinds["iops"]], kinds["iops"]) if "iops" in kinds else None
+        lat_kind = next((k for k in LAT_KINDS if k in kinds), None)
+        lat = read_fio_log(sources[kinds[lat_kind]], kinds[lat_kind]) if lat_kind else None
+        if iops is None and lat is None:
+            continue
+        logger.debug(f"== {prefix} job {job}: {lat_kind or 'no'} latency log ==")
+        samples.append(job_samples(iops, lat, start))
+    logger.info(f"Loaded the FIO logs of {len(samples)} jobs")
+    return merge_samples(samples)
+
+
+def main(argv: List[str]) -> None:
+    examples = """
+    Examples:
+    # Time series of all the FIO logs of a run:
+        %prog -d /tmp/run -o fio_series.csv
+
+    # Only those of a test:
+        %prog -d /tmp/run -p fio_crimson_1osd -o fio_series.csv
+    """
+    parser = argparse.ArgumentParser(
+        description="""Load the FIO per-interval logs into an IOPS/latency time series""",
+        epilog=examples,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        "-d", "--directory", type=str, default=".", help="Directory of the FIO logs"
+    )
+    parser.add_argument(
+        "-p", "--prefix", type=str, default="", help="LOG_NAME prefix of the logs"
+    )
+    parser.add_argument(
+        "-o", "--output", type=str, default="", help="CSV output file (default: stdout)"
+    )
+    parser.add_argument(
+        "-v", "--verbose", action="store_true", default=False, help="Verbose logging"
+    )
+    options = parser.parse_args(argv)
+
+    with tempfile.NamedTemporaryFile(dir="/tmp", delete=False) as tmpfile:
+        logging.basicConfig(
+            filename=tmpfile.name,
+            encoding="utf-8",
+            level=logging.DEBUG if options.verbose else logging.INFO,
+        )
+
+    series = load_fio_logs(find_fio_logs(options.directory, options.prefix))
+    series.to_csv(options.output or sys.stdout, index_label="time")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
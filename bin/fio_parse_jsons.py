@@ -22,6 +22,9 @@
 #
 # -m - flag to indicate whether the run is for MultiFIO
 #
+# -j <num> - number of processes parsing the JSON files (default: the spare
+# cores, 0: serial)
+#
 # Example:
 # python3 fio_parse_jsons.py -c \
 #  crimson4cores_200gb_1img_4k_1procs_randwrite_list -t \
@@ -41,8 +44,14 @@ import functools
 
 # import time
 from datetime import datetime, timezone
+from concurrent.futures import ProcessPoolExecutor
 from operator import add
-from typing import List
+from typing import Dict, Iterator, List, Optional
+
+import json_stream
+from json_query import JsonQuery, compile_step
+from latency_histogram import CLAT_PERCENTILES, LatencyHistogram, merge_histograms
+from postproc_dag import spare_cores
 
 __author__ = "Jose J Palacios-Perez"
 
@@ -65,6 +74,8 @@ predef_dict = {
         "total_ios": "write/total_ios",
         "clat_ms": "write/clat_ns",
         "clat_stdev": "write/clat_ns",
+        "clat_p99_ms": "write/clat_ns",
+        "clat_p999_ms": "write/clat_ns",
         "usr_cpu": "usr_cpu",
         "sys_cpu": "sys_cpu",
     },
@@ -73,6 +84,8 @@ predef_dict = {
         "total_ios": "read/total_ios",
         "clat_ms": "read/clat_ns",
         "clat_stdev": "read/clat_ns",
+        "clat_p99_ms": "read/clat_ns",
+        "clat_p999_ms": "read/clat_ns",
         "usr_cpu": "usr_cpu",
         "sys_cpu": "sys_cpu",
     },
@@ -81,6 +94,8 @@ predef_dict = {
         "total_ios": "write/total_ios",
         "clat_ms": "write/clat_ns",
         "clat_stdev": "write/clat_ns",
+        "clat_p99_ms": "write/clat_ns",
+        "clat_p999_ms": "write/clat_ns",
         "usr_cpu": "usr_cpu",
         "sys_cpu": "sys_cpu",
     },
@@ -89,6 +104,8 @@ predef_dict = {
         "total_ios": "read/total_ios",
         "clat_ms": "read/clat_ns",
         "clat_stdev": "read/clat_ns",
+        "clat_p99_ms": "read/clat_ns",
+        "clat_p999_ms": "read/clat_ns",
         "usr_cpu": "usr_cpu",
         "sys_cpu": "sys_cpu",
     },
@@ -128,38 +145,20 @@ def filter_json_node(next_branch, jnode_list_in):
     - sequence - key field syntax is name=value, where
               name is a dictionary key of sequence elements, and
               value is the desired value to select a sequence element
+    The step is compiled once (see json_query.compile_step)
     """
-    next_node_list = []
-    # Nothing to do if the input next_branch is empty
-    if not next_branch:
-        return next_node_list
-    for n in jnode_list_in:
-        dotlist = next_branch.split("=")
-        if len(dotlist) > 2:
-            logger.info(f"unrecognized syntax at {next_branch}")
-            return []
-        if len(dotlist) == 1:
-            assert isinstance(n, dict)
-            next_node_list.append(n[next_branch])
-        else:  # must be a sequence, take any element with key matching value
-            select_key = dotlist[0]
-            select_value = dotlist[1]
-            assert isinstance(n, list)
-            for e in n:
-                # n is a list
-                # print 'select with key %s value %s sequence
-                # element %s'%(select_key, select_value, e)
-                if select_value == "*":
-                    next_node_list.append(e)
-                else:
-                    v = e[select_key]
-                    if v == select_value:
-                        next_node_list.append(e)
-                        # print('selecting: %s'%str(e))
-            if len(next_node_list) == 0:
-                logger.info(f"{select_key}={select_value} not found")
-                return []
-    return next_node_list
+    return compile_step(next_branch)(jnode_list_in)
+
+
+# Compiled queries of predef_dict, per jobname
+_compiled_queries = {}
+
+
+def compiled_query(jobname: str) -> JsonQuery:
+    """The predef_dict query of *jobname*, compiled on first use"""
+    if jobname not in _compiled_queries:
+        _compiled_queries[jobname] = JsonQuery(predef_dict[jobname])
+    return _compiled_queries[jobname]
 
 
 def process_fio_item(k, next_node_list):
@@ -176,6 +175,9 @@ def process_fio_item(k, next_node_list):
     json files for the same timestamp and then divide by total IOPs to get
     an average latency
     """
+    if k in CLAT_PERCENTILES:
+        # Kept as a histogram, to be merged across the jobs/processes
+        return LatencyHistogram.from_fio(next_node_list[0])
     #    match k: # Python version on node does not support 'match'
     #    case 'iops' | 'usr_cpu' | 'sys_cpu':
     if re.search("iops|usr_cpu|sys_cpu|iodepth|total_ios", k):
@@ -242,6 +244,9 @@ def apply_reductor(result_dict, metric):
     """
     if re.search("iops|usr_cpu|sys_cpu|bw|total_ios", metric):
         return functools.reduce(add, result_dict[metric])
+    if metric in CLAT_PERCENTILES:
+        merged = merge_histograms(result_dict[metric])
+        return merged.percentile(CLAT_PERCENTILES[metric]) / 1e6
     if metric == "clat_ms":
         z = zip(result_dict["clat_ms"], result_dict["total_ios"])
         mx, _ = functools.reduce(lambda x, y: combined_mean(x, y), z)
@@ -261,6 +266,7 @@ def reduce_result_list(result_dict, jobname):
     - avg (completion) latency is the combined avg
     - clat std dev is the combined std dev -- for the last two, we need
     the number of samples from FIO, which is "total_ios"
+    - clat percentiles are read from the merged latency histograms
     """
     _res = {}
     for metric in predef_dict[jobname].keys():
@@ -296,6 +302,34 @@ def validate_json_file(jsondata):
     return valid
 
 
+# Top-level keys of the FIO JSON output used, besides the jobs
+FIO_HEADER_KEYS = ("fio version", "timestamp", "global options")
+FIO_JOB_LISTS = ("jobs", "client_stats")
+
+
+def iter_fio_json(json_data) -> Iterator[dict]:
+    """
+    Stream a FIO JSON output: yield first the header (FIO_HEADER_KEYS, which
+    FIO writes before the jobs), then each job, decoded one at a time, so
+    the memory used is that of a single job rather than the whole file.
+    The other keys (eg. disk_util) are skipped without being decoded.
+    Nothing is yielded if the file is not a valid FIO output.
+    """
+    header = {}
+    for key, value in json_stream.scan_object(
+        json_data, keys=FIO_HEADER_KEYS, stream=FIO_JOB_LISTS
+    ):
+        if key not in FIO_JOB_LISTS:
+            header[key] = value
+            continue
+        # Only the key matters for the validation
+        if key != "jobs" or not validate_json_file({**header, key: None}):
+            continue
+        yield header
+        yield from value
+        return
+
+
 def process_fio_json_file(json_file: str) -> List[dict]:
     """
     Collect metrics from an individual JSON file, which might
@@ -309,180 +343,286 @@ def process_fio_json_file(json_file: str) -> List[dict]:
         if f_info.st_size == 0:
             logger.error(f"JSON input file {json_file} is empty")
             return data_set
+        fio_json = iter_fio_json(json_data)
         try:
-            data = json.load(json_data)
+            header = next(fio_json, None)
+            if header is None:
+                logger.error(
+                    f"JSON input file {json_file} does not appear to be a valid fio json output file, skipping"
+                )
+                return data_set
+            # Extract the json timestamp: useful for matching same workloads from
+            # different FIO processes
+            global_opts["filename"] = json_file
+            global_opts["timestamp"] = datetime.fromtimestamp(header["timestamp"])
+            # Get some global options for the table, which are common to all the jobs in the .json file
+            for k in ["bs", "size", "numjobs", "iodepth", "rw"]:
+                if k in header["global options"].keys():
+                    global_opts[k] = header["global options"][k]
+                else:
+                    logger.warning(f"Global option {k} not found in {json_file}")
+
+            # Traverse the jobs, streamed one at a time: we are going ot generate a row in the .csv per
+            # job, so the data_set has the same global options for all the jobs,
+            # but the metrics are going to be different for each job, so we need to
+            # merge the global options with the job options, and then we can use
+            # the job options to query the predef_dict for the metrics
+            for job in fio_json:
+                data_set.append(_fio_job_row(job, global_opts))
         except json.JSONDecodeError as e:
             logger.error(f"JSON input file {json_file} invalid: {e}")
-            return data_set
-        if not validate_json_file(data):
-            logger.error(
-                f"JSON input file {json_file} does not appear to be a valid fio json output file, skipping"
-            )
-            return data_set
-        # Extract the json timestamp: useful for matching same workloads from
-        # different FIO processes
-        global_opts["filename"] = json_file
-        global_opts["timestamp"] = datetime.fromtimestamp(data["timestamp"])
-        # data_set["iodepth"] = data["global options"]["iodepth"]
-        # data_set["jobname"] = data["global options"]["rw"]
-        # Get some global options for the table, which are common to all the jobs in the .json file
-        for k in ["bs", "size", "numjobs", "iodepth", "rw"]:
-            if k in data["global options"].keys():
-                global_opts[k] = data["global options"][k]
-            else:
-                logger.warning(f"Global option {k} not found in {json_file}")
-        # Use the jobname to index the predef_dict for the json query
-
-        # Traverse the jobs: we are going ot generate a row in the .csv per
-        # job, so the data_set has the same global options for all the jobs,
-        # but the metrics are going to be different for each job, so we need to
-        # merge the global options with the job options, and then we can use
-        # the job options to query the predef_dict for the metrics
-        jobs_list = data["jobs"]
-        logger.info(f"Num jobs: {len(jobs_list)}")
-
-        for job in jobs_list:
-            job_result = global_opts.copy()
-            job_result["jobname"] = job["jobname"]
-            job_start_timestamp = job["job_start"]
-            try:
-                job_start_datetime = datetime.fromtimestamp(job_start_timestamp, tz=timezone.utc)
-                logger.info(f"Job {job['jobname']} start time: {job_start_datetime}")
-            except ValueError:
-                logger.warning(f"Job {job['jobname']} 'job_start' timestamp failed to parse.")
-            job_result["rw"] = job["job options"]["rw"]
-            job_result["runtime"] = job["job options"]["runtime"]
-            # What if we decide not to use the job options?
-            # job_result.update(job["job options"])
-            # Use "rw"as index for the metrics data: this is the type of workload
-            fio_job_type = job_result["rw"]
-            for k in rw_map:
-                if re.search(rw_map[k], fio_job_type):
-                    for metric in generic_metrics:
-                        job_result[metric] = job[k][metric]
-                    # For latency, we need to calculate the mean latency in ms from the clat_ns dict
-                    job_result["clat_ms"] = job[k]["clat_ns"]["mean"] / 1e6
-                    # std dev of latency in ms
-                    job_result["clat_stdev_ms"] = job[k]["clat_ns"]["stddev"] / 1e6
-            data_set.append(job_result)
-            logger.info(f"{job_result}")
-
+            return []
+        logger.info(f"Num jobs: {len(data_set)}")
         return data_set
 
 
-def _process_fio_json_file(json_file, json_tree_path):
+def _fio_job_row(job: dict, global_opts: dict) -> dict:
+    """The row of the .csv of a FIO job"""
+    job_result = global_opts.copy()
+    job_result["jobname"] = job["jobname"]
+    job_start_timestamp = job["job_start"]
+    try:
+        job_start_datetime = datetime.fromtimestamp(job_start_timestamp, tz=timezone.utc)
+        logger.info(f"Job {job['jobname']} start time: {job_start_datetime}")
+    except ValueError:
+        logger.warning(f"Job {job['jobname']} 'job_start' timestamp failed to parse.")
+    job_result["rw"] = job["job options"]["rw"]
+    job_result["runtime"] = job["job options"]["runtime"]
+    # What if we decide not to use the job options?
+    # job_result.update(job["job options"])
+    # Use "rw"as index for the metrics data: this is the type of workload
+    fio_job_type = job_result["rw"]
+    for k in rw_map:
+        if re.search(rw_map[k], fio_job_type):
+            for metric in generic_metrics:
+                job_result[metric] = job[k][metric]
+            # For latency, we need to calculate the mean latency in ms from the clat_ns dict
+            job_result["clat_ms"] = job[k]["clat_ns"]["mean"] / 1e6
+            # std dev of latency in ms
+            job_result["clat_stdev_ms"] = job[k]["clat_ns"]["stddev"] / 1e6
+            # tail latency in ms, from the clat bins (json+) or percentiles
+            hist = LatencyHistogram.from_fio(job[k]["clat_ns"], job[k]["total_ios"])
+            job_result.update(hist.percentiles_ms())
+    logger.info(f"{job_result}")
+    return job_result
+
+
+def _fio_json_results(json_file):
     """
-    Collect metrics from an individual JSON file, which might
-    contain several entries, one per job
-
-    if job["jobname"] != "All clients":
-                # Merging gloabl and job options
-                job["job options"] = {**job["job options"], **data["global options"]}
-                if "job options" not in job.keys():
-                    logger.error(f"Job options not found for job {job['jobname']} in {json_file}")
-                    return data_set
-
+    The header fields and the queried metrics of the jobs of a JSON file,
+    as (result_dict, job_result): job_result holds a list per metric, one
+    item per job, to be reduced by :func:`reduce_result_list`.
+    The jobs are streamed one at a time, and only the metrics queried are
+    kept from each. Returns ({}, {}) for an invalid file.
     """
     with open(json_file, "r") as json_data:
         result_dict = {}
+        job_result = {}
         # check for empty file
         f_info = os.fstat(json_data.fileno())
         if f_info.st_size == 0:
             logger.error(f"JSON input file {json_file} is empty")
-            return result_dict
+            return result_dict, job_result
+        fio_json = iter_fio_json(json_data)
         try:
-            data = json.load(json_data)
+            header = next(fio_json, None)
+            if header is None:
+                logger.error(
+                    f"JSON input file {json_file} does not appear to be a valid fio json output file, skipping"
+                )
+                return result_dict, job_result
+            global_options = header["global options"]
+            # Extract the json timestamp: useful for matching same workloads from
+            # different FIO processes
+            result_dict["timestamp"] = datetime.fromtimestamp(header["timestamp"])
+            result_dict["jobname"] = global_options["rw"]
+            # Get some global options for the table, which are common to all the jobs in the .json file
+            for k in ["bs", "size", "numjobs", "iodepth", "rw"]:
+                if k in global_options.keys():
+                    result_dict[k] = global_options[k]
+                else:
+                    logger.warning(f"Global option {k} not found in {json_file}")
+
+            # Use the jobname to index the predef_dict for the json query
+            jobname = result_dict["jobname"]
+            logger.info(f"Processing {json_file} as {jobname}")
+            if jobname not in predef_dict:
+                logger.error(f"Job name {jobname} not found in predef_dict")
+                return result_dict, job_result
+            query = compiled_query(jobname)
+            num_jobs = 0
+            for job in fio_json:
+                num_jobs += 1
+                # A single traversal of the job for all the metrics
+                for k, next_node_list in query(job).items():
+                    item = process_fio_item(k, next_node_list)
+                    if k not in job_result:
+                        job_result[k] = []
+                    job_result[k].append(item)
         except json.JSONDecodeError as e:
             logger.error(f"JSON input file {json_file} invalid: {e}")
-            return result_dict
-        if not validate_json_file(data):
-            logger.error(
-                f"JSON input file {json_file} does not appear to be a valid fio json output file, skipping"
-            )
-            return result_dict
-        # Extract the json timestamp: useful for matching same workloads from
-        # different FIO processes
-        result_dict["timestamp"] = datetime.fromtimestamp(data["timestamp"])
-        # result_dict["iodepth"] = data["global options"]["iodepth"]
-        result_dict["jobname"] = data["global options"]["rw"]
-        # Get some global options for the table, which are common to all the jobs in the .json file
-        for k in ["bs", "size", "numjobs", "iodepth", "rw"]:
-            if k in data["global options"].keys():
-                result_dict[k] = data["global options"][k]
-            else:
-                logger.warning(f"Global option {k} not found in {json_file}")
-        # Use the jobname to index the predef_dict for the json query
-
-        # Traverse the jobs: we are going ot generate a row in the .csv per
-        # job, so the result_dict has the same global options for all the jobs,
-        # but the metrics are going to be different for each job, so we need to
-        # merge the global options with the job options, and then we can use
-        # the job options to query the predef_dict for the metrics
-        jobs_list = data["jobs"]
-        logger.info(f"Num jobs: {len(jobs_list)}")
-        job_result = {}
+            return {}, {}
+        logger.info(f"Num jobs: {num_jobs}")
+        return result_dict, job_result
 
-        for job in jobs_list:
-            if job["jobname"] != "All clients":
-                # Merging gloabl and job options
-                job["job options"] = {**job["job options"], **data["global options"]}
-                if "job options" not in job.keys():
-                    logger.error(
-                        f"Job options not found for job {job['jobname']} in {json_file}"
-                    )
-                    return result_dict
-
-        jobname = result_dict["jobname"]
-        jobname = jobname if jobname in predef_dict else data["global options"]["rw"]
-        logger.info(f"Processing {json_file} as {jobname}")
-        if jobname not in predef_dict:
-            logger.error(f"Job name {jobname} not found in predef_dict")
-            return result_dict
-        query_dict = predef_dict[jobname]
-        for _, job in enumerate(jobs_list):
-            # Get the job type, which is the global "rw" attribute
-            for k in query_dict.keys():
-                json_tree_path = query_dict[k].split("/")
-                next_node_list = [job]
-
-                for next_branch in json_tree_path:
-                    next_node_list = filter_json_node(next_branch, next_node_list)
-                item = process_fio_item(k, next_node_list)
-                if k not in job_result:
-                    job_result[k] = []
-                job_result[k].append(item)
-
-        reduced = reduce_result_list(job_result, result_dict["jobname"])
-        merged = {**result_dict, **reduced}
-        return merged
-
-def process_list_fio_json_files(json_files: List[str]) -> List[dict]:
+
+def _process_fio_json_file(json_file, json_tree_path):
+    """
+    Collect metrics from an individual JSON file, which might
+    contain several entries, one per job, reduced into a single row.
+    """
+    result_dict, job_result = _fio_json_results(json_file)
+    if not job_result:
+        return result_dict
+    reduced = reduce_result_list(job_result, result_dict["jobname"])
+    merged = {**result_dict, **reduced}
+    return merged
+
+
+def _process_fio_point(json_files: List[str]) -> dict:
+    """
+    Reduce the jobs of all the JSON files of a point (one per FIO process)
+    into a single row: the IOPS/BW add up, the latency mean and std dev are
+    combined, and the clat percentiles are read from the merged histograms.
+    The header fields are those of the first file; {} if no file is valid.
+    """
+    point_dict = {}
+    point_result = {}
+    for json_file in json_files:
+        result_dict, job_result = _fio_json_results(json_file)
+        if not job_result:
+            continue
+        if not point_dict:
+            point_dict = result_dict
+        for k, items in job_result.items():
+            point_result.setdefault(k, []).extend(items)
+    if not point_result:
+        return {}
+    reduced = reduce_result_list(point_result, point_dict["jobname"])
+    return {**point_dict, **reduced}
+
+
+# Suffix of the JSON file of each FIO process of a point (run_fio.py)
+PROC_SUFFIX_RE = re.compile(r"_p\d+(?=\.json$)")
+
+
+def point_name(json_file: str) -> str:
+    """The name of the point of *json_file*, without its _p<i> process suffix"""
+    return PROC_SUFFIX_RE.sub("", json_file)
+
+
+def load_fio_points(json_files: List[str], workers: Optional[int] = None) -> Dict[str, dict]:
+    """
+    One reduced row per point, keyed by the point name, in the order of the
+    files: the _p<i> JSON files the FIO processes of a multi-FIO point write
+    are reduced together (see :func:`_process_fio_point`), so the tail
+    latency of the point is that of all its IOs, not an average of per
+    process percentiles. The points are reduced on a process pool of
+    *workers* (see :func:`load_fio_columns`).
+    """
+    points: Dict[str, List[str]] = {}
+    for fname in dict.fromkeys(json_files):  # Avoid duplicates!
+        points.setdefault(point_name(fname), []).append(fname)
+    if workers is None:
+        workers = spare_cores()
+    if workers <= 1 or len(points) <= MIN_BATCH:
+        rows = [_process_fio_point(files) for files in points.values()]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            rows = list(pool.map(_process_fio_point, points.values()))
+    return {name: row for name, row in zip(points, rows) if row}
+
+# Smallest number of files parsed by a worker of the pool at a time
+MIN_BATCH = 16
+
+
+def _parse_batch(json_files: List[str]) -> Dict[str, list]:
+    """
+    Parse a batch of JSON files (in a worker of the pool): the rows of all
+    their jobs, as column arrays (a missing metric is None), which are
+    cheaper to send back than a dict per row.
+    """
+    rows = []
+    for fname in json_files:
+        rows.extend(process_fio_json_file(fname))
+    return rows_to_columns(rows)
+
+
+def rows_to_columns(rows: List[dict]) -> Dict[str, list]:
+    """
+    Turn a list of rows (dicts) into column arrays, in the order of the keys
+    first seen; a key missing from a row is None in its column.
+    """
+    columns: Dict[str, list] = {}
+    for i, row in enumerate(rows):
+        for k in row:
+            if k not in columns:
+                columns[k] = [None] * i
+        for k, col in columns.items():
+            col.append(row.get(k))
+    return columns
+
+
+def columns_to_rows(columns: Dict[str, list]) -> List[dict]:
+    """The inverse of :func:`rows_to_columns`."""
+    keys = list(columns)
+    return [dict(zip(keys, values)) for values in zip(*columns.values())]
+
+
+def load_fio_columns(json_files: List[str], workers: Optional[int] = None) -> Dict[str, list]:
+    """
+    Collect the metrics of the jobs of a list of JSON files as column
+    arrays, in the order of the files (duplicates are parsed once).
+
+    The files are parsed in batches on a process pool of *workers* (by
+    default the spare cores); with few files, or ``workers=0``, they are
+    parsed serially in this process.
+    """
+    json_files = list(dict.fromkeys(json_files))  # Avoid duplicates!
+    if workers is None:
+        workers = spare_cores()
+    if workers <= 1 or len(json_files) <= MIN_BATCH:
+        return _parse_batch(json_files)
+    size = max(MIN_BATCH, -(-len(json_files) // (workers * 4)))
+    batches = [json_files[i : i + size] for i in range(0, len(json_files), size)]
+    logger.info(f"Parsing {len(json_files)} files in {len(batches)} batches on {workers} workers")
+    columns: Dict[str, list] = {}
+    num_rows = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for batch in pool.map(_parse_batch, batches):
+            batch_rows = len(next(iter(batch.values()), []))
+            for k in batch:
+                if k not in columns:
+                    columns[k] = [None] * num_rows
+            for k, col in columns.items():
+                col.extend(batch.get(k, [None] * batch_rows))
+            num_rows += batch_rows
+    return columns
+
+
+def process_list_fio_json_files(json_files: List[str], workers: Optional[int] = None) -> List[dict]:
     """
     Collect metrics from a list of JSON files, which might
     contain several entries, one per job
-    data_set = []
-    for fname in json_files:
-        data_set += process_fio_json_file(fname)
-    return data_set
+    (see :func:`load_fio_columns` for the *workers*)
     """
-    dict_new = {}
-    data_set = []
-    for fname in json_files:
-        # Avoid duplicates!
-        if fname not in dict_new:
-            data_set = data_set + process_fio_json_file(fname)
-            # node_list = process_fio_json_file(fname, json_tree_path)
-            dict_new[fname] = 1  # node_list
-            #logger.info(f"== {fname} ==")
-    return data_set
+    return columns_to_rows(load_fio_columns(json_files, workers))
 
 
-def traverse_files(dir, config, json_tree_path) -> List[dict]:
+def load_fio_dataframe(json_files: List[str], workers: Optional[int] = None):
     """
-    Traverses the JSON files given in the config
-    Returns a dictionary whose keys are the input .json file names, values
-    are the (sub)dictionary of the metrics collected from the input .json file
-    TODO: use the config.json instead of the text _list
+    The metrics of the jobs of a list of JSON files as a pandas DataFrame,
+    built at once from the column arrays.
+    """
+    import pandas as pd
+
+    return pd.DataFrame(load_fio_columns(json_files, workers))
+
+
+def read_fio_list(dir, config) -> List[str]:
+    """
+    The names of the JSON files listed in the config, relative to the
+    result directory dir, which becomes the current directory
     """
     os.chdir(dir)
     try:
@@ -492,10 +632,22 @@ def traverse_files(dir, config, json_tree_path) -> List[dict]:
     json_files = config_file.read().splitlines()
     logger.info(json_files)
     config_file.close()
+    return json_files
+
+
+def traverse_files(dir, config, json_tree_path, workers: Optional[int] = None) -> List[dict]:
+    """
+    Traverses the JSON files given in the config
+    Returns a dictionary whose keys are the input .json file names, values
+    are the (sub)dictionary of the metrics collected from the input .json file
+    TODO: use the config.json instead of the text _list
+    """
+    json_files = read_fio_list(dir, config)
     logger.info(f"loading {len(json_files)} .json files ...")
-    pp = pprint.PrettyPrinter(width=41, compact=True)
-    data_set = process_list_fio_json_files(json_files)
-    logger.info(pp.pformat(data_set))
+    data_set = process_list_fio_json_files(json_files, workers)
+    if logger.isEnabledFor(logging.DEBUG):
+        pp = pprint.PrettyPrinter(width=41, compact=True)
+        logger.debug(pp.pformat(data_set))
     return data_set  # dict_new
 
 
@@ -514,7 +666,15 @@ def gen_plot(config: str, data: str, list_subtables, title: str, header_keys: di
             "y2label": "CPU",
             # "y2column": "OSD_cpu", # for cores based top filter, this should be OSD_usr instead
             "y2column": "OSD_user",
-        }
+            "yerrcolumn": "clat_stdev",
+        },
+        # Tail latency, from the histograms merged across the FIO processes
+        "iops_vs_p99_vs_cpu": {
+            "ylabel": "p99 Latency (ms)",
+            "ycolumn": "clat_p99_ms",
+            "y2label": "CPU",
+            "y2column": "OSD_user",
+        },
     }
     # Define a new one for the CPU core utilisation
     pg_y2column = {
@@ -555,6 +715,12 @@ set style function linespoints
         ylabel = plot_dict[pk]["ylabel"]
         ycol = str(header_keys[plot_dict[pk]["ycolumn"]])
         y2label = plot_dict[pk]["y2label"]
+        if "yerrcolumn" in plot_dict[pk]:
+            yerr = f":{header_keys[plot_dict[pk]['yerrcolumn']]}"
+            style = "yerr"
+        else:
+            yerr = ""
+            style = "lp"
         template += f"""
 set ylabel "{ylabel}"
 set xlabel "IOPS (thousand)"
@@ -569,9 +735,9 @@ set title "{_title}"
 """
         # To plot CPU util in the same response curve, we need the extra axis
         # This list_subtables indicates how many sub-tables the .datfile will have
-        # The stdev is the error column:5
+        # The stdev is the error column, when charting the mean
         if len(list_subtables) > 0:
-            head = f"plot '{out_data}' index 0 using ($2/1e3):{ycol}:5 t '{list_subtables[0]} q-depth' w yerr axes x1y1 lc 1"
+            head = f"plot '{out_data}' index 0 using ($2/1e3):{ycol}{yerr} t '{list_subtables[0]} q-depth' w {style} axes x1y1 lc 1"
             head += (
                 f",\\\n '' index 0 using ($2/1e3):{ycol} notitle w lp lc 1 axes x1y1"
             )
@@ -601,7 +767,8 @@ set title "{_title}"
 
 def initial_fio_table(dict_files, multi):
     """
-    Construct a table from the input mesurements FIO json
+    Construct a table from the input mesurements FIO json, dict_files being
+    the reduced row of each point (see load_fio_points)
     If multi=True, the avg list reduces the samples from dict_files into a single row
     """
     table = {}
@@ -618,9 +785,9 @@ def initial_fio_table(dict_files, multi):
                 table[k] = []
             table[k].append(item[k])
             if multi:
-                if k not in table:
+                if k not in avg:
                     avg[k] = 0.0
-                avg[k] += item[k]
+                avg[k] += float(item[k])
     for k in avg.keys():
         avg[k] /= len(table[k])
     return table, avg
@@ -802,6 +969,36 @@ def save_table_json(table, name):
         f.close()
 
 
+def sort_rows_by_iodepth(dict_files, table):
+    """
+    Reorder the rows of *table*, and the entries of *dict_files* they come
+    from, by iodepth within each numjobs, the numjobs in the order they
+    first appear; the points chosen by the adaptive iodepth search
+    (run_fio.py --adaptive-iodepth) are measured out of order.  Rows whose
+    name does not follow the naming convention are kept last.
+    Returns the reordered (dict_files, table).
+    """
+    names = list(dict_files.keys())
+    jobs_order = {}
+    keys = []
+    for i, name in enumerate(names):
+        m = re.search(r"(?P<job>\d+)job_(?P<io>\d+)io_", name)
+        if m:
+            job = jobs_order.setdefault(int(m.group("job")), len(jobs_order))
+            keys.append((0, job, int(m.group("io")), i))
+        else:
+            keys.append((1, 0, 0, i))
+    order = [k[-1] for k in sorted(keys)]
+    if order == list(range(len(names))):
+        return dict_files, table
+    dict_files = {names[i]: dict_files[names[i]] for i in order}
+    for k, column in table.items():
+        # Columns not one value per row (eg. MultiFIO CPU) are left as is
+        if len(column) == len(names):
+            table[k] = [column[i] for i in order]
+    return dict_files, table
+
+
 def gen_table(dict_files, config: str, title: str, avg_cpu: dict, multi=False):
     """
     Construct a table from the predefined keys, sorted according to the
@@ -842,6 +1039,7 @@ def gen_table(dict_files, config: str, title: str, avg_cpu: dict, multi=False):
     # for pname in ("OSD", "FIO"):
     # Move this loop inside aggregate_proc_cpu_avg() since the keys (proc group names) are in the avg_cpu .json file
     aggregate_proc_cpu_avg(avg, table, avg_cpu)
+    dict_files, table = sort_rows_by_iodepth(dict_files, table)
 
     save_table_json(table, config.replace("_list", ".json"))
     # Note: in general the CPU measurements are global across the test time
@@ -1009,15 +1207,15 @@ def load_avg_cpu_json(json_fname):
         raise argparse.ArgumentTypeError(str(e))
 
 
-def main(directory: str, config, json_query: str):
+def main(directory: str, config, json_query: str, workers: Optional[int] = None):
     """
     Entry point: an initial query path is an inheritance of the original script from which this tool
-    evolved
+    evolved; the JSON files are parsed on a pool of *workers* processes
     """
     if not bool(json_query):
         json_query = "jobs/jobname=*"
     json_tree_path = json_query.split("/")
-    data_set = traverse_files(directory, config, json_tree_path)
+    data_set = traverse_files(directory, config, json_tree_path, workers)
     logger.info("Note: clat_ns has been converted to milliseconds")
     logger.info("Note: bw has been converted to MiBs")
     return data_set
@@ -1080,6 +1278,14 @@ def parse_args():
         help="Indicate multiple FIO instance as opposed to response curves",
         default=False,
     )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        required=False,
+        help="Number of processes parsing the JSON files (default: the spare cores, 0: serial)",
+        default=None,
+    )
     parser.add_argument(
         "-v",
         "--verbose",
@@ -1113,19 +1319,23 @@ def parse_args():
 
 if __name__ == "__main__":
     args = parse_args()
-    data_set = main(args.directory, args.config, args.query)
     if args.cpu_core_avg:
+        # One row per point: the FIO processes of a multi-FIO point reduced together
+        json_files = read_fio_list(args.directory, args.config)
         avg_cpu = load_avg_cpu_json(args.average)
         avg_core_cpu = load_avg_cpu_json(args.cpu_core_avg)
-        gen_table(data_set, args.config, args.title, avg_cpu, args.multi)
-    elif args.csv:
-        # Generate a .csv file with the table data
-        out_csv = args.config.replace("_list", ".csv")
-        with open(out_csv, "w", encoding="utf-8") as f:
-            # Write the header: we need to fiter this to only the keys we want to include in the .csv
-            # probably worth creating a dataframe and using the pandas to_csv() method, but for now we can do it manually
-            f.write(",".join(data_set[0].keys()) + "\n")
-            # Write the data rows
-            for row in data_set:
-                f.write(",".join(str(row[k]) for k in row.keys()) + "\n")
-            f.close()
+        dict_files = load_fio_points(json_files, args.jobs)
+        gen_table(dict_files, args.config, args.title, avg_cpu, args.multi)
+    else:
+        data_set = main(args.directory, args.config, args.query, args.jobs)
+        if args.csv:
+            # Generate a .csv file with the table data
+            out_csv = args.config.replace("_list", ".csv")
+            with open(out_csv, "w", encoding="utf-8") as f:
+                # Write the header: we need to fiter this to only the keys we want to include in the .csv
+                # probably worth creating a dataframe and using the pandas to_csv() method, but for now we can do it manually
+                f.write(",".join(data_set[0].keys()) + "\n")
+                # Write the data rows
+                for row in data_set:
+                    f.write(",".join("" if row[k] is None else str(row[k]) for k in row.keys()) + "\n")
+                f.close()
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Live parser of the FIO JSON status stream.
+
+When launched with ``--output-format=json --status-interval=N`` and no
+``--output`` file, FIO writes a full JSON report to stdout every N seconds,
+followed by the final report when the job completes (or is interrupted with
+SIGINT).  :class:`FioStatusMonitor` reads that stream from a background
+thread, computes the mean completion latency of each interval from the
+cumulative ``clat_ns`` statistics, and calls ``on_abort`` once the latency
+has been above the threshold for a number of consecutive intervals.  When
+the stream ends, the last report is written to the output file, so the
+result is the same JSON file FIO would have produced with ``--output``.
+The IOPS of each interval are kept as well, e.g. for steady-state detection.
+
+This allows the response curve runs to stop a point as soon as it is clearly
+past the latency threshold, rather than running it for the full runtime.
+
+Usage: import fio_status
+
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE)
+    mon = FioStatusMonitor(proc.stdout, "fio_out.json", "write", 20.0,
+                           on_abort=lambda mon: proc.send_signal(signal.SIGINT))
+    mon.start()
+    proc.wait()
+    mon.join()
+"""
+
+import json
+import logging
+import re
+import threading
+from typing import IO, Any, Callable, Dict, List, Optional, Tuple
+
+__author__ = "Jose J Palacios-Perez"
+
+logger = logging.getLogger(__name__)
+
+# Bytes read from the stream at a time
+READ_SIZE = 1 << 16
+
+# Characters that change the brace depth or the string state of a report
+_STRUCT_RE = re.compile(r'[{}"]')
+_STRING_END_RE = re.compile(r'["\\]')
+
+
+def clat_totals(report: Dict[str, Any], mode: str) -> Tuple[float, float]:
+    """
+    Cumulative ``(completions, total latency in ns)`` of *mode* (``"read"``
+    or ``"write"``) over all the jobs of a FIO JSON report.
+    """
+    count = 0.0
+    total = 0.0
+    for job in report.get("jobs", []):
+        clat = job.get(mode, {}).get("clat_ns", {})
+        n = float(clat.get("N", 0) or 0)
+        count += n
+        total += n * float(clat.get("mean", 0.0) or 0.0)
+    return count, total
+
+
+class FioStatusMonitor:
+    """
+    Follow the JSON status reports FIO writes to *stream*.
+
+    Parameters
+    ----------
+    stream : file
+        Binary stream (FIO stdout) with the concatenated JSON reports.
+    outfile : str
+        Where the last report is written when the stream ends.
+    mode : str
+        ``"read"`` or ``"write"``, the latency being monitored.
+    max_latency : float
+        Threshold in ms for the mean completion latency of an interval.
+    abort_intervals : int
+        Consecutive intervals over *max_latency* before ``on_abort`` is called
+        (0: the latency is not monitored).
+    on_abort : callable, optional
+        Called once, with the monitor, when the threshold is exceeded.
+    """
+
+    def __init__(
+        self,
+        stream: IO[bytes],
+        outfile: str,
+        mode: str,
+        max_latency: float,
+        abort_intervals: int = 3,
+        on_abort: Optional[Callable[["FioStatusMonitor"], None]] = None,
+    ) -> None:
+        self.stream = stream
+        self.outfile = outfile
+        self.mode = mode
+        self.max_latency = max_latency
+        self.abort_intervals = abort_intervals
+        self.on_abort = on_abort
+        self.latest: Optional[Dict[str, Any]] = None
+        self.num_reports = 0
+        # Mean completion latency (ms) of each interval with completions
+        self.latencies: List[float] = []
+        # (Unix time, IOPS) of each interval
+        self.iops: List[Tuple[float, float]] = []
+        self.aborted = False
+        self._over = 0
+        self._prev = (0.0, 0.0)
+        self._prev_ms: Optional[float] = None
+        self._buf = ""
+        # Scan state of the report at the head of _buf: where to resume,
+        # brace depth and whether inside a string
+        self._scan = 0
+        self._depth = 0
+        self._in_str = False
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self.run, daemon=True)
+        self._thread.start()
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def run(self) -> None:
+        """Read *stream* to the end, then write the last report."""
+        try:
+            while True:
+                data = self.stream.read1(READ_SIZE)
+                if not data:
+                    break
+                self.feed(data.decode(errors="replace"))
+        except (OSError, ValueError) as e:
+            logger.warning(f"== FIO status stream: {e} ==")
+        self.save()
+
+    def feed(self, text: str) -> None:
+        """Consume *text* from the stream, handling every complete report."""
+        self._buf += text
+        while True:
+            if self._scan == 0:
+                buf = self._buf.lstrip()
+                if not buf:
+                    self._buf = ""
+                    return
+                if not buf.startswith("{"):
+                    # Stray lines such as "fio: ..." warnings
+                    eol = buf.find("\n")
+                    if eol < 0:
+                        self._buf = buf
+                        return
+                    logger.info(f"== FIO: {buf[:eol].strip()} ==")
+                    self._buf = buf[eol + 1 :]
+                    continue
+                self._buf = buf
+            end = self._report_end()
+            if end < 0:
+                # Incomplete report: wait for more data
+                return
+            raw, self._buf = self._buf[:end], self._buf[end:]
+            try:
+                report = json.loads(raw)
+            except json.JSONDecodeError as e:
+                logger.warning(f"== FIO status: invalid report: {e} ==")
+                continue
+            self.handle(report)
+
+    def _report_end(self) -> int:
+        """
+        End of the report at the head of ``_buf``, or -1 if it is incomplete.
+
+        Only the data appended since the previous call is scanned, tracking
+        the brace depth outside strings, so the report is decoded once,
+        when complete, rather than on every chunk.
+        """
+        buf = self._buf
+        pos = self._scan
+        while True:
+            if self._in_str:
+                m = _STRING_END_RE.search(buf, pos)
+                if m is None:
+                    self._scan = len(buf)
+                    return -1
+                if m.group() == "\\":
+                    if m.end() == len(buf):
+                        # Escape cut at the end: resume from the backslash
+                        self._scan = m.start()
+                        return -1
+                    pos = m.end() + 1
+                    continue
+                self._in_str = False
+                pos = m.end()
+                continue
+            m = _STRUCT_RE.search(buf, pos)
+            if m is None:
+                self._scan = len(buf)
+                return -1
+            pos = m.end()
+            if m.group() == '"':
+                self._in_str = True
+            elif m.group() == "{":
+                self._depth += 1
+            else:
+                self._depth -= 1
+                if self._depth == 0:
+                    self._scan = 0
+                    return pos
+
+    def handle(self, report: Dict[str, Any]) -> None:
+        """Update the interval latency with *report* and check the threshold."""
+        self.latest = report
+        self.num_reports += 1
+        count, total = clat_totals(report, self.mode)
+        prev_count, prev_total = self._prev
+        self._prev = (count, total)
+        ts_ms = report.get("timestamp_ms")
+        if ts_ms is not None:
+            if self._prev_ms is not None and ts_ms > self._prev_ms:
+                iops = (count - prev_count) * 1000.0 / (ts_ms - self._prev_ms)
+                self.iops.append((ts_ms / 1000.0, iops))
+            self._prev_ms = ts_ms
+        if self.abort_intervals <= 0 or count <= prev_count:
+            return
+        latency = (total - prev_total) / (count - prev_count) / 1e6
+        self.latencies.append(latency)
+        self._over = self._over + 1 if latency > self.max_latency else 0
+        if self._over >= self.abort_intervals and not self.aborted:
+            self.aborted = True
+            logger.warning(
+                f"== Latency: {latency:.3f}(ms) over {self.max_latency}(ms) for"
+                f" {self._over} intervals, aborting =="
+            )
+            if self.on_abort is not None:
+                self.on_abort(self)
+
+    def save(self) -> None:
+        """Write the last report to *outfile* (nothing if there was none)."""
+        if self.latest is None:
+            logger.warning(f"== No FIO report for {self.outfile} ==")
+            return
+        with open(self.outfile, "w") as f:
+            json.dump(self.latest, f, indent=2)
+            f.write("\n")
@@ -9,10 +9,18 @@
 #   - zero or more *.csv files (which will be regenerated)
 #
 # Usage:
-#   python3 fio_zip_regen_csv.py <archive.zip> [--dry-run] [-v]
+#   python3 fio_zip_regen_csv.py <archive.zip|dir>... [--dry-run] [--full] [--compact] [-j N] [-v]
 #
 # The regenerated .csv files are written back into the zip, replacing any
-# existing ones.  The rest of the archive is left untouched.
+# existing ones.  The rest of the archive is left untouched, and not
+# recompressed: the updated .csv entries are appended.
+#
+# Regeneration is incremental: a sidecar manifest (<archive>.zip.regen.json)
+# keeps the content hash (CRC-32, size) and the CSV rows of every JSON
+# parsed, with the parser version, so only the JSONs that changed, or all
+# of them after a parser change (PARSER_VERSION), are parsed again, and
+# only the .csv entries whose content changed are written.  Many archives
+# (eg. a whole results tree) are processed concurrently.
 #
 # Logic is adapted from process_list_fio_json_files() / process_fio_json_file()
 # in fio_parse_jsons.py, but reads all JSON content directly from the zip.
@@ -26,6 +34,9 @@
 # # Verbose
 # python3 bin/fio_zip_regen_csv.py sea_1osd_1reactor_custom_default_rc.zip -v
 #
+# # Every archive under a results tree, 8 at a time
+# python3 bin/fio_zip_regen_csv.py ~/Work/results -j 8
+#
 
 import argparse
 import io
@@ -37,8 +48,13 @@ import shutil
 import sys
 import tempfile
 import zipfile
+import zlib
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timezone
-from typing import Dict, List
+from typing import Dict, List, Optional
+
+from latency_histogram import CLAT_PERCENTILES, LatencyHistogram
+from postproc_dag import spare_cores
 
 __author__ = "Jose J Palacios-Perez"
 
@@ -55,6 +71,7 @@ CSV_HEADER = [
     "filename", "timestamp", "job_start", "bs", "size", "numjobs", "iodepth",
     "jobname", "rw", "io_size", "nrfiles", "time_based", "runtime",
     "bw", "iops", "total_ios", "clat_ms", "clat_stdev_ms",
+    *CLAT_PERCENTILES,
 ]
 
 
@@ -137,12 +154,14 @@ def _parse_fio_json(json_bytes: bytes, basename: str) -> List[dict]:
                 clat_ns              = job_io.get("clat_ns", {})
                 row["clat_ms"]       = clat_ns.get("mean",   0) / 1e6
                 row["clat_stdev_ms"] = clat_ns.get("stddev", 0) / 1e6
+                hist = LatencyHistogram.from_fio(clat_ns, job_io.get("total_ios"))
+                row.update(hist.percentiles_ms())
                 matched = True
                 break
 
         if not matched:
             logger.warning(f"{basename}: rw='{fio_job_type}' did not match read/write patterns")
-            for col in ("bw", "iops", "total_ios", "clat_ms", "clat_stdev_ms"):
+            for col in ("bw", "iops", "total_ios", "clat_ms", "clat_stdev_ms", *CLAT_PERCENTILES):
                 row.setdefault(col, "")
 
         data_set.append(row)
@@ -159,32 +178,94 @@ def _rows_to_csv(rows: List[dict]) -> str:
     return "\n".join(lines) + "\n"
 
 
+# ── manifest ──────────────────────────────────────────────────────────────────
+
+# Bump whenever _parse_fio_json() (or CSV_HEADER) changes its output, so the
+# rows cached in the manifests are parsed again.
+PARSER_VERSION = 2
+
+# Sidecar of an archive: <archive>.zip.regen.json
+MANIFEST_SUFFIX = ".regen.json"
+
+
+def manifest_path(zip_path: str) -> str:
+    return zip_path + MANIFEST_SUFFIX
+
+
+def _member_key(info: zipfile.ZipInfo) -> List[int]:
+    """
+    Content hash of a member: its CRC-32 and size, as recorded in the
+    central directory, so unchanged members are not even decompressed.
+    """
+    return [info.CRC, info.file_size]
+
+
+def _load_manifest(zip_path: str) -> Dict[str, dict]:
+    """
+    The cached CSV lines of each JSON member of the archive (name ->
+    {"key", "lines"}), empty when missing or from another parser version.
+    """
+    path = manifest_path(zip_path)
+    try:
+        with open(path, "r") as f:
+            manifest = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+    if manifest.get("parser_version") != PARSER_VERSION:
+        logger.info(f"{path}: parser version changed, parsing all the JSONs again")
+        return {}
+    return manifest.get("members", {})
+
+
+def _save_manifest(zip_path: str, members: Dict[str, dict]) -> None:
+    path = manifest_path(zip_path)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"parser_version": PARSER_VERSION, "members": members}, f)
+    os.replace(tmp_path, path)
+
+
 # ── main logic ────────────────────────────────────────────────────────────────
 
-def regen_csv_in_zip(zip_path: str, dry_run: bool = False) -> None:
+def regen_csv_in_zip(
+    zip_path: str, dry_run: bool = False, full: bool = False, compact: bool = False
+) -> List[str]:
     """
     For every *_list file found inside FIO/ in the zip, parse the listed JSON
     files (also from inside the zip) and regenerate the corresponding .csv.
-    The updated .csv entries are written back into the zip in-place.
+
+    Only the JSONs whose content (or the parser) changed since the last run
+    are parsed: the rows of the others come from the sidecar manifest
+    (ignored when *full*).  Only the .csv entries whose content changed are
+    written back, appended to the zip in-place without recompressing the
+    other entries (*compact* rewrites the whole zip instead, dropping the
+    space of the replaced entries).
+
+    Returns the names of the .csv entries updated.
     """
     zip_path = os.path.expanduser(zip_path)
 
     if not os.path.isfile(zip_path):
         raise FileNotFoundError(f"Archive not found: {zip_path}")
 
+    cached = {} if full else _load_manifest(zip_path)
+    members: Dict[str, dict] = {}
+    parsed = 0
+
     with zipfile.ZipFile(zip_path, "r") as zf:
-        all_names = set(zf.namelist())
+        infos = {info.filename: info for info in zf.infolist()}
 
         # Find every list file inside FIO/
         list_entries = [
-            n for n in all_names
+            n for n in infos
             if re.match(r"FIO/[^/]+_list$", n)
         ]
         if not list_entries:
-            logger.warning("No *_list files found under FIO/ in the archive.")
-            return
+            logger.warning(f"{zip_path}: no *_list files found under FIO/ in the archive.")
+            return []
 
         csv_updates: Dict[str, bytes] = {}   # zip entry name → new CSV bytes
+        updated: List[str] = []
 
         for list_entry in sorted(list_entries):
             list_text = zf.read(list_entry).decode()
@@ -196,7 +277,7 @@ def regen_csv_in_zip(zip_path: str, dry_run: bool = False) -> None:
             csv_entry = list_entry.replace("_list", ".csv")
             logger.info(f"Processing list '{list_entry}' → '{csv_entry}'")
 
-            all_rows: List[dict] = []
+            csv_lines: List[str] = []
             seen: set = set()
 
             for basename in json_basenames:
@@ -205,21 +286,34 @@ def regen_csv_in_zip(zip_path: str, dry_run: bool = False) -> None:
                 seen.add(basename)
 
                 json_entry = f"FIO/{basename}"
-                if json_entry not in all_names:
+                if json_entry not in infos:
                     logger.warning(f"  JSON not found in archive: {json_entry}, skipping")
                     continue
 
-                logger.info(f"  Parsing {json_entry}")
-                json_bytes = zf.read(json_entry)
-                rows = _parse_fio_json(json_bytes, basename)
-                all_rows.extend(rows)
+                key = _member_key(infos[json_entry])
+                entry = members.get(json_entry) or cached.get(json_entry)
+                if entry is None or entry["key"] != key:
+                    logger.info(f"  Parsing {json_entry}")
+                    rows = _parse_fio_json(zf.read(json_entry), basename)
+                    entry = {"key": key, "lines": _rows_to_csv(rows).splitlines()[1:]}
+                    parsed += 1
+                else:
+                    logger.debug(f"  Unchanged {json_entry}")
+                members[json_entry] = entry
+                csv_lines.extend(entry["lines"])
 
-            if not all_rows:
+            if not csv_lines:
                 logger.warning(f"  No rows produced for {csv_entry}, skipping")
                 continue
 
-            csv_text = _rows_to_csv(all_rows)
-            logger.info(f"  → {len(all_rows)} rows written to {csv_entry}")
+            csv_text = "\n".join([",".join(CSV_HEADER), *csv_lines]) + "\n"
+            csv_bytes = csv_text.encode()
+            old = infos.get(csv_entry)
+            if old is not None and _member_key(old) == [zlib.crc32(csv_bytes), len(csv_bytes)]:
+                logger.info(f"  {csv_entry} unchanged")
+                continue
+            logger.info(f"  → {len(csv_lines)} rows written to {csv_entry}")
+            updated.append(csv_entry)
 
             if dry_run:
                 print(f"[dry-run] {csv_entry} ({len(csv_text)} bytes):")
@@ -227,15 +321,47 @@ def regen_csv_in_zip(zip_path: str, dry_run: bool = False) -> None:
                 print(preview + ("..." if len(csv_text) > 800 else ""))
                 print()
             else:
-                csv_updates[csv_entry] = csv_text.encode()
+                csv_updates[csv_entry] = csv_bytes
+
+    logger.info(f"{zip_path}: parsed {parsed} of {len(members)} JSONs")
+    if dry_run:
+        return updated
+    if not csv_updates:
+        logger.info("Nothing to update.")
+    elif compact:
+        _rewrite_zip(zip_path, csv_updates)
+    else:
+        _replace_members(zip_path, csv_updates)
+    if updated:
+        print(f"Updated archive: {zip_path}")
+    _save_manifest(zip_path, members)
+    return updated
 
-    if dry_run or not csv_updates:
-        if not dry_run:
-            logger.info("Nothing to update.")
-        return
 
-    # Re-write the zip, replacing/adding the CSV entries while preserving all
-    # other entries exactly as they are.
+def _replace_members(zip_path: str, updates: Dict[str, bytes]) -> None:
+    """
+    Append the *updates* entries to the zip, dropping the entries of the
+    same names from the central directory: the other entries are neither
+    read nor recompressed, and the replaced ones are left as unreferenced
+    space (reclaimed by --compact).
+    """
+    with zipfile.ZipFile(zip_path, "a", compression=zipfile.ZIP_DEFLATED) as zf:
+        for name, data in updates.items():
+            old = zf.NameToInfo.pop(name, None)
+            if old is not None:
+                logger.info(f"Replacing  {name}")
+                zf.filelist.remove(old)
+            else:
+                logger.info(f"Adding new {name}")
+            zf.writestr(name, data)
+
+
+def _rewrite_zip(zip_path: str, updates: Dict[str, bytes]) -> None:
+    """
+    Re-write the zip, replacing/adding the *updates* entries while preserving
+    all other entries exactly as they are.
+    """
+    csv_updates = dict(updates)
     tmp_fd, tmp_path = tempfile.mkstemp(
         dir=os.path.dirname(os.path.abspath(zip_path)), suffix=".zip"
     )
@@ -255,25 +381,74 @@ def regen_csv_in_zip(zip_path: str, dry_run: bool = False) -> None:
                 zf_out.writestr(csv_entry, csv_bytes)
 
         shutil.move(tmp_path, zip_path)
-        print(f"Updated archive: {zip_path}")
     except Exception:
         os.unlink(tmp_path)
         raise
 
 
+def find_archives(paths: List[str]) -> List[str]:
+    """The .zip archives given, those under the directories given included."""
+    archives = []
+    for path in paths:
+        path = os.path.expanduser(path)
+        if os.path.isdir(path):
+            for root, _dirs, files in os.walk(path):
+                archives.extend(os.path.join(root, f) for f in sorted(files) if f.endswith(".zip"))
+        else:
+            archives.append(path)
+    return archives
+
+
+def _regen_one(zip_path: str, full: bool, compact: bool) -> List[str]:
+    try:
+        return regen_csv_in_zip(zip_path, full=full, compact=compact)
+    except (OSError, zipfile.BadZipFile) as exc:
+        logger.error(f"{zip_path}: {exc}")
+        return []
+
+
+def regen_csv_in_archives(
+    zip_paths: List[str],
+    dry_run: bool = False,
+    full: bool = False,
+    compact: bool = False,
+    workers: Optional[int] = None,
+) -> Dict[str, List[str]]:
+    """
+    Regenerate the .csv entries of many archives, each archive on a worker
+    of a process pool (default: the spare cores; serial for a single archive,
+    *workers* <= 1, or a dry run, to keep its output in order).
+
+    Returns the .csv entries updated per archive.
+    """
+    if workers is None:
+        workers = spare_cores()
+    if dry_run or workers <= 1 or len(zip_paths) <= 1:
+        return {
+            z: regen_csv_in_zip(z, dry_run=dry_run, full=full, compact=compact)
+            for z in zip_paths
+        }
+    with ProcessPoolExecutor(max_workers=min(workers, len(zip_paths))) as pool:
+        results = pool.map(
+            _regen_one, zip_paths, [full] * len(zip_paths), [compact] * len(zip_paths)
+        )
+        return dict(zip(zip_paths, results))
+
+
 # ── CLI ───────────────────────────────────────────────────────────────────────
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(
         description=(
-            "Regenerate FIO/*.csv files inside a benchmark archive zip "
-            "from the FIO JSON files also stored in the archive."
+            "Regenerate FIO/*.csv files inside benchmark archive zips "
+            "from the FIO JSON files also stored in the archives."
         )
     )
     parser.add_argument(
         "archive",
         metavar="ARCHIVE.zip",
-        help="Path to the benchmark archive zip file",
+        nargs="+",
+        help="Benchmark archive zip files, or directories to search for them",
     )
     parser.add_argument(
         "--dry-run",
@@ -281,6 +456,24 @@ def parse_args() -> argparse.Namespace:
         default=False,
         help="Print the CSV that would be generated without modifying the zip",
     )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        default=False,
+        help="Parse all the JSONs again, ignoring the sidecar manifests",
+    )
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        default=False,
+        help="Rewrite the whole zip rather than appending the updated CSVs",
+    )
+    parser.add_argument(
+        "-j", "--jobs",
+        type=int,
+        default=None,
+        help="Number of archives processed concurrently (default: the spare cores)",
+    )
     parser.add_argument(
         "-v", "--verbose",
         action="store_true",
@@ -296,4 +489,10 @@ if __name__ == "__main__":
         level=logging.DEBUG if args.verbose else logging.INFO,
         format="%(levelname)s: %(message)s",
     )
-    regen_csv_in_zip(args.archive, dry_run=args.dry_run)
+    regen_csv_in_archives(
+        find_archives(args.archive),
+        dry_run=args.dry_run,
+        full=args.full,
+        compact=args.compact,
+        workers=args.jobs,
+    )
@@ -11,6 +11,9 @@ import functools
 from operator import add
 from abc import ABC, abstractmethod
 
+from json_query import JsonQuery, compile_step
+from latency_histogram import CLAT_PERCENTILES, LatencyHistogram, merge_histograms
+
 __author__ = "Jose J Palacios-Perez"
 logger = logging.getLogger(__name__)
 
@@ -71,40 +74,20 @@ class JsonXtractor(ABC):
         - sequence - key field syntax is name=value, where
                   name is a dictionary key of sequence elements, and
                   value is the desired value to select a sequence element
+        The step is compiled once (see json_query.compile_step)
         """
-        next_node_list = []
-        # Nothing to do if the input next_branch is empty
-        if not next_branch:
-            return next_node_list
-        for n in jnode_list_in:
-            dotlist = next_branch.split("=")
-            if len(dotlist) > 2:
-                print(f"unrecognized syntax at {next_branch}")
-                # logger.debug(f"unrecognized syntax at {next_branch}")
-                return []
-            if len(dotlist) == 1:
-                assert isinstance(n, dict)
-                next_node_list.append(n[next_branch])
-            else:  # must be a sequence, take any element with key matching value
-                select_key = dotlist[0]
-                select_value = dotlist[1]
-                assert isinstance(n, list)
-                for e in n:
-                    # n is a list
-                    # print 'select with key %s value %s sequence
-                    # element %s'%(select_key, select_value, e)
-                    if select_value == "*":
-                        next_node_list.append(e)
-                    else:
-                        v = e[select_key]
-                        if v == select_value:
-                            next_node_list.append(e)
-                            # print('selecting: %s'%str(e))
-                if len(next_node_list) == 0:
-                    print(f"{select_key}={select_value} not found")
-                    # logger.debug(f"{select_key}={select_value} not found")
-                    return []
-        return next_node_list
+        return compile_step(next_branch)(jnode_list_in)
+
+    def compiled_query(self, jobname):
+        """
+        The predef_dict query of jobname, compiled once per subclass
+        """
+        cls = type(self)
+        if "_compiled_queries" not in cls.__dict__:
+            cls._compiled_queries = {}
+        if jobname not in cls._compiled_queries:
+            cls._compiled_queries[jobname] = JsonQuery(cls.predef_dict[jobname])
+        return cls._compiled_queries[jobname]
 
     def load_json_file(self, json_file):
         """
@@ -153,6 +136,8 @@ class JsonFioXtractor(JsonXtractor):
             "total_ios": "write/total_ios",
             "clat_ms": "write/clat_ns",
             "clat_stdev": "write/clat_ns",
+            "clat_p99_ms": "write/clat_ns",
+            "clat_p999_ms": "write/clat_ns",
             "usr_cpu": "usr_cpu",
             "sys_cpu": "sys_cpu",
         },
@@ -161,6 +146,8 @@ class JsonFioXtractor(JsonXtractor):
             "total_ios": "read/total_ios",
             "clat_ms": "read/clat_ns",
             "clat_stdev": "read/clat_ns",
+            "clat_p99_ms": "read/clat_ns",
+            "clat_p999_ms": "read/clat_ns",
             "usr_cpu": "usr_cpu",
             "sys_cpu": "sys_cpu",
         },
@@ -169,6 +156,8 @@ class JsonFioXtractor(JsonXtractor):
             "total_ios": "write/total_ios",
             "clat_ms": "write/clat_ns",
             "clat_stdev": "write/clat_ns",
+            "clat_p99_ms": "write/clat_ns",
+            "clat_p999_ms": "write/clat_ns",
             "usr_cpu": "usr_cpu",
             "sys_cpu": "sys_cpu",
         },
@@ -177,6 +166,8 @@ class JsonFioXtractor(JsonXtractor):
             "total_ios": "read/total_ios",
             "clat_ms": "read/clat_ns",
             "clat_stdev": "read/clat_ns",
+            "clat_p99_ms": "read/clat_ns",
+            "clat_p999_ms": "read/clat_ns",
             "usr_cpu": "usr_cpu",
             "sys_cpu": "sys_cpu",
         },
@@ -204,6 +195,9 @@ class JsonFioXtractor(JsonXtractor):
         json files for the same timestamp and then divide by total IOPs to get
         an average latency
         """
+        if k in CLAT_PERCENTILES:
+            # Kept as a histogram, to be merged across the jobs/processes
+            return LatencyHistogram.from_fio(next_node_list[0])
         #    match k: # Python version on the SV1 node does not support 'match'
         #    case 'iops' | 'usr_cpu' | 'sys_cpu':
         # For consistency, these are normally the "columns" for the TestRunResult table
@@ -238,6 +232,9 @@ class JsonFioXtractor(JsonXtractor):
         """
         if re.search("iops|usr_cpu|sys_cpu|bw|total_ios", metric):
             return functools.reduce(add, result_dict[metric])
+        if metric in CLAT_PERCENTILES:
+            merged = merge_histograms(result_dict[metric])
+            return merged.percentile(CLAT_PERCENTILES[metric]) / 1e6
         if metric == "clat_ms":
             z = zip(result_dict["clat_ms"], result_dict["total_ios"])
             mx, _ = functools.reduce(lambda x, y: combined_mean(x, y), z)
@@ -256,6 +253,7 @@ class JsonFioXtractor(JsonXtractor):
         - avg (completion) latency is the combined avg
         - clat std dev is the combined std dev -- for the last two, we need
         the number of samples from FIO, which is "total_ios"
+        - clat percentiles are read from the merged latency histograms
         """
         _res = {}
         for metric in self.predef_dict[jobname].keys():
@@ -279,17 +277,11 @@ class JsonFioXtractor(JsonXtractor):
         jobs_list = node["jobs"]
         print(f"Num jobs: {len(jobs_list)}")
         job_result = {}
+        query = self.compiled_query(result_dict["jobname"])
         for _i, job in enumerate(jobs_list):
-            jobname = result_dict["jobname"]
-            query_dict = self.predef_dict[jobname]
             # These keys are metrics (columns of the TestRunTable) -- they should
-            # have a fixed key order
-            for k in query_dict.keys():
-                json_tree_path = query_dict[k].split("/")
-                next_node_list = [job]
-
-                for next_branch in json_tree_path:
-                    next_node_list = self.filter_json_node(next_branch, next_node_list)
+            # have a fixed key order; the job is traversed once for all of them
+            for k, next_node_list in query(job).items():
                 item = self.process_leaf_item(k, next_node_list)
                 if k not in job_result:
                     job_result[k] = []
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Adaptive iodepth search for response latency curves.
+
+Walking the whole ``range_iodepth`` grid of a test plan costs ``runtime``
+plus ramp-up and OSD dumps per point, even where the curve is flat.
+:class:`IodepthSearch` instead measures a coarse grid in ascending order,
+stops as soon as a point goes over the latency target, and then bisects
+the intervals around the knee of the IOPS vs latency curve until they are
+no wider than ``min_step``.
+
+The knee is taken as the point of maximum *power*, IOPS / latency: past
+it, latency grows faster than throughput.  Each refinement halves the
+intervals on either side of the knee, as well as the interval between the
+last point under the latency target and the first one over it.
+
+Every point measured is recorded with the phase and reason it was chosen,
+and :meth:`IodepthSearch.save` writes them as JSON next to the results.
+
+Usage: import iodepth_search
+
+    search = IodepthSearch([1, 4, 16, 64], max_latency=20.0)
+    io = search.next_point()
+    while io is not None:
+        iops, latency = run(io)
+        search.record(io, iops, latency)
+        io = search.next_point()
+"""
+
+import json
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from fio_status import clat_totals
+
+__author__ = "Jose J Palacios-Perez"
+
+logger = logging.getLogger(__name__)
+
+PHASE_COARSE = "coarse"
+PHASE_REFINE = "refine"
+
+
+def point_stats(reports: List[Dict[str, Any]], mode: str) -> Tuple[float, float]:
+    """
+    Aggregate ``(IOPS, mean completion latency in ms)`` of *mode* over the
+    FIO JSON *reports* of the processes run concurrently for a point.
+    """
+    iops = 0.0
+    count = 0.0
+    total = 0.0
+    for report in reports:
+        for job in report.get("jobs", []):
+            iops += float(job.get(mode, {}).get("iops", 0.0) or 0.0)
+        n, t = clat_totals(report, mode)
+        count += n
+        total += t
+    latency = total / count / 1e6 if count else float("nan")
+    return iops, latency
+
+
+class IodepthSearch:
+    """
+    Choose the iodepths to measure for one response curve.
+
+    Parameters
+    ----------
+    coarse : list of int
+        Initial grid, measured in ascending order.
+    max_latency : float
+        Latency target in ms; no deeper point is measured once it is exceeded.
+    min_step : int
+        Intervals no wider than this are not bisected any further.
+    max_points : int
+        Upper bound on the points measured (0 for no limit).
+    """
+
+    def __init__(
+        self,
+        coarse: List[int],
+        max_latency: float,
+        min_step: int = 1,
+        max_points: int = 0,
+    ) -> None:
+        self.coarse = sorted(set(int(io) for io in coarse))
+        self.max_latency = max_latency
+        self.min_step = max(1, min_step)
+        self.max_points = max_points
+        self.points: List[Dict[str, Any]] = []
+        self._pending: Optional[Tuple[int, str, str]] = None
+
+    # ------------------------------------------------------------------
+
+    def _measured(self) -> List[Dict[str, Any]]:
+        return sorted(self.points, key=lambda p: p["iodepth"])
+
+    def over_target(self, point: Dict[str, Any]) -> bool:
+        latency = point["latency_ms"]
+        return point["aborted"] or not latency <= self.max_latency
+
+    def knee(self) -> Optional[Dict[str, Any]]:
+        """Point under the latency target with the maximum IOPS / latency."""
+        best = None
+        best_power = 0.0
+        for point in self.points:
+            if self.over_target(point) or not point["latency_ms"] > 0:
+                continue
+            power = point["iops"] / point["latency_ms"]
+            if best is None or power > best_power:
+                best, best_power = point, power
+        return best
+
+    def _bisect(self, lo: int, hi: int) -> Optional[int]:
+        if hi - lo <= self.min_step:
+            return None
+        mid = (lo + hi) // 2
+        return mid if mid not in (lo, hi) else None
+
+    def _choose(self) -> Optional[Tuple[int, str, str]]:
+        measured = self._measured()
+        done = {p["iodepth"] for p in measured}
+        over = [p for p in measured if self.over_target(p)]
+        limit = over[0]["iodepth"] if over else None
+
+        for io in self.coarse:
+            if limit is not None and io > limit:
+                break
+            if io not in done:
+                return io, PHASE_COARSE, "coarse grid"
+
+        depths = [p["iodepth"] for p in measured]
+        if limit is not None:
+            depths = [d for d in depths if d <= limit]
+        knee = self.knee()
+        candidates = []
+        if knee is not None:
+            i = depths.index(knee["iodepth"])
+            if i > 0:
+                candidates.append(
+                    (depths[i - 1], depths[i], f"below knee at {depths[i]}")
+                )
+            if i + 1 < len(depths):
+                candidates.append(
+                    (depths[i], depths[i + 1], f"above knee at {depths[i]}")
+                )
+        if limit is not None and len(depths) > 1:
+            candidates.append(
+                (depths[-2], depths[-1], f"latency target crossed at {limit}")
+            )
+        for lo, hi, reason in candidates:
+            mid = self._bisect(lo, hi)
+            if mid is not None and mid not in done:
+                return mid, PHASE_REFINE, f"bisect {lo}-{hi}: {reason}"
+        return None
+
+    # ------------------------------------------------------------------
+
+    def next_point(self) -> Optional[int]:
+        """Next iodepth to measure, ``None`` when the search is over."""
+        if self.max_points and len(self.points) >= self.max_points:
+            self._pending = None
+        else:
+            self._pending = self._choose()
+        return None if self._pending is None else self._pending[0]
+
+    def record(
+        self,
+        iodepth: int,
+        iops: float,
+        latency_ms: float,
+        aborted: bool = False,
+    ) -> Dict[str, Any]:
+        """Record the measurement of *iodepth* (as returned by :meth:`next_point`)."""
+        phase, reason = PHASE_COARSE, "requested"
+        if self._pending is not None and self._pending[0] == iodepth:
+            _, phase, reason = self._pending
+        self._pending = None
+        point = {
+            "iodepth": int(iodepth),
+            "iops": iops,
+            "latency_ms": latency_ms,
+            "aborted": aborted,
+            "phase": phase,
+            "reason": reason,
+        }
+        self.points.append(point)
+        logger.info(
+            f"== iodepth {iodepth} ({phase}: {reason}): {iops:.1f} IOPS,"
+            f" {latency_ms:.3f} ms{' (aborted)' if aborted else ''} =="
+        )
+        return point
+
+    def to_dict(self) -> Dict[str, Any]:
+        knee = self.knee()
+        return {
+            "coarse": self.coarse,
+            "max_latency": self.max_latency,
+            "min_step": self.min_step,
+            "knee": None if knee is None else knee["iodepth"],
+            "points": self.points,
+        }
+
+    def save(self, path: str, **extra: Any) -> None:
+        """Write :meth:`to_dict` (plus *extra* fields) as JSON to *path*."""
+        with open(path, "w") as f:
+            json.dump({**extra, **self.to_dict()}, f, indent=2)
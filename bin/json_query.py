@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Compiled JSON-path queries, for the extraction of metrics from FIO JSON
+output.
+
+The queries are the paths of ``predef_dict`` (``fio_parse_jsons.py``,
+``gen_json_xtractor.py``): ``/``-separated steps, each either
+
+  - ``key``: selects the value of *key* in a dictionary,
+  - ``name=value``: selects the elements of a sequence whose field *name*
+    is *value*, or all of them when *value* is ``*``.
+
+Rather than splitting the path strings and filtering the node lists again
+for every metric of every job, the steps are compiled once into functions,
+and the paths of a query dictionary are merged into a tree on their common
+prefixes (``read/clat_ns`` is shared by the latency metrics), so a job is
+traversed a single time for all of its metrics.
+
+Usage: import json_query
+
+    query = JsonQuery({"iops": "read/iops", "clat_ms": "read/clat_ns"})
+    for metric, nodes in query(job).items():
+        ...
+"""
+
+import logging
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Tuple
+
+__author__ = "Jose J Palacios-Perez"
+
+logger = logging.getLogger(__name__)
+
+Step = Callable[[List[Any]], List[Any]]
+
+
+@lru_cache(maxsize=None)
+def compile_step(step: str) -> Step:
+    """
+    The function selecting the nodes of *step* from a list of nodes (see
+    the module docstring for the syntax).
+    """
+    parts = step.split("=")
+    if not step or len(parts) > 2:
+        if step:
+            logger.info(f"unrecognized syntax at {step}")
+        return lambda nodes: []
+    if len(parts) == 1:
+
+        def select_key(nodes: List[Any]) -> List[Any]:
+            return [n[step] for n in nodes if isinstance(n, dict) and step in n]
+
+        return select_key
+    name, value = parts
+
+    if value == "*":
+
+        def select_all(nodes: List[Any]) -> List[Any]:
+            return [e for n in nodes if isinstance(n, list) for e in n]
+
+        return select_all
+
+    def select_matching(nodes: List[Any]) -> List[Any]:
+        selected = [
+            e
+            for n in nodes
+            if isinstance(n, list)
+            for e in n
+            if isinstance(e, dict) and e.get(name) == value
+        ]
+        if not selected:
+            logger.info(f"{name}={value} not found")
+        return selected
+
+    return select_matching
+
+
+def compile_path(path: str) -> Step:
+    """The function selecting the nodes of the whole *path*."""
+    steps = [compile_step(s) for s in path.split("/")]
+
+    def select(nodes: List[Any]) -> List[Any]:
+        for step in steps:
+            if not nodes:
+                break
+            nodes = step(nodes)
+        return nodes
+
+    return select
+
+
+class _Trie:
+    def __init__(self) -> None:
+        self.children: Dict[str, "_Trie"] = {}
+        self.metrics: List[str] = []
+
+
+class JsonQuery:
+    """
+    A dictionary of queries (metric name -> path), compiled into a tree of
+    steps applied in a single traversal.
+
+    Parameters
+    ----------
+    paths : dict
+        Metric name -> path; the results keep the order of the metrics.
+    """
+
+    def __init__(self, paths: Dict[str, str]) -> None:
+        self.metrics = list(paths)
+        root = _Trie()
+        for metric, path in paths.items():
+            node = root
+            for step in path.split("/"):
+                node = node.children.setdefault(step, _Trie())
+            node.metrics.append(metric)
+        self._root = self._compile(root)
+
+    def _compile(self, trie: _Trie) -> List[Tuple[Step, List[str], Any]]:
+        return [
+            (compile_step(step), child.metrics, self._compile(child))
+            for step, child in trie.children.items()
+        ]
+
+    def __call__(self, node: Any) -> Dict[str, List[Any]]:
+        """The list of nodes selected by each path from *node*."""
+        found: Dict[str, List[Any]] = {}
+        stack = [(self._root, [node])]
+        while stack:
+            branches, nodes = stack.pop()
+            for step, metrics, children in branches:
+                selected = step(nodes)
+                for metric in metrics:
+                    found[metric] = selected
+                if children and selected:
+                    stack.append((children, selected))
+        return {metric: found.get(metric, []) for metric in self.metrics}
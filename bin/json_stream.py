@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Incremental decoding of large JSON files, one element at a time.
+
+``json.load`` builds the whole document in memory before anything can be
+extracted from it.  The OSD dump files are arrays of hundreds of full
+``dump_metrics`` snapshots, and the FIO outputs with many clients have as
+many job entries, while the tools only need one snapshot or job at a time,
+and a few of the top-level keys.
+
+The file is read in chunks, and only the values asked for are decoded
+(with ``json.JSONDecoder.raw_decode``, so each value is decoded by the C
+scanner); the others are skipped by scanning for the brackets and strings,
+without building them.  The peak memory is then bounded by the largest
+value decoded (one snapshot, one job), rather than the whole file.  Only
+the standard library is used.
+
+Usage: import json_stream
+
+    with open("run_dump.json") as f:
+        for envelope in json_stream.iter_elements(f):
+            ...
+
+    with open("fio.json") as f:
+        for key, value in json_stream.scan_object(f, keys={"timestamp"}, stream={"jobs"}):
+            if key == "jobs":
+                for job in value:
+                    ...
+"""
+
+import io
+import json
+import logging
+import re
+from typing import IO, Any, Collection, Iterator, Optional, Sequence, Tuple
+
+__author__ = "Jose J Palacios-Perez"
+
+logger = logging.getLogger(__name__)
+
+# Characters read at a time
+CHUNK_SIZE = 1 << 16
+
+_decoder = json.JSONDecoder()
+_WS = re.compile(r"\s*")
+_SPECIAL = re.compile(r'["\[\]{}]')
+# The rest of a string, after its opening quote
+_STRING_END = re.compile(r'(?:[^"\\]|\\.)*"', re.DOTALL)
+# Characters that may continue a number cut at the end of the buffer
+_NUMBER_TAIL = re.compile(r"[0-9.eE+-]*")
+
+
+class _Scanner:
+    """A window on a text stream, consumed from left to right."""
+
+    def __init__(self, fp: IO, chunk_size: int = CHUNK_SIZE) -> None:
+        if isinstance(fp.read(0), bytes):
+            fp = io.TextIOWrapper(fp, encoding="utf-8")
+        self.fp = fp
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def _grow(self) -> bool:
+        """
+        Read more (at least as much as is pending, so a large value is
+        decoded in a number of attempts logarithmic in its size).
+        """
+        if self.eof:
+            return False
+        pending = len(self.buf) - self.pos
+        data = self.fp.read(max(self.chunk_size, pending))
+        self.buf = self.buf[self.pos :] + data
+        self.pos = 0
+        if not data:
+            self.eof = True
+        return bool(data)
+
+    def _error(self, msg: str) -> json.JSONDecodeError:
+        return json.JSONDecodeError(msg, self.buf, self.pos)
+
+    def peek(self) -> str:
+        """The next character that is not a blank, "" at the end."""
+        while True:
+            self.pos = _WS.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._grow():
+                return ""
+
+    def expect(self, chars: str) -> str:
+        c = self.peek()
+        if not c or c not in chars:
+            raise self._error(f"Expecting one of {chars!r}")
+        self.pos += 1
+        return c
+
+    def value(self) -> Any:
+        """Decode the next value."""
+        c = self.peek()
+        while True:
+            try:
+                obj, end = _decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self._grow():
+                    continue
+                raise
+            # A number or literal may go on in the next chunk: "-2." decodes
+            # as -2, so also when only number characters follow it
+            if (
+                c not in '{["'
+                and _NUMBER_TAIL.match(self.buf, end).end() == len(self.buf)
+                and self._grow()
+            ):
+                continue
+            self.pos = end
+            return obj
+
+    def skip(self) -> None:
+        """Skip the next value, without building it."""
+        c = self.peek()
+        if c not in "[{":
+            self.value()
+            return
+        depth = 0
+        while True:
+            m = _SPECIAL.search(self.buf, self.pos)
+            if m is None:
+                # Only scalars and separators in between
+                self.pos = len(self.buf)
+                if not self._grow():
+                    raise self._error("Unterminated value")
+                continue
+            self.pos = m.start()
+            c = m.group()
+            if c == '"':
+                end = _STRING_END.match(self.buf, self.pos + 1)
+                if end is None:
+                    if not self._grow():
+                        raise self._error("Unterminated string")
+                    continue
+                self.pos = end.end()
+                continue
+            self.pos += 1
+            depth += 1 if c in "[{" else -1
+            if depth == 0:
+                return
+
+    def members(self) -> Iterator[str]:
+        """
+        The keys of the object that follows; the value of each key must be
+        consumed (``value``/``skip``) before resuming.
+        """
+        self.expect("{")
+        if self.peek() == "}":
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            self.expect(":")
+            yield key
+            if self.expect(",}") == "}":
+                return
+
+    def elements(self) -> Iterator[None]:
+        """
+        Position on each element of the array that follows, which must be
+        consumed before resuming.
+        """
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield None
+            if self.expect(",]") == "]":
+                return
+
+    def descend(self, path: Sequence[str]) -> None:
+        """Position on the value of *path* (keys of nested objects)."""
+        for step in path:
+            for key in self.members():
+                if key == step:
+                    break
+                self.skip()
+            else:
+                raise KeyError(step)
+
+
+class _LazyArray:
+    """The elements of a streamed array, decoded as they are iterated."""
+
+    def __init__(self, scanner: _Scanner) -> None:
+        self._scanner = scanner
+        self._positions = scanner.elements()
+        self.done = False
+
+    def __iter__(self) -> Iterator[Any]:
+        for _ in self._positions:
+            yield self._scanner.value()
+        self.done = True
+
+    def drain(self) -> None:
+        """Skip the elements not iterated."""
+        for _ in self._positions:
+            self._scanner.skip()
+        self.done = True
+
+
+def iter_array(fp: IO, path: Sequence[str] = (), chunk_size: int = CHUNK_SIZE) -> Iterator[Any]:
+    """The elements of the array at *path* in the JSON stream *fp*, one at a time."""
+    scanner = _Scanner(fp, chunk_size)
+    scanner.descend(path)
+    yield from _LazyArray(scanner)
+
+
+def iter_elements(fp: IO, chunk_size: int = CHUNK_SIZE) -> Iterator[Any]:
+    """
+    The elements of the top-level array of *fp*, one at a time; a document
+    that is not an array is yielded whole.
+    """
+    scanner = _Scanner(fp, chunk_size)
+    if scanner.peek() == "[":
+        yield from _LazyArray(scanner)
+    elif scanner.peek():
+        yield scanner.value()
+
+
+def scan_object(
+    fp: IO,
+    keys: Optional[Collection[str]] = None,
+    stream: Collection[str] = (),
+    path: Sequence[str] = (),
+    chunk_size: int = CHUNK_SIZE,
+) -> Iterator[Tuple[str, Any]]:
+    """
+    The ``(key, value)`` members of the object at *path* in *fp* whose key
+    is in *keys* (all when ``None``), in the order of the document; the
+    others are skipped.  The value of a key in *stream* is an iterator over
+    the elements of that array, valid until the next member is requested.
+    """
+    scanner = _Scanner(fp, chunk_size)
+    scanner.descend(path)
+    for key in scanner.members():
+        if key in stream:
+            if scanner.peek() != "[":
+                yield key, iter([scanner.value()])
+                continue
+            lazy = _LazyArray(scanner)
+            yield key, iter(lazy)
+            if not lazy.done:
+                lazy.drain()
+        elif keys is None or key in keys:
+            yield key, scanner.value()
+        else:
+            scanner.skip()
+
+
+def load_keys(
+    fp: IO, keys: Collection[str], path: Sequence[str] = (), chunk_size: int = CHUNK_SIZE
+) -> dict:
+    """Only the members *keys* of the object at *path* in *fp*, as a dict."""
+    return dict(scan_object(fp, keys=keys, path=path, chunk_size=chunk_size))
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Mergeable latency histograms, to combine the completion latency (clat) of
+several FIO processes into accurate aggregate percentiles.
+
+Means and standard deviations can be combined across processes
+(``combined_mean``/``combined_std_dev`` in ``fio_parse_jsons.py``), but
+percentiles cannot: the p99 of the union is not any reduction of the p99 of
+each process.  Instead, the latencies of each process are kept in a
+log-bucketed histogram (HDR-style: each power of two is split in
+``2**bits`` linear buckets, so the relative error of a bucket is at most
+``2**-bits``), whose counts can simply be added, and the percentiles are
+read from the merged histogram.
+
+The bucketing is the one of FIO itself (``plat_val_to_idx`` with
+``FIO_IO_U_PLAT_BITS = 6``), so the ``bins`` that FIO emits in its
+``clat_ns`` section with ``--output-format=json+`` fall into their own
+bucket: the percentiles of the merged histogram are as accurate as those
+FIO reports for a single process.  When the FIO output has no ``bins``
+(plain ``--output-format=json``), the histogram is approximated from the
+``percentile`` section, weighted by the number of IOs.
+
+Usage: import latency_histogram
+
+    hist = LatencyHistogram.from_fio(job["read"]["clat_ns"], job["read"]["total_ios"])
+    hist.merge(LatencyHistogram.from_fio(other["read"]["clat_ns"]))
+    p99_ms = hist.percentile(99.0) / 1e6
+"""
+
+import logging
+from typing import Any, Dict, Iterable, List, Optional
+
+__author__ = "Jose J Palacios-Perez"
+
+logger = logging.getLogger(__name__)
+
+# Linear buckets per power of two, as FIO_IO_U_PLAT_BITS
+PLAT_BITS = 6
+
+# Columns of the aggregate percentiles, in ms: name -> percentile
+CLAT_PERCENTILES = {
+    "clat_p99_ms": 99.0,
+    "clat_p999_ms": 99.9,
+}
+
+
+class LatencyHistogram:
+    """
+    Histogram of latencies (in ns) with log-linear buckets.
+
+    Parameters
+    ----------
+    bits : int
+        Each power of two is split in ``2**bits`` buckets.
+    """
+
+    def __init__(self, bits: int = PLAT_BITS) -> None:
+        self.bits = bits
+        self.counts: List[int] = []
+        self.total = 0
+        # Whether built from the percentiles rather than the bins of FIO
+        self.approximate = False
+
+    def _index(self, value: int) -> int:
+        value = max(int(value), 0)
+        msb = value.bit_length() - 1
+        if msb <= self.bits:
+            return value
+        error_bits = msb - self.bits
+        base = (error_bits + 1) << self.bits
+        return base + ((value >> error_bits) & ((1 << self.bits) - 1))
+
+    def _value(self, index: int) -> float:
+        """Midpoint of the bucket *index*."""
+        if index < (2 << self.bits):
+            return float(index)
+        error_bits = (index >> self.bits) - 1
+        base = 1 << (error_bits + self.bits)
+        k = index % (1 << self.bits)
+        return base + (k + 0.5) * (1 << error_bits)
+
+    def add(self, value: float, count: int = 1) -> None:
+        """Record *count* latencies of *value* ns."""
+        if count <= 0:
+            return
+        index = self._index(value)
+        if index >= len(self.counts):
+            self.counts.extend([0] * (index + 1 - len(self.counts)))
+        self.counts[index] += count
+        self.total += count
+
+    def merge(self, other: "LatencyHistogram") -> "LatencyHistogram":
+        """Add the counts of *other* to this histogram; returns ``self``."""
+        if other.bits != self.bits:
+            raise ValueError(
+                f"Cannot merge histograms of {other.bits} and {self.bits} bits"
+            )
+        if len(other.counts) > len(self.counts):
+            self.counts.extend([0] * (len(other.counts) - len(self.counts)))
+        for i, count in enumerate(other.counts):
+            self.counts[i] += count
+        self.total += other.total
+        self.approximate = self.approximate or other.approximate
+        return self
+
+    def percentile(self, q: float) -> float:
+        """
+        The latency (ns) below which *q* percent of the IOs completed, 0.0
+        for an empty histogram.
+        """
+        if not self.total:
+            return 0.0
+        rank = max(1, -(-self.total * q // 100))  # ceil
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return self._value(i)
+        return self._value(len(self.counts) - 1)
+
+    def percentiles_ms(self, columns: Dict[str, float] = CLAT_PERCENTILES) -> Dict[str, float]:
+        """The percentiles of *columns* (name -> percentile), in ms."""
+        return {name: self.percentile(q) / 1e6 for name, q in columns.items()}
+
+    @classmethod
+    def from_fio(
+        cls, clat_ns: Dict[str, Any], total_ios: Optional[int] = None, bits: int = PLAT_BITS
+    ) -> "LatencyHistogram":
+        """
+        Histogram of the ``clat_ns`` section of a FIO job: from its ``bins``
+        when present (``json+`` output), otherwise approximated from its
+        ``percentile`` section and *total_ios* (defaults to ``N``).
+        """
+        hist = cls(bits)
+        bins = clat_ns.get("bins")
+        if bins:
+            for value, count in bins.items():
+                hist.add(int(value), int(count))
+            return hist
+        percentiles = clat_ns.get("percentile")
+        if total_ios is None:
+            total_ios = clat_ns.get("N", 0)
+        if not percentiles or not total_ios:
+            return hist
+        hist.approximate = True
+        # The IOs between two consecutive percentiles take the upper latency
+        points = sorted((float(p), v) for p, v in percentiles.items())
+        prev = 0.0
+        for p, value in points:
+            hist.add(value, round(total_ios * (p - prev) / 100.0))
+            prev = p
+        # The tail beyond the last percentile reported
+        if prev < 100.0:
+            tail = clat_ns.get("max", points[-1][1])
+            hist.add(tail, total_ios - hist.total)
+        return hist
+
+
+def merge_histograms(hists: Iterable[LatencyHistogram]) -> LatencyHistogram:
+    """A new histogram with the counts of all of *hists*."""
+    merged = LatencyHistogram()
+    for hist in hists:
+        merged.merge(hist)
+    if merged.approximate:
+        logger.debug("== Latency percentiles approximated (no FIO json+ bins) ==")
+    return merged
@@ -7,19 +7,23 @@ Usage: import monitoring
 
 Functions:
   mon_perf()           - Collect perf statistics with optional flamegraph recording
+  mon_perf_record()    - Record perf samples with wall-clock timestamps until stopped
+  mon_perf_stop()      - Stop a recording started by mon_perf_record()
   mon_measure()        - Record CPU and thread utilization with top
   mon_filter_top()     - Filter and process top output (cores-based filter)
   mon_filter_top_cpu() - Filter top output with CPU/PID specification
-  mon_diskstats()      - Periodically capture /proc/diskstats (deprecated)
+  mon_diskstats()      - Periodically sample /proc/diskstats
 """
 
-import datetime
 import logging
 import os
+import signal
 import subprocess
 import time
 from typing import Optional
 
+from diskstat_sampler import DEFAULT_DEVICE_REGEX, DiskStatSampler
+
 logger = logging.getLogger(__name__)
 
 __author__ = "Jose J Palacios-Perez (translated from bash)"
@@ -48,6 +52,8 @@ PERF_OPTIONS = {
     ),
     "core": " -A -a --per-core ",  # --cpu=<cpu-list> --no-aggr
 }
+# Sampling frequency (Hz) of the recordings spanning a whole run
+PERF_RECORD_FREQ = 99
 
 
 def mon_perf(
@@ -96,6 +102,52 @@ def mon_perf(
     )
 
 
+def mon_perf_record(
+    pid: str,
+    outfile: str,
+    freq: int = PERF_RECORD_FREQ,
+) -> subprocess.Popen:
+    """Record perf samples of *pid* continuously, until :func:`mon_perf_stop`.
+
+    The samples are timestamped with the wall clock (``-k realtime``), so
+    they can be split afterwards over the workload intervals of the FIO
+    outputs (see :mod:`perf_folder`).
+
+    Parameters
+    ----------
+    pid:
+        Comma-separated string of process IDs to profile.
+    outfile:
+        Path of the perf data file.
+    freq:
+        Sampling frequency in Hz.
+    """
+    return subprocess.Popen(
+        [
+            "perf", "record", "-e", "cycles:u",
+            "--call-graph", "dwarf", "-F", str(freq),
+            "-k", "realtime", "-i",
+            "-p", str(pid),
+            "-o", outfile,
+            "--quiet",
+        ],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+def mon_perf_stop(proc: subprocess.Popen, timeout: float = 60) -> None:
+    """Stop the recording *proc* with SIGINT, so perf writes its data file."""
+    if proc.poll() is None:
+        proc.send_signal(signal.SIGINT)
+    try:
+        proc.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        logger.warning("== perf record did not stop, killing it ==")
+        proc.kill()
+        proc.wait()
+
+
 def mon_measure(
     pid: str,
     test_out: str,
@@ -234,24 +286,37 @@ def mon_filter_top_cpu(
     )
 
 
-def mon_diskstats(test_name: str, num_samples: int, sleep_secs: int) -> None:
-    """Periodically capture /proc/diskstats.
+def mon_diskstats(
+    test_name: str,
+    num_samples: int,
+    sleep_secs: float,
+    device_regex: str = DEFAULT_DEVICE_REGEX,
+) -> None:
+    """Periodically sample /proc/diskstats.
 
-    .. deprecated::
-        Use ``fun_get_diskstats`` / ``get_diskstats`` instead.
+    The counters are read natively by :class:`diskstat_sampler.DiskStatSampler`
+    (no ``jc`` process per sample), so *sleep_secs* may be sub-second.  The
+    per-interval IOPS, bandwidth, await and queue depth are saved to
+    ``<test_name>_diskstats.json``.
 
     Parameters
     ----------
     test_name:
-        Base name for output snapshot files.
+        Base name for the output file.
     num_samples:
         Number of samples to capture.
     sleep_secs:
         Sleep duration in seconds between samples.
+    device_regex:
+        Regex selecting the devices to sample.
     """
-    for _ in range(num_samples):
-        ts = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-        ds_file = f"{test_name}_{ts}_ds.json"
-        with open(ds_file, "w") as f:
-            subprocess.run(["jc", "--pretty", "/proc/diskstats"], stdout=f)
-        time.sleep(sleep_secs)
+    if num_samples <= 0:
+        return
+    sampler = DiskStatSampler(device_regex)
+    try:
+        for _ in range(num_samples):
+            sampler.sample()
+            time.sleep(sleep_secs)
+    finally:
+        sampler.close()
+    sampler.save_json(f"{test_name}_diskstats.json")
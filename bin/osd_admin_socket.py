@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Persistent client for the Ceph OSD admin socket (``.asok``).
+
+``ceph tell osd.N dump_metrics`` starts a full Python CLI, authenticates
+against the monitors and routes the command through the messenger, which
+costs hundreds of milliseconds of CPU on the very host being benchmarked.
+The admin socket accepts the same commands locally over a Unix socket, so
+this module talks to it directly:
+
+  - request:  a JSON command, e.g. ``{"prefix": "dump_metrics"}``, NUL terminated
+  - reply:    a 4-byte big-endian payload length followed by the payload
+
+The connection is kept open between commands; when the daemon closes it after
+a reply (Classic OSD does, one command per connection) the client reconnects
+transparently on the next command, which is still only a ``connect(2)`` away.
+
+Usage: import osd_admin_socket
+
+Classes:
+  AdminSocketClient  - one persistent connection to a single ``.asok`` path
+  OSDAdminSockets    - lazily-created clients keyed by OSD id
+"""
+
+import glob
+import json
+import logging
+import os
+import socket
+import stat
+import struct
+import threading
+from typing import Any, BinaryIO, Dict, List, Optional
+
+__author__ = "Jose J Palacios-Perez"
+
+logger = logging.getLogger(__name__)
+
+# Candidate locations of the OSD admin sockets, in order of preference:
+# vstart.sh (out/ or the per-run asok dir under /tmp), then a packaged cluster.
+ASOK_SEARCH_PATTERNS: List[str] = [
+    "/ceph/build/out/osd.{osd}.asok",
+    "/tmp/ceph-asok.*/osd.{osd}.asok",
+    "/var/run/ceph/ceph-osd.{osd}.asok",
+]
+
+# Default socket timeout in seconds: dump_metrics on a busy Crimson OSD with
+# many reactors can take a while to serialise.
+ASOK_TIMEOUT = 10.0
+# Receive chunk size used when streaming a reply
+_CHUNK_SIZE = 256 * 1024
+
+
+class AdminSocketError(Exception):
+    """Raised when the admin socket cannot be reached or replies badly."""
+
+
+def find_osd_asok(osd: int, patterns: Optional[List[str]] = None) -> Optional[str]:
+    """
+    Return the path of the admin socket for OSD *osd*, or ``None``.
+
+    Each pattern may contain a ``{osd}`` placeholder and shell wildcards;
+    the most recently modified match of the first matching pattern wins.
+    """
+    for pattern in patterns or ASOK_SEARCH_PATTERNS:
+        matches = [
+            p for p in glob.glob(pattern.format(osd=osd)) if _is_socket(p)
+        ]
+        if matches:
+            return max(matches, key=os.path.getmtime)
+    return None
+
+
+def _is_socket(path: str) -> bool:
+    try:
+        return stat.S_ISSOCK(os.stat(path).st_mode)
+    except OSError:
+        return False
+
+
+class AdminSocketClient:
+    """
+    A persistent connection to one admin socket.
+
+    Parameters
+    ----------
+    path : str
+        Path to the ``.asok`` Unix socket.
+    timeout : float
+        Socket timeout in seconds for connect/send/recv.
+    """
+
+    def __init__(self, path: str, timeout: float = ASOK_TIMEOUT) -> None:
+        self.path = path
+        self.timeout = timeout
+        self._sock: Optional[socket.socket] = None
+        # One request/reply in flight at a time: collectors may share a client
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> "AdminSocketClient":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    @property
+    def connected(self) -> bool:
+        return self._sock is not None
+
+    def connect(self) -> None:
+        """Open the connection if it is not already open."""
+        if self._sock is not None:
+            return
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.path)
+        except OSError as e:
+            sock.close()
+            raise AdminSocketError(f"cannot connect to {self.path}: {e}") from e
+        self._sock = sock
+
+    def close(self) -> None:
+        """Close the connection (it is reopened on the next command)."""
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            finally:
+                self._sock = None
+
+    @staticmethod
+    def encode_command(prefix: str, **kwargs: Any) -> bytes:
+        """Encode a command as the NUL-terminated JSON the daemon expects."""
+        cmd = {"prefix": prefix}
+        cmd.update({k: v for k, v in kwargs.items() if v not in (None, "")})
+        return json.dumps(cmd).encode() + b"\0"
+
+    def _recv_exact(self, nbytes: int) -> bytes:
+        buf = bytearray()
+        while len(buf) < nbytes:
+            chunk = self._sock.recv(min(nbytes - len(buf), _CHUNK_SIZE))
+            if not chunk:
+                raise ConnectionResetError("admin socket closed mid-reply")
+            buf += chunk
+        return bytes(buf)
+
+    def _send(self, request: bytes) -> int:
+        """Send *request* and return the announced reply length."""
+        self.connect()
+        self._sock.sendall(request)
+        header = self._recv_exact(4)
+        return struct.unpack(">I", header)[0]
+
+    def _request(self, request: bytes) -> int:
+        """Send *request*, reconnecting once if the daemon dropped the link."""
+        try:
+            return self._send(request)
+        except (ConnectionResetError, BrokenPipeError):
+            # Classic OSD closes the connection after every reply
+            self.close()
+        except OSError as e:
+            # A timeout is a slow daemon, not a dropped link: not resent
+            self.close()
+            raise AdminSocketError(f"{self.path}: {e}") from e
+        try:
+            return self._send(request)
+        except OSError as e:
+            self.close()
+            raise AdminSocketError(f"{self.path}: {e}") from e
+
+    def command(self, prefix: str, **kwargs: Any) -> bytes:
+        """Run *prefix* (with optional arguments) and return the raw reply."""
+        with self._lock:
+            length = self._request(self.encode_command(prefix, **kwargs))
+            try:
+                return self._recv_exact(length)
+            except OSError as e:
+                self.close()
+                raise AdminSocketError(f"{self.path}: {e}") from e
+
+    def command_json(self, prefix: str, **kwargs: Any) -> Any:
+        """Run *prefix* and decode the reply as JSON (``None`` if empty)."""
+        payload = self.command(prefix, **kwargs)
+        if not payload.strip():
+            return None
+        try:
+            return json.loads(payload)
+        except ValueError as e:
+            raise AdminSocketError(f"{self.path}: invalid JSON reply: {e}") from e
+
+    def command_into(self, out: BinaryIO, prefix: str, **kwargs: Any) -> int:
+        """
+        Run *prefix* and stream the reply into the binary file *out*.
+
+        The reply is copied chunk by chunk as it arrives, so large
+        ``dump_metrics`` payloads are neither decoded nor held in memory.
+        Returns the number of bytes written.
+        """
+        with self._lock:
+            length = self._request(self.encode_command(prefix, **kwargs))
+            remaining = length
+            try:
+                while remaining:
+                    chunk = self._sock.recv(min(remaining, _CHUNK_SIZE))
+                    if not chunk:
+                        raise ConnectionResetError("admin socket closed mid-reply")
+                    out.write(chunk)
+                    remaining -= len(chunk)
+            except OSError as e:
+                self.close()
+                raise AdminSocketError(f"{self.path}: {e}") from e
+        return length
+
+
+class OSDAdminSockets:
+    """
+    Lazily-created :class:`AdminSocketClient` instances keyed by OSD id.
+
+    A client is only created when the OSD's admin socket can be found, so
+    callers can fall back to ``ceph tell`` when :meth:`get` returns ``None``.
+    """
+
+    def __init__(
+        self,
+        patterns: Optional[List[str]] = None,
+        timeout: float = ASOK_TIMEOUT,
+    ) -> None:
+        self.patterns = patterns or ASOK_SEARCH_PATTERNS
+        self.timeout = timeout
+        self._clients: Dict[int, AdminSocketClient] = {}
+
+    def get(self, osd: int) -> Optional[AdminSocketClient]:
+        """Return the client for OSD *osd*, or ``None`` if it has no socket."""
+        client = self._clients.get(osd)
+        if client is not None:
+            return client
+        path = find_osd_asok(osd, self.patterns)
+        if path is None:
+            return None
+        logger.info(f"== Using admin socket {path} for osd.{osd} ==")
+        client = AdminSocketClient(path, self.timeout)
+        self._clients[osd] = client
+        return client
+
+    def discard(self, osd: int) -> None:
+        """Drop the client for OSD *osd* (e.g. after the OSD restarted)."""
+        client = self._clients.pop(osd, None)
+        if client is not None:
+            client.close()
+
+    def close(self) -> None:
+        """Close every open connection."""
+        for client in self._clients.values():
+            client.close()
+        self._clients.clear()
@@ -16,12 +16,15 @@ import re
 import logging
 import os
 from abc import ABC, abstractmethod
-from typing import Dict, Any, List, Optional, Set, Tuple
+from array import array
+from typing import Dict, Any, Iterator, List, Optional, Set, Tuple, Union
 from collections import defaultdict
 from datetime import datetime
 from enum import Enum
 import numpy as np
 
+from telemetry_store import TelemetryStore
+
 __author__ = "Jose J Palacios-Perez"
 
 logger = logging.getLogger(__name__)
@@ -71,6 +74,81 @@ class OSDType(Enum):
     UNKNOWN = "unknown"
 
 
+class MetricColumns:
+    """
+    The ``(metric, shard, value, labels)`` samples of a dump as typed column
+    arrays, filled as the dump is parsed, rather than a dict per sample.
+
+    The metric names, shards and label values are dictionary-encoded (the
+    categories in order of appearance, and an array of codes), the values
+    are float64; a label missing from a sample has code -1.
+    """
+
+    def __init__(self) -> None:
+        self.metrics: Dict[str, int] = {}
+        self.shards: Dict[Any, int] = {}
+        self.metric_codes = array("i")
+        self.shard_codes = array("i")
+        self.values = array("d")
+        # label -> (codes, categories)
+        self.labels: Dict[str, Tuple[array, Dict[Any, int]]] = {}
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def append(
+        self, metric: str, shard: Any, value: float, labels: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """Add a sample."""
+        metrics, shards = self.metrics, self.shards
+        code = metrics.get(metric)
+        if code is None:
+            code = metrics[metric] = len(metrics)
+        self.metric_codes.append(code)
+        code = shards.get(shard)
+        if code is None:
+            code = shards[shard] = len(shards)
+        self.shard_codes.append(code)
+        if labels:
+            row = len(self.values)
+            for k, v in labels.items():
+                if v is None:
+                    continue
+                column = self.labels.get(k)
+                if column is None:
+                    column = self.labels[k] = (array("i", [-1]) * row, {})
+                codes, categories = column
+                if len(codes) < row:
+                    codes.extend(array("i", [-1]) * (row - len(codes)))
+                code = categories.get(v)
+                if code is None:
+                    code = categories[v] = len(categories)
+                codes.append(code)
+        self.values.append(value)
+
+    def shard_column(self) -> Tuple[np.ndarray, Optional[List[Any]]]:
+        """
+        The shards: int16 values when all are numeric (Seastar shards), else
+        codes and their categories.
+        """
+        codes = np.array(self.shard_codes, dtype=np.int32)
+        shards = list(self.shards)
+        if all(isinstance(s, int) or (isinstance(s, str) and s.isdigit()) for s in shards):
+            lookup = np.array([int(s) for s in shards], dtype=np.int16)
+            return lookup[codes], None
+        return codes, shards
+
+    def label_columns(self) -> Dict[str, Tuple[np.ndarray, List[Any]]]:
+        """The codes (padded to every sample) and categories of each label."""
+        rows = len(self.values)
+        columns = {}
+        for k, (codes, categories) in self.labels.items():
+            if len(codes) < rows:
+                codes.extend(array("i", [-1]) * (rows - len(codes)))
+            columns[k] = (np.array(codes, dtype=np.int32), list(categories))
+        return columns
+
+
 class BaseOSDDumpMetricsParser(ABC):
     """
     Abstract base class for OSD dump metrics parsers.
@@ -136,6 +214,17 @@ class BaseOSDDumpMetricsParser(ABC):
     def get_metric_groups(self) -> Dict[str, Dict[str, Any]]:
         """Return the metric groups for this parser."""
         return self.METRIC_GROUPS
+
+    def parse_columns(self, data: Dict[str, Any]) -> Optional[MetricColumns]:
+        """
+        Parse the scalar metrics of *data* straight into column arrays,
+        skipping the nested dicts of :meth:`parse` (histograms are still
+        collected in ``_histogram``).
+
+        Returns None when the OSD type has no such form (the Classic OSD
+        rows have no single value).
+        """
+        return None
     
     def get_parsed_data(self) -> tuple:
         """
@@ -163,6 +252,24 @@ class BaseOSDDumpMetricsParser(ABC):
         self._metrics_seen.clear()
 
 
+def _crimson_entries(data: Dict[str, Any]) -> Iterator[Tuple[str, Dict[str, Any], Any]]:
+    """
+    The ``(metric name, entry, value)`` of the Seastar metrics format:
+    { "metrics": [ { "<name>": { "shard": "<N>", "value": <V>, ... } }, ... ] }
+    """
+    metrics_list = data.get("metrics")
+    if not isinstance(metrics_list, list):
+        logger.warning("No 'metrics' list in data")
+        return
+    for item in metrics_list:
+        if not isinstance(item, dict) or len(item) != 1:
+            continue
+        metric_name, entry = next(iter(item.items()))
+        value = entry.get("value")
+        if value is not None:
+            yield metric_name, entry, value
+
+
 class CrimsonSeaStoreParser(BaseOSDDumpMetricsParser):
     """
     Parser for Crimson OSD with SeaStore backend.
@@ -427,6 +534,24 @@ class CrimsonSeaStoreParser(BaseOSDDumpMetricsParser):
                     self._multi[metric_name].append(row)
                 elif isinstance(value, (int, float)):
                     self._raw[metric_name][shard].append(float(value))
+
+    def parse_columns(self, data: Dict[str, Any]) -> Optional[MetricColumns]:
+        """
+        Parse Crimson SeaStore metrics into column arrays, the histograms
+        into ``_histogram`` as :meth:`parse` does.
+        """
+        columns = MetricColumns()
+        for metric_name, entry, value in _crimson_entries(data):
+            if isinstance(value, (int, float)):
+                columns.append(
+                    metric_name, entry.get("shard", "0"), value, self._extract_extra_dims(entry)
+                )
+            elif self.is_histogram_metric(value):
+                rec = self._parse_histogram(value)
+                rec.update({"shard": entry.get("shard", "0")})
+                rec.update(self._extract_histo_dims(entry))
+                self._histogram[metric_name].append(rec)
+        return columns
     
     def _extract_extra_dims(self, entry: Dict[str, Any]) -> Dict[str, Any]:
         """Extract dimension labels beyond shard and value."""
@@ -570,6 +695,18 @@ class CrimsonBlueStoreParser(BaseOSDDumpMetricsParser):
                     self._multi[metric_name].append(row)
                 elif isinstance(value, (int, float)):
                     self._raw[metric_name][shard].append(float(value))
+
+    def parse_columns(self, data: Dict[str, Any]) -> Optional[MetricColumns]:
+        """Parse Crimson BlueStore metrics into column arrays."""
+        columns = MetricColumns()
+        for metric_name, entry, value in _crimson_entries(data):
+            shard = entry.get("shard", "0")
+            # Histogram values: their count
+            if isinstance(value, dict) and "count" in value:
+                columns.append(metric_name, shard, value["count"])
+            elif isinstance(value, (int, float)):
+                columns.append(metric_name, shard, value, self._extract_extra_dims(entry))
+        return columns
     
     def _extract_extra_dims(self, entry: Dict[str, Any]) -> Dict[str, Any]:
         """Extract dimension labels beyond shard and value."""
@@ -796,4 +933,95 @@ def get_parser_for_data(data: Dict[str, Any]) -> BaseOSDDumpMetricsParser:
     """
     return create_parser(data=data)
 
+
+# ---------------------------------------------------------------------------
+# Delta-encoded snapshot reader
+# ---------------------------------------------------------------------------
+
+class DumpSnapshotReader:
+    """
+    Read the dumps of a run back from a :class:`TelemetryStore`.
+
+    The store keeps successive snapshots of an OSD as deltas against the
+    previous one; this reader rebuilds full snapshots on demand and derives
+    per-interval counter rates straight from the value vectors, without
+    going through the JSON payloads.
+
+    Parameters
+    ----------
+    store : str or TelemetryStore
+        An open store, or the prefix (or ``.tlm.json`` manifest) of one.
+    """
+
+    def __init__(self, store: Union[str, TelemetryStore]):
+        self.store = TelemetryStore.open(store) if isinstance(store, str) else store
+
+    def samples(self, osd: Optional[int] = None, label: Optional[str] = None) -> List[int]:
+        """Sample indices, in order, optionally of a single OSD and/or label."""
+        store = self.store
+        out = []
+        for sample in range(store.num_samples):
+            info = store.sample_info(sample)
+            if osd is not None and info["osd"] != osd:
+                continue
+            if label is not None and info["label"] != label:
+                continue
+            out.append(sample)
+        return out
+
+    def snapshots(self, osd: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """Yield the full ``{"timestamp", "osd", "label", "data"}`` snapshots."""
+        for sample in self.samples(osd):
+            yield self.store.snapshot(sample)
+
+    def parser(self, sample: int = 0) -> BaseOSDDumpMetricsParser:
+        """Parser matching the OSD type of *sample*."""
+        return create_parser(data=self.store.snapshot(sample)["data"])
+
+    def counter_rates(
+        self,
+        osd: int = 0,
+        metrics: Optional[List[str]] = None,
+        label: Optional[str] = None,
+    ) -> Tuple[np.ndarray, List[Tuple[str, int, Dict[str, Any]]], np.ndarray]:
+        """
+        Per-second rates of the series of *osd* between successive samples.
+
+        Parameters
+        ----------
+        osd : int
+            OSD whose samples are used.
+        metrics : list of str, optional
+            Only keep the series of these metric names.
+        label : str, optional
+            Only use the samples with this envelope label.
+
+        Returns
+        -------
+        tuple
+            ``(timestamps, keys, rates)``: the end timestamp of each
+            interval, the ``(metric, shard, labels)`` key of each series and
+            a ``(intervals, series)`` array, NaN where a series is missing
+            from either end of an interval.
+        """
+        store = self.store
+        samples = self.samples(osd, label)
+        ids, values = store.value_matrix(samples)
+        if metrics is not None:
+            wanted = {
+                code for code, name in enumerate(store.dicts["metric"]) if name in metrics
+            }
+            table = store.series_table()
+            keep = np.isin(table["metric"][ids], list(wanted))
+            ids, values = ids[keep], values[:, keep]
+        ts = np.array([store.samples[s][0] for s in samples], dtype=np.float64)
+        keys = [store.series_key(int(i)) for i in ids]
+        if len(samples) < 2:
+            return ts[1:], keys, np.empty((0, len(ids)))
+        dt = np.diff(ts)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rates = np.diff(values, axis=0) / dt[:, None]
+        rates[dt <= 0] = np.nan
+        return ts[1:], keys, rates
+
 # Made with Bob
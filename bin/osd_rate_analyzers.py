@@ -8,13 +8,17 @@ This module provides a hierarchy of rate analyzer classes for different OSD type
 - ClassicOSDRateAnalyzer: For Classic (non-Crimson) OSD
 
 Each analyzer knows how to extract and calculate rates for its specific metric format.
+
+In multi-OSD clusters, :func:`create_rate_analyzers_from_store` builds one
+analyzer per OSD from a telemetry store and :func:`compare_osd_rates` puts
+their rates side by side, with per-rate imbalance statistics across OSDs.
 """
 
 import json
 import logging
 import os
 from abc import ABC, abstractmethod
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
@@ -68,6 +72,14 @@ class BaseOSDRateAnalyzer(ABC):
                 self.add_snapshot(timestamp, data)
                 logger.info(f"Loaded {self.osd_type} snapshot from {fpath}")
     
+    def load_snapshots_from_store(self, store: Any, osd: Optional[int] = None) -> None:
+        """Load the snapshots of a telemetry store, optionally of a single OSD."""
+        for snap in store.snapshots():
+            if osd is not None and snap['osd'] != osd:
+                continue
+            if snap['data']:
+                self.add_snapshot(snap['timestamp'], snap['data'])
+
     def calculate_rates(self, snapshot_idx1: int = 0, snapshot_idx2: int = -1) -> Dict[str, Any]:
         """Calculate rates between two snapshots."""
         if len(self.snapshots) < 2:
@@ -543,4 +555,127 @@ def _detect_osd_type(data: Dict[str, Any]) -> str:
     logger.warning("Could not definitively detect OSD type, defaulting to seastore")
     return 'seastore'
 
+
+# ---------------------------------------------------------------------------
+# Cross-OSD comparison
+# ---------------------------------------------------------------------------
+
+def create_rate_analyzers_from_store(
+    store: Any, osd_type: Optional[str] = None
+) -> Dict[int, BaseOSDRateAnalyzer]:
+    """
+    One rate analyzer per OSD of a telemetry store.
+
+    Parameters
+    ----------
+    store : telemetry_store.TelemetryStore
+        Store of OSD dumps, each sample tagged with its OSD id.
+    osd_type : str, optional
+        Analyzer type; detected from the first dump of each OSD when omitted.
+
+    Returns
+    -------
+    dict
+        Analyzers keyed by OSD id.
+    """
+    analyzers: Dict[int, BaseOSDRateAnalyzer] = {}
+    for snap in store.snapshots():
+        data = snap['data']
+        if not data:
+            continue
+        osd = snap['osd']
+        if osd not in analyzers:
+            analyzers[osd] = create_rate_analyzer(osd_type or _detect_osd_type(data))
+        analyzers[osd].add_snapshot(snap['timestamp'], data)
+    return analyzers
+
+
+def _flatten_rates(rates: Dict[str, Any], prefix: str = "") -> Dict[str, float]:
+    """Flatten nested rate dicts into ``{"section.key.subkey": value}``."""
+    flat: Dict[str, float] = {}
+    for key, value in rates.items():
+        name = f"{prefix}.{key}" if prefix else str(key)
+        if isinstance(value, dict):
+            flat.update(_flatten_rates(value, name))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = float(value)
+    return flat
+
+
+def compare_osd_rates(analyzers: Dict[int, BaseOSDRateAnalyzer]) -> Dict[str, Any]:
+    """
+    Compare the rates of several OSDs over their first and last snapshots.
+
+    Parameters
+    ----------
+    analyzers : dict
+        Rate analyzers keyed by OSD id.
+
+    Returns
+    -------
+    dict
+        ``per_osd``: the :meth:`BaseOSDRateAnalyzer.calculate_rates` result of
+        each OSD; ``imbalance``: for every rate reported by at least two
+        OSDs, its ``min``, ``max``, ``mean``, coefficient of variation
+        ``cv``, ``max_over_mean`` and the OSD with the maximum, ``max_osd``.
+    """
+    per_osd: Dict[int, Dict[str, Any]] = {}
+    flat: Dict[int, Dict[str, float]] = {}
+    for osd, analyzer in sorted(analyzers.items()):
+        rates = analyzer.calculate_rates() if len(analyzer.snapshots) >= 2 else {}
+        if not rates:
+            continue
+        per_osd[osd] = rates
+        flat[osd] = _flatten_rates(
+            {k: rates[k] for k in ('messenger', 'transaction_manager', 'object_store')}
+        )
+
+    imbalance: Dict[str, Dict[str, Any]] = {}
+    names = sorted({name for rates in flat.values() for name in rates})
+    for name in names:
+        values: List[Tuple[int, float]] = [
+            (osd, rates[name]) for osd, rates in flat.items() if name in rates
+        ]
+        if len(values) < 2:
+            continue
+        nums = [v for _, v in values]
+        mean = sum(nums) / len(nums)
+        std = (sum((v - mean) ** 2 for v in nums) / len(nums)) ** 0.5
+        max_osd, max_value = max(values, key=lambda x: x[1])
+        imbalance[name] = {
+            'min': min(nums),
+            'max': max_value,
+            'mean': mean,
+            'cv': std / abs(mean) if mean else 0.0,
+            'max_over_mean': max_value / mean if mean else 0.0,
+            'max_osd': max_osd,
+        }
+    return {'per_osd': per_osd, 'imbalance': imbalance}
+
+
+def generate_osd_comparison_report(
+    comparison: Dict[str, Any], top: int = 20, output_file: Optional[str] = None
+) -> str:
+    """Text report of the *top* most imbalanced rates of :func:`compare_osd_rates`."""
+    imbalance = comparison.get('imbalance', {})
+    ranked = sorted(imbalance.items(), key=lambda kv: kv[1]['cv'], reverse=True)
+    lines = [
+        "=" * 80,
+        f"OSD LOAD IMBALANCE ({len(comparison.get('per_osd', {}))} OSDs)",
+        "=" * 80,
+        f"{'rate':<50} {'mean':>10} {'max/mean':>9} {'cv':>6} {'max osd':>8}",
+    ]
+    for name, stats in ranked[:top]:
+        lines.append(
+            f"{name:<50} {stats['mean']:>10.2f} {stats['max_over_mean']:>9.2f}"
+            f" {stats['cv']:>6.2f} {stats['max_osd']:>8}"
+        )
+    lines.append("=" * 80)
+    report = "\n".join(lines)
+    if output_file:
+        with open(output_file, 'w') as f:
+            f.write(report)
+        logger.info(f"OSD comparison report written to {output_file}")
+    return report
+
 # Made with Bob
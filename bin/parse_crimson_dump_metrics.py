@@ -34,8 +34,9 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 
-from typing import List, Dict, Any, Optional, Tuple
-from common import load_json, save_json
+from typing import IO, List, Dict, Any, Iterator, Optional, Tuple
+from common import iter_json, load_json, save_json
+import json_stream
 
 __author__ = "Jose J Palacios-Perez"
 
@@ -731,6 +732,42 @@ def _group_for_metric(metric_name: str, metric_groups: Dict[str, Dict[str, Any]]
     return "ungrouped"
 
 
+# Dump labels whose name collides with a column of the flat DataFrames: the
+# Seastar scheduling "group" of the reactor metrics is kept as "sched_group",
+# "group" being the metric group.
+LABEL_RENAMES = {"group": "sched_group"}
+
+
+def _label_column(label: str) -> str:
+    """The DataFrame column of the dump label *label*."""
+    return LABEL_RENAMES.get(label, label)
+
+
+def _columns_to_dataframe(columns: Any, metric_groups: Dict[str, Dict[str, Any]]) -> pd.DataFrame:
+    """
+    The flat DataFrame of the column arrays of a parser
+    (:class:`osd_dump_parsers.MetricColumns`), built from the columns
+    rather than a dict per row: metric, group and the extra labels are
+    categoricals, shard is int16 (categorical when not numeric) and value
+    float64.
+    """
+    metric_names = list(columns.metrics)
+    metric_codes = np.array(columns.metric_codes, dtype=np.int32)
+    groups = [_group_for_metric(m, metric_groups) for m in metric_names]
+    group_names = list(dict.fromkeys(groups))
+    group_codes = np.array([group_names.index(g) for g in groups], dtype=np.int32)
+    shard, shard_names = columns.shard_column()
+    frame: Dict[str, Any] = {
+        "metric": pd.Categorical.from_codes(metric_codes, categories=metric_names),
+        "group": pd.Categorical.from_codes(group_codes[metric_codes], categories=group_names),
+        "shard": shard if shard_names is None else pd.Categorical.from_codes(shard, shard_names),
+        "value": np.array(columns.values, dtype=np.float64),
+    }
+    for label, (codes, categories) in columns.label_columns().items():
+        frame[_label_column(label)] = pd.Categorical.from_codes(codes, categories=categories)
+    return pd.DataFrame(frame)
+
+
 def load_crimson_dump_dataframe_from_content(json_content: str) -> tuple:
     """
     Load OSD dump_metrics JSON content into flat DataFrames.
@@ -749,7 +786,8 @@ def load_crimson_dump_dataframe_from_content(json_content: str) -> tuple:
         Detected OSD type string.
     df : pd.DataFrame
         Flat DataFrame for simple / multi-dim metrics.
-        Columns: metric, group, shard, value, and any extra dimensions.
+        Columns: metric, group, shard, value, and any extra dimensions (the
+        dump label ``group`` as ``sched_group``, see ``LABEL_RENAMES``).
     histo : dict
         Raw histogram data keyed by metric name (list of parsed histogram
         records as returned by ``CrimsonSeaStoreParser._parse_histogram``).
@@ -760,18 +798,38 @@ def load_crimson_dump_dataframe_from_content(json_content: str) -> tuple:
     except json.JSONDecodeError as e:
         logger.error(f"Failed to parse JSON content: {e}")
         return "unknown", pd.DataFrame(), {}
+    return load_crimson_dump_dataframe_from_data(data)
+
+
+def load_crimson_dump_dataframe_from_data(data: Dict[str, Any]) -> tuple:
+    """
+    Load an already decoded OSD dump_metrics snapshot into flat DataFrames,
+    as :func:`load_crimson_dump_dataframe_from_content` does; used for the
+    snapshots streamed one at a time from a dump file, or read from a store.
+    """
+    if not isinstance(data, dict):
+        logger.error(f"Not a dump_metrics snapshot: {type(data).__name__}")
+        return "unknown", pd.DataFrame(), {}
 
     if _HAS_OSD_DUMP_PARSERS:
         try:
             osd_type = detect_osd_type(data)
             parser = create_parser(osd_type)
+            metric_groups = parser.get_metric_groups()
+
+            # Crimson: typed columns straight from the parser
+            columns = parser.parse_columns(data)
+            if columns is not None:
+                histo = parser.get_parsed_data()[2]
+                if not len(columns) and not histo:
+                    raise ValueError("No metrics parsed with new parser")
+                return str(osd_type), _columns_to_dataframe(columns, metric_groups), histo
+
             parser.parse(data)
             raw, multi, histo, shards, metrics = parser.get_parsed_data()
             if not raw and not multi and not histo:
                 raise ValueError("No metrics parsed with new parser")
 
-            metric_groups = parser.get_metric_groups()
-
             rows: List[Dict[str, Any]] = []
 
             # Simple (shard → scalar) metrics
@@ -792,7 +850,7 @@ def load_crimson_dump_dataframe_from_content(json_content: str) -> tuple:
                 group = _group_for_metric(metric_name, metric_groups)
                 for entry in entries:
                     row: Dict[str, Any] = {"metric": metric_name, "group": group}
-                    row.update(entry)
+                    row.update((_label_column(k), v) for k, v in entry.items())
                     if "shard" in row and isinstance(row["shard"], str) and row["shard"].isdigit():
                         row["shard"] = int(row["shard"])
                     rows.append(row)
@@ -825,11 +883,123 @@ def load_crimson_dump_dataframe_from_content(json_content: str) -> tuple:
                 "shard": int(shard),
                 "value": float(value),
             }
-            row.update({k: v for k, v in entry.items() if k not in {"shard", "value"}})
+            row.update(
+                (_label_column(k), v) for k, v in entry.items() if k not in {"shard", "value"}
+            )
             rows.append(row)
     return osd_type, pd.DataFrame(rows), {}
 
 
+def load_crimson_dump_dataframes_from_store(store: Any) -> List[tuple]:
+    """
+    Load every sample of a columnar :class:`telemetry_store.TelemetryStore`
+    into the flat DataFrames of :func:`load_crimson_dump_dataframe_from_content`.
+
+    The frames are sliced from the memory-mapped store columns, so no JSON is
+    decoded for the ``dump_metrics`` samples; only the histogram metrics are
+    rebuilt and parsed.  Other payloads (Classic ``perf dump``) go through the
+    JSON loader.
+
+    Returns
+    -------
+    list of (timestamp, osd, osd_type, df, histo)
+        One tuple per sample, *timestamp* being a Unix timestamp.
+    """
+    from telemetry_store import LAYOUT_METRICS
+
+    results: List[tuple] = []
+    if not store.num_samples:
+        return results
+    full = store.to_dataframe(expand_labels=True)
+    hist_rows = full["_field"].notna() if "_field" in full else None
+    snapshots = None
+    bounds = np.searchsorted(
+        full["sample"].to_numpy(), np.arange(store.num_samples + 1)
+    )
+    for sample in range(store.num_samples):
+        info = store.sample_info(sample)
+        ts, osd = info["timestamp"], info["osd"]
+        if info["layout"] != LAYOUT_METRICS:
+            if snapshots is None:
+                snapshots = list(store.snapshots())
+            data = snapshots[sample]["data"]
+            results.append((ts, osd, *load_crimson_dump_dataframe_from_data(data)))
+            continue
+        part = full.iloc[bounds[sample] : bounds[sample + 1]]
+        histo: Dict[str, Any] = {}
+        if hist_rows is not None:
+            in_hist = hist_rows.iloc[bounds[sample] : bounds[sample + 1]]
+            if in_hist.any():
+                if snapshots is None:
+                    snapshots = list(store.snapshots())
+                hist_names = set(part.loc[in_hist, "metric"].astype(str))
+                data = {
+                    "metrics": [
+                        item
+                        for item in snapshots[sample]["data"]["metrics"]
+                        if next(iter(item)) in hist_names
+                    ]
+                }
+                _, _, histo = load_crimson_dump_dataframe_from_data(data)
+                part = part[~in_hist]
+        metric_names = part["metric"].cat.categories
+        probe = {"metrics": [{str(metric_names[0]): {}}]} if len(metric_names) else {}
+        osd_type = detect_osd_type(probe) if _HAS_OSD_DUMP_PARSERS else None
+        if _HAS_OSD_DUMP_PARSERS and osd_type != OSDType.UNKNOWN:
+            groups = create_parser(osd_type).get_metric_groups()
+            group_of = {m: _group_for_metric(m, groups) for m in metric_names}
+        else:
+            group_of = {m: _get_metric_group(m) for m in metric_names}
+        label_cols = [
+            c
+            for c in part.columns
+            if c not in ("sample", "timestamp", "osd", "shard", "metric", "labels", "value")
+            and part[c].notna().any()
+        ]
+        # The dtypes of the frames of the JSON loader (_columns_to_dataframe)
+        metric = part["metric"].cat.remove_unused_categories()
+        metric_groups = [str(group_of[m]) for m in metric.cat.categories]
+        metric = metric.cat.rename_categories([str(m) for m in metric.cat.categories])
+        group_names = list(dict.fromkeys(metric_groups))
+        group_codes = np.array([group_names.index(g) for g in metric_groups], dtype=np.int32)
+        df = pd.DataFrame(
+            {
+                "metric": metric.array,
+                "group": pd.Categorical.from_codes(
+                    group_codes[metric.cat.codes.to_numpy()], categories=group_names
+                ),
+                "shard": part["shard"].to_numpy(),
+                "value": part["value"].to_numpy(),
+            }
+        )
+        for col in label_cols:
+            df[_label_column(col)] = pd.Categorical(part[col].to_numpy())
+        results.append((ts, osd, str(osd_type), df, histo))
+    return results
+
+
+def iter_crimson_dump_dataframes(fp: IO) -> Iterator[tuple]:
+    """
+    Stream the snapshots of a dump file into the flat DataFrames of
+    :func:`load_crimson_dump_dataframe_from_content`, one snapshot at a time.
+
+    The file is either a single ``dump_metrics`` output, or the array of
+    ``{"timestamp", "label", "data"}`` envelopes written over a run, which
+    is decoded one envelope at a time rather than as a whole.
+
+    Yields
+    ------
+    (timestamp, osd_type, df, histo)
+        *timestamp* is that of the envelope (``YYYYMMDD_HHMMSS``), None for
+        a single dump.
+    """
+    for item in json_stream.iter_elements(fp):
+        if isinstance(item, dict) and "data" in item and "metrics" not in item:
+            yield (item.get("timestamp"), *load_crimson_dump_dataframe_from_data(item["data"]))
+        else:
+            yield (None, *load_crimson_dump_dataframe_from_data(item))
+
+
 def load_crimson_dump_dataframe(json_fname: str) -> pd.DataFrame:
     """
     Load a Crimson dump_metrics JSON file into a flat DataFrame.
@@ -970,10 +1140,19 @@ class CrimsonMetricsRateAnalyzer:
                 # Use file modification time as fallback
                 timestamp = os.path.getmtime(fpath)
                 
-            data = load_json(fpath)
-            if data:
-                self.add_snapshot(timestamp, data)
-                logger.info(f"Loaded snapshot from {fpath} at timestamp {timestamp}")
+            # A single dump, or the array of envelopes of a run, streamed
+            # one snapshot at a time
+            for data in iter_json(fpath):
+                snap_ts = timestamp
+                if isinstance(data, dict) and "data" in data and "metrics" not in data:
+                    try:
+                        snap_ts = datetime.strptime(data["timestamp"], "%Y%m%d_%H%M%S").timestamp()
+                    except (KeyError, TypeError, ValueError):
+                        pass
+                    data = data["data"]
+                if data:
+                    self.add_snapshot(snap_ts, data)
+                    logger.info(f"Loaded snapshot from {fpath} at timestamp {snap_ts}")
     
     def _get_metric_value(self, metrics_list: List[Dict], metric_name: str,
                           filters: Optional[Dict[str, str]] = None) -> float:
@@ -26,7 +26,10 @@ Handles three histogram-family metrics emitted by the Crimson OSD:
 
 Input files follow the naming convention:
     <YYYYMMDD>_<HHMMSS>_<N>qd_dump.json
-where N is the I/O queue depth at the time of sampling.
+where N is the I/O queue depth at the time of sampling.  The columnar
+telemetry store written in place of such a file (its
+``<YYYYMMDD>_<HHMMSS>_<N>qd_dump.tlm.json`` manifest) is read as well, one
+record per snapshot.
 
 Files may optionally start with a zip-extraction preamble (plain-text
 lines before the opening ``{``); the parser skips those automatically.
@@ -68,6 +71,8 @@ import numpy as np
 import pandas as pd
 import seaborn as sns
 
+from telemetry_store import MANIFEST_SUFFIX, TelemetryStore
+
 __author__ = "Jose J Palacios-Perez"
 
 logger = logging.getLogger(__name__)
@@ -157,12 +162,34 @@ def _collect_dump_entries(zf: zipfile.ZipFile) -> List[str]:
     Return all zip entry names that look like seastore dump files.
 
     Matches the naming convention ``<YYYYMMDD>_<HHMMSS>_<N>qd_dump.json``
-    regardless of whether they live in a subdirectory inside the archive.
+    regardless of whether they live in a subdirectory inside the archive,
+    and the manifests of the telemetry stores written in their place.  A
+    JSON exported from a store is left out in favour of the store.
     """
-    return sorted(
+    names = [
         name for name in zf.namelist()
-        if re.search(r"\d{8}_\d{6}_\d+qd_dump\.json$", name)
-    )
+        if re.search(r"\d{8}_\d{6}_\d+qd_dump(\.tlm)?\.json$", name)
+    ]
+    exported = {
+        TelemetryStore.prefix_of(name) + ".json"
+        for name in names if name.endswith(MANIFEST_SUFFIX)
+    }
+    return sorted(name for name in names if name not in exported)
+
+
+def _store_records(store: TelemetryStore, path: str) -> List["SampleRecord"]:
+    """
+    One :class:`SampleRecord` per snapshot of *store*, timestamped by the
+    snapshot; the queue depth is taken from the store name *path*.
+    """
+    records = []
+    for snap in store.snapshots():
+        if not isinstance(snap["data"], dict):
+            continue
+        rec = SampleRecord(path)
+        rec.parse(snap["data"], datetime.fromtimestamp(snap["timestamp"]))
+        records.append(rec)
+    return records
 
 
 def _parse_filename(path: str) -> Tuple[Optional[datetime], Optional[int]]:
@@ -215,8 +242,14 @@ class SampleRecord:
         #                   sum, count, mean_replays, buckets }
         self.conflict: List[Dict[str, Any]] = []
 
-    def parse(self, data: Dict[str, Any]) -> None:
+    def parse(self, data: Dict[str, Any], timestamp: Optional[datetime] = None) -> None:
+        """
+        Parse the ``dump_metrics`` payload *data*; *timestamp* (that of a
+        store snapshot) overrides the one in the file name.
+        """
         ts, qd = _parse_filename(self.path)
+        if timestamp is not None:
+            ts = timestamp
         self.timestamp = ts
         self.qd = qd
         self.label = f"{ts.strftime('%H:%M:%S') if ts else self.basename} QD={qd or '?'}"
@@ -689,6 +722,15 @@ class SeastoreHistogramAnalyzer:
     def load(self) -> None:
         """Load and parse all input files from the filesystem."""
         for path in self.file_paths:
+            if path.endswith(MANIFEST_SUFFIX):
+                try:
+                    records = _store_records(TelemetryStore.open(path), path)
+                except (OSError, ValueError) as exc:
+                    logger.error("Cannot read the store %s: %s", path, exc)
+                    continue
+                self.samples.extend(records)
+                logger.info("Loaded %d snapshots from %s", len(records), path)
+                continue
             data = _load_json_tolerant(path)
             if data is None:
                 continue
@@ -707,7 +749,8 @@ class SeastoreHistogramAnalyzer:
         Load and parse all seastore dump JSON files from *zip_path*.
 
         Entries are selected by :func:`_collect_dump_entries` (files whose
-        name matches ``YYYYMMDD_HHMMSS_<N>qd_dump.json``).  The parsed
+        name matches ``YYYYMMDD_HHMMSS_<N>qd_dump.json``, or the telemetry
+        stores written in their place).  The parsed
         records are appended to :attr:`samples` and sorted afterwards, so
         this method can be called alongside (or instead of) :meth:`load`.
         """
@@ -723,10 +766,21 @@ class SeastoreHistogramAnalyzer:
                 return
             logger.info("Found %d dump entries in %s", len(entries), zip_path)
             for entry in entries:
-                raw = zf.read(entry)
                 # Use only the basename as the logical path so that
                 # _parse_filename() can extract timestamp and QD from it.
                 basename = os.path.basename(entry)
+                if entry.endswith(MANIFEST_SUFFIX):
+                    try:
+                        records = _store_records(
+                            TelemetryStore.open_zip(zf, entry), basename
+                        )
+                    except (KeyError, OSError, ValueError) as exc:
+                        logger.error("Cannot read the store %s: %s", entry, exc)
+                        continue
+                    self.samples.extend(records)
+                    logger.info("Loaded %d snapshots from %s", len(records), basename)
+                    continue
+                raw = zf.read(entry)
                 data = _parse_json_bytes(raw, basename)
                 if data is None:
                     continue
@@ -919,7 +973,8 @@ def _build_parser() -> argparse.ArgumentParser:
         nargs="*",
         metavar="FILE",
         help=(
-            "One or more dump JSON files (YYYYMMDD_HHMMSS_<N>qd_dump.json). "
+            "One or more dump JSON files (YYYYMMDD_HHMMSS_<N>qd_dump.json), "
+            "or the .tlm.json manifests of their telemetry stores. "
             "May be omitted when --archive is supplied."
         ),
     )
@@ -929,7 +984,8 @@ def _build_parser() -> argparse.ArgumentParser:
         metavar="ARCHIVE.zip",
         help=(
             "Benchmark archive zip from which seastore dump JSON files are "
-            "read automatically (files matching YYYYMMDD_HHMMSS_<N>qd_dump.json)."
+            "read automatically (files matching YYYYMMDD_HHMMSS_<N>qd_dump.json, "
+            "or their telemetry stores)."
         ),
     )
     p.add_argument(
@@ -0,0 +1,645 @@
+#!/usr/bin/env python3
+"""
+Fold ``perf script`` output into flamegraph stacks in a single pass.
+
+This replaces the ``perf script | c++filt | stackcollapse-perf.pl | sed |
+pp_crimson_flamegraphs.py`` pipeline of the flamegraphs: the output of
+``perf script`` is streamed once, and for each sample
+
+  - the symbols are demangled by a single ``c++filt`` coprocess, each
+    symbol once (:class:`Demangler`), and tidied as ``stackcollapse-perf.pl``
+    does (offsets and argument lists removed),
+  - the thread names are coalesced (``reactor-N`` and ``perf-crimson-ms`` to
+    ``reactor``, ``msgr-worker-N`` to ``msgr-worker``),
+  - the tall towers of future/promise continuations are coalesced as
+    :func:`pp_crimson_flamegraphs.compact_line` does, each function name
+    appearing once followed by its number of repetitions,
+
+and the resulting stack is added to a prefix trie (:class:`StackTrie`).  From
+the trie the folded stacks are written for ``flamegraph.pl``, along with a
+table of the top functions by self and total samples.
+
+A recording taken over a whole run (``perf record -k realtime``) is split by
+:class:`IntervalFolder` into one profile per FIO output, over the workload
+intervals of :mod:`fio_job_parser`: :func:`fold_perf_slices` writes one
+folded profile per point of a response curve, showing how the profile shifts
+as the iodepth climbs.
+
+Two folded files (e.g. Classic vs Crimson, or LRU vs 2Q) can be compared with
+:func:`diff_folded`, which writes the two-column input of a differential
+flamegraph, and :func:`diff_table`, which ranks the functions by the change
+of their share of the samples.
+
+Usage:
+
+    # Fold a perf.data file, printing the top 20 functions
+    perf_folder.py -i osd_perf.out -o osd_perf.folded -t 20
+
+    # One folded profile per FIO output of a continuous recording
+    perf_folder.py -i run_perf.data -l run_1job_*io_*.json -o run_slices.json
+
+    # Differential folded stacks (and top changes) between two runs
+    perf_folder.py -d classic.folded crimson.folded -n -o diff.folded -t 20
+"""
+
+import argparse
+import bisect
+import json
+import logging
+import os
+import re
+import subprocess
+import sys
+import tempfile
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+__author__ = "Jose J Palacios-Perez"
+
+logger = logging.getLogger(__name__)
+
+# Thread names coalesced in the flamegraphs
+THREAD_RENAMES = [
+    (re.compile(r"perf-crimson-ms"), "reactor"),
+    (re.compile(r"reactor-[0-9]+"), "reactor"),
+    (re.compile(r"msgr-worker-[0-9]+"), "msgr-worker"),
+]
+
+# Sample header: "comm pid[/tid] [cpu] time: [period] event:"
+re_header = re.compile(r"^(\S.*?)\s+(\d+)(?:/\d+)?\s+")
+re_time = re.compile(r"\s(\d+\.\d+):")
+# Stack frame: "addr symbol+0xoff (dso)"
+re_frame = re.compile(r"^\s*([0-9a-fA-F]+)\s+(.*?)\s*\((.*)\)$")
+re_offset = re.compile(r"\+0x[0-9a-fA-F]+$")
+# Repetition count appended by the coalescing
+re_repeats = re.compile(r"\[\d+\]$")
+
+
+class Demangler:
+    """
+    Demangle C++ symbols with a ``c++filt`` coprocess, caching the result of
+    every symbol; symbols are returned as they are if ``c++filt`` is missing.
+    """
+
+    def __init__(self, cmd: str = "c++filt") -> None:
+        self.cache: Dict[str, str] = {}
+        self._proc: Optional[subprocess.Popen] = None
+        try:
+            self._proc = subprocess.Popen(
+                [cmd],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                text=True,
+                bufsize=1,
+            )
+        except OSError as e:
+            logger.warning(f"== {cmd} not available, symbols not demangled: {e} ==")
+
+    def __call__(self, symbol: str) -> str:
+        if not symbol.startswith("_Z") or self._proc is None:
+            return symbol
+        name = self.cache.get(symbol)
+        if name is None:
+            self._proc.stdin.write(symbol + "\n")
+            name = self._proc.stdout.readline().rstrip("\n") or symbol
+            self.cache[symbol] = name
+        return name
+
+    def close(self) -> None:
+        if self._proc is not None:
+            self._proc.stdin.close()
+            self._proc.wait()
+            self._proc = None
+
+    def __enter__(self) -> "Demangler":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+def tidy_symbol(name: str) -> str:
+    """Strip the argument list of a (demangled) symbol, as stackcollapse-perf.pl."""
+    name = name.replace(";", ":")
+    if not re.search(r"\.\(.*\)\.", name):
+        name = re.sub(r"\((?!anonymous namespace\)).*", "", name)
+    return name.replace('"', "").replace("'", "")
+
+
+def rename_threads(name: str) -> str:
+    for regex, repl in THREAD_RENAMES:
+        name = regex.sub(repl, name)
+    return name
+
+
+def compact_frames(frames: Iterable[str]) -> List[str]:
+    """
+    Coalesce repeated function names of a stack: each name is kept once, in
+    order of first appearance, followed by ``[n]``, its number of repetitions.
+    """
+    repeats: Dict[str, int] = {}
+    for frame in frames:
+        frame = frame.strip()
+        repeats[frame] = repeats[frame] + 1 if frame in repeats else 0
+    return [f"{frame}[{n}]" for frame, n in repeats.items()]
+
+
+class _Node:
+    __slots__ = ("children", "self_count", "total")
+
+    def __init__(self) -> None:
+        self.children: Dict[str, "_Node"] = {}
+        self.self_count = 0
+        self.total = 0
+
+
+class StackTrie:
+    """
+    Prefix trie of stacks (root frame first), with the samples ending at each
+    node (self) and going through it (total).
+    """
+
+    def __init__(self) -> None:
+        self.root = _Node()
+
+    @property
+    def total(self) -> int:
+        return self.root.total
+
+    def add(self, frames: Iterable[str], count: int = 1) -> None:
+        node = self.root
+        node.total += count
+        for frame in frames:
+            child = node.children.get(frame)
+            if child is None:
+                child = node.children[frame] = _Node()
+            child.total += count
+            node = child
+        node.self_count += count
+
+    def folded(self) -> Iterator[Tuple[str, int]]:
+        """The ``(stack, samples)`` of every stack, as in a folded file."""
+        stack: List[str] = []
+
+        def walk(node: _Node) -> Iterator[Tuple[str, int]]:
+            if node.self_count and stack:
+                yield ";".join(stack), node.self_count
+            for frame, child in node.children.items():
+                stack.append(frame)
+                yield from walk(child)
+                stack.pop()
+
+        return walk(self.root)
+
+    def function_table(self) -> Dict[str, Dict[str, int]]:
+        """
+        Samples of each function name (without the repetition count): *self*
+        where it is the leaf frame, *total* where it is anywhere on the stack.
+        """
+        table: Dict[str, Dict[str, int]] = {}
+        path: Dict[str, int] = {}
+
+        def walk(node: _Node) -> None:
+            for frame, child in node.children.items():
+                name = re_repeats.sub("", frame)
+                entry = table.setdefault(name, {"self": 0, "total": 0})
+                entry["self"] += child.self_count
+                # Only the outermost occurrence counts towards the total
+                if not path.get(name):
+                    entry["total"] += child.total
+                path[name] = path.get(name, 0) + 1
+                walk(child)
+                path[name] -= 1
+
+        walk(self.root)
+        return table
+
+    def top(self, n: int = 20, key: str = "self") -> List[Dict[str, Any]]:
+        """The *n* functions with the most *key* (``self`` or ``total``) samples."""
+        total = self.total or 1
+        rows = [
+            {
+                "function": name,
+                "self": entry["self"],
+                "total": entry["total"],
+                "self_pct": 100.0 * entry["self"] / total,
+                "total_pct": 100.0 * entry["total"] / total,
+            }
+            for name, entry in self.function_table().items()
+        ]
+        rows.sort(key=lambda row: row[key], reverse=True)
+        return rows[:n]
+
+
+class PerfScriptFolder:
+    """
+    Fold the text output of ``perf script`` into a :class:`StackTrie`, one
+    line at a time.
+
+    Parameters
+    ----------
+    demangle : callable, optional
+        Demangles a symbol (e.g. a :class:`Demangler`); identity by default.
+    compact : bool
+        Coalesce the repeated frames of each stack (:func:`compact_frames`).
+    """
+
+    def __init__(self, demangle=None, compact: bool = True) -> None:
+        self.demangle = demangle or (lambda symbol: symbol)
+        self.compact = compact
+        self.trie = StackTrie()
+        self.samples = 0
+        self._names: Dict[Tuple[str, str], str] = {}
+        self._comm: Optional[str] = None
+        self._ts: Optional[float] = None
+        self._frames: List[str] = []
+
+    def _tries(self, ts: Optional[float]) -> List[StackTrie]:
+        """The tries a sample taken at *ts* is added to."""
+        return [self.trie]
+
+    def _name(self, symbol: str, dso: str) -> str:
+        key = (symbol, dso)
+        name = self._names.get(key)
+        if name is None:
+            raw = re_offset.sub("", symbol)
+            if raw in ("", "[unknown]") and dso not in ("", "[unknown]"):
+                name = f"[{os.path.basename(dso)}]"
+            else:
+                name = tidy_symbol(self.demangle(raw))
+            name = self._names[key] = rename_threads(name)
+        return name
+
+    def _flush(self) -> None:
+        if self._comm is not None:
+            stack = [self._comm] + self._frames[::-1]
+            if self.compact:
+                stack = compact_frames(stack)
+            for trie in self._tries(self._ts):
+                trie.add(stack)
+            self.samples += 1
+        self._comm = None
+        self._ts = None
+        self._frames = []
+
+    def feed(self, line: str) -> None:
+        line = line.rstrip("\n")
+        if not line.strip():
+            self._flush()
+        elif line.startswith("#"):
+            return
+        elif line[0].isspace():
+            if self._comm is not None:
+                match = re_frame.match(line)
+                if match:
+                    self._frames.append(self._name(match.group(2), match.group(3)))
+        else:
+            self._flush()
+            match = re_header.match(line)
+            if match:
+                self._comm = rename_threads(match.group(1).replace(" ", "_"))
+                time_match = re_time.search(line, match.end(2))
+                self._ts = float(time_match.group(1)) if time_match else None
+
+    def fold(self, lines: Iterable[str]) -> StackTrie:
+        for line in lines:
+            self.feed(line)
+        self._flush()
+        return self.trie
+
+
+class IntervalFolder(PerfScriptFolder):
+    """
+    Fold ``perf script`` output into one :class:`StackTrie` per time slice,
+    e.g. the measurement window of each point of a response curve.  The
+    samples must have been recorded with the same clock as the slices (``perf
+    record -k realtime`` for Unix timestamps); a sample within several
+    (overlapping) slices is added to each, samples outside every slice are
+    only counted.
+
+    Parameters
+    ----------
+    slices : list of (key, start, end)
+        The slices, *start* and *end* in seconds.
+    """
+
+    def __init__(
+        self,
+        slices: List[Tuple[str, float, float]],
+        demangle=None,
+        compact: bool = True,
+    ) -> None:
+        super().__init__(demangle, compact)
+        self.slices = sorted(slices, key=lambda s: s[1])
+        self.tries: Dict[str, StackTrie] = {key: StackTrie() for key, _, _ in self.slices}
+        self.outside = 0
+        self._starts = [start for _, start, _ in self.slices]
+        # Latest end of the slices up to each one, to stop the search early
+        self._max_end: List[float] = []
+        for _, _, end in self.slices:
+            self._max_end.append(max(end, self._max_end[-1]) if self._max_end else end)
+
+    def _tries(self, ts: Optional[float]) -> List[StackTrie]:
+        tries = []
+        if ts is not None:
+            i = bisect.bisect_right(self._starts, ts) - 1
+            while i >= 0 and self._max_end[i] >= ts:
+                key, _, end = self.slices[i]
+                if end >= ts:
+                    tries.append(self.tries[key])
+                i -= 1
+        if not tries:
+            self.outside += 1
+        return tries
+
+
+def fio_slices(fio_jsons: Iterable[str]) -> List[Tuple[str, float, float]]:
+    """
+    ``(fio_json, start, end)`` of the measurement window of each FIO JSON
+    output, from the :class:`fio_job_parser.WorkloadInterval` of its jobs.
+    """
+    from fio_job_parser import FioJobParser
+
+    slices = []
+    for fio_json in fio_jsons:
+        try:
+            with open(fio_json) as f:
+                intervals = FioJobParser().parse_fio_json(f.read())
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"== No workload interval in {fio_json}: {e} ==")
+            continue
+        if intervals:
+            slices.append(
+                (
+                    fio_json,
+                    min(i.start_time for i in intervals),
+                    max(i.end_time for i in intervals),
+                )
+            )
+    return slices
+
+
+def slice_folded_name(fio_json: str) -> str:
+    """Folded profile of the slice of *fio_json*."""
+    return re.sub(r"\.json$", "", fio_json) + "_perf.folded"
+
+
+def write_folded(trie: StackTrie, out: IO[str]) -> None:
+    for stack, count in trie.folded():
+        out.write(f"{stack} {count}\n")
+
+
+def load_folded(lines: Iterable[str]) -> StackTrie:
+    """A :class:`StackTrie` from the lines of a folded file."""
+    trie = StackTrie()
+    for line in lines:
+        stack, _, count = line.rstrip("\n").rpartition(" ")
+        if stack and count.isdigit():
+            trie.add(stack.split(";"), int(count))
+    return trie
+
+
+def diff_folded(
+    a: StackTrie, b: StackTrie, normalize: bool = False
+) -> Iterator[Tuple[str, int, int]]:
+    """
+    ``(stack, samples in a, samples in b)`` of every stack in either trie,
+    the input of a differential flamegraph (as ``difffolded.pl``).  With
+    *normalize*, the samples of *a* are scaled to the total of *b*.
+    """
+    counts: Dict[str, List[int]] = {}
+    for i, trie in enumerate((a, b)):
+        for stack, count in trie.folded():
+            counts.setdefault(stack, [0, 0])[i] += count
+    scale = b.total / a.total if normalize and a.total else 1.0
+    for stack, (ca, cb) in counts.items():
+        yield stack, int(round(ca * scale)), cb
+
+
+def diff_table(
+    a: StackTrie, b: StackTrie, n: int = 20, key: str = "self"
+) -> List[Dict[str, Any]]:
+    """
+    The *n* functions whose share of the samples (``self`` or ``total``)
+    changed the most from *a* to *b*, in percentage points.
+    """
+    ta, tb = a.function_table(), b.function_table()
+    totals = (a.total or 1, b.total or 1)
+    rows = []
+    for name in set(ta) | set(tb):
+        row: Dict[str, Any] = {"function": name}
+        for kind in ("self", "total"):
+            pa = 100.0 * ta.get(name, {}).get(kind, 0) / totals[0]
+            pb = 100.0 * tb.get(name, {}).get(kind, 0) / totals[1]
+            row[f"{kind}_pct_a"] = pa
+            row[f"{kind}_pct_b"] = pb
+            row[f"{kind}_delta"] = pb - pa
+        rows.append(row)
+    rows.sort(key=lambda row: abs(row[f"{key}_delta"]), reverse=True)
+    return rows[:n]
+
+
+def fold_perf_data(
+    perf_file: str, compact: bool = True, folder: Optional[PerfScriptFolder] = None
+) -> PerfScriptFolder:
+    """
+    Fold the output of ``perf script`` on the perf data *perf_file*, streamed,
+    with *folder* (a new :class:`PerfScriptFolder` by default).
+    """
+    with Demangler() as demangle:
+        if folder is None:
+            folder = PerfScriptFolder(demangle, compact)
+        else:
+            folder.demangle = demangle
+        proc = subprocess.Popen(
+            ["perf", "script", "-i", perf_file],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            errors="replace",
+        )
+        folder.fold(proc.stdout)
+        proc.wait()
+    return folder
+
+
+def fold_perf(
+    perf_file: str, folded: str, table: Optional[str] = None, top: int = 20
+) -> int:
+    """
+    Fold the stacks of the perf data *perf_file* into *folded*, and write
+    the top *top* functions as JSON to *table*; returns the samples folded.
+    """
+    folder = fold_perf_data(perf_file)
+    trie = folder.trie
+    with open(folded, "w") as f:
+        write_folded(trie, f)
+    if table:
+        with open(table, "w") as f:
+            json.dump(
+                {
+                    "samples": trie.total,
+                    "top_self": trie.top(top, "self"),
+                    "top_total": trie.top(top, "total"),
+                },
+                f,
+                indent=2,
+            )
+    return folder.samples
+
+
+def fold_perf_slices(
+    perf_file: str, fio_jsons: List[str], index: str, top: int = 20
+) -> List[str]:
+    """
+    Split the samples of the perf data *perf_file*, recorded continuously
+    over a run, per FIO JSON output in *fio_jsons*, writing the folded
+    profile of each (:func:`slice_folded_name`, possibly empty) and an
+    *index* JSON with the window, samples and top functions of each slice.
+    Returns the folded files.
+    """
+    slices = fio_slices(fio_jsons)
+    folder = IntervalFolder(slices)
+    fold_perf_data(perf_file, folder=folder)
+    entries = []
+    for key, start, end in folder.slices:
+        trie = folder.tries[key]
+        with open(slice_folded_name(key), "w") as f:
+            write_folded(trie, f)
+        entries.append(
+            {
+                "fio_json": key,
+                "folded": slice_folded_name(key),
+                "start": start,
+                "end": end,
+                "samples": trie.total,
+                "top_self": trie.top(top, "self"),
+            }
+        )
+    with open(index, "w") as f:
+        json.dump(
+            {
+                "perf_file": perf_file,
+                "samples": folder.samples,
+                "outside": folder.outside,
+                "slices": entries,
+            },
+            f,
+            indent=2,
+        )
+    logger.info(
+        f"== {perf_file}: {folder.samples} samples in {len(entries)} slices,"
+        f" {folder.outside} outside =="
+    )
+    return [entry["folded"] for entry in entries]
+
+
+def _print_table(
+    rows: List[Dict[str, Any]], columns: List[str], out: IO[str]
+) -> None:
+    out.write("\t".join(columns) + "\n")
+    for row in rows:
+        out.write(
+            "\t".join(
+                f"{row[c]:.2f}" if isinstance(row[c], float) else str(row[c])
+                for c in columns
+            )
+            + "\n"
+        )
+
+
+def main(argv):
+    examples = """
+    Examples:
+    # Fold a perf.data file from a Crimson OSD, with the top 20 functions
+    #  %prog -i osd_perf.out -o osd_perf.folded -t 20
+    # Fold perf script output read from stdin
+    #  perf script -i osd_perf.out | %prog -s - > osd_perf.folded
+    # One folded profile per FIO output, with an index of the slices
+    #  %prog -i run_perf.data -l run_1job_1io.json run_1job_2io.json -o run_slices.json
+    # Differential folded stacks between two runs, normalised
+    #  %prog -d classic.folded crimson.folded -n -o diff.folded
+    """
+    parser = argparse.ArgumentParser(
+        description="Fold perf script output into flamegraph stacks",
+        epilog=examples,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("-i", "--input", type=str, help="perf.data file to fold")
+    source.add_argument(
+        "-s", "--script", type=str, help="perf script output to fold ('-' for stdin)"
+    )
+    source.add_argument(
+        "-d", "--diff", type=str, nargs=2, metavar=("A", "B"),
+        help="Two folded files to compare",
+    )
+    parser.add_argument(
+        "-l", "--slices", type=str, nargs="+", metavar="FIO_JSON",
+        help="With -i, fold one profile per FIO JSON output (-o is the index)",
+    )
+    parser.add_argument("-o", "--output", type=str, help="Output folded file", default="-")
+    parser.add_argument(
+        "-t", "--top", type=int, default=0, help="Print the top N functions"
+    )
+    parser.add_argument(
+        "-n", "--normalize", action="store_true",
+        help="Scale the samples of A to the total of B",
+    )
+    parser.add_argument(
+        "--no-compact", action="store_true",
+        help="Do not coalesce the repeated frames of the stacks",
+    )
+    parser.add_argument(
+        "-v", "--verbose", action="store_true", help="True to enable verbose logging mode"
+    )
+    options = parser.parse_args(argv)
+
+    logLevel = logging.DEBUG if options.verbose else logging.INFO
+    with tempfile.NamedTemporaryFile(dir="/tmp", delete=False) as tmpfile:
+        logging.basicConfig(filename=tmpfile.name, encoding="utf-8", level=logLevel)
+    logger.debug(f"Got options: {options}")
+
+    out = sys.stdout if options.output == "-" else open(options.output, "w")
+    # The tables go to stderr when the stacks are written to stdout
+    table_out = sys.stderr if out is sys.stdout else sys.stdout
+    try:
+        if options.diff:
+            with open(options.diff[0]) as fa, open(options.diff[1]) as fb:
+                a, b = load_folded(fa), load_folded(fb)
+            for stack, ca, cb in diff_folded(a, b, options.normalize):
+                out.write(f"{stack} {ca} {cb}\n")
+            if options.top:
+                _print_table(
+                    diff_table(a, b, options.top),
+                    ["function", "self_pct_a", "self_pct_b", "self_delta",
+                     "total_pct_a", "total_pct_b", "total_delta"],
+                    table_out,
+                )
+            return
+        if options.input and options.slices:
+            index = options.output if out is not sys.stdout else f"{options.input}_slices.json"
+            if out is not sys.stdout:
+                out.close()
+                out = sys.stdout
+            fold_perf_slices(options.input, options.slices, index)
+            return
+        if options.input:
+            trie = fold_perf_data(options.input, not options.no_compact).trie
+        else:
+            src = sys.stdin if options.script == "-" else open(options.script)
+            with Demangler() as demangle:
+                trie = PerfScriptFolder(demangle, not options.no_compact).fold(src)
+        write_folded(trie, out)
+        if options.top:
+            _print_table(
+                trie.top(options.top),
+                ["function", "self", "total", "self_pct", "total_pct"],
+                table_out,
+            )
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -40,6 +40,7 @@ import seaborn as sns
 from typing import List, Dict, Any
 from common import load_json, save_json
 from collections import defaultdict
+from telemetry_store import MANIFEST_SUFFIX, TelemetryStore, format_timestamp
 
 __author__ = "Jose J Palacios-Perez"
 
@@ -211,6 +212,33 @@ def get_longest_prefixes(words: list[str]) -> Dict[str,Any]: #int:
     # #     print(f"New longest sequence found with prefix '{prefix}' of length {res}")
     # return dict(sorted(wp.items(), key=lambda item: item[1]))
 
+def load_dump_entries(path: str) -> Any:
+    """
+    Load the dump *path*: the legacy JSON (an array of ``{"timestamp",
+    "label", "data"}`` envelopes, or a single payload), or the columnar
+    telemetry store when given its .tlm.json manifest, whose snapshots are
+    returned as envelopes with ``YYYYMMDD_HHMMSS`` timestamps.
+    """
+    if path.endswith(MANIFEST_SUFFIX):
+        return [
+            dict(snap, timestamp=format_timestamp(snap["timestamp"]))
+            for snap in TelemetryStore.open(path).snapshots()
+        ]
+    return load_json(path)
+
+
+def find_dump_files(suffix: str) -> List[str]:
+    """
+    The ``*<suffix>.json`` dumps in the current directory, and the
+    ``*<suffix>.tlm.json`` stores written in their place; a JSON exported
+    from a store is skipped in favour of the store.
+    """
+    stores = glob.glob(f"*{suffix}{MANIFEST_SUFFIX}")
+    exported = {TelemetryStore.prefix_of(m) + ".json" for m in stores}
+    files = [f for f in glob.glob(f"*{suffix}.json") if f not in exported]
+    return sorted(files + stores)
+
+
 class PerfMetric(ABC):
     """
     Abstract base class for performance metrics
@@ -1632,12 +1660,13 @@ class PerfMetricEntry(object):
     # These are intended for a small sub class, and probably provisional
     def load_perf_dump(self):
         """
-        Load the perf_dump .json input file
+        Load the perf_dump .json input file, or the columnar telemetry store
+        when given its .tlm.json manifest
         """
         try:
             # List of dicts
-            self.perf_dump = load_json(self.options.input)
-        except IOError as e:
+            self.perf_dump = load_dump_entries(self.options.input)
+        except (IOError, ValueError) as e:
             raise argparse.ArgumentTypeError(str(e))
         # json_files = self.perf_dump.get("input", [])
         self.perf_data = {}
@@ -1696,34 +1725,30 @@ class PerfMetricEntry(object):
 
     def load_perf_dumps(self):
         """
-        Load the *_dump .json files available in the current directory, this is
-        a special case that we also want to load the time sequence of the
-        reactor_utilization, so we need to keep the data as a dictionary,
+        Load the *_dump .json files (or their columnar stores) available in the
+        current directory, this is a special case that we also want to load
+        the time sequence of the reactor_utilization, so we need to keep the
+        data as a dictionary,
         """
         #list_dumps = []
         # Load the *_dump.json files
-        files = glob.glob("*_dump.json")
+        files = find_dump_files("_dump")
         self.perf_data = {}
         for f in files:
             try:
-                perf_dump = load_json(f)
-            except IOError as e:
+                entries = load_dump_entries(f)
+            except (IOError, ValueError) as e:
                 raise argparse.ArgumentTypeError(str(e))
             logger.info(f"Loaded {f}")
+            if isinstance(entries, list):
+                # One sample per envelope, keyed by its own timestamp
+                for entry in entries:
+                    self._load_dump_sample(entry.get("timestamp", ""), entry.get("data", {}))
+                continue
             ts = re.search(r"(\d{8}_\d{6})", f)
             if ts:
                 ts = ts.group(1) # timestamp extracted from the filename
-            # Get a dataframe from the perf_dump, the keys are the metric
-            # names, the values are the dataframes with the attributes as
-            # columns 
-            #prefixes = get_longest_prefixes( [ m.keys() for m in perf_dump.get("metrics", []) ] )
-            all_keys = []
-            for m in perf_dump.get("metrics", []):
-                #logger.info(f"Metric keys for timestamp {ts}: {m.keys()}")
-                all_keys.extend(m.keys())
-            prefixes = get_longest_prefixes( all_keys )
-            logger.info(f"Prefixes to form groups for metrics: {ts} has {pp.pformat(dict(prefixes))}")
-            self.perf_data[ts] = self.filter_metrics(perf_dump)
+            self._load_dump_sample(ts, entries)
 
         for ts in self.perf_data:
             logger.info(f"Timestamp {ts} has {len(self.perf_data[ts])} shards")
@@ -1731,6 +1756,23 @@ class PerfMetricEntry(object):
                 self.sample_size = len(self.perf_data[ts])
         logger.info(f"perf_data:\n{pp.pformat(self.perf_data)}")
 
+    def _load_dump_sample(self, ts: str, perf_dump: Dict[str, Any]) -> None:
+        """
+        Filter the metrics of the dump_metrics payload *perf_dump* into
+        self.perf_data[ts]
+        """
+        # Get a dataframe from the perf_dump, the keys are the metric
+        # names, the values are the dataframes with the attributes as
+        # columns 
+        #prefixes = get_longest_prefixes( [ m.keys() for m in perf_dump.get("metrics", []) ] )
+        all_keys = []
+        for m in perf_dump.get("metrics", []):
+            #logger.info(f"Metric keys for timestamp {ts}: {m.keys()}")
+            all_keys.extend(m.keys())
+        prefixes = get_longest_prefixes( all_keys )
+        logger.info(f"Prefixes to form groups for metrics: {ts} has {pp.pformat(dict(prefixes))}")
+        self.perf_data[ts] = self.filter_metrics(perf_dump)
+
 
     def _load_generic_stats(self, schema: str, data_list: List[Dict[str, Any]]) -> None:
         """
@@ -1778,23 +1820,24 @@ class PerfMetricEntry(object):
 
     def load_stats_dump(self):
         """
-        Load the stats_dump .json input file according to their schema:
+        Load the stats_dump .json input files (or their columnar stores)
+        according to their schema:
         """
         schemas = {
             "seastar": {
                 # "ext": re.compile(r"_dump_seastar_stats\.json$"),
-                "ext": "_dump_seastar_stats.json",
+                "ext": "_dump_seastar_stats",
                 "cb": self._load_seastar_stats,
             },
             "tcmalloc": {
                 # "ext": re.compile(r"_dump_tcmalloc_stats\.json$"),
-                "ext": "_dump_tcmalloc_stats.json",
+                "ext": "_dump_tcmalloc_stats",
                 "cb": self._load_tcmalloc_stats,
             },
         }
         # Traverse the schemnas to find the matching files, load them accordingly
         for schema in schemas:
-            file_list = glob.glob("*" + schemas[schema]["ext"])
+            file_list = find_dump_files(schemas[schema]["ext"])
             # Sort the files according to
             # file_list.sort(key=lambda x: int(re.match(self.DEFAULT_REGEX, x).group(1)) if re.match(self.DEFAULT_REGEX, x) else 0)
             self.stats_dump[schema] = {}
@@ -1803,8 +1846,8 @@ class PerfMetricEntry(object):
                 logger.info(f"Loading {schema} stats from {filename}")
                 try:
                     # self.stats_dump[schema].append(schemas[schema]["cb"]( load_json(filename) ))
-                    schemas[schema]["cb"](load_json(filename))
-                except IOError as e:
+                    schemas[schema]["cb"](load_dump_entries(filename))
+                except (IOError, ValueError) as e:
                     raise argparse.ArgumentTypeError(str(e))
 
     def _plot_stats(self):
@@ -15,16 +15,21 @@ import pprint
 import zipfile
 from io import StringIO
 from collections import defaultdict
-from datetime import datetime, timezone
+from datetime import datetime
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 
 # import seaborn.objects as so
-from typing import Dict, Any, List
-from pp_diskstat import load_diskstat_dataframe_from_content
+from typing import Dict, Any, List, Optional, Tuple
+from pp_diskstat import (
+    iter_diskstat_series_from_content,
+    load_diskstat_dataframe_from_content,
+)
 from parse_crimson_dump_metrics import (
     load_crimson_dump_dataframe_from_content,  # returns (osd_type, df, histo_dict)
+    iter_crimson_dump_dataframes,  # yields (timestamp, osd_type, df, histo_dict)
+    load_crimson_dump_dataframes_from_store,
     CrimsonMetricsRateAnalyzer,
     CrimsonDumpMetricsParser,
 )
@@ -51,6 +56,14 @@ from parse_seastore_histograms import (
 # (osd_type_str, flat_df, histogram_dict)
 from perf_stats import load_perf_stat_dataframe_from_content
 from fio_job_parser import FioJobParser, WorkloadInterval
+from fio_interval_logs import LOG_RE, load_fio_logs
+from telemetry_store import MANIFEST_SUFFIX, TelemetryStore, format_timestamp
+from steady_state import mser_truncation
+from osd_rate_analyzers import (
+    compare_osd_rates,
+    create_rate_analyzers_from_store,
+    generate_osd_comparison_report,
+)
 # import sys
 # import glob
 # import subprocess
@@ -250,8 +263,15 @@ class PerfReporter(object):
     _DISKSTAT_GROUPS: Dict[str, list] = {
         "io_completed": ["reads_completed", "writes_completed"],
         "io_time_ms": ["read_time_ms", "write_time_ms"],
+        # Per-interval metrics of the *_diskstats.json series
+        "iops": ["read_iops", "write_iops"],
+        "await_ms": ["read_await_ms", "write_await_ms"],
+        "util": ["util", "queue_depth"],
     }
 
+    # Number of metrics listed in the OSD imbalance tables, most imbalanced first
+    _OSD_IMBALANCE_TOP = 20
+
     def get_target_name(self, name: str) -> str:
         """
         Get the name of the generated target file, always assuming the figures
@@ -287,26 +307,100 @@ class PerfReporter(object):
         """
         # debug_printed = False
         telemetry = self.ds_list[name].setdefault("telemetry", defaultdict(list))
+        # Columnar stores of OSD dumps supersede their exported JSON
+        stores = [
+            m
+            for m in archive.namelist()
+            if re.search(r"_dump" + re.escape(MANIFEST_SUFFIX) + "$", m)
+        ]
+        exported = {TelemetryStore.prefix_of(m) + ".json" for m in stores}
+        for member in stores:
+            logger.info(f"Run {name}: Loading telemetry store {member}")
+            try:
+                store = TelemetryStore.open_zip(archive, member)
+                samples = load_crimson_dump_dataframes_from_store(store)
+            except Exception as e:
+                logger.error(f"Error reading telemetry store {member}: {e}")
+                exported.discard(TelemetryStore.prefix_of(member) + ".json")
+                continue
+            osds = sorted({osd for _, osd, _, _, _ in samples})
+            if len(osds) > 1:
+                logger.info(f"Run {name}: Comparing rates of OSDs {osds}")
+                try:
+                    self.ds_list[name].setdefault("osd_comparison", {})[member] = (
+                        compare_osd_rates(create_rate_analyzers_from_store(store))
+                    )
+                except Exception as e:
+                    logger.error(f"Error comparing OSD rates in {member}: {e}")
+            for ts, osd, osd_type, df, histo in samples:
+                if df is None or df.empty:
+                    continue
+                entry_record: Dict[str, Any] = {
+                    "timestamp": format_timestamp(ts),
+                    "source": member,
+                    "frame": df.assign(osd=osd),
+                    "osd_type": osd_type,
+                    "osd": osd,
+                }
+                if histo:
+                    entry_record["histogram"] = histo
+                telemetry["crimson_dump"].append(entry_record)
+
+        # Per-interval logs of the FIO jobs, merged into a single series
+        fio_logs = [m for m in archive.namelist() if LOG_RE.match(os.path.basename(m))]
+        if fio_logs:
+            logger.info(f"Run {name}: Loading {len(fio_logs)} FIO logs")
+            try:
+                series = load_fio_logs(
+                    {os.path.basename(m): archive.read(m) for m in fio_logs}
+                )
+            except Exception as e:
+                logger.error(f"Error reading the FIO logs: {e}")
+            else:
+                # A series rather than snapshots: kept apart from the telemetry
+                if not series.empty:
+                    self.ds_list[name]["fio_series"] = series
+
         for member in archive.namelist():
             base = os.path.basename(member)
-            if not base.endswith(".json"):
+            if not base.endswith(".json") or base.endswith(MANIFEST_SUFFIX):
+                continue
+            if member in exported:
                 continue
             logger.info(f"Run {name}: Loading telemetry JSON member {member}")
             ts = self._extract_timestamp(base)
+            if re.search(r"_dump\.json$", base):
+                # Streamed one snapshot at a time, rather than read whole
+                self._load_dump_member(archive, member, ts, telemetry["crimson_dump"])
+                continue
             try:
                 content = archive.read(member).decode(encoding="utf-8")
             except Exception as e:
                 logger.error(f"Error reading JSON member {member}: {e}")
                 continue
 
+            if re.search(r"_diskstats\.json$", base):
+                # Series of the sampler: one snapshot per interval
+                try:
+                    for snap_ts, df in iter_diskstat_series_from_content(content):
+                        if df.empty:
+                            continue
+                        telemetry["diskstat"].append(
+                            {
+                                "timestamp": format_timestamp(snap_ts),
+                                "source": member,
+                                "frame": df,
+                                "osd_type": None,
+                            }
+                        )
+                except (ValueError, KeyError, IndexError) as e:
+                    logger.error(f"Error reading diskstat series {member}: {e}")
+                continue
             if re.search(r"_ds\.json$", base):
                 df = load_diskstat_dataframe_from_content(content)
                 kind = "diskstat"
                 osd_type = None
                 histo = {}
-            elif re.search(r"_dump\.json$", base):
-                osd_type, df, histo = load_crimson_dump_dataframe_from_content(content)
-                kind = "crimson_dump"
             elif re.search(r"_perf_stat\.json$", base):
                 df = load_perf_stat_dataframe_from_content(content)
                 kind = "perf_stat"
@@ -329,6 +423,36 @@ class PerfReporter(object):
                 entry_record["histogram"] = histo
             telemetry[kind].append(entry_record)
 
+    @staticmethod
+    def _load_dump_member(
+        archive: zipfile.ZipFile, member: str, ts: str, records: List[Dict[str, Any]]
+    ) -> None:
+        """
+        Append the snapshots of an OSD dump JSON member to *records*: the
+        member is decoded incrementally, so only one snapshot is in memory
+        at a time, even for the arrays of hundreds of snapshots of a run.
+        The timestamp of each snapshot is that of its envelope, or *ts*
+        (from the member name) for a single dump.
+        """
+        try:
+            with archive.open(member) as fp:
+                for snap_ts, osd_type, df, histo in iter_crimson_dump_dataframes(fp):
+                    if df is None or df.empty:
+                        continue
+                    entry_record: Dict[str, Any] = {
+                        "timestamp": snap_ts or ts,
+                        "source": member,
+                        "frame": df,
+                        "osd_type": osd_type,
+                    }
+                    # Attach histogram data so callers can produce histogram
+                    # charts (stage-lat, conflict replay, etc.)
+                    if histo:
+                        entry_record["histogram"] = histo
+                    records.append(entry_record)
+        except Exception as e:
+            logger.error(f"Error reading JSON member {member}: {e}")
+
     def _calculate_crimson_rates(self, name: str, archive: zipfile.ZipFile) -> None:
         """
         Calculate work rates for Crimson OSD metrics from multiple dump snapshots.
@@ -344,26 +468,56 @@ class PerfReporter(object):
         that uses the FIO job intervals to filter the telemetry snapshots, and
         calculate the rates per workload interval.
         """
-        # Collect all crimson dump JSON files with their timestamps
+        # Collect the crimson dump snapshots with their timestamps: the
+        # columnar stores first, then the dump JSON files not exported from one
         crimson_snapshots = []
+        stores = [
+            m
+            for m in archive.namelist()
+            if re.search(r"_dump" + re.escape(MANIFEST_SUFFIX) + "$", m)
+        ]
+        exported = {TelemetryStore.prefix_of(m) + ".json" for m in stores}
+        for member in stores:
+            try:
+                store = TelemetryStore.open_zip(archive, member)
+            except Exception as e:
+                logger.error(f"Error processing {member} for rate analysis: {e}")
+                exported.discard(TelemetryStore.prefix_of(member) + ".json")
+                continue
+            # The rates of a single OSD: the OSDs are compared apart
+            osds = sorted({info[1] for info in store.samples})
+            for snap in store.snapshots():
+                if snap["osd"] != osds[0] or not snap["data"]:
+                    continue
+                crimson_snapshots.append(
+                    {"timestamp": snap["timestamp"], "data": snap["data"], "source": member}
+                )
+
         for member in archive.namelist():
             base = os.path.basename(member)
-            if not re.search(r"_dump\.json$", base):
+            if not re.search(r"_dump\.json$", base) or member in exported:
                 continue
 
             ts = self._extract_timestamp(base)
             try:
                 content = archive.read(member).decode(encoding="utf-8")
                 data = json.loads(content)
+                if isinstance(data, list):
+                    # Array of dump envelopes (--json-dump), OSDs as above
+                    osds = sorted({e.get("osd", 0) for e in data if isinstance(e, dict)})
+                    for entry in data:
+                        entry_ts = self._entry_unix_ts(entry)
+                        if entry_ts is None or entry.get("osd", 0) != osds[0]:
+                            continue
+                        if entry.get("data"):
+                            crimson_snapshots.append(
+                                {"timestamp": entry_ts, "data": entry["data"], "source": member}
+                            )
+                    continue
 
                 # Convert timestamp string to float (Unix timestamp)
-                # Format: YYYYMMDD_HHMMSS (assumed to be in UTC)
-                if ts != "unknown_ts":
-                    dt = datetime.strptime(ts, "%Y%m%d_%H%M%S").replace(
-                        tzinfo=timezone.utc
-                    )
-                    timestamp = dt.timestamp()
-                else:
+                timestamp = self._unix_ts(ts)
+                if timestamp is None:
                     # Use a sequential counter if timestamp extraction fails
                     timestamp = float(len(crimson_snapshots))
 
@@ -499,6 +653,9 @@ class PerfReporter(object):
         """
         for run_name, run_data in self.ds_list.items():
             telemetry = run_data.get("telemetry", {})
+            series = run_data.get("fio_series")
+            if series is not None:
+                self._plot_fio_log_over_time(run_name, series)
             for kind, entries in telemetry.items():
                 if not entries:
                     continue
@@ -737,6 +894,59 @@ class PerfReporter(object):
                 )
                 plt.close()
 
+    def _plot_fio_log_over_time(self, run_name: str, combined: pd.DataFrame) -> None:
+        """
+        Plot the per-second IOPS and completion latency of the FIO jobs.
+
+        The series come from the FIO per-interval logs (merged over all
+        the FIO processes), so the latency spikes can be compared with the
+        OSD and disk telemetry charts, which share the timestamp axis.
+
+        Parameters
+        ----------
+        run_name : str
+            Label for this FIO run.
+        combined : pd.DataFrame
+            Series of :func:`fio_interval_logs.load_fio_logs`.
+        """
+        if combined.empty:
+            return
+        try:
+            sns.set_theme(style="darkgrid")
+            fig, ax = plt.subplots(figsize=(10, 5))
+            ax.plot(combined["timestamp"], combined["iops"], color="tab:blue", label="IOPS")
+            ax.set_ylabel("IOPS")
+            ax2 = ax.twinx()
+            ax2.plot(combined["timestamp"], combined["clat_ms"], color="tab:red", label="clat (ms)")
+            ax2.plot(
+                combined["timestamp"],
+                combined["clat_max_ms"],
+                color="tab:red",
+                linestyle=":",
+                label="max clat (ms)",
+            )
+            ax2.set_ylabel("Latency (ms)")
+            ax.set_title(f"{run_name} – FIO per-second IOPS and latency")
+            ax.set_xlabel("Timestamp")
+            ax.tick_params(axis="x", rotation=45)
+            ax.xaxis.set_major_locator(plt.MaxNLocator(12))
+            fig.legend(loc="upper right")
+            plt.tight_layout()
+            file_name = f"{run_name}_fio_log.png"
+            t_path = self.get_target_path(file_name, "figures")
+            plt.savefig(t_path, dpi=100, bbox_inches="tight")
+            self.add_entry_figure(
+                key="tex",
+                title=f"{run_name} FIO IOPS and latency over time",
+                file_name=file_name,
+                dir_path=os.path.join("figures/", f"{self.config['output']['name']}/"),
+                label=f"fig:{run_name}-fio-log",
+            )
+            plt.close()
+        except Exception as e:
+            logger.error(f"Error plotting the FIO logs of {run_name}: {e}")
+            plt.close()
+
     def _plot_perf_stat_over_time(self, run_name: str, entries: list) -> None:
         """
         Plot Linux perf stat metrics over time.
@@ -896,6 +1106,173 @@ class PerfReporter(object):
 
         return dict(workload_intervals)
 
+    def _extract_warmup_windows(
+        self, name: str, archive: zipfile.ZipFile
+    ) -> List[Tuple[float, float]]:
+        """
+        Extract the warm-up windows of the FIO runs from the archive.
+
+        Each ``*_steady.json`` member, written by
+        :meth:`run_fio.FioRunner.register_steady_state`, gives the Unix time
+        the run started and the end of its warm-up.
+
+        Returns:
+            Sorted list of ``(start, warmup_end)`` tuples
+        """
+        windows = []
+        for member in archive.namelist():
+            if not member.endswith("_steady.json"):
+                continue
+            try:
+                data = json.loads(archive.read(member))
+                start, end = data.get("start"), data.get("warmup_end")
+            except Exception as e:
+                logger.error(f"Run {name}: Error parsing {member}: {e}")
+                continue
+            if start is not None and end is not None:
+                windows.append((float(start), float(end)))
+        logger.info(f"Run {name}: Found {len(windows)} warm-up windows")
+        return sorted(windows)
+
+    @staticmethod
+    def _unix_ts(ts_str: str) -> Optional[float]:
+        """
+        Unix time of a ``YYYYMMDD_HHMMSS`` timestamp, in local time as written
+        by :func:`telemetry_store.format_timestamp` and in the file names.
+        """
+        try:
+            dt = datetime.strptime(ts_str, "%Y%m%d_%H%M%S")
+        except (TypeError, ValueError):
+            return None
+        return dt.timestamp()
+
+    @classmethod
+    def _entry_unix_ts(cls, entry: Dict[str, Any]) -> Optional[float]:
+        """Unix time of a telemetry entry (see :meth:`_unix_ts`)."""
+        return cls._unix_ts(entry.get("timestamp"))
+
+    @staticmethod
+    def _entry_rutil(entry: Dict[str, Any]) -> float:
+        """Mean reactor utilisation of a ``crimson_dump`` entry (NaN if absent)."""
+        df = entry.get("frame")
+        if df is None or "metric" not in df.columns or "value" not in df.columns:
+            return float("nan")
+        values = pd.to_numeric(
+            df.loc[df["metric"] == "reactor_utilization", "value"], errors="coerce"
+        )
+        return float(values.mean()) if len(values) else float("nan")
+
+    def _exclude_warmup(
+        self,
+        entries: List[Dict[str, Any]],
+        windows: List[Tuple[float, float]],
+        telem_kind: str = "",
+    ) -> List[Dict[str, Any]]:
+        """
+        Tag the warm-up telemetry entries and return the steady ones.
+
+        Each entry gets a ``warmup`` flag: set when its timestamp falls in
+        one of the warm-up *windows* recorded by the run.  For runs without
+        such windows, the ``crimson_dump`` entries are cut with MSER-5 on
+        their reactor utilisation instead.  When every entry is warm-up,
+        all are returned, so short intervals still get aggregated.
+
+        Args:
+            entries: Telemetry entries of a workload interval, in time order
+            windows: ``(start, warmup_end)`` tuples from
+                :meth:`_extract_warmup_windows`
+            telem_kind: Telemetry kind of the entries
+
+        Returns:
+            The entries not tagged as warm-up
+        """
+        if windows:
+            for entry in entries:
+                ts = self._entry_unix_ts(entry)
+                entry["warmup"] = ts is not None and any(
+                    start <= ts < end for start, end in windows
+                )
+        elif telem_kind == "crimson_dump":
+            cut = mser_truncation([self._entry_rutil(e) for e in entries])
+            for i, entry in enumerate(entries):
+                entry["warmup"] = i < cut
+        else:
+            for entry in entries:
+                entry["warmup"] = False
+        steady = [e for e in entries if not e["warmup"]]
+        return steady or entries
+
+    @staticmethod
+    def _osd_imbalance(df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Compare the OSDs of a multi-OSD ``crimson_dump`` DataFrame.
+
+        Args:
+            df: Combined DataFrame with ``osd``, ``metric`` and ``value`` columns
+
+        Returns:
+            ``(per_osd, imbalance)``: the per-OSD value of each metric (the
+            sum over shards of the mean over samples), one column per OSD,
+            and for each metric its ``mean``, ``max``, ``max_over_mean``,
+            coefficient of variation ``cv`` and ``max_osd`` across OSDs,
+            most imbalanced first
+        """
+        values = pd.to_numeric(df["value"], errors="coerce")
+        keys = [df["osd"], df["metric"].astype(str)]
+        if "shard" in df.columns:
+            keys.append(df["shard"].astype(str))
+        per_shard = values.groupby(keys).mean()
+        per_osd = per_shard.groupby(level=[0, 1]).sum().unstack(0)
+        per_osd.index.name = "metric"
+        per_osd.columns.name = "osd"
+        mean = per_osd.mean(axis=1)
+        imbalance = pd.DataFrame(
+            {
+                "mean": mean,
+                "max": per_osd.max(axis=1),
+                "max_over_mean": per_osd.max(axis=1) / mean.where(mean != 0),
+                "cv": per_osd.std(axis=1, ddof=0) / mean.abs().where(mean != 0),
+                "max_osd": per_osd.idxmax(axis=1),
+            }
+        ).sort_values("cv", ascending=False)
+        return per_osd, imbalance
+
+    @staticmethod
+    def _aggregate_fio_series(
+        series: pd.DataFrame, interval: WorkloadInterval
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Aggregate the per-second FIO series over a workload interval: mean
+        IOPS and latency, and the latency of the worst seconds (so a spike
+        is not averaged away).
+
+        Args:
+            series: Series of :func:`fio_interval_logs.load_fio_logs`
+            interval: WorkloadInterval defining the time range
+
+        Returns:
+            Dict with ``aggregated``, ``sample_count``, ``interval`` and the
+            ``series`` of the interval, or None when it has no samples
+        """
+        window = series.loc[int(interval.start_time) : int(interval.end_time)]
+        if window.empty:
+            return None
+        agg_df = pd.DataFrame(
+            {
+                "iops": [window["iops"].mean()],
+                "clat_ms": [window["clat_ms"].mean()],
+                "clat_p99_sec_ms": [window["clat_ms"].quantile(0.99)],
+                "clat_max_ms": [window["clat_max_ms"].max()],
+            }
+        )
+        return {
+            "aggregated": agg_df,
+            "sample_count": len(window),
+            "warmup_count": 0,
+            "interval": interval,
+            "series": window,
+        }
+
     def _filter_telemetry_by_interval(
         self, telemetry_entries: List[Dict[str, Any]], interval: WorkloadInterval
     ) -> List[Dict[str, Any]]:
@@ -913,22 +1290,15 @@ class PerfReporter(object):
 
         for entry in telemetry_entries:
             # Convert timestamp string to Unix timestamp for comparison
-            ts_str = entry["timestamp"]
-            try:
-                # Parse timestamp format: YYYYMMDD_HHMMSS (assumed to be in UTC)
-                dt = datetime.strptime(ts_str, "%Y%m%d_%H%M%S").replace(
-                    tzinfo=timezone.utc
-                )
-                ts_unix = dt.timestamp()
-
-                # Check if timestamp falls within interval
-                if interval.start_time <= ts_unix <= interval.end_time:
-                    filtered.append(entry)
-
-            except Exception as e:
-                logger.warning(f"Could not parse timestamp {ts_str}: {e}")
+            ts_unix = self._entry_unix_ts(entry)
+            if ts_unix is None:
+                logger.warning(f"Could not parse timestamp {entry.get('timestamp')}")
                 continue
 
+            # Check if timestamp falls within interval
+            if interval.start_time <= ts_unix <= interval.end_time:
+                filtered.append(entry)
+
         return filtered
 
     # ------------------------------------------------------------------
@@ -1288,10 +1658,14 @@ class PerfReporter(object):
 
         # Get telemetry data
         telemetry = run_data.get("telemetry", {})
-        if not telemetry:
+        series = run_data.get("fio_series")
+        if not telemetry and series is None:
             logger.warning(f"Run {name}: No telemetry data found")
             return
 
+        # Warm-up samples are left out of the aggregates
+        warmup_windows = run_data.get("warmup_windows", [])
+
         # Emit a one-time summary of OSD metric kinds for this run
         crimson_entries_all = telemetry.get("crimson_dump", [])
         if crimson_entries_all:
@@ -1309,6 +1683,11 @@ class PerfReporter(object):
                     f"Run {name}: Processing {workload_name} at iodepth={iodepth}, interval={interval}"
                 )
 
+                if series is not None:
+                    fio_log = self._aggregate_fio_series(series, interval)
+                    if fio_log:
+                        workload_metrics[workload_name][iodepth]["fio_log"] = fio_log
+
                 # Filter each telemetry type to the workload interval
                 for telem_kind, entries in telemetry.items():
                     filtered_entries = self._filter_telemetry_by_interval(
@@ -1318,6 +1697,10 @@ class PerfReporter(object):
                     if not filtered_entries:
                         logger.debug(f"  No {telem_kind} data in interval")
                         continue
+                    num_filtered = len(filtered_entries)
+                    filtered_entries = self._exclude_warmup(
+                        filtered_entries, warmup_windows, telem_kind
+                    )
 
                     # Combine filtered dataframes
                     frames = [entry["frame"] for entry in filtered_entries]
@@ -1347,7 +1730,7 @@ class PerfReporter(object):
                             "metric" in combined_df.columns
                             and "shard" in combined_df.columns
                         ):
-                            agg_df = combined_df.groupby(["metric", "shard"]).agg(
+                            agg_df = combined_df.groupby(["metric", "shard"], observed=True).agg(
                                 {"value": "mean", "group": "first"}
                             )
                             logger.debug(
@@ -1362,8 +1745,17 @@ class PerfReporter(object):
                     entry_data: dict = {
                         "aggregated": agg_df,
                         "sample_count": len(filtered_entries),
+                        "warmup_count": num_filtered - len(filtered_entries),
                         "interval": interval,
                     }
+                    if (
+                        telem_kind == "crimson_dump"
+                        and "osd" in combined_df.columns
+                        and combined_df["osd"].nunique() > 1
+                    ):
+                        per_osd, imbalance = self._osd_imbalance(combined_df)
+                        entry_data["per_osd"] = per_osd
+                        entry_data["osd_imbalance"] = imbalance
 
                     # For crimson_dump: also build histogram DataFrames from
                     # SampleRecords so that _plot_workload_histogram_metrics
@@ -1446,11 +1838,7 @@ class PerfReporter(object):
                 )
 
                 for entry in filtered_entries:
-                    ts_str = entry["timestamp"]
-                    dt = datetime.strptime(ts_str, "%Y%m%d_%H%M%S").replace(
-                        tzinfo=timezone.utc
-                    )
-                    ts_unix = dt.timestamp()
+                    ts_unix = self._entry_unix_ts(entry)
 
                     # Load the original JSON data for rate calculation
                     # We need to reconstruct it from the dataframe or load from source
@@ -1539,6 +1927,10 @@ class PerfReporter(object):
             "writes_completed",
             "read_time_ms",
             "write_time_ms",
+            "read_iops",
+            "write_iops",
+            "read_await_ms",
+            "write_await_ms",
         ]
         available_cols = [col for col in metric_cols if col in df.columns]
 
@@ -2052,6 +2444,12 @@ class PerfReporter(object):
                 except Exception as e:
                     logger.error(f"Error plotting {workload}/{metric_type}: {e}")
 
+            # Most imbalanced metrics across the OSDs, per run and iodepth
+            try:
+                self._report_workload_osd_imbalance(workload)
+            except Exception as e:
+                logger.error(f"Error reporting the OSD imbalance of {workload}: {e}")
+
             # Histogram charts (stage-lat, conflict-replay, concurrent) per run
             for run_name, run_data in self.ds_list.items():
                 workload_metrics = run_data.get("workload_metrics", {})
@@ -2099,6 +2497,56 @@ class PerfReporter(object):
                         f"Error plotting histogram metrics for {run_name}/{workload}: {e}"
                     )
 
+        self._report_osd_comparison()
+
+    def _report_workload_osd_imbalance(self, workload_name: str) -> None:
+        """
+        Add a table per run and iodepth of *workload_name* with the most
+        imbalanced ``crimson_dump`` metrics across the OSDs, as computed by
+        :meth:`_osd_imbalance` (only for multi-OSD runs).
+        """
+        for run_name, run_data in self.ds_list.items():
+            per_iodepth = run_data.get("workload_metrics", {}).get(workload_name, {})
+            for iodepth, metrics in sorted(per_iodepth.items()):
+                imbalance = metrics.get("crimson_dump", {}).get("osd_imbalance")
+                if imbalance is None or imbalance.empty:
+                    continue
+                table = imbalance.head(self._OSD_IMBALANCE_TOP)[
+                    ["mean", "max_over_mean", "cv", "max_osd"]
+                ]
+                table.index = table.index.str.replace("_", ".", regex=False)
+                t_name = f"{run_name}_{workload_name}_{iodepth}_osd_imbalance.tex"
+                table.to_latex(
+                    self.get_target_path(t_name, "tables"),
+                    float_format="%.2f",
+                    header=["Mean", "Max/Mean", "CV", "Max OSD"],
+                )
+                self.get_entry_table(
+                    key="tex",
+                    title=f"{run_name} {workload_name} iodepth {iodepth} OSD imbalance",
+                    table_content=t_name,
+                    label=f"tab:{run_name}-{workload_name}-{iodepth}-osd-imbalance",
+                )
+
+    def _report_osd_comparison(self) -> None:
+        """
+        Add the OSD load imbalance report of the rates of each multi-OSD
+        store (see osd_rate_analyzers.generate_osd_comparison_report), saved
+        under the tables directory as well.
+        """
+        for run_name, run_data in self.ds_list.items():
+            for member, comparison in run_data.get("osd_comparison", {}).items():
+                store_name = os.path.basename(TelemetryStore.prefix_of(member))
+                report_name = f"{run_name}_{store_name}_osd_comparison_report.txt"
+                report = generate_osd_comparison_report(
+                    comparison,
+                    top=self._OSD_IMBALANCE_TOP,
+                    output_file=self.get_target_path(report_name, "tables"),
+                )
+                self.document["tex"] += (
+                    f"\\begin{{verbatim}}\n{report}\n\\end{{verbatim}}\n"
+                )
+
     def analyze_workload_metrics(self) -> None:
         """
         Main entry point for per-workload analysis.
@@ -2139,6 +2587,9 @@ class PerfReporter(object):
                         run_name, archive
                     )
                     run_data["workload_intervals"] = workload_intervals
+                    run_data["warmup_windows"] = self._extract_warmup_windows(
+                        run_name, archive
+                    )
 
                     # Step 2 & 3: Aggregate metrics by workload
                     logger.info(f"Run {run_name}: Aggregating metrics by workload")
@@ -2552,6 +3003,9 @@ class PerfReporter(object):
                     self.ds_list[name]["workload_intervals"] = (
                         self._extract_workload_intervals(name, archive)
                     )
+                    self.ds_list[name]["warmup_windows"] = (
+                        self._extract_warmup_windows(name, archive)
+                    )
                     # Step 2 & 3: Aggregate metrics by workload
                     logger.info(f"Run {name}: Aggregating metrics by workload")
                     self._aggregate_metrics_by_workload(name)
@@ -0,0 +1,420 @@
+#!/usr/bin/env python3
+"""
+Wall-clock cost estimator and scheduler for a :class:`PerfTestPlan`.
+
+:func:`expand_plan` expands a plan into its full list of points:
+
+    configurations x osd_range x reactor_range x workloads x iodepth x numjobs
+
+(Classic configurations have no reactor range).  :func:`make_schedule` then
+orders the points so that those on the same cluster shape (OSD type,
+backend, store devices, number of OSDs and reactors, CPU sets, balance
+strategy) are consecutive, as :meth:`run_test_plan.BalancedOSDRunner.plan_clusters`
+runs them: each shape is started (and preconditioned, for a persistent
+backend) once.  Every step gets an estimated duration from a
+:class:`CostModel`:
+
+  - cluster start (vstart and readiness) and stop,
+  - preconditioning, once per cluster with a persistent store,
+  - per point, the FIO ``runtime`` plus its ramp-up and the OSD dumps,
+    or the median wall-clock time of the same point in previous runs
+    (:class:`History`, read from the ``result_index.jsonl`` of previous
+    run directories, see :mod:`result_index`).
+
+The :class:`Schedule` can be printed as a dry run, saved as JSON and
+compared against a time budget.
+
+Usage: ./plan_schedule.py -t <test-plan.json> [-H <result_index.jsonl> ...] [-b 8h] [-o schedule.json]
+
+    plan = load_test_plan("tp.json")
+    sched = make_schedule(expand_plan(plan), CostModel(), History.load(["run/result_index.jsonl"]))
+    print(sched.total, sched.fits(8 * 3600))
+"""
+
+import argparse
+import json
+import logging
+import os
+import re
+import statistics
+import sys
+import tempfile
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from perf_test_plan import CrimsonClusterConfiguration, FioWorkload, PerfTestPlan, load_test_plan
+
+__author__ = "Jose J Palacios-Perez"
+
+logger = logging.getLogger(__name__)
+
+# Backends whose devices are preconditioned before measuring
+PERSISTENT_BACKENDS = ("bluestore", "seastore")
+
+START = "start"
+PRECONDITION = "precondition"
+POINT = "point"
+STOP = "stop"
+
+
+@dataclass
+class CostModel:
+    """Seconds taken by each kind of step of a plan."""
+
+    cluster_start: float = 60.0  # vstart.sh, until the OSDs are up and in
+    cluster_stop: float = 30.0  # stop.sh, until the OSD processes are gone
+    precondition: float = 900.0  # randwrite over the store devices
+    ramp_up: float = 30.0  # FIO start and warm-up, not in the runtime
+    dump: float = 10.0  # OSD dumps before and after each point
+    default_runtime: float = 300.0  # for workloads without a runtime
+
+
+@dataclass
+class PlanPoint:
+    """One measured point of a plan."""
+
+    cfg_name: str
+    shape: Tuple[Any, ...]
+    num_osd: int
+    num_reactors: Optional[int]
+    engine: str
+    workload_name: str
+    workload: FioWorkload
+    iodepth: int
+    numjobs: int
+    precondition: bool
+
+    @property
+    def label(self) -> str:
+        reactors = f"_{self.num_reactors}reactor" if self.num_reactors is not None else ""
+        return (
+            f"{self.cfg_name}_{self.num_osd}osd{reactors}_{self.workload_name}"
+            f"_{self.numjobs}job_{self.iodepth}io"
+        )
+
+
+@dataclass
+class Step:
+    """A step of a :class:`Schedule`, starting *offset* seconds in."""
+
+    kind: str
+    seconds: float
+    offset: float
+    label: str
+    point: Optional[PlanPoint] = None
+    measured: bool = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "kind": self.kind,
+            "label": self.label,
+            "offset": self.offset,
+            "seconds": self.seconds,
+            "measured": self.measured,
+        }
+
+
+@dataclass
+class Schedule:
+    """The ordered steps of a plan, with their estimated durations."""
+
+    steps: List[Step] = field(default_factory=list)
+
+    @property
+    def total(self) -> float:
+        return sum(step.seconds for step in self.steps)
+
+    def count(self, kind: str) -> int:
+        return sum(1 for step in self.steps if step.kind == kind)
+
+    def fits(self, budget: float) -> bool:
+        """Whether the schedule completes within *budget* seconds."""
+        return self.total <= budget
+
+    def cut(self, budget: float) -> List[PlanPoint]:
+        """The points that complete within *budget* seconds."""
+        return [
+            step.point
+            for step in self.steps
+            if step.kind == POINT and step.offset + step.seconds <= budget
+        ]
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "total": self.total,
+            "points": self.count(POINT),
+            "clusters": self.count(START),
+            "preconditions": self.count(PRECONDITION),
+            "measured": sum(1 for step in self.steps if step.measured),
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {**self.summary(), "steps": [step.to_dict() for step in self.steps]}
+
+
+def cluster_shape(cfg, num_osd: int, num_reactors: Optional[int]) -> Tuple[Any, ...]:
+    """What a cluster is started with: runs of the same shape share it."""
+    return (
+        cfg.osd_type,
+        cfg.osd_backend,
+        tuple(cfg.store_devs[:num_osd]),
+        num_osd,
+        num_reactors,
+        tuple(cfg.vstart_cpu_set),
+        getattr(cfg, "balance_strategy", None),
+    )
+
+
+def needs_precondition(cfg) -> bool:
+    return cfg.osd_backend in PERSISTENT_BACKENDS and cfg.osd_type != "cyan"
+
+
+def expand_plan(plan: PerfTestPlan) -> List[PlanPoint]:
+    """Every point of *plan*, in the order of the plan."""
+    points = []
+    for cfg_name, cfg in plan.cluster.configurations.items():
+        reactors: List[Optional[int]] = (
+            list(cfg.reactor_range)
+            if isinstance(cfg, CrimsonClusterConfiguration)
+            else [None]
+        )
+        for num_osd in cfg.osd_range:
+            for num_reactors in reactors:
+                shape = cluster_shape(cfg, num_osd, num_reactors)
+                for engine, bench in plan.benchmarks.benchmarks.items():
+                    for wk, wl in bench.workloads.items():
+                        for iodepth in wl.iodepth:
+                            for numjobs in wl.numjobs:
+                                points.append(
+                                    PlanPoint(
+                                        cfg_name, shape, num_osd, num_reactors,
+                                        engine, wk, wl, iodepth, numjobs,
+                                        needs_precondition(cfg),
+                                    )
+                                )
+    return points
+
+
+class History:
+    """
+    Wall-clock seconds of the points of previous runs, keyed by the
+    cluster shape they ran on (:func:`cluster_shape`) and the FIO definition
+    ``(rw, bs, runtime, iodepth, numjobs)``.
+    """
+
+    def __init__(self) -> None:
+        self.timings: Dict[Tuple[Any, ...], List[float]] = {}
+
+    @staticmethod
+    def key(
+        shape: Any, rw: Any, bs: Any, runtime: Any, iodepth: Any, numjobs: Any
+    ) -> Tuple[Any, ...]:
+        # The shape as read back from the JSON index, its tuples as lists
+        return (json.dumps(shape), rw, bs, runtime, iodepth, numjobs)
+
+    def add(
+        self,
+        shape: Any,
+        rw: Any,
+        bs: Any,
+        runtime: Any,
+        iodepth: Any,
+        numjobs: Any,
+        seconds: float,
+    ) -> None:
+        key = self.key(shape, rw, bs, runtime, iodepth, numjobs)
+        self.timings.setdefault(key, []).append(seconds)
+
+    def lookup(self, point: PlanPoint) -> Optional[float]:
+        """Median seconds of *point* in previous runs, if it was measured."""
+        wl = point.workload
+        timings = self.timings.get(
+            self.key(point.shape, wl.rw, wl.bs, wl.runtime, point.iodepth, point.numjobs)
+        )
+        return statistics.median(timings) if timings else None
+
+    @classmethod
+    def load(cls, paths: Iterable[str]) -> "History":
+        """Read the completed points with their timings from result indexes."""
+        history = cls()
+        for path in paths:
+            if not os.path.exists(path):
+                logger.warning(f"== No result index {path} ==")
+                continue
+            with open(path) as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    if entry.get("status") != "done" or "elapsed" not in entry:
+                        continue
+                    iodepth, numjobs = entry.get("iodepth"), entry.get("numjobs")
+                    # A catalog run covers all its iodepths: not a single point
+                    if isinstance(iodepth, list) or isinstance(numjobs, list):
+                        continue
+                    history.add(
+                        entry.get("cluster"),
+                        entry.get("rw"),
+                        entry.get("bs"),
+                        entry.get("runtime"),
+                        iodepth,
+                        numjobs,
+                        entry["elapsed"],
+                    )
+        return history
+
+
+def estimate_point(
+    point: PlanPoint, model: CostModel, history: Optional[History] = None
+) -> Tuple[float, bool]:
+    """Estimated seconds of *point*, and whether it comes from history."""
+    if history is not None:
+        seconds = history.lookup(point)
+        if seconds is not None:
+            return seconds, True
+    runtime = point.workload.runtime or model.default_runtime
+    return runtime + model.ramp_up + model.dump, False
+
+
+def make_schedule(
+    points: List[PlanPoint],
+    model: Optional[CostModel] = None,
+    history: Optional[History] = None,
+    precondition: bool = True,
+    reorder: bool = True,
+) -> Schedule:
+    """
+    Schedule *points*: with *reorder*, the points of a cluster shape are
+    made consecutive (keeping the order of the shapes' first points), so
+    every shape is started, preconditioned and stopped once.
+    """
+    model = model or CostModel()
+    if reorder:
+        groups: Dict[Tuple[Any, ...], List[PlanPoint]] = {}
+        for point in points:
+            groups.setdefault(point.shape, []).append(point)
+        points = [point for group in groups.values() for point in group]
+
+    schedule = Schedule()
+    offset = 0.0
+
+    def add(kind: str, seconds: float, label: str, point=None, measured=False) -> None:
+        nonlocal offset
+        schedule.steps.append(Step(kind, seconds, offset, label, point, measured))
+        offset += seconds
+
+    running = None
+    for point in points:
+        if point.shape != running:
+            if running is not None:
+                add(STOP, model.cluster_stop, "stop")
+            running = point.shape
+            add(START, model.cluster_start, f"start {point.cfg_name} {point.num_osd}osd")
+            if precondition and point.precondition:
+                add(PRECONDITION, model.precondition, "precondition")
+        seconds, measured = estimate_point(point, model, history)
+        add(POINT, seconds, point.label, point, measured)
+    if running is not None:
+        add(STOP, model.cluster_stop, "stop")
+    return schedule
+
+
+def parse_duration(text: str) -> float:
+    """Seconds in *text*: ``90``, ``90s``, ``45m``, ``8h``, ``1d`` or ``1h30m``."""
+    units = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+    parts = re.findall(r"(\d+(?:\.\d+)?)([smhd]?)", text.strip())
+    if not parts or "".join(n + u for n, u in parts) != text.strip():
+        raise ValueError(f"Invalid duration: {text}")
+    return sum(float(n) * units[u or "s"] for n, u in parts)
+
+
+def format_duration(seconds: float) -> str:
+    minutes, secs = divmod(int(round(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h{minutes:02d}m{secs:02d}s"
+
+
+def print_schedule(schedule: Schedule, out=sys.stdout, steps: bool = True) -> None:
+    """Print *schedule* as a table of steps followed by its summary."""
+    if steps:
+        for step in schedule.steps:
+            mark = "*" if step.measured else " "
+            out.write(
+                f"{format_duration(step.offset):>12} {format_duration(step.seconds):>12}{mark}"
+                f" {step.kind:<12} {step.label}\n"
+            )
+    summary = schedule.summary()
+    out.write(
+        f"== {summary['points']} points on {summary['clusters']} clusters,"
+        f" {summary['preconditions']} preconditions,"
+        f" {summary['measured']} timings from previous runs (*):"
+        f" {format_duration(summary['total'])} ==\n"
+    )
+
+
+def main(argv):
+    examples = """
+    Examples:
+    # Dry run of a test plan, with the timings of a previous run
+    #  %prog -t tp_cmp_classic_seastore.json -H /tmp/run1/result_index.jsonl
+    # Check the plan fits in 10 hours (exit status 1 otherwise)
+    #  %prog -t tp_cmp_classic_seastore.json -b 10h -q
+    """
+    parser = argparse.ArgumentParser(
+        description="Estimate the wall-clock time of a performance test plan",
+        epilog=examples,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("-t", "--test_plan", required=True, help="Performance test plan")
+    parser.add_argument(
+        "-H", "--history", nargs="+", default=[],
+        help="result_index.jsonl files of previous runs",
+    )
+    parser.add_argument("-b", "--budget", type=parse_duration, help="Time budget (eg. 8h)")
+    parser.add_argument("-o", "--output", type=str, help="Save the schedule as JSON")
+    parser.add_argument(
+        "--no-precond", action="store_true", help="Do not precondition the devices"
+    )
+    parser.add_argument(
+        "--keep-order", action="store_true",
+        help="Keep the order of the plan rather than grouping the cluster shapes",
+    )
+    parser.add_argument("-q", "--quiet", action="store_true", help="Only print the summary")
+    parser.add_argument(
+        "-v", "--verbose", action="store_true", help="True to enable verbose logging mode"
+    )
+    options = parser.parse_args(argv)
+
+    logLevel = logging.DEBUG if options.verbose else logging.INFO
+    with tempfile.NamedTemporaryFile(dir="/tmp", delete=False) as tmpfile:
+        logging.basicConfig(filename=tmpfile.name, encoding="utf-8", level=logLevel)
+    logger.debug(f"Got options: {options}")
+
+    plan = load_test_plan(options.test_plan)
+    schedule = make_schedule(
+        expand_plan(plan),
+        CostModel(),
+        History.load(options.history),
+        precondition=not options.no_precond,
+        reorder=not options.keep_order,
+    )
+    print_schedule(schedule, steps=not options.quiet)
+    if options.output:
+        with open(options.output, "w") as f:
+            json.dump(schedule.to_dict(), f, indent=2)
+    if options.budget is not None:
+        if schedule.fits(options.budget):
+            print(f"== Fits in the budget of {format_duration(options.budget)} ==")
+        else:
+            done = len(schedule.cut(options.budget))
+            print(
+                f"== Over the budget of {format_duration(options.budget)}:"
+                f" {done} of {schedule.count(POINT)} points would complete =="
+            )
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
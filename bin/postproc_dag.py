@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Dependency graph executor for the post-processing of a run.
+
+Once all the workloads have completed, :meth:`run_fio.FioRunner.post_process`
+filters the top output, parses the FIO JSON results, renders the gnuplot
+charts and folds the perf data of every ``*perf.out`` into a flamegraph.
+Most of these stages are independent of each other, so rather than running
+them one after another, they are added to a :class:`PostProcessDAG` with the
+stages they depend on, and each stage starts as soon as its dependencies
+have completed:
+
+  - ``THREAD`` stages mostly wait on external tools (``top_parser.py``,
+    ``gnuplot``, ``flamegraph.pl``), and run on a thread pool,
+  - ``PROCESS`` stages are Python code that used to be run as a separate
+    interpreter (``fio_parse_jsons.py``, the stack folding of
+    :mod:`perf_folder`); they are called in-process on a process pool instead.
+
+Both pools are sized to the cores spare (see :func:`spare_cores`).  A stage
+that fails is logged, and the stages depending on it are skipped.  With
+``workers=0`` the stages are run serially in the calling thread, in the
+order they were added.
+
+The stage functions used by the run are defined in this module too.
+
+Usage: import postproc_dag
+
+    dag = PostProcessDAG()
+    dag.add("fold", fold_perf, "osd_perf.out", "osd_perf.out_folded", kind=PROCESS)
+    dag.add("svg", render_flamegraph, "osd_perf.out_folded", "osd_fg.svg", "osd",
+            "/packages/", after=["fold"])
+    results = dag.run()
+"""
+
+import contextlib
+import gzip
+import logging
+import os
+import shutil
+import subprocess
+import time
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+__author__ = "Jose J Palacios-Perez"
+
+logger = logging.getLogger(__name__)
+
+THREAD = "thread"
+PROCESS = "process"
+
+
+def spare_cores(reserved: int = 1) -> int:
+    """Number of CPUs this process may run on, less *reserved* (at least 1)."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    return max(1, cpus - reserved)
+
+
+class Stage:
+    """A node of the graph: ``func(*args, **kwargs)`` run after *after*."""
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable[..., Any],
+        args: tuple,
+        kwargs: Dict[str, Any],
+        after: List[str],
+        kind: str,
+    ) -> None:
+        self.name = name
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.after = after
+        self.kind = kind
+
+
+class PostProcessDAG:
+    """
+    Run stages concurrently, each once the stages it depends on are done.
+
+    Parameters
+    ----------
+    workers : int, optional
+        Size of each pool, :func:`spare_cores` by default; 0 runs the stages
+        serially in the calling thread.
+    """
+
+    def __init__(self, workers: Optional[int] = None) -> None:
+        self.workers = spare_cores() if workers is None else max(0, workers)
+        self.stages: Dict[str, Stage] = {}
+        self.results: Dict[str, Any] = {}
+        self.errors: Dict[str, BaseException] = {}
+        self.skipped: List[str] = []
+        # Wall-clock seconds of each stage completed
+        self.timings: Dict[str, float] = {}
+
+    def add(
+        self,
+        name: str,
+        func: Callable[..., Any],
+        *args: Any,
+        after: Iterable[str] = (),
+        kind: str = THREAD,
+        **kwargs: Any,
+    ) -> str:
+        """
+        Add stage *name*, calling ``func(*args, **kwargs)`` once every stage
+        in *after* has completed.  The stages in *after* must have been
+        added already, so the graph cannot have cycles.  *func* must be a
+        module level function for ``PROCESS`` stages.
+        """
+        if name in self.stages:
+            raise ValueError(f"Duplicate stage {name}")
+        if kind not in (THREAD, PROCESS):
+            raise ValueError(f"Unknown stage kind {kind}")
+        after = list(after)
+        for dep in after:
+            if dep not in self.stages:
+                raise ValueError(f"Stage {name} depends on unknown stage {dep}")
+        self.stages[name] = Stage(name, func, args, kwargs, after, kind)
+        return name
+
+    def _failed(self, stage: Stage) -> Optional[str]:
+        for dep in stage.after:
+            if dep in self.errors or dep in self.skipped:
+                return dep
+        return None
+
+    def _skip(self, stage: Stage, dep: str) -> None:
+        logger.warning(f"== Skipping {stage.name}: {dep} did not complete ==")
+        self.skipped.append(stage.name)
+
+    def _done(self, name: str, start: float, result: Any = None,
+              error: Optional[BaseException] = None) -> None:
+        self.timings[name] = time.time() - start
+        if error is None:
+            self.results[name] = result
+        else:
+            logger.error(f"== Post-processing stage {name} failed: {error} ==")
+            self.errors[name] = error
+
+    def _run_serial(self) -> None:
+        for stage in self.stages.values():
+            dep = self._failed(stage)
+            if dep is not None:
+                self._skip(stage, dep)
+                continue
+            start = time.time()
+            try:
+                result = stage.func(*stage.args, **stage.kwargs)
+            except Exception as e:
+                self._done(stage.name, start, error=e)
+            else:
+                self._done(stage.name, start, result)
+
+    def run(self) -> Dict[str, Any]:
+        """Run every stage; returns the result of each stage that completed."""
+        if self.workers == 0:
+            self._run_serial()
+            return self.results
+        pending = dict(self.stages)
+        running: Dict[Future, tuple] = {}
+        pools: Dict[str, Executor] = {}
+        try:
+            while pending or running:
+                for name, stage in list(pending.items()):
+                    dep = self._failed(stage)
+                    if dep is not None:
+                        del pending[name]
+                        self._skip(stage, dep)
+                        continue
+                    if any(d not in self.results for d in stage.after):
+                        continue
+                    del pending[name]
+                    if stage.kind not in pools:
+                        cls = ThreadPoolExecutor if stage.kind == THREAD else ProcessPoolExecutor
+                        pools[stage.kind] = cls(max_workers=self.workers)
+                    future = pools[stage.kind].submit(
+                        stage.func, *stage.args, **stage.kwargs
+                    )
+                    running[future] = (name, time.time())
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name, start = running.pop(future)
+                    error = future.exception()
+                    self._done(name, start, None if error else future.result(), error)
+        finally:
+            for pool in pools.values():
+                pool.shutdown(wait=True)
+        return self.results
+
+
+# ----------------------------------------------------------------------
+# Stages of FioRunner.post_process
+
+
+def strip_fio_lines(fio_json: str) -> None:
+    """Remove the ``fio:`` warning lines FIO mixes with its JSON output."""
+    with open(fio_json) as f:
+        lines = f.readlines()
+    kept = [line for line in lines if not line.startswith("fio:")]
+    if len(kept) != len(lines):
+        with open(fio_json, "w") as f:
+            f.writelines(kept)
+
+
+def parse_fio_jsons(
+    list_file: str,
+    outfile: str,
+    cpu_avg: str = "",
+    title: str = "",
+    directory: str = "",
+) -> bool:
+    """
+    Build the results table of the FIO JSON files named in *list_file*, with
+    :func:`fio_parse_jsons.gen_table`: one row per point (the processes of a
+    point reduced together) with the CPU utilisation of *cpu_avg*, its
+    standard output written to *outfile*.  The names in *list_file* are
+    relative to *directory*.  Nothing is done (returns ``False``) without
+    the CPU average file.
+
+    This already runs on a worker of the graph, so the files are parsed
+    serially, and the current directory is left alone.
+    """
+    import fio_parse_jsons
+
+    if cpu_avg and not os.path.exists(cpu_avg):
+        return False
+    list_path = os.path.join(directory, list_file)
+    with open(list_path) as f:
+        json_files = [
+            os.path.join(directory, line.strip()) for line in f if line.strip()
+        ]
+    avg_cpu = fio_parse_jsons.load_avg_cpu_json(cpu_avg) if cpu_avg else []
+    with open(outfile, "w") as f, contextlib.redirect_stdout(f):
+        dict_files = fio_parse_jsons.load_fio_points(json_files, workers=0)
+        if dict_files:
+            fio_parse_jsons.gen_table(dict_files, list_path, title, avg_cpu)
+    return True
+
+
+def render_flamegraph(
+    folded: str, fg_file: str, title: str, pack_dir: str
+) -> None:
+    """Render the folded stacks in *folded* as the SVG *fg_file*."""
+    if not os.path.getsize(folded):
+        logger.warning(f"== No stacks in {folded}, no flamegraph ==")
+        return
+    with open(folded) as src, open(fg_file, "w") as dst:
+        subprocess.run(
+            [f"{pack_dir}/FlameGraph/flamegraph.pl", "--title", title],
+            stdin=src,
+            stdout=dst,
+        )
+
+
+def archive_perf(perf_file: str, folded: str) -> None:
+    """Keep *folded* gzipped, and remove *perf_file*."""
+    if os.path.exists(folded):
+        with open(folded, "rb") as src, gzip.open(f"{folded}.gz", "wb", 9) as dst:
+            shutil.copyfileobj(src, dst)
+        os.remove(folded)
+    try:
+        os.remove(perf_file)
+    except OSError:
+        pass
+
+
+def render_chart(plot_file: str) -> None:
+    """Render *plot_file* with gnuplot."""
+    subprocess.run(
+        ["gnuplot", plot_file],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
@@ -77,20 +77,17 @@ def load_file(fname):
     Prints the coalesced output to stdout.
     Register in the log the top entries in the stack (if greater than 1).
     """
-    lines = []
     try:
         with open(fname, "r") as data:
             f_info = os.fstat(data.fileno())
             if f_info.st_size == 0:
                 logger.error(f"input file {fname} is empty")
                 return
-            lines = data.read().splitlines()
-            data.close()
+            # Stream the lines rather than loading the whole file
+            for i,line in enumerate(data):
+                print(compact_line(i,line.rstrip("\n")))
     except IOError as e:
         raise argparse.ArgumentTypeError(str(e))
-        
-    for i,line in enumerate(lines):
-        print(compact_line(i,line)) 
 
 def main(argv):
     examples = """
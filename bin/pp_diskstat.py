@@ -16,7 +16,7 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 from io import StringIO
-from typing import Optional
+from typing import Iterator, Optional, Tuple
 
 __author__ = "Jose J Palacios-Perez"
 
@@ -35,6 +35,35 @@ def load_diskstat_dataframe_from_content(
     return df
 
 
+def iter_diskstat_series_from_content(
+    json_content: str, device_regex: Optional[str] = None
+) -> Iterator[Tuple[float, pd.DataFrame]]:
+    """
+    Iterate over the intervals of the columnar JSON of
+    diskstat_sampler.DiskStatSampler.save_json (``*_diskstats.json``),
+    yielding (end of interval timestamp, DataFrame) with one row per device
+    and one column per interval metric (read_iops, write_await_ms, util...).
+    """
+    data = json.loads(json_content)
+    devices = data.get("devices", [])
+    timestamps = data.get("timestamp", [])
+    # Per-device metrics only: one list of device columns per interval
+    metrics = [
+        k
+        for k, v in data.items()
+        if k not in ("devices", "sample_timestamp", "timestamp")
+        and v
+        and isinstance(v[0], list)
+    ]
+    for i, ts in enumerate(timestamps):
+        df = pd.DataFrame({"device": devices})
+        for m in metrics:
+            df[m] = pd.to_numeric(pd.Series(data[m][i]), errors="coerce")
+        if device_regex:
+            df = df[df["device"].str.contains(device_regex, regex=True, na=False)]
+        yield ts, df
+
+
 def load_diskstat_dataframe(
     json_fname: str, device_regex: Optional[str] = None
 ) -> pd.DataFrame:
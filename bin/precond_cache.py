@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Record of the preconditioned state of the store devices and RBD images, to
+skip a redundant prefill.
+
+Two kinds of prefill are done before measuring:
+
+  - the store devices are preconditioned (``randwrite64k.fio`` over the raw
+    devices, until the IOPS are steady) before the cluster is created: the
+    drives keep that state across clusters, so it only needs redoing when
+    the devices or the job change,
+  - the RBD images are created and prefilled (``cephmkrbd.sh``) once the
+    cluster is up: that data lives in the OSD store, so it is only valid
+    for as long as the cluster runs, and only for the same pool, number and
+    size of images, backend and prefill.
+
+Each state is fingerprinted (:func:`device_fingerprint`,
+:func:`image_fingerprint`) and recorded in ``precond_state.json`` in the
+run directory when the prefill succeeds.  Before a prefill the fingerprint
+is looked up: when the state recorded matches, the prefill is skipped.  The
+images of a cluster are forgotten when it is stopped.
+
+Usage: import precond_cache
+
+    cache = PrecondCache("/tmp/run/precond_state.json")
+    fp = device_fingerprint(["/dev/nvme0n1p2"], "fio_workloads/randwrite64k.fio")
+    if not cache.devices_ready(["/dev/nvme0n1p2"], fp):
+        ...
+        cache.record_devices(["/dev/nvme0n1p2"], fp)
+"""
+
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, Iterable, Optional
+
+from result_index import file_digest, point_key
+
+__author__ = "Jose J Palacios-Perez"
+
+logger = logging.getLogger(__name__)
+
+STATE_NAME = "precond_state.json"
+
+# Preconditioning modes of the store devices
+PRECOND_OFF = "off"
+PRECOND_ALWAYS = "always"  # before every cluster created
+PRECOND_ONCE = "once"  # when the state recorded does not match
+
+
+def device_fingerprint(devices: Iterable[str], job_file: str) -> str:
+    """Fingerprint of *devices* preconditioned with the FIO *job_file*."""
+    return point_key(devices=sorted(devices), job=file_digest(job_file))
+
+
+def image_fingerprint(
+    cluster_id: str,
+    pool: str,
+    num_images: int,
+    image_size: str,
+    backend: str,
+    prefill: str = "cephmkrbd.sh",
+) -> str:
+    """Fingerprint of the RBD images prefilled on cluster *cluster_id*."""
+    return point_key(
+        cluster=cluster_id,
+        pool=pool,
+        num_images=num_images,
+        image_size=image_size,
+        backend=backend,
+        prefill=prefill,
+    )
+
+
+class PrecondCache:
+    """
+    The preconditioned state, saved to *path* on every change.
+
+    Parameters
+    ----------
+    path : str
+        JSON file of the state, loaded when it exists.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.devices: Dict[str, Dict[str, Any]] = {}
+        self.images: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(path):
+            try:
+                with open(path) as f:
+                    state = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                logger.warning(f"== Ignoring the preconditioning state {path}: {e} ==")
+            else:
+                self.devices = state.get("devices", {})
+                self.images = state.get("images", {})
+
+    def _save(self) -> None:
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"devices": self.devices, "images": self.images}, f, indent=2)
+        os.replace(tmp, self.path)
+
+    def devices_ready(self, devices: Iterable[str], fingerprint: str) -> bool:
+        """Whether every device in *devices* was preconditioned as *fingerprint*."""
+        devices = list(devices)
+        return bool(devices) and all(
+            self.devices.get(dev, {}).get("fingerprint") == fingerprint for dev in devices
+        )
+
+    def record_devices(self, devices: Iterable[str], fingerprint: str, **info: Any) -> None:
+        for dev in devices:
+            self.devices[dev] = {"fingerprint": fingerprint, "timestamp": time.time(), **info}
+        self._save()
+
+    def forget_devices(self, devices: Iterable[str]) -> None:
+        """The *devices* lost their state (eg. they were trimmed)."""
+        for dev in devices:
+            self.devices.pop(dev, None)
+        self._save()
+
+    def images_for(self, fingerprint: str) -> Optional[str]:
+        """The prefix of the images prefilled as *fingerprint*, if any."""
+        entry = self.images.get(fingerprint)
+        return entry["prefix"] if entry else None
+
+    def record_images(self, fingerprint: str, cluster_id: str, prefix: str) -> None:
+        self.images[fingerprint] = {
+            "cluster": cluster_id,
+            "prefix": prefix,
+            "timestamp": time.time(),
+        }
+        self._save()
+
+    def forget_cluster(self, cluster_id: str) -> None:
+        """Forget the images of cluster *cluster_id*, which was stopped."""
+        self.images = {
+            fp: entry for fp, entry in self.images.items() if entry["cluster"] != cluster_id
+        }
+        self._save()
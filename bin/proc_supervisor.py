@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+Event-driven supervision of the FIO and OSD processes of a run.
+
+Rather than polling one process every few seconds, :class:`ProcessSupervisor`
+opens a pidfd (``os.pidfd_open``) for every process it watches and waits on
+all of them from a single selector loop in a background thread: as soon as
+any process exits, its exit status is collected (``waitpid`` for the FIO
+processes, which are our children; OSDs are only known to have exited) and
+recorded.
+
+An exit is a failure when it was not expected, i.e. not after :meth:`stop`:
+
+  - a FIO process exiting with a non-zero status or killed by a signal,
+  - an OSD process exiting at all.
+
+On the first failure the remaining FIO processes of the point are killed, so
+the point does not wait for the others to finish nor leaves partial results
+of the survivors, and ``on_failure`` is called.  Without pidfd support, the
+processes are polled every ``poll_interval`` seconds instead.
+
+Usage: import proc_supervisor
+
+    sup = ProcessSupervisor(on_failure=lambda ex: logger.error(ex))
+    sup.watch("fio_0", proc.pid)
+    sup.watch("osd.0", osd_pid, kind=OSD, child=False)
+    sup.start()
+    sup.wait()
+    sup.close()
+    sup.save("run_procs.json")
+"""
+
+import json
+import logging
+import os
+import selectors
+import signal
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+__author__ = "Jose J Palacios-Perez"
+
+logger = logging.getLogger(__name__)
+
+FIO = "fio"
+OSD = "osd"
+
+
+class ProcExit:
+    """Exit of a supervised process: status *rc* or *signal* when known."""
+
+    def __init__(
+        self,
+        name: str,
+        pid: int,
+        kind: str,
+        rc: Optional[int] = None,
+        sig: Optional[int] = None,
+        expected: bool = False,
+    ) -> None:
+        self.name = name
+        self.pid = pid
+        self.kind = kind
+        self.rc = rc
+        self.signal = sig
+        self.expected = expected
+        self.timestamp = time.time()
+
+    @property
+    def failed(self) -> bool:
+        if self.expected:
+            return False
+        if self.kind == OSD:
+            return True
+        return bool(self.rc) or self.signal is not None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "pid": self.pid,
+            "kind": self.kind,
+            "rc": self.rc,
+            "signal": self.signal,
+            "expected": self.expected,
+            "failed": self.failed,
+            "timestamp": self.timestamp,
+        }
+
+    def __repr__(self) -> str:
+        status = f"signal {self.signal}" if self.signal is not None else f"rc {self.rc}"
+        return f"{self.kind} {self.name} (pid: {self.pid}) exited with {status}"
+
+
+class _Watched:
+    def __init__(self, name: str, pid: int, kind: str, child: bool) -> None:
+        self.name = name
+        self.pid = pid
+        self.kind = kind
+        self.child = child
+        self.fd: Optional[int] = None
+
+
+class ProcessSupervisor:
+    """
+    Watch processes and react as soon as any of them exits.
+
+    Parameters
+    ----------
+    on_failure : callable, optional
+        Called once, from the supervisor thread, with the :class:`ProcExit`
+        of the first failure (after the FIO processes were torn down).
+    poll_interval : float
+        Seconds between checks when pidfds are not supported.
+    """
+
+    def __init__(
+        self,
+        on_failure: Optional[Callable[[ProcExit], None]] = None,
+        poll_interval: float = 1.0,
+    ) -> None:
+        self.on_failure = on_failure
+        self.poll_interval = poll_interval
+        self.exits: Dict[str, ProcExit] = {}
+        self.failed: Optional[ProcExit] = None
+        self._watched: Dict[str, _Watched] = {}
+        self._expected = False
+        self._lock = threading.Lock()
+        self._done = threading.Condition(self._lock)
+        self._sel = selectors.DefaultSelector()
+        self._wake_r, self._wake_w = os.pipe()
+        self._sel.register(self._wake_r, selectors.EVENT_READ)
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+        self.use_pidfd = hasattr(os, "pidfd_open")
+
+    # ------------------------------------------------------------------
+
+    def watch(self, name: str, pid: int, kind: str = FIO, child: bool = True) -> None:
+        """
+        Watch process *pid*; *child* processes (FIO) are reaped and their
+        status recorded, the others (OSD) only noticed when they exit.
+        """
+        proc = _Watched(name, pid, kind, child)
+        if child and self._not_our_child(pid):
+            self._exited(proc)
+            return
+        if self.use_pidfd:
+            try:
+                proc.fd = os.pidfd_open(pid)
+            except ProcessLookupError:
+                self._exited(proc)
+                return
+            except OSError as e:
+                logger.warning(f"== pidfd_open not supported ({e}), polling ==")
+                self.use_pidfd = False
+        with self._lock:
+            self._watched[name] = proc
+            if proc.fd is not None:
+                self._sel.register(proc.fd, selectors.EVENT_READ, proc)
+        self._wake()
+
+    @staticmethod
+    def _not_our_child(pid: int) -> bool:
+        try:
+            os.waitid(os.P_PID, pid, os.WEXITED | os.WNOHANG | os.WNOWAIT)
+        except ChildProcessError:
+            return True
+        return False
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self, sig: int = signal.SIGINT, pids: Optional[List[int]] = None) -> None:
+        """
+        Send *sig* to *pids* (by default the FIO processes being watched);
+        the exits from now on are expected.
+        """
+        with self._lock:
+            self._expected = True
+            if pids is None:
+                pids = [p.pid for p in self._watched.values() if p.kind == FIO]
+        self._signal(pids, sig)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until every child process has exited; returns ``False`` on
+        timeout.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._done:
+            while any(p.child for p in self._watched.values()):
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._done.wait(remaining)
+        return True
+
+    def close(self) -> None:
+        """Stop watching (the processes are left running)."""
+        with self._lock:
+            self._closed = True
+        self._wake()
+        if self._thread is not None:
+            self._thread.join()
+        with self._lock:
+            for proc in self._watched.values():
+                if proc.fd is not None:
+                    os.close(proc.fd)
+            self._watched.clear()
+        self._sel.close()
+        os.close(self._wake_r)
+        os.close(self._wake_w)
+
+    def exit_codes(self) -> Dict[str, Optional[int]]:
+        return {name: ex.rc for name, ex in self.exits.items()}
+
+    def save(self, path: str, **extra: Any) -> None:
+        """Write the exits (plus *extra* fields) as JSON to *path*."""
+        with open(path, "w") as f:
+            json.dump(
+                {**extra, "exits": [ex.to_dict() for ex in self.exits.values()]},
+                f,
+                indent=2,
+            )
+
+    # ------------------------------------------------------------------
+
+    def _wake(self) -> None:
+        try:
+            os.write(self._wake_w, b"x")
+        except OSError:
+            pass
+
+    @staticmethod
+    def _signal(pids: List[int], sig: int) -> None:
+        for pid in pids:
+            try:
+                os.kill(pid, sig)
+            except (ProcessLookupError, OSError):
+                pass
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                if self._closed:
+                    return
+                polling = any(p.fd is None for p in self._watched.values())
+            events = self._sel.select(self.poll_interval if polling else None)
+            for key, _ in events:
+                if key.fileobj == self._wake_r:
+                    os.read(self._wake_r, 4096)
+                else:
+                    self._exited(key.data)
+            if polling:
+                self._poll()
+
+    def _poll(self) -> None:
+        with self._lock:
+            procs = [p for p in self._watched.values() if p.fd is None]
+        for proc in procs:
+            if proc.child:
+                try:
+                    pid, status = os.waitpid(proc.pid, os.WNOHANG)
+                except ChildProcessError:
+                    self._exited(proc)
+                    continue
+                if pid:
+                    self._exited(proc, status)
+            else:
+                try:
+                    os.kill(proc.pid, 0)
+                except (ProcessLookupError, OSError):
+                    self._exited(proc)
+
+    def _reap(self, proc: _Watched) -> Optional[int]:
+        if not proc.child:
+            return None
+        try:
+            _, status = os.waitpid(proc.pid, 0)
+        except ChildProcessError:
+            return None
+        return status
+
+    def _exited(self, proc: _Watched, status: Optional[int] = None) -> None:
+        if status is None:
+            status = self._reap(proc)
+        rc = sig = None
+        if status is not None:
+            if os.WIFSIGNALED(status):
+                sig = os.WTERMSIG(status)
+            else:
+                rc = os.WEXITSTATUS(status)
+        with self._lock:
+            self._watched.pop(proc.name, None)
+            if proc.fd is not None:
+                self._sel.unregister(proc.fd)
+                os.close(proc.fd)
+                proc.fd = None
+            ex = ProcExit(proc.name, proc.pid, proc.kind, rc, sig, self._expected)
+            self.exits[proc.name] = ex
+            first_failure = ex.failed and self.failed is None
+            if first_failure:
+                self.failed = ex
+            survivors = [p.pid for p in self._watched.values() if p.kind == FIO]
+            self._done.notify_all()
+        if not first_failure:
+            logger.info(f"== {ex} ==")
+            return
+        logger.error(f"== {ex}: tearing down the point ==")
+        self._signal(survivors, signal.SIGKILL)
+        if self.on_failure is not None:
+            self.on_failure(ex)
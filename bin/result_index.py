@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Index of the measured points of a test plan, to resume an interrupted plan.
+
+A full test plan iterates every cluster configuration x OSD count x reactor
+count x workload, and takes most of a day.  Each measured point is keyed by a
+content hash (:func:`point_key`) of what determines its result:
+
+  - the cluster configuration (the ``vstart.sh`` command line and the fields
+    of the configuration other than the ranges iterated),
+  - the build id of Ceph (:func:`build_id`),
+  - the FIO workload definition, including the contents of its ``.fio`` file
+    (:func:`file_digest`),
+  - the iodepth and the numjobs.
+
+Once a point has completed, its key is appended to the index, a JSON-lines
+file ``result_index.jsonl`` in the run directory (flushed and fsync'ed, so a
+crash loses at most the point in progress).  When the plan is launched again,
+the points already in the index are skipped, and a cluster whose points are
+all done is not even started.  A point that failed is recorded as such, but
+is run again.
+
+Usage: import result_index
+
+    index = ResultIndex("/tmp/run/result_index.jsonl")
+    key = point_key(cluster=cmd, build=build_id(), workload=wk, iodepth=4, numjobs=1)
+    if not index.done(key):
+        ...
+        index.record(key, test_name="cyan_1osd_4iodepth")
+"""
+
+import dataclasses
+import hashlib
+import json
+import logging
+import os
+import subprocess
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+__author__ = "Jose J Palacios-Perez"
+
+logger = logging.getLogger(__name__)
+
+DONE = "done"
+FAILED = "failed"
+
+INDEX_NAME = "result_index.jsonl"
+
+
+def _jsonable(obj: Any) -> Any:
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return dataclasses.asdict(obj)
+    if isinstance(obj, (set, frozenset)):
+        return sorted(obj)
+    return str(obj)
+
+
+def point_key(**fields: Any) -> str:
+    """
+    Content hash of *fields*: the SHA-256 of their canonical JSON (sorted
+    keys, dataclasses as dicts), so equal definitions give the same key.
+    """
+    canonical = json.dumps(fields, sort_keys=True, default=_jsonable, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def file_digest(path: Optional[str]) -> Optional[str]:
+    """SHA-256 of the contents of *path*, ``None`` when it does not exist."""
+    if not path or not os.path.isfile(path):
+        return None
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def build_id(ceph_bin: str = "/ceph/build/bin/ceph") -> str:
+    """
+    Build id of Ceph: the output of ``ceph --version``, which carries the git
+    sha of the build; ``unknown`` when it cannot be run.
+    """
+    try:
+        result = subprocess.run(
+            [ceph_bin, "--version"], capture_output=True, text=True, timeout=30
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return "unknown"
+    version = result.stdout.strip()
+    return version if result.returncode == 0 and version else "unknown"
+
+
+class ResultIndex:
+    """
+    Append-only index of the points of a test plan.
+
+    Parameters
+    ----------
+    path : str
+        JSON-lines file of the index, loaded when it exists.  The last entry
+        of a key is the one that counts.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        # Whether the file does not end with a newline (cut by a crash)
+        self._torn = False
+        if os.path.exists(path):
+            self._load()
+
+    def _load(self) -> None:
+        with open(self.path) as f:
+            for lineno, line in enumerate(f, 1):
+                self._torn = not line.endswith("\n")
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # Typically the last line, cut by a crash
+                    logger.warning(f"== {self.path}:{lineno}: skipping corrupt entry ==")
+                    continue
+                self.entries[entry["key"]] = entry
+        logger.info(
+            f"== Result index {self.path}: {sum(map(self.done, self.entries))} points done =="
+        )
+
+    def done(self, key: str) -> bool:
+        """Whether the point *key* has completed."""
+        entry = self.entries.get(key)
+        return entry is not None and entry["status"] == DONE
+
+    def pending(self, keys: Iterable[str]) -> List[str]:
+        """The keys of *keys* not completed yet, in order."""
+        return [key for key in keys if not self.done(key)]
+
+    def record(self, key: str, status: str = DONE, **info: Any) -> None:
+        """Append the outcome of point *key* (plus *info*) to the index."""
+        entry = {"key": key, "status": status, "timestamp": time.time(), **info}
+        self.entries[key] = entry
+        with open(self.path, "a") as f:
+            if self._torn:
+                f.write("\n")
+                self._torn = False
+            f.write(json.dumps(entry, default=_jsonable) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
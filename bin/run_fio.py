@@ -40,11 +40,30 @@ import os
 import signal
 import subprocess
 import sys
-import threading
 import time
-from typing import Dict, List, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Optional, Tuple
 
 import monitoring
+from diskstat_sampler import DEFAULT_DEVICE_REGEX, DiskStatSampler
+from fio_status import FioStatusMonitor
+from iodepth_search import IodepthSearch, point_stats
+from steady_state import SteadyStateDetector
+from osd_admin_socket import AdminSocketError, OSDAdminSockets
+from perf_folder import fold_perf, fold_perf_slices, slice_folded_name
+from postproc_dag import (
+    PROCESS,
+    PostProcessDAG,
+    archive_perf,
+    parse_fio_jsons,
+    render_chart,
+    render_flamegraph,
+    strip_fio_lines,
+)
+from proc_supervisor import FIO, OSD, ProcExit, ProcessSupervisor
+from telemetry_scheduler import TelemetryScheduler, Tick
+from telemetry_store import TelemetryStore
+from thread_sampler import ThreadCPUSampler, append_avg_per_run
 
 __author__ = "Jose J Palacios-Perez (translated from bash)"
 
@@ -179,6 +198,12 @@ PROCS_ORDER: List[bool] = [True, False]
 PACK_DIR = "/packages/"
 
 
+def _timestamp(ts: Optional[float] = None) -> str:
+    """Format the Unix timestamp *ts* (default: now) as used in the dump envelopes."""
+    when = datetime.datetime.fromtimestamp(ts) if ts else datetime.datetime.now()
+    return when.strftime("%Y%m%d_%H%M%S")
+
+
 # ---------------------------------------------------------------------------
 # FioRunner class
 # ---------------------------------------------------------------------------
@@ -193,7 +218,7 @@ class FioRunnerCustom:
     def run(self) -> int:
         # Implement custom logic for running the workload: will return the pid
         # of the FIO process launched, and the caller will monitor it with the
-        # watchdog
+        # supervisor
         logger.info(f"Running custom FIO workload with context: {self.__dict__}")
 
         pool_name = getattr(
@@ -224,7 +249,7 @@ class FioRunnerCustom:
             os.path.join(self.script_dir, self.workload.fio_name),
             # "fio", fio_name,
             f"--output={fio_json}",
-            "--output-format=json",
+            "--output-format=json+",
         ]
         with open(fio_err, "w") as err_f:
             proc = subprocess.Popen(cmd, env=env, stderr=err_f)
@@ -241,6 +266,8 @@ class FioRunner:
 
     SUCCESS = 0
     FAILURE = 1
+    # The point went over max_latency: no retries, skip the deeper iodepths
+    ABORTED = 2
 
     def __init__(self, script_dir: str, run_dir: str) -> None:
         """Initialise the runner with default configuration.
@@ -279,20 +306,60 @@ class FioRunner:
         self.post_proc: bool = False
         self.with_flamegraphs: bool = True
         self.with_mem_profile: bool = False
+        # Record perf over the whole workload loop, split per point afterwards
+        # (see perf_folder.fold_perf_slices), instead of 10s per point
+        self.perf_continuous: bool = False
+        self.perf_freq: int = monitoring.PERF_RECORD_FREQ
+        # Sample OSD metrics over the admin socket instead of `ceph tell`
+        self.use_asok: bool = True
+        self.asok = OSDAdminSockets()
+        # Append OSD dumps to a columnar TelemetryStore instead of
+        # concatenating JSON text (telemetry_store.py exports the legacy JSON)
+        self.use_store: bool = True
+        self.stores: Dict[str, TelemetryStore] = {}
+        # Workers sampling the OSDs of a multi-OSD cluster concurrently
+        self.dump_workers: int = 4
+        # Their pool, kept from the first sample to osd_dump_end()
+        self._dump_pool: Optional[ThreadPoolExecutor] = None
+        # Workers running the post-processing stages (None: the spare cores)
+        self.post_workers: Optional[int] = None
 
         # Tunable parameters
         self.max_latency: int = 20  # ms; threshold for RC heuristic
         self.num_attempts: int = 3
+        # Response curves: follow the FIO JSON status every status_interval
+        # seconds and abort a point after abort_intervals intervals over
+        # max_latency
+        self.live_status: bool = True
+        self.status_interval: int = 1
+        self.abort_intervals: int = 3
+        # Response curves: measure a coarse iodepth grid, then bisect around
+        # the knee (see iodepth_search)
+        self.adaptive_iodepth: bool = False
+        self.iodepth_min_step: int = 1
+        self.iodepth_max_points: int = 0  # 0: no limit
         self.runtime: int = 60  # seconds; overridden from test plan
         self.num_samples: int = 30  # for top measurements
         self.delay_samples: int = 1  # seconds between top samples
+        self.ramp_up: float = 30  # seconds before the collectors start
+        # Start the collectors once the FIO IOPS settle (ramp_up is then the
+        # longest wait): rolling CV of the last steady_window status samples
+        self.steady_state: bool = False
+        self.steady_window: int = 5
+        self.steady_cv: float = 0.05
+        self.rutil_interval: float = 10  # seconds between reactor_utilization samples
+        self.rutil_samples: int = 10
+        self.disk_regex: str = DEFAULT_DEVICE_REGEX  # devices sampled from diskstats
+        self.disk_interval: float = 0.25  # seconds between diskstats samples
+        self.use_top: bool = False  # scrape top -H instead of sampling /proc
 
         # Runtime state (populated by set_globals / run_workload)
         self.osd_id: Dict[str, int] = {}
         self.fio_id: Dict[str, int] = {}
         self.global_fio_id: List[int] = []
-        self.watchdog_enabled: bool = False
+        self.fio_outputs: List[str] = []  # FIO JSON outputs of the last point
         self.fio_rc: int = 0
+        self.fio_exits: List[ProcExit] = []  # process exits of the last point
 
         # Variables set by set_globals()
         self.test_result: str = ""
@@ -314,7 +381,15 @@ class FioRunner:
     # ------------------------------------------------------------------
 
     def osd_dump_start(self, outfile: str) -> None:
-        """Write the opening ``[`` of a JSON array to *outfile*."""
+        """Start the dump *outfile*.
+
+        With :attr:`use_store`, open the :class:`TelemetryStore` the samples
+        for *outfile* are appended to; otherwise write the opening ``[`` of
+        a JSON array.
+        """
+        if self.use_store:
+            self.stores[outfile] = TelemetryStore(TelemetryStore.prefix_of(outfile))
+            return
         with open(outfile, "w") as f:
             f.write("[\n")
 
@@ -322,12 +397,23 @@ class FioRunner:
         """Open stats dump JSON files (tcmalloc and seastar) for non-classic OSDs."""
         if self.osd_type != "classic":
             for dmp_stats in ("dump_tcmalloc_stats", "dump_seastar_stats"):
-                stats_file = outfile.replace("_dump.json", f"_{dmp_stats}.json")
-                with open(stats_file, "w") as f:
-                    f.write("[\n")
+                self.osd_dump_start(outfile.replace("_dump.json", f"_{dmp_stats}.json"))
 
     def osd_dump_end(self, outfile: str) -> None:
-        """Write the closing ``]`` of a JSON array to *outfile*."""
+        """Finish the dump *outfile*.
+
+        A store is closed; it is archived as is, the legacy JSON array being
+        exported from it on demand (``telemetry_store.py``, or ``--json-dump``
+        to write the JSON in the first place).  Otherwise the closing ``]``
+        is appended.
+        """
+        if self._dump_pool is not None:
+            self._dump_pool.shutdown()
+            self._dump_pool = None
+        store = self.stores.pop(outfile, None)
+        if store is not None:
+            store.close()
+            return
         with open(outfile, "a") as f:
             f.write("]\n")
 
@@ -335,12 +421,16 @@ class FioRunner:
         """Close stats dump JSON files for non-classic OSDs."""
         if self.osd_type != "classic":
             for dmp_stats in ("dump_tcmalloc_stats", "dump_seastar_stats"):
-                stats_file = outfile.replace("_dump.json", f"_{dmp_stats}.json")
-                with open(stats_file, "a") as f:
-                    f.write("]\n")
+                self.osd_dump_end(outfile.replace("_dump.json", f"_{dmp_stats}.json"))
 
     def get_json_from_cmd(
-        self, test_name: str, cmd: str, outfile: str, end: str = ""
+        self,
+        test_name: str,
+        cmd: str,
+        outfile: str,
+        end: str = "",
+        ts: Optional[float] = None,
+        osd: int = 0,
     ) -> None:
         """Run *cmd*, wrap the JSON output in a timestamped envelope and append to *outfile*.
         We might deprecate this by concatenating the JSON files by loading them in Python and re-dumping.
@@ -355,9 +445,25 @@ class FioRunner:
             Output file to append to.
         end:
             When ``"end"``, the trailing comma is omitted (last element).
+        ts:
+            Unix timestamp of the sample (e.g. a scheduler tick); defaults to now.
+        osd:
+            OSD the sample was taken from.
+
+        When *outfile* has an open store, the output is appended to the store
+        instead.
         """
-        ts = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
         result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
+        store = self.stores.get(outfile)
+        if store is not None:
+            try:
+                store.append_json(
+                    result.stdout.encode(), ts or time.time(), osd, test_name
+                )
+            except ValueError as e:
+                logger.warning(f"== {cmd}: invalid JSON output: {e} ==")
+            return
+        ts = _timestamp(ts)
         try:
             data = json.loads(result.stdout)
             data_str = json.dumps(data)
@@ -372,19 +478,79 @@ class FioRunner:
         with open(outfile, "a") as f:
             f.write(entry)
 
+    def get_json_from_asok(
+        self,
+        test_name: str,
+        osd: int,
+        prefix: str,
+        outfile: str,
+        end: str = "",
+        ts: Optional[float] = None,
+        **kwargs: Any,
+    ) -> bool:
+        """Run *prefix* on the admin socket of *osd* and append the reply to *outfile*.
+
+        Same envelope as :meth:`get_json_from_cmd`, but the reply is streamed
+        straight from the socket into the file, without forking the ``ceph``
+        CLI nor decoding and re-encoding the JSON payload.
+
+        Returns ``False`` (leaving *outfile* untouched) when the admin socket
+        is not available, so the caller can fall back to ``ceph tell``.
+
+        When *outfile* has an open store, the reply is appended to the store.
+        """
+        client = self.asok.get(osd) if self.use_asok else None
+        if client is None:
+            return False
+        store = self.stores.get(outfile)
+        if store is not None:
+            try:
+                store.append_json(
+                    client.command(prefix, **kwargs), ts or time.time(), osd, test_name
+                )
+            except AdminSocketError as e:
+                logger.warning(f"== admin socket osd.{osd} {prefix} failed: {e} ==")
+                self.asok.discard(osd)
+                return False
+            except ValueError as e:
+                logger.warning(f"== admin socket osd.{osd} {prefix}: bad JSON: {e} ==")
+            return True
+        ts = _timestamp(ts)
+        sep = "" if end == "end" else ","
+        with open(outfile, "ab") as f:
+            start = f.tell()
+            f.write(
+                f'    {{ "timestamp": "{ts}", "label": "{test_name}", "data": '.encode()
+            )
+            try:
+                if client.command_into(f, prefix, **kwargs) == 0:
+                    f.write(b"null")
+            except AdminSocketError as e:
+                logger.warning(f"== admin socket osd.{osd} {prefix} failed: {e} ==")
+                f.truncate(start)
+                self.asok.discard(osd)
+                return False
+            f.write(f" }}{sep}\n".encode())
+        return True
+
     def osd_dump_generic(
         self,
         test_name: str,
         num_samples: int,
-        sleep_secs: int,
+        sleep_secs: float,
         outfile: str,
         metrics: str = "",
         end: str = "",
     ) -> None:
         """Collect OSD metrics in a loop and append JSON entries to *outfile*.
 
+        Uses the OSD admin socket when it can be found (see
+        :mod:`osd_admin_socket`), otherwise the ``ceph tell`` CLI.
+
         Parameters
         ----------
+        sleep_secs:
+            Delay between samples; sub-second values are fine with the admin socket.
         metrics:
             Metrics filter passed to ``dump_metrics``.
             Pass ``"none"`` to omit the filter (equivalent to ``perf dump`` for classic).
@@ -394,29 +560,164 @@ class FioRunner:
         if metrics == "none":
             metrics = ""
 
-        if self.osd_type == "classic":
-            cmd = "/ceph/build/bin/ceph tell osd.0 perf dump"
-        else:
-            cmd = f"/ceph/build/bin/ceph tell osd.0 dump_metrics {metrics}".rstrip()
-
         logger.info(
             f"{GREEN}== OSD type: {self.osd_type}: num_samples: {num_samples}:"
-            f" cmd:{cmd} =={NC}"
+            f" metrics: {metrics or 'all'} =={NC}"
         )
 
         for i in range(num_samples):
             current_end = end
             if not current_end:
                 current_end = "end" if i == num_samples - 1 else "notyet"
-            self.get_json_from_cmd(test_name, cmd, outfile, current_end)
+            self.osd_dump_sample(test_name, outfile, metrics, current_end)
+            time.sleep(sleep_secs)
 
-            if self.osd_type != "classic" and not metrics:
-                for dmp_stats in ("dump_tcmalloc_stats", "dump_seastar_stats"):
-                    lcmd = f"/ceph/build/bin/ceph tell osd.0 {dmp_stats}"
-                    stats_file = outfile.replace("_dump.json", f"_{dmp_stats}.json")
-                    self.get_json_from_cmd(test_name, lcmd, stats_file, current_end)
+    def dump_osds(self) -> List[int]:
+        """Ids of the OSDs to sample: those of :attr:`osd_id`, else OSD 0."""
+        ids = []
+        for name in self.osd_id:
+            _, _, num = name.rpartition(".")
+            if num.isdigit():
+                ids.append(int(num))
+        return sorted(ids) or [0]
+
+    def _dump_commands(self, osd: int, metrics: str) -> List[tuple]:
+        """``(asok prefix, asok kwargs, ceph tell command, outfile suffix)``
+        of each dump taken from *osd* for one sample."""
+        tell = f"/ceph/build/bin/ceph tell osd.{osd}"
+        if self.osd_type == "classic":
+            return [("perf dump", {}, f"{tell} perf dump", "")]
+        cmds = [
+            (
+                "dump_metrics",
+                {"group": metrics},
+                f"{tell} dump_metrics {metrics}".rstrip(),
+                "",
+            )
+        ]
+        if not metrics:
+            for dmp_stats in ("dump_tcmalloc_stats", "dump_seastar_stats"):
+                cmds.append((dmp_stats, {}, f"{tell} {dmp_stats}", dmp_stats))
+        return cmds
+
+    @staticmethod
+    def _dump_outfile(outfile: str, suffix: str) -> str:
+        return outfile.replace("_dump.json", f"_{suffix}.json") if suffix else outfile
+
+    def fetch_osd_json(
+        self, osd: int, prefix: str, cmd: str, **kwargs: Any
+    ) -> bytes:
+        """JSON reply of *prefix* from *osd*: admin socket, else ``ceph tell`` *cmd*."""
+        client = self.asok.get(osd) if self.use_asok else None
+        if client is not None:
+            try:
+                return client.command(prefix, **kwargs)
+            except AdminSocketError as e:
+                logger.warning(f"== admin socket osd.{osd} {prefix} failed: {e} ==")
+                self.asok.discard(osd)
+        result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
+        return result.stdout.encode()
 
-            time.sleep(sleep_secs)
+    def append_osd_json(
+        self,
+        test_name: str,
+        outfile: str,
+        payload: bytes,
+        osd: int,
+        end: str = "",
+        ts: Optional[float] = None,
+    ) -> None:
+        """Append the reply *payload* of *osd* to *outfile*.
+
+        The envelope of the concatenated JSON text carries an ``osd`` field.
+        """
+        store = self.stores.get(outfile)
+        if store is not None:
+            try:
+                store.append_json(payload, ts or time.time(), osd, test_name)
+            except ValueError as e:
+                logger.warning(f"== osd.{osd}: invalid JSON output: {e} ==")
+            return
+        try:
+            data_str = json.dumps(json.loads(payload))
+        except ValueError:
+            data_str = payload.decode(errors="replace").strip() or "null"
+        sep = "" if end == "end" else ","
+        with open(outfile, "a") as f:
+            f.write(
+                f'    {{ "timestamp": "{_timestamp(ts)}", "label": "{test_name}",'
+                f' "osd": {osd}, "data": {data_str} }}{sep}\n'
+            )
+
+    def osd_dump_sample(
+        self,
+        test_name: str,
+        outfile: str,
+        metrics: str = "",
+        end: str = "",
+        ts: Optional[float] = None,
+    ) -> None:
+        """Append a single OSD metrics sample (and the stats dumps) to *outfile*.
+
+        One iteration of :meth:`osd_dump_generic`, also used as the sample
+        callable of the scheduled reactor utilisation collector.
+
+        With several OSDs (see :meth:`dump_osds`) they are all sampled
+        concurrently, on up to :attr:`dump_workers` threads, and the replies
+        are appended in OSD order, each tagged with its OSD id and sharing
+        the timestamp *ts*.
+        """
+        osds = self.dump_osds()
+        if len(osds) > 1:
+            self._osd_dump_sample_all(osds, test_name, outfile, metrics, end, ts)
+            return
+
+        osd = osds[0]
+        for prefix, kwargs, cmd, suffix in self._dump_commands(osd, metrics):
+            dump_file = self._dump_outfile(outfile, suffix)
+            if not self.get_json_from_asok(
+                test_name, osd, prefix, dump_file, end, ts, **kwargs
+            ):
+                self.get_json_from_cmd(test_name, cmd, dump_file, end, ts, osd)
+
+    def _osd_dump_sample_all(
+        self,
+        osds: List[int],
+        test_name: str,
+        outfile: str,
+        metrics: str,
+        end: str,
+        ts: Optional[float],
+    ) -> None:
+        ts = ts or time.time()
+
+        def _fetch(osd: int) -> List[bytes]:
+            return [
+                self.fetch_osd_json(osd, prefix, cmd, **kwargs)
+                for prefix, kwargs, cmd, _ in self._dump_commands(osd, metrics)
+            ]
+
+        if self._dump_pool is None:
+            self._dump_pool = ThreadPoolExecutor(
+                max_workers=max(1, min(self.dump_workers, len(osds))),
+                thread_name_prefix="osd-dump",
+            )
+        replies = list(self._dump_pool.map(_fetch, osds))
+
+        for k, (osd, payloads) in enumerate(zip(osds, replies)):
+            # Only the very last envelope of the sample may close the array
+            sep = end if k == len(osds) - 1 else "notyet"
+            for (_, _, _, suffix), payload in zip(
+                self._dump_commands(osd, metrics), payloads
+            ):
+                self.append_osd_json(
+                    test_name,
+                    self._dump_outfile(outfile, suffix),
+                    payload,
+                    osd,
+                    sep,
+                    ts,
+                )
 
     def osd_dump(
         self,
@@ -440,13 +741,6 @@ class FioRunner:
         """Collect OSD metrics with the given *metrics* filter."""
         self.osd_dump_generic(test_name, num_samples, sleep_secs, outfile, metrics)
 
-    def get_reactor_util(self, test_name: str, test_result: str) -> None:
-        """Collect reactor utilisation: 10 samples, 10 s apart."""
-        rutil_file = f"{test_result}_rutil.json"
-        self.osd_dump_start(rutil_file)
-        self.osd_dump_metrics(test_name, 10, 10, rutil_file, "reactor_utilization")
-        self.osd_dump_end(rutil_file)
-
     def osd_mem_profile(self, outfile: str) -> None:
         """Collect memory profile via gdb (non-classic OSDs only)."""
         if self.osd_type == "classic":
@@ -466,23 +760,47 @@ class FioRunner:
             subprocess.run(gdb_cmd, shell=True, stdout=f, stderr=subprocess.STDOUT)
             f.write("}\n")
 
-    def get_diskstats(self, test_name: str, outfile: str) -> None:
-        """Capture ``/proc/diskstats`` as a JSON entry and append to *outfile*."""
-        ts = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-        result = subprocess.run(
-            ["jc", "--pretty", "/proc/diskstats"], capture_output=True, text=True
-        )
+    def save_thread_stats(self, sampler: ThreadCPUSampler, outfile: str) -> None:
+        """Save the per-thread CPU samples of the last FIO run to *outfile*.
+
+        The per process group means are also appended to :attr:`osd_cpu_avg`,
+        which ``fio_parse_jsons.py`` merges into the results table.
+        """
+        sampler.save_json(outfile)
+        averages = sampler.averages()
+        if averages and self.osd_cpu_avg:
+            append_avg_per_run(self.osd_cpu_avg, averages)
+
+    def save_diskstats(self, sampler: DiskStatSampler) -> None:
+        """Save the diskstats time series of the last FIO run.
+
+        Writes the per-interval IOPS/bandwidth/await/queue depth series to
+        ``<test_name>_diskstats.json``, and the start/end difference to
+        :attr:`disk_stat` (with its heatmaps) and :attr:`disk_out`, as
+        ``diskstat_diff.py`` used to.
+        """
+        sampler.save_json(f"{self.test_name}_diskstats.json")
+        diff = sampler.first_last_diff()
+        if not diff:
+            return
+        with open(self.disk_stat, "w") as f:
+            json.dump(diff, f, indent=4, sort_keys=True)
         try:
-            data = json.loads(result.stdout)
-            data_str = json.dumps(data)
-        except (json.JSONDecodeError, ValueError):
-            data_str = result.stdout.strip() or "null"
+            from diskstat_diff import DiskStatEntry
 
-        entry = (
-            f'{{ "timestamp": "{ts}", "label": "{test_name}", "data": {data_str} }}\n'
-        )
-        with open(outfile, "a") as f:
-            f.write(entry)
+            ds = DiskStatEntry(self.disk_stat, self.disk_regex, self.run_dir)
+            first, last = (
+                ds.filter_metrics(
+                    [{"device": dev, **vals} for dev, vals in snap.items()]
+                )
+                for snap in (sampler.snapshot(0), sampler.snapshot(-1))
+            )
+            ds.get_diff(first, last)
+            with open(self.disk_out, "a") as f:
+                f.write(f"{ds.df}\n")
+            ds.make_heatmap(ds.df)
+        except Exception as e:
+            logger.warning(f"== diskstat heatmaps failed: {e} ==")
 
     # ------------------------------------------------------------------
     # Job-spec / globals setup
@@ -544,7 +862,9 @@ class FioRunner:
         self.top_pid_list = f"{self.test_result}_pid_list"
         self.top_pid_json = f"{self.test_result}_pid.json"
 
-        if monitoring.TOP_FILTER == "cores":
+        if not self.use_top:
+            self.osd_cpu_avg = f"{self.test_result}_threads_cpu.json"
+        elif monitoring.TOP_FILTER == "cores":
             self.osd_cpu_avg = f"{self.test_result}_cores.json"
         else:
             self.osd_cpu_avg = f"{self.test_result}_cpu_avg.json"
@@ -623,60 +943,185 @@ class FioRunner:
     # Watchdog
     # ------------------------------------------------------------------
 
-    def watchdog_proc(self, proc_name: str, proc_pid: int) -> None:
-        """Monitor *proc_pid*; clean up all FIO processes if it exits unexpectedly.
-        We might need to deprecate this since run_balanced_osd.py has a similar
-        watchdog that monitors both OSD and FIO processes; but for now we want
-        to maintain the same watchdog logic as run_fio.sh.
-
-        Parameters
-        ----------
-        proc_name:
-            Human-readable name of the process being watched.
-        proc_pid:
-            PID to monitor.
-        """
-        while self.watchdog_enabled:
+    def kill_all_fio(self) -> None:
+        """Send SIGKILL to all tracked FIO processes."""
+        for pid in list(self.global_fio_id):
             try:
-                os.kill(proc_pid, 0)
+                os.kill(pid, signal.SIGKILL)
+                logger.info(f"== Killed FIO process (pid: {pid}) ==")
             except (ProcessLookupError, OSError):
-                break
-            time.sleep(5)
+                pass
 
-        if not self.watchdog_enabled:
-            return
+    # ------------------------------------------------------------------
+    # Telemetry collectors
+    # ------------------------------------------------------------------
 
-        self.watchdog_enabled = False
-        logger.info(
-            f"== Watchdog: Process {proc_name} (pid: {proc_pid}) has exited! =="
-        )
+    def register_collectors(
+        self,
+        sched: TelemetryScheduler,
+        with_flamegraphs: bool,
+        disk_sampler: Optional[DiskStatSampler] = None,
+    ) -> None:
+        """Register the telemetry collectors of a FIO run with *sched*.
+
+        *disk_sampler* is sampled every :attr:`disk_interval` seconds from
+        the start.  The other collectors start :attr:`ramp_up` seconds after
+        the scheduler and share its clock: perf (one-shot, it runs for the
+        whole measurement window), the per-thread CPU of the OSD and FIO
+        processes every :attr:`delay_samples` seconds (or a one-shot ``top``
+        when :attr:`use_top` is set), and for Crimson the reactor
+        utilisation sampled every :attr:`rutil_interval` seconds.  With
+        :attr:`steady_state` these are gated: they start as soon as
+        :meth:`register_steady_state` detects a steady state, at the latest
+        after :attr:`ramp_up`.
+        """
+        osd_pids_str = ",".join(str(v) for v in self.osd_id.values())
+        fio_pids_str = ",".join(str(v) for v in self.fio_id.values())
+        all_pids = ",".join(p for p in (osd_pids_str, fio_pids_str) if p)
+        test_name = self.test_name
+        top_out_name = self.test_result if self.response_curve else test_name
 
-        try:
-            _, status = os.waitpid(proc_pid, 0)
-            rc = os.WEXITSTATUS(status)
-        except ChildProcessError:
-            rc = self.fio_rc
+        if not self.response_curve:
+            with open(self.top_pid_list, "w") as f:
+                f.write(f"OSD: {osd_pids_str}\n")
+                f.write(f"FIO: {fio_pids_str}\n")
+            with open(self.top_pid_json, "w") as f:
+                osd_list = [int(x) for x in osd_pids_str.split(",") if x]
+                fio_list = [int(x) for x in fio_pids_str.split(",") if x]
+                json.dump({"OSD": osd_list, "FIO": fio_list}, f)
 
-        if rc == 0 or self.fio_rc == 0:
-            logger.info(
-                f"== Watchdog: Process {proc_name} (pid: {proc_pid})"
-                " completed successfully! =="
+        if disk_sampler is not None:
+            sched.register(
+                "diskstats",
+                lambda tick: disk_sampler.sample(tick.wall),
+                interval=self.disk_interval,
+                blocking=False,
+            )
+
+        # Monitor OSD with perf
+        if not self.skip_osd_mon and osd_pids_str:
+            logger.info(f"== Profiling OSD {osd_pids_str} with perf ==")
+            sched.register_once(
+                "perf",
+                lambda tick: monitoring.mon_perf(
+                    osd_pids_str,
+                    test_name,
+                    with_flamegraphs and not self.perf_continuous,
+                    self.runtime,
+                ),
+                delay=self.ramp_up,
+                gated=self.steady_state,
             )
+
+        # Monitor all pids threads, from /proc or with top
+        if self.use_top:
+            sched.register_once(
+                "top",
+                lambda tick: monitoring.mon_measure(
+                    all_pids,
+                    f"{top_out_name}_top.out",
+                    self.top_out_list,
+                    self.num_samples,
+                    self.delay_samples,
+                ),
+                delay=self.ramp_up,
+                gated=self.steady_state,
+            )
+        else:
+            thr_sampler = ThreadCPUSampler(
+                {
+                    "OSD": [int(x) for x in osd_pids_str.split(",") if x],
+                    "FIO": [int(x) for x in fio_pids_str.split(",") if x],
+                }
+            )
+            threads_file = f"{test_name}_threads.json"
+            # The first sample only sets the baseline of each thread
+            sched.register(
+                "threads",
+                lambda tick: thr_sampler.sample(tick.wall),
+                interval=self.delay_samples,
+                num_samples=self.num_samples + 1,
+                delay=self.ramp_up,
+                gated=self.steady_state,
+                on_stop=lambda: self.save_thread_stats(thr_sampler, threads_file),
+            )
+
+        if self.skip_osd_mon:
             return
 
-        logger.error(f"== Watchdog: Process {proc_name} (pid: {proc_pid}) FAILED! ==")
-        self.kill_all_fio()
-        self.tidyup(self.test_result)
-        sys.exit(1)
+        # OSD metrics during the FIO run
+        if self.osd_type != "classic":
+            rutil_file = f"{self.test_result}_rutil.json"
+            self.osd_dump_start(rutil_file)
+
+            def _rutil(tick: Tick) -> None:
+                # Leading separator: the array stays valid if we are stopped early
+                if rutil_file not in self.stores and os.path.getsize(
+                    rutil_file
+                ) > len("[\n"):
+                    with open(rutil_file, "a") as f:
+                        f.write(",")
+                self.osd_dump_sample(
+                    test_name, rutil_file, "reactor_utilization", "end", tick.wall
+                )
 
-    def kill_all_fio(self) -> None:
-        """Send SIGKILL to all tracked FIO processes."""
-        for pid in list(self.global_fio_id):
-            try:
-                os.kill(pid, signal.SIGKILL)
-                logger.info(f"== Killed FIO process (pid: {pid}) ==")
-            except (ProcessLookupError, OSError):
-                pass
+            sched.register(
+                "rutil",
+                _rutil,
+                interval=self.rutil_interval,
+                num_samples=self.rutil_samples,
+                delay=self.ramp_up,
+                gated=self.steady_state,
+                on_stop=lambda: self.osd_dump_end(rutil_file),
+            )
+
+    def register_steady_state(
+        self, sched: TelemetryScheduler, monitors: List[FioStatusMonitor]
+    ) -> SteadyStateDetector:
+        """Release the gated collectors of *sched* once the FIO IOPS settle.
+
+        Every :attr:`status_interval` seconds the IOPS of the last status
+        interval of each FIO process are summed and fed to a
+        :class:`SteadyStateDetector`.  The timeline and the end of the
+        warm-up (the release time, or :attr:`ramp_up` if the IOPS never
+        settled) are saved to ``<test_name>_steady.json`` so the analysis
+        can exclude the warm-up samples.
+        """
+        detector = SteadyStateDetector(self.steady_window, self.steady_cv)
+        seen = [0] * len(monitors)
+        test_name = self.test_name
+
+        def _steady(tick: Tick) -> None:
+            if detector.start is None:
+                detector.start = tick.wall
+            fresh = [len(m.iops) > n for m, n in zip(monitors, seen)]
+            if not all(fresh):
+                return
+            seen[:] = [len(m.iops) for m in monitors]
+            iops = sum(m.iops[-1][1] for m in monitors)
+            settled = detector.settled
+            if detector.update(tick.wall, iops=iops) and not settled:
+                sched.release()
+
+        def _save() -> None:
+            warmup_end = sched.gate_wall()
+            if warmup_end is None:
+                warmup_end = sched.wall_start + self.ramp_up
+            detector.save(
+                f"{test_name}_steady.json",
+                warmup_end,
+                test_name=test_name,
+                ramp_up=self.ramp_up,
+            )
+
+        sched.register(
+            "steady",
+            _steady,
+            interval=self.status_interval,
+            blocking=False,
+            on_stop=_save,
+        )
+        return detector
 
     # ------------------------------------------------------------------
     # Core workload execution
@@ -695,19 +1140,38 @@ class FioRunner:
         """Run a single FIO workload iteration.
 
         Launches ``num_procs`` FIO processes (each as a separate OS process),
-        starts monitoring threads, waits for FIO completion, and evaluates
-        the response-curve heuristic.
+        drives the telemetry collectors from a :class:`TelemetryScheduler`,
+        waits for FIO completion, and evaluates the response-curve heuristic.
+
+        For response curves (unless :attr:`live_status` is off) the FIO JSON
+        status is followed with a :class:`FioStatusMonitor`, and all the FIO
+        processes are interrupted as soon as the latency is over
+        :attr:`max_latency` for :attr:`abort_intervals` status intervals.
 
         Returns
         -------
         int
-            :attr:`SUCCESS` or :attr:`FAILURE`.
+            :attr:`SUCCESS`, :attr:`FAILURE` or :attr:`ABORTED`.
         """
         fio_pids: List[int] = []
+        self.fio_outputs = []
+        monitors: List[FioStatusMonitor] = []
+        check_latency = (
+            self.response_curve and not self.rc_skip_heuristic and self.live_status
+        )
+        live = check_latency or self.steady_state
+        mop = WORKLOAD_MODE.get(workload, "write")
 
-        # Capture diskstats before launching FIO
-        with open(self.disk_stat, "w") as f:
-            subprocess.run(["jc", "--pretty", "/proc/diskstats"], stdout=f)
+        supervisor = ProcessSupervisor()
+
+        def _abort(mon: FioStatusMonitor) -> None:
+            # FIO writes its final report when interrupted; the supervisor
+            # does not take the exit statuses as failures
+            supervisor.stop(signal.SIGINT, fio_pids)
+
+        # Sample diskstats from before launching FIO until it completes
+        disk_sampler = DiskStatSampler(self.disk_regex)
+        disk_sampler.sample()
 
         workload_full = WORKLOAD_MAP.get(workload, workload)
 
@@ -725,7 +1189,8 @@ class FioRunner:
             fio_name = os.path.join(
                 self.fio_jobs, f"{self.fio_job_spec}{workload_full}.fio"
             )
-            log_name = self.test_result if self.response_curve else test_name
+            # One set of per-interval logs per process and point, as the JSON
+            log_name = test_name
 
             env = os.environ.copy()
             env.update(
@@ -741,22 +1206,44 @@ class FioRunner:
             # FIO benchmark runs as a separate process: we might use a separate folder, so the fio-plot would be easier to run
             fio_json = os.path.join(self.run_dir, f"fio_{test_name}.json")
             fio_err = os.path.join(self.run_dir, f"fio_{test_name}.err")
+            self.fio_outputs.append(fio_json)
             cmd = [
                 "taskset",
                 "-ac",
                 self.fio_cores,
                 "fio",
                 fio_name,
-                f"--output={fio_json}",
-                "--output-format=json",
             ]
-            with open(fio_err, "w") as err_f:
-                proc = subprocess.Popen(cmd, env=env, stderr=err_f)
+            if live:
+                # The status reports and the final report go to stdout
+                cmd += [
+                    "--output-format=json+",
+                    f"--status-interval={self.status_interval}",
+                ]
+                with open(fio_err, "w") as err_f:
+                    proc = subprocess.Popen(
+                        cmd, env=env, stdout=subprocess.PIPE, stderr=err_f
+                    )
+                mon = FioStatusMonitor(
+                    proc.stdout,
+                    fio_json,
+                    mop,
+                    self.max_latency,
+                    self.abort_intervals if check_latency else 0,
+                    on_abort=_abort,
+                )
+                mon.start()
+                monitors.append(mon)
+            else:
+                cmd += [f"--output={fio_json}", "--output-format=json+"]
+                with open(fio_err, "w") as err_f:
+                    proc = subprocess.Popen(cmd, env=env, stderr=err_f)
 
             last_fio_pid = proc.pid
             self.fio_id[f"fio_{i}"] = last_fio_pid
             self.global_fio_id.append(last_fio_pid)
             fio_pids.append(last_fio_pid)
+            supervisor.watch(f"fio_{i}", last_fio_pid)
             logger.info(
                 f"== Launched FIO (pid: {last_fio_pid}) {fio_name}"
                 f" with RBD_NAME=fio_test_{i} IO_DEPTH={io} NUM_JOBS={job}"
@@ -766,88 +1253,50 @@ class FioRunner:
         if not fio_pids:
             return self.FAILURE
 
-        # Start watchdog over the first FIO process
-        first_pid = self.fio_id.get("fio_0", fio_pids[0])
-        logger.info(f"Starting watchdog over proc {first_pid} ...")
-        self.watchdog_enabled = True
-        watchdog_thread = threading.Thread(
-            target=self.watchdog_proc, args=("FIO", first_pid), daemon=True
-        )
-        watchdog_thread.start()
-
-        time.sleep(30)  # ramp-up time
-
-        # Monitor OSD with perf (non-blocking background thread)
-        if not self.skip_osd_mon:
-            osd_pids = ",".join(str(v) for v in self.osd_id.values())
-            if osd_pids:
-                logger.info(f"== Profiling OSD {osd_pids} with perf ==")
-                threading.Thread(
-                    target=monitoring.mon_perf,
-                    args=(osd_pids, self.test_name, with_flamegraphs, self.runtime),
-                    daemon=True,
-                ).start()
-
-        # Monitor all pids with top (non-blocking background thread)
-        all_pids = ",".join(
-            [str(v) for v in self.osd_id.values()]
-            + [str(v) for v in self.fio_id.values()]
+        # Watch every FIO and OSD process: any unexpected exit tears down the
+        # FIO processes of the point at once
+        for osd_name, osd_pid in self.osd_id.items():
+            supervisor.watch(osd_name, osd_pid, kind=OSD, child=False)
+        supervisor.start()
+
+        # All collectors run from one scheduler loop, starting after ramp-up
+        sched = TelemetryScheduler()
+        self.register_collectors(sched, with_flamegraphs, disk_sampler)
+        if self.steady_state and monitors:
+            self.register_steady_state(sched, monitors)
+        sched.start()
+
+        # Wait for all the FIO processes (or the first failure)
+        supervisor.wait()
+        supervisor.close()
+        self.fio_exits = list(supervisor.exits.values())
+        self.fio_rc = next(
+            (ex.rc or 1 for ex in self.fio_exits if ex.kind == FIO and ex.failed), 0
         )
-        osd_pids_str = ",".join(str(v) for v in self.osd_id.values())
-        fio_pids_str = ",".join(str(v) for v in self.fio_id.values())
-        top_out_name = self.test_result if self.response_curve else self.test_name
-
-        if not self.response_curve:
-            with open(self.top_pid_list, "w") as f:
-                f.write(f"OSD: {osd_pids_str}\n")
-                f.write(f"FIO: {fio_pids_str}\n")
-            with open(self.top_pid_json, "w") as f:
-                osd_list = [int(x) for x in osd_pids_str.split(",") if x]
-                fio_list = [int(x) for x in fio_pids_str.split(",") if x]
-                json.dump({"OSD": osd_list, "FIO": fio_list}, f)
-
-        threading.Thread(
-            target=monitoring.mon_measure,
-            args=(
-                all_pids,
-                f"{top_out_name}_top.out",
-                self.top_out_list,
-                self.num_samples,
-                self.delay_samples,
-            ),
-            daemon=True,
-        ).start()
-
-        # OSD metrics and diskstats during the FIO run
-        if not self.skip_osd_mon:
-            if self.osd_type != "classic":
-                threading.Thread(
-                    target=self.get_reactor_util,
-                    args=(self.test_name, self.test_result),
-                    daemon=True,
-                ).start()
-            self.get_diskstats(self.test_name, f"{self.test_result}_diskstats.json")
-
-        # Wait for the last FIO process
-        last_pid = fio_pids[-1]
-        try:
-            _, status = os.waitpid(last_pid, 0)
-            self.fio_rc = os.WEXITSTATUS(status)
-        except ChildProcessError:
-            self.fio_rc = 0
-        self.watchdog_enabled = False
+        sched.stop()
+        # The monitors write the FIO JSON output when the stream ends
+        for mon in monitors:
+            mon.join()
+        aborted = any(mon.aborted for mon in monitors)
         logger.info(f"FIO completed with rc: {self.fio_rc}")
-
-        # Capture diskstats after FIO completes
-        result = subprocess.run(
-            f"jc --pretty /proc/diskstats"
-            f" | python3 {self.script_dir}/diskstat_diff.py -a {self.disk_stat}",
-            shell=True,
-            capture_output=True,
-            text=True,
+        supervisor.save(
+            f"{self.test_result or test_prefix}_{job}job_{io}io_procs.json",
+            workload=workload_full,
         )
-        with open(self.disk_out, "a") as f:
-            f.write(result.stdout)
+
+        # Last diskstats sample after FIO completes
+        disk_sampler.sample()
+        disk_sampler.close()
+        self.save_diskstats(disk_sampler)
+
+        failed = supervisor.failed
+        if failed is not None:
+            if failed.kind == OSD:
+                logger.error(f"== {failed}, quitting ==")
+                self.kill_all_fio()
+                self.tidyup(self.test_result)
+                sys.exit(1)
+            return self.FAILURE
 
         # Filter stray FIO error lines from the JSON output
         fio_json = os.path.join(self.run_dir, f"fio_{self.test_name}.json")
@@ -859,9 +1308,11 @@ class FioRunner:
                 text=True,
             )
 
+        if aborted:
+            return self.ABORTED
+
         # Response-curve latency heuristic
         if self.response_curve and not self.rc_skip_heuristic:
-            mop = WORKLOAD_MODE.get(workload, "write")
             result = subprocess.run(
                 f"jq '.jobs | .[] | .{mop}.clat_ns.mean/1000000' {fio_json}",
                 shell=True,
@@ -884,6 +1335,123 @@ class FioRunner:
     # Workload loop
     # ------------------------------------------------------------------
 
+    def run_point(
+        self,
+        workload: str,
+        single: bool,
+        with_flamegraphs: bool,
+        test_prefix: str,
+        workload_name: str,
+        job: int,
+        io: int,
+    ) -> int:
+        """Run the (numjobs, iodepth) point, retrying up to :attr:`num_attempts`.
+
+        Exits when all the attempts fail.
+
+        Returns
+        -------
+        int
+            :attr:`SUCCESS` or :attr:`ABORTED`.
+        """
+        num_attempts = 0
+        rc = self.FAILURE
+        while num_attempts < self.num_attempts and rc == self.FAILURE:
+            logger.info(
+                f"== Attempt {num_attempts + 1} for job {job}"
+                f" with io depth {io} =="
+            )
+            rc = self.run_workload(
+                workload,
+                single,
+                with_flamegraphs,
+                test_prefix,
+                workload_name,
+                job,
+                io,
+            )
+            if rc == self.FAILURE:
+                logger.warning(
+                    f"== Attempt {num_attempts + 1} failed, retrying... =="
+                )
+                num_attempts += 1
+            elif rc == self.ABORTED:
+                logger.warning(
+                    f"== Latency over {self.max_latency}(ms) with io"
+                    f" depth {io}, skipping the deeper io depths =="
+                )
+            else:
+                logger.info(
+                    f"{GREEN}== Attempt {num_attempts + 1} succeeded =={NC}"
+                )
+        if rc == self.FAILURE:
+            logger.error(
+                f"{RED}== All attempts failed for job {job}"
+                f" with io depth {io}, exiting... =={NC}"
+            )
+            self.tidyup(self.test_result)
+            sys.exit(1)
+        return rc
+
+    def dump_point(self, end: str) -> None:
+        """OSD dump after a point; *end* is ``"end"`` after the last one."""
+        if not self.skip_osd_mon:
+            self.osd_dump(
+                self.test_name,
+                1,
+                1,
+                f"{self.test_result}_dump.json",
+                end,
+            )
+
+    def point_stats(self, workload: str) -> Tuple[float, float]:
+        """``(IOPS, latency in ms)`` of the last point, from its FIO outputs."""
+        reports = []
+        for path in self.fio_outputs:
+            try:
+                with open(path) as f:
+                    reports.append(json.load(f))
+            except (OSError, ValueError) as e:
+                logger.warning(f"== Cannot read FIO output {path}: {e} ==")
+        return point_stats(reports, WORKLOAD_MODE.get(workload, "write"))
+
+    def run_iodepth_search(
+        self,
+        workload: str,
+        single: bool,
+        with_flamegraphs: bool,
+        test_prefix: str,
+        workload_name: str,
+        job: int,
+        iodepth_list: List[str],
+    ) -> IodepthSearch:
+        """Measure the iodepths chosen by an :class:`IodepthSearch` for *job*.
+
+        *iodepth_list* is the coarse grid; the points measured and the reason
+        for each are saved to ``<test_result>_<job>job_iodepth_search.json``.
+        """
+        search = IodepthSearch(
+            [int(io) for io in iodepth_list],
+            self.max_latency,
+            self.iodepth_min_step,
+            self.iodepth_max_points,
+        )
+        io = search.next_point()
+        while io is not None:
+            rc = self.run_point(
+                workload, single, with_flamegraphs, test_prefix, workload_name, job, io
+            )
+            iops, latency = self.point_stats(workload)
+            search.record(io, iops, latency, aborted=rc == self.ABORTED)
+            io = search.next_point()
+            self.dump_point("notyet" if io is not None else "end")
+        search.save(
+            f"{self.test_result}_{job}job_iodepth_search.json",
+            workload=workload,
+            numjobs=job,
+        )
+        return search
+
     def run_workload_loop(
         self,
         workload: str,
@@ -895,7 +1463,10 @@ class FioRunner:
         """Iterate over all (numjobs × iodepth) combinations for *workload*.
 
         Handles retries (up to :attr:`num_attempts`), optional OSD dump
-        bookending, and calls :meth:`post_process` on completion.
+        bookending, and calls :meth:`post_process` on completion.  A point
+        aborted over the latency threshold is not retried, and the deeper
+        iodepths of its numjobs are skipped.  With :attr:`adaptive_iodepth`
+        the iodepths are chosen by :meth:`run_iodepth_search` instead.
         """
         self.set_globals(workload, single, with_flamegraphs, test_prefix, workload_name)
 
@@ -907,65 +1478,95 @@ class FioRunner:
 
         iodepth_list = self.range_iodepth.split()
 
-        for job in self.range_numjobs.split():
-            for io in iodepth_list:
-                num_attempts = 0
-                rc = self.FAILURE
-                while num_attempts < self.num_attempts and rc == self.FAILURE:
-                    logger.info(
-                        f"== Attempt {num_attempts + 1} for job {job}"
-                        f" with io depth {io} =="
-                    )
-                    rc = self.run_workload(
-                        workload,
-                        single,
-                        with_flamegraphs,
-                        test_prefix,
-                        workload_name,
-                        int(job),
-                        int(io),
-                    )
-                    if rc == self.FAILURE:
-                        logger.warning(
-                            f"== Attempt {num_attempts + 1} failed, retrying... =="
-                        )
-                        num_attempts += 1
-                    else:
-                        logger.info(
-                            f"{GREEN}== Attempt {num_attempts + 1} succeeded =={NC}"
-                        )
-                        if not self.skip_osd_mon:
-                            end = "end" if io == iodepth_list[-1] else "notyet"
-                            self.osd_dump(
-                                self.test_name,
-                                1,
-                                1,
-                                f"{self.test_result}_dump.json",
-                                end,
-                            )
-                if rc == self.FAILURE:
-                    logger.error(
-                        f"{RED}== All attempts failed for job {job}"
-                        f" with io depth {io}, exiting... =={NC}"
-                    )
-                    self.tidyup(self.test_result)
-                    sys.exit(1)
+        perf_proc = self.start_perf_recording(with_flamegraphs)
+        try:
+            self._run_points(
+                workload, single, with_flamegraphs, test_prefix, workload_name, iodepth_list
+            )
+        finally:
+            if perf_proc is not None:
+                monitoring.mon_perf_stop(perf_proc)
 
         if not self.skip_osd_mon:
             dump_file = f"{self.test_result}_dump.json"
             self.osd_dump_end(dump_file)
             self.osd_dump_stats_end(dump_file)
+            self.asok.close()
             if self.with_mem_profile:
                 self.osd_mem_profile(f"{self.test_result}_memprofile.out")
 
         self.post_process()
 
+    def start_perf_recording(
+        self, with_flamegraphs: bool
+    ) -> Optional[subprocess.Popen]:
+        """
+        With :attr:`perf_continuous`, start recording the OSD with perf for
+        the whole workload loop into ``<test_result>_perf.data``; the
+        samples are split per point in :meth:`post_process`.
+        """
+        if not (self.perf_continuous and with_flamegraphs) or self.skip_osd_mon:
+            return None
+        osd_pids_str = ",".join(str(v) for v in self.osd_id.values())
+        if not osd_pids_str:
+            return None
+        logger.info(f"== Recording OSD {osd_pids_str} with perf for the whole loop ==")
+        return monitoring.mon_perf_record(
+            osd_pids_str, f"{self.test_result}_perf.data", self.perf_freq
+        )
+
+    def _run_points(
+        self,
+        workload: str,
+        single: bool,
+        with_flamegraphs: bool,
+        test_prefix: str,
+        workload_name: str,
+        iodepth_list: List[str],
+    ) -> None:
+        """Run the points of :meth:`run_workload_loop`, for each numjobs."""
+        for job in self.range_numjobs.split():
+            if self.adaptive_iodepth:
+                self.run_iodepth_search(
+                    workload,
+                    single,
+                    with_flamegraphs,
+                    test_prefix,
+                    workload_name,
+                    int(job),
+                    iodepth_list,
+                )
+                continue
+            for io in iodepth_list:
+                rc = self.run_point(
+                    workload,
+                    single,
+                    with_flamegraphs,
+                    test_prefix,
+                    workload_name,
+                    int(job),
+                    int(io),
+                )
+                last = rc == self.ABORTED or io == iodepth_list[-1]
+                self.dump_point("end" if last else "notyet")
+                if rc == self.ABORTED:
+                    break
+
     # ------------------------------------------------------------------
     # Post-processing
     # ------------------------------------------------------------------
 
     def post_process(self) -> None:
-        """Filter and chart FIO results and perf data after all workloads complete."""
+        """
+        Filter and chart FIO results and perf data after all workloads complete.
+
+        The stages run concurrently on :attr:`post_workers` workers, each once
+        those it depends on are done (see :class:`postproc_dag.PostProcessDAG`):
+        the top filter and the FIO JSON clean-up before the FIO results are
+        parsed, which precedes the gnuplot charts, while the flamegraph of each
+        perf file is folded independently.
+        """
+        dag = PostProcessDAG(self.post_workers)
         if self.response_curve:
             osd_pids = ",".join(str(v) for v in self.osd_id.values())
             fio_pids = ",".join(str(v) for v in self.global_fio_id)
@@ -976,77 +1577,124 @@ class FioRunner:
                 osd_list = [int(x) for x in osd_pids.split(",") if x]
                 fio_list = [int(x) for x in fio_pids.split(",") if x]
                 json.dump({"OSD": osd_list, "FIO": fio_list}, f)
-            monitoring.mon_filter_top(
-                f"{self.test_result}_top.out",
-                self.osd_cpu_avg,
-                self.top_pid_json,
-                self.num_samples,
-                monitoring.TOP_FILTER,
-            )
+            top_files = [f"{self.test_result}_top.out"] if self.use_top else []
+        elif self.use_top:
+            top_files = [
+                top_file
+                for top_file in self._read_list(self.top_out_list)
+                if os.path.exists(top_file)
+            ]
         else:
-            for top_file in self._read_list(self.top_out_list):
-                if os.path.exists(top_file):
-                    monitoring.mon_filter_top(
-                        top_file,
-                        self.osd_cpu_avg,
-                        self.top_pid_json,
-                        self.num_samples,
-                        monitoring.TOP_FILTER,
-                    )
+            top_files = []
+        # All filters write the same CPU average file, so they are serialised
+        prev: List[str] = []
+        for i, top_file in enumerate(top_files):
+            prev = [
+                dag.add(
+                    f"top_{i}",
+                    monitoring.mon_filter_top,
+                    top_file,
+                    self.osd_cpu_avg,
+                    self.top_pid_json,
+                    self.num_samples,
+                    monitoring.TOP_FILTER,
+                    after=prev,
+                )
+            ]
 
-        # Post-process FIO JSON outputs
-        if os.path.exists(self.osd_test_list) and os.path.exists(self.osd_cpu_avg):
-            for fio_json in self._read_list(self.osd_test_list):
+        # Post-process FIO JSON outputs, once the CPU average is available
+        fio_jsons: List[str] = []
+        stripped: List[str] = []
+        if os.path.exists(self.osd_test_list):
+            for i, fio_json in enumerate(self._read_list(self.osd_test_list)):
                 if os.path.exists(fio_json):
-                    subprocess.run(["sed", "-i", "/^fio:/d", fio_json])
-            result = subprocess.run(
-                f"python3 {self.script_dir}/fio_parse_jsons.py"
-                f" -c {self.osd_test_list}"
-                f" -t {self.test_result}"
-                f" -a {self.osd_cpu_avg}",
-                shell=True,
-                capture_output=True,
-                text=True,
-            )
-            with open(f"{self.test_result}_json.out", "w") as f:
-                f.write(result.stdout)
+                    fio_jsons.append(fio_json)
+                    stripped.append(dag.add(f"strip_{i}", strip_fio_lines, fio_json))
+            deps = prev + stripped
+            prev = [
+                dag.add(
+                    "fio_parse_jsons",
+                    parse_fio_jsons,
+                    self.osd_test_list,
+                    f"{self.test_result}_json.out",
+                    self.osd_cpu_avg,
+                    self.test_result,
+                    directory=os.getcwd(),
+                    after=deps,
+                    kind=PROCESS,
+                )
+            ]
 
         # Generate gnuplot charts
         for plot_file in glob.glob("*.plot"):
-            subprocess.run(
-                ["gnuplot", plot_file],
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL,
-            )
+            dag.add(f"chart_{plot_file}", render_chart, plot_file, after=prev)
 
         # Process perf flamegraphs
         if self.with_flamegraphs:
             for perf_file in glob.glob("*perf.out"):
                 fg_file = perf_file.replace("perf.out", "fg.svg")
-                merged = f"{perf_file}_merged"
+                folded = f"{perf_file}_folded"
                 title = perf_file.replace("perf.out", "")
-                cmd = (
-                    f"perf script -i {perf_file} | c++filt |"
-                    f" {PACK_DIR}/FlameGraph/stackcollapse-perf.pl |"
-                    " sed -e 's/perf-crimson-ms/reactor/g'"
-                    r" -e 's/reactor-[0-9]\+/reactor/g'"
-                    r" -e 's/msgr-worker-[0-9]\+/msgr-worker/g'"
-                    f" > {merged}"
+                fold = dag.add(
+                    f"fold_{perf_file}",
+                    fold_perf,
+                    perf_file,
+                    folded,
+                    perf_file.replace("perf.out", "fg_top.json"),
+                    kind=PROCESS,
+                )
+                render = dag.add(
+                    f"flamegraph_{perf_file}",
+                    render_flamegraph,
+                    folded,
+                    fg_file,
+                    title,
+                    PACK_DIR,
+                    after=[fold],
+                )
+                dag.add(
+                    f"archive_{perf_file}",
+                    archive_perf,
+                    perf_file,
+                    folded,
+                    after=[render],
                 )
-                subprocess.run(cmd, shell=True)
-                cmd2 = (
-                    f"python3 {self.script_dir}/pp_crimson_flamegraphs.py"
-                    f" -i {merged} |"
-                    f" {PACK_DIR}/FlameGraph/flamegraph.pl"
-                    f" --title '{title}' > {fg_file}"
+            # Recordings of a whole loop: one flamegraph per FIO output
+            for perf_file in glob.glob("*_perf.data"):
+                fold = dag.add(
+                    f"slice_{perf_file}",
+                    fold_perf_slices,
+                    perf_file,
+                    fio_jsons,
+                    perf_file.replace("_perf.data", "_perf_slices.json"),
+                    after=stripped,
+                    kind=PROCESS,
                 )
-                subprocess.run(cmd2, shell=True)
-                subprocess.run(["gzip", "-9", merged])
-                try:
-                    os.remove(perf_file)
-                except OSError:
-                    pass
+                for fio_json in fio_jsons:
+                    folded = slice_folded_name(fio_json)
+                    render = dag.add(
+                        f"flamegraph_{folded}",
+                        render_flamegraph,
+                        folded,
+                        folded.replace("_perf.folded", "_fg.svg"),
+                        os.path.basename(fio_json),
+                        PACK_DIR,
+                        after=[fold],
+                    )
+                    dag.add(
+                        f"archive_{folded}",
+                        archive_perf,
+                        perf_file,
+                        folded,
+                        after=[render],
+                    )
 
+        start = time.time()
+        dag.run()
+        logger.info(
+            f"== Post-processed {len(dag.stages)} stages in {time.time() - start:.1f}s"
+            f" on {dag.workers} workers =="
+        )
         self.tidyup(self.test_result)
 
     def _read_list(self, list_file: str) -> List[str]:
@@ -1066,6 +1714,9 @@ class FioRunner:
         stat:
             Optional suffix appended to the zip name (e.g. ``"_failed"``).
         """
+        # Keep the samples of an aborted run
+        for outfile in list(self.stores):
+            self.osd_dump_end(outfile)
         # Remove empty .err files
         subprocess.run(
             "find . -type f -name 'fio*.err' -size 0c -exec rm {} \\;",
@@ -1087,10 +1738,11 @@ class FioRunner:
         subprocess.run(
             f"zip -9mqj {test_result}{stat}.zip"
             f" {test_result}_json.out"
-            f" *_top.out *.json *.plot *.dat *.png *.gif *.svg *.tex *.md"
+            f" *_top.out *.json *.npy *.plot *.dat *.png *.gif *.svg *.tex *.md"
             f" {self.top_out_list}"
             f" osd*_threads.out *_list {self.top_pid_list}"
-            f" numa_args*.out *_diskstat.out",
+            f" numa_args*.out *_diskstat.out"
+            f" *_iops.*.log *_lat.*.log *_clat.*.log *_slat.*.log *_bw.*.log",
             shell=True,
             stdout=subprocess.DEVNULL,
             stderr=subprocess.DEVNULL,
@@ -1119,7 +1771,8 @@ class FioRunner:
             orig_dir = os.getcwd()
             os.chdir(extract_dir)
             try:
-                if os.path.exists(self.osd_cpu_avg):
+                # The /proc thread sampler CPU averages are archived as is
+                if self.use_top and os.path.exists(self.osd_cpu_avg):
                     os.remove(self.osd_cpu_avg)
                 top_json = f"{self.test_result}_top.json"
                 if os.path.exists(top_json):
@@ -1266,6 +1919,14 @@ class FioRunner:
         self.rc_skip_heuristic = args.rc_skip_heuristic
         self.with_flamegraphs = not args.no_flamegraphs
         self.with_mem_profile = args.with_mem_profile
+        self.use_asok = not getattr(args, "no_asok", False)
+        self.use_top = getattr(args, "top", False)
+        self.use_store = not getattr(args, "json_dump", False)
+        self.live_status = not getattr(args, "no_live_status", False)
+        self.adaptive_iodepth = getattr(args, "adaptive_iodepth", False)
+        self.steady_state = getattr(args, "steady_state", False)
+        self.post_workers = getattr(args, "post_workers", None)
+        self.perf_continuous = getattr(args, "perf_continuous", False)
 
         os.makedirs(self.run_dir, exist_ok=True)
         os.chdir(self.run_dir)
@@ -1399,6 +2060,48 @@ def main() -> None:
         action="store_true",
         help="Skip the latency heuristic check for response curves",
     )
+    parser.add_argument(
+        "--no-asok",
+        action="store_true",
+        help="Sample OSD metrics with `ceph tell` instead of the admin socket",
+    )
+    parser.add_argument(
+        "--json-dump",
+        action="store_true",
+        help="Write OSD dumps as the legacy JSON array instead of a columnar store"
+        " (a store is exported with telemetry_store.py)",
+    )
+    parser.add_argument(
+        "--no-live-status",
+        action="store_true",
+        help="Check the response curve latency only once FIO completes",
+    )
+    parser.add_argument(
+        "--adaptive-iodepth",
+        action="store_true",
+        help="Bisect the iodepth range around the response curve knee",
+    )
+    parser.add_argument(
+        "--steady-state",
+        action="store_true",
+        help="Start the measurements once the FIO IOPS settle, not after a fixed ramp-up",
+    )
+    parser.add_argument(
+        "--perf-continuous",
+        action="store_true",
+        help="Record perf over the whole loop and fold one flamegraph per point",
+    )
+    parser.add_argument(
+        "--post-workers",
+        type=int,
+        default=None,
+        help="Workers for the post-processing stages (default: spare cores, 0: serial)",
+    )
+    parser.add_argument(
+        "--top",
+        action="store_true",
+        help="Measure thread CPU with `top -H` instead of sampling /proc",
+    )
     parser.add_argument(
         "-z",
         "--aio",
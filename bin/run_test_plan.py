@@ -3,13 +3,19 @@
 Translated from run_balanced_osd.sh
 Run performance test plans to compare Classic vs Crimson OSD with balanced vs default CPU core/reactor distribution.
 
-Usage: ./run_test_plan.py [-t <test-plan>] [-d rundir]
+Usage: ./run_test_plan.py [-t <test-plan>] [-d rundir] [--rerun] [--precond off|always|once]
 
 -d : indicate the run directory cd to
 -t : test plan describing the cluster configurations to try, and the banchmark details
+--rerun : run every point, even those already completed
+--precond : precondition the store devices before creating each cluster
+
+The points completed are recorded in <rundir>/result_index.jsonl (see
+result_index.py), so a plan launched again resumes where it stopped.
 """
 
 import argparse
+import dataclasses
 import json
 import logging
 import os
@@ -20,7 +26,7 @@ import threading
 import time
 
 # from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
 # Tuple, List, Optional, Union
 
 from perf_test_plan import (
@@ -30,6 +36,26 @@ from perf_test_plan import (
     load_test_plan as _load_test_plan,
 )
 import taskset_pid
+from plan_schedule import (
+    POINT,
+    START,
+    History,
+    cluster_shape,
+    expand_plan,
+    format_duration,
+    make_schedule,
+    needs_precondition,
+)
+from precond_cache import (
+    PRECOND_ALWAYS,
+    PRECOND_OFF,
+    PRECOND_ONCE,
+    STATE_NAME,
+    PrecondCache,
+    device_fingerprint,
+    image_fingerprint,
+)
+from result_index import DONE, FAILED, INDEX_NAME, ResultIndex, build_id, file_digest, point_key
 from run_fio import FioRunner, FioRunnerCustom
 # import monitoring
 
@@ -103,6 +129,24 @@ class BalancedOSDRunner:
         # FioRunner instance and its execution thread (set by run_fio())
         self._fio_runner: Optional[FioRunner] = None
         self._fio_thread: Optional[threading.Thread] = None
+        # Whether the workload loop of _fio_thread completed (set by the thread)
+        self._fio_ok = False
+        # Index of the points completed, to resume the plan (set by run())
+        self.result_index: Optional[ResultIndex] = None
+        self.rerun = False
+        self.build_id = "unknown"
+        # Cluster the current points run on (set by run_body())
+        self.cluster_fields: Dict[str, Any] = {}
+        self.cluster_shape: Optional[Tuple[Any, ...]] = None
+        # (configuration, vstart command) of the cluster left running by
+        # run_body() for the next run of the same shape, and its pools
+        self.running_cluster: Optional[Tuple[Any, str]] = None
+        self.cluster_pools: set = set()
+        # Unique id of the running cluster, for the images prefilled on it
+        self.cluster_id: Optional[str] = None
+        # Preconditioning of the store devices, and the state prefilled
+        self.precond_mode = PRECOND_OFF
+        self.precond_cache: Optional[PrecondCache] = None
 
         # Associative arrays: we might deprecate these
         self.test_table: Dict[str, str] = {}
@@ -288,9 +332,10 @@ class BalancedOSDRunner:
         if threads_list:
             self.validate_set(test_name)
 
-    def wait_for_fio(self):
+    def wait_for_fio(self) -> bool:
         """
-        Wait for FIO to finish via the background thread
+        Wait for FIO to finish via the background thread, or the FIO
+        process; returns whether the workload loop, or the process, succeeded.
         """
         # Start watchdog
         logger.info(f"{time.strftime('%Y-%m-%d %H:%M:%S')} Starting watchdog...")
@@ -301,16 +346,98 @@ class BalancedOSDRunner:
         logger.info(
             f"{time.strftime('%Y-%m-%d %H:%M:%S')} Waiting for FIO to complete..."
         )
+        ok = True
         if self._fio_thread is not None:
             self._fio_thread.join()
+            ok = self._fio_ok
+            # Done with this run: the next one may be a FIO process
+            self._fio_thread = None
         elif self.fio_pid != 0:
-            os.waitpid(self.fio_pid, 0)
+            _, status = os.waitpid(self.fio_pid, 0)
+            ok = os.waitstatus_to_exitcode(status) == 0
 
         # Stop watchdog
         logger.info(
             f"{time.strftime('%Y-%m-%d %H:%M:%S')} FIO completed, stopping watchdog..."
         )
         self.watchdog_enabled = False
+        return ok
+
+    # ------------------------------------------------------------------
+    # Result index
+
+    def set_cluster_fields(self, cfg, cmd: str) -> None:
+        """
+        Set the cluster the next points run on: the configuration *cfg*
+        without the ranges iterated over, which are in the vstart *cmd*.
+        """
+        fields = dataclasses.asdict(cfg) if dataclasses.is_dataclass(cfg) else {}
+        for name in ("osd_range", "reactor_range", "store_devs"):
+            fields.pop(name, None)
+        fields["cmd"] = cmd
+        self.cluster_fields = fields
+
+    def point_key(self, workload, iodepth: Any, numjobs: Any) -> str:
+        """
+        Content hash of a point of *workload* on the current cluster: see
+        :func:`result_index.point_key`.
+        """
+        definition = (
+            dataclasses.asdict(workload) if dataclasses.is_dataclass(workload) else {}
+        )
+        definition.pop("iodepth", None)
+        definition.pop("numjobs", None)
+        fio_name = getattr(workload, "fio_name", None)
+        return point_key(
+            cluster=self.cluster_fields,
+            build=self.build_id,
+            workload=definition,
+            fio_file=file_digest(os.path.join(self.script_dir, fio_name)) if fio_name else None,
+            iodepth=iodepth,
+            numjobs=numjobs,
+        )
+
+    def plan_points(self, test_name: str) -> List[str]:
+        """
+        Keys of the points run on the current cluster, as
+        :meth:`run_body` would run them.
+        """
+        keys = []
+        for bench_name, bench_data in self.test_plan_data.benchmarks.items():
+            for wk, wk_data in bench_data.workloads.items():
+                wp = os.path.join(self.script_dir, wk_data.fio_name)
+                if (
+                    os.path.exists(wp)
+                    and os.path.exists(wk_data.cmd_path)
+                    and os.access(wk_data.cmd_path, os.X_OK)
+                ):
+                    keys.extend(
+                        self.point_key(wk_data, iodepth, numjobs)
+                        for iodepth in wk_data.iodepth
+                        for numjobs in wk_data.numjobs
+                    )
+                if os.path.exists(os.path.join(self.script_dir, wk_data.fio_catalog)):
+                    keys.append(self.point_key(wk_data, wk_data.iodepth, wk_data.numjobs))
+        return keys
+
+    def is_done(self, key: str) -> bool:
+        """Whether point *key* completed in a previous run of the plan."""
+        return (
+            not self.rerun
+            and self.result_index is not None
+            and self.result_index.done(key)
+        )
+
+    def record_point(self, key: str, ok: bool, **info: Any) -> None:
+        """
+        Record the outcome of point *key*; with the shape of the cluster it
+        ran on, its ``rw``, ``bs``, ``runtime``, ``iodepth``, ``numjobs`` and
+        ``elapsed`` seconds are the history of :mod:`plan_schedule`.
+        """
+        if self.result_index is not None:
+            self.result_index.record(
+                key, DONE if ok else FAILED, cluster=self.cluster_shape, **info
+            )
 
     def run_fio_custom(self, bench, workload, cfg, test_name: str) -> None:
         """
@@ -322,8 +449,14 @@ class BalancedOSDRunner:
         # Traverse over num of jobs and iodepths if specified in
         # the test plan, otherwise just run with the default .fio
         # file
-        for iodepth in workload.iodepths:
+        for iodepth in workload.iodepth:
             for numjobs in workload.numjobs:
+                key = self.point_key(workload, iodepth, numjobs)
+                if self.is_done(key):
+                    logger.info(
+                        f"== Skipping numjobs={numjobs}, iodepth={iodepth}: already done =="
+                    )
+                    continue
                 logger.info(f"Running FIO with numjobs={numjobs}, iodepth={iodepth}...")
                 # fio_opts = f"--numjobs={numjobs} --iodepth={iodepth}"
                 ctx = {
@@ -339,11 +472,23 @@ class BalancedOSDRunner:
                 # self.fio_pid = self.run_fio_bench(bench, workload, cfg, test_name, fio_opts)
                 # Create and configure a FioRunner (imported from run_fio)
                 fio_runner = FioRunnerCustom(ctx)
+                start = time.time()
                 self.fio_pid = fio_runner.run()
                 logger.info(
                     f"{time.strftime('%Y-%m-%d %H:%M:%S')} FIO custom started: {test_name}, pid: {self.fio_pid} =="
                 )
-                self.wait_for_fio()
+                ok = self.wait_for_fio()
+                self.record_point(
+                    key,
+                    ok,
+                    test_name=ctx["test_name"],
+                    rw=workload.rw,
+                    bs=workload.bs,
+                    runtime=workload.runtime,
+                    iodepth=iodepth,
+                    numjobs=numjobs,
+                    elapsed=time.time() - start,
+                )
 
     def mk_pool(self, pool_name: str, pool_size: int, replica_size: int = 1):
         """
@@ -384,22 +529,46 @@ class BalancedOSDRunner:
         test_run_log = os.path.join(self.run_dir, f"{test_name}_test_run.log")
         # Sync this value with the one used in gen_fio_job.sh to generate the .fio files, or better pass
         self.rbd_vol_prefix = f"rbd_{test_name}"
-        # Run cephmkrbd.sh to create the RBD image(s)
-        cmd = [
-            "cephmkrbd.sh",
-            "-n",
-            f"{cfg.num_rbd_images}",
-            "-p",
-            self.rbd_vol_prefix,
-            "-s",
-            f"{cfg.rbd_image_size}",
-        ]
-        _cmd = " ".join(cmd)
-        logger.info(f"Running cephmkrbd.sh with command: {_cmd}")
-        with open(self.test_run_log, "a") as log_file:
-            # Attempting as _cmd string  fails
-            result = subprocess.run(cmd, stdout=log_file, stderr=subprocess.STDOUT)
-            logger.info(f"cephmkrbd.sh completed with return code {result.returncode}")
+        # Images already prefilled on this cluster with the same pool,
+        # number, size and backend are reused
+        images_fp = image_fingerprint(
+            self.cluster_id or "",
+            cfg.pool_name,
+            cfg.rbd_num_images,
+            cfg.rbd_image_size,
+            cfg.osd_backend,
+        )
+        prefix = None
+        if self.precond_cache is not None and self.cluster_id is not None:
+            prefix = self.precond_cache.images_for(images_fp)
+        if prefix is not None:
+            self.rbd_vol_prefix = prefix
+            logger.info(f"== Reusing the RBD image(s) {prefix} prefilled on this cluster ==")
+        else:
+            # Run cephmkrbd.sh to create the RBD image(s)
+            cmd = [
+                "cephmkrbd.sh",
+                "-n",
+                f"{cfg.rbd_num_images}",
+                "-p",
+                self.rbd_vol_prefix,
+                "-s",
+                f"{cfg.rbd_image_size}",
+            ]
+            _cmd = " ".join(cmd)
+            logger.info(f"Running cephmkrbd.sh with command: {_cmd}")
+            with open(self.test_run_log, "a") as log_file:
+                # Attempting as _cmd string  fails
+                result = subprocess.run(cmd, stdout=log_file, stderr=subprocess.STDOUT)
+                logger.info(f"cephmkrbd.sh completed with return code {result.returncode}")
+            if (
+                result.returncode == 0
+                and self.precond_cache is not None
+                and self.cluster_id is not None
+            ):
+                self.precond_cache.record_images(
+                    images_fp, self.cluster_id, self.rbd_vol_prefix
+                )
 
         runtime = self.test_plan_data.benchmarks.librbdfio.runtime
         logger.info(f"FIO runtime: {runtime} seconds")
@@ -454,23 +623,71 @@ class BalancedOSDRunner:
                 else ([fio_runner.workload] if fio_runner.workload else [])
             )
             workload_name = fio_runner.workload or ""
-            for wk in workloads:
-                fio_runner.run_workload_loop(
-                    wk,
-                    fio_runner.single,
-                    fio_runner.with_flamegraphs,
-                    fio_runner.test_prefix,
-                    workload_name,
-                )
+            try:
+                for wk in workloads:
+                    fio_runner.run_workload_loop(
+                        wk,
+                        fio_runner.single,
+                        fio_runner.with_flamegraphs,
+                        fio_runner.test_prefix,
+                        workload_name,
+                    )
+            except SystemExit as e:
+                # FioRunner exits once all the attempts of a point failed
+                logger.error(f"{RED}== FIO catalog {test_name} exited: {e.code} =={NC}")
+            except Exception as e:
+                logger.error(f"{RED}== FIO catalog {test_name} failed: {e} =={NC}")
+            else:
+                self._fio_ok = True
 
+        self._fio_ok = False
         fio_thread = threading.Thread(target=_fio_target, daemon=True)
         fio_thread.start()
         self._fio_thread = fio_thread
 
         return 0
 
-    def run_precond(self, test_name: str):
-        """Run preconditioning"""
+    def precond_job(self, test_name: str, devices: Optional[List[str]] = None) -> str:
+        """
+        FIO job file preconditioning *devices*: the ``[global]`` section of
+        ``randwrite64k.fio`` and one job per device, written to the run
+        directory; ``randwrite64k.fio`` itself when no devices are given.
+        """
+        template = os.path.join(self.fio_jobs, "randwrite64k.fio")
+        if not devices:
+            return template
+        global_section: List[str] = []
+        in_global = False
+        with open(template) as f:
+            for line in f:
+                line = line.rstrip()
+                if line.startswith("["):
+                    in_global = line == "[global]"
+                if in_global and line:
+                    global_section.append(line)
+        jobs = [f"[{os.path.basename(dev)}]\nfilename={dev}" for dev in sorted(devices)]
+        fio_job = os.path.join(self.run_dir, f"precond_{test_name}.fio")
+        with open(fio_job, "w") as f:
+            f.write("\n\n".join(["\n".join(global_section)] + jobs) + "\n")
+        return fio_job
+
+    def run_precond(self, test_name: str, devices: Optional[List[str]] = None) -> bool:
+        """
+        Run preconditioning of the store *devices*, with the job of
+        :meth:`precond_job`.  In the ``once`` mode, it is skipped when the
+        devices were already preconditioned with the same job (see
+        :mod:`precond_cache`); returns whether it ran.
+        """
+        fio_job = self.precond_job(test_name, devices)
+        fingerprint = device_fingerprint(devices or [], fio_job)
+        if (
+            devices
+            and self.precond_mode == PRECOND_ONCE
+            and self.precond_cache is not None
+            and self.precond_cache.devices_ready(devices, fingerprint)
+        ):
+            self.log_color(f"== {','.join(devices)} already preconditioned, skipping ==")
+            return False
         self.log_color("== Preconditioning ==")
 
         precond_json = os.path.join(self.run_dir, f"{test_name}_precond.json")
@@ -479,7 +696,6 @@ class BalancedOSDRunner:
         )
 
         fio_output = os.path.join(self.run_dir, f"precond_{test_name}.json")
-        fio_job = os.path.join(self.fio_jobs, "randwrite64k.fio")
 
         result = subprocess.run(
             ["fio", fio_job, f"--output={fio_output}", "--output-format=json"],
@@ -516,6 +732,9 @@ class BalancedOSDRunner:
         # out, err = dsdiff_proc.communicate()
         # if dsdiff_proc.returncode == 0:
         logger.info(f"{GREEN}== Diskstats diff saved to {self.run_dir} =={NC}")
+        if devices and self.precond_cache is not None:
+            self.precond_cache.record_devices(devices, fingerprint, test_name=test_name)
+        return True
 
     def stop_cluster(self, pid_fio: int = 0):
         """Stop the cluster and kill the FIO process(es)."""
@@ -597,21 +816,19 @@ class BalancedOSDRunner:
                 f"{RED}== Error generating FIO job files in {self.fio_jobs} =={NC}"
             )
 
-    # For both cases (Classic and Seastore) we willuse up to number of OSD for storage devices (slice)
-    def run_crimson_config(self, cfg, num_osd):
+    def crimson_runs(self, cfg, num_osd) -> List[Tuple[str, str, str, Optional[int]]]:
         """
-        Run Crimson tests for a given configuration and number of OSDs,
-        iterating over the specified number of reactors.  The test name is
-        constructed based on the parameters for logging and result organization
-        purposes.
+        The (title, test name, vstart command, number of reactors) of the
+        Crimson clusters for a given configuration and number of OSDs, one
+        per number of reactors.
+        The test name is constructed based on the parameters for logging and
+        result organization purposes.
         """
+        runs = []
         for num_reactors in cfg.reactor_range:
             store_devs = cfg.store_devs[:num_osd]
             osd_type = cfg.osd_type
             bal_key = cfg.balance_strategy
-            logger.info(
-                f"{GREEN}== Running {cfg.osd_backend} test: {num_osd} OSD, {osd_type}, {bal_key}, {num_reactors} reactors =={NC}"
-            )
             title = f"({osd_type}) {num_osd} OSD crimson, {num_reactors} reactor"
             cmd = (
                 f"MDS=1 MON=1 OSD={num_osd} MGR=1 taskset -ac '{cfg.vstart_cpu_set}' "
@@ -628,16 +845,14 @@ class BalancedOSDRunner:
                 title += f" alien_num_threads={num_alien_threads}"
                 cmd += f" --crimson-alien-num-threads {num_alien_threads}"
                 test_name = f"{osd_type}_{num_osd}osd_{num_reactors}reactor_{num_alien_threads}at_{bal_key}"
-            self.test_name = test_name
-            self.run_body(cfg, title, test_name, cmd)
+            runs.append((title, test_name, cmd, num_reactors))
+        return runs
 
-    def run_classic_config(self, cfg, num_osd):
+    def classic_runs(self, cfg, num_osd) -> List[Tuple[str, str, str, Optional[int]]]:
         """
-        Run Classic tests for a given configuration and number of OSDs.
+        The (title, test name, vstart command, number of reactors: None) of
+        the Classic cluster for a given configuration and number of OSDs.
         """
-        logger.info(
-            f"{GREEN}== Running Classic test: {num_osd} OSD, {cfg.osd_backend} =={NC}"
-        )
         title = f"({cfg.osd_type}) {num_osd} OSD classic"
         # Slice cfg.store_devs to use up to num_osd devices
         store_devs = cfg.store_devs[:num_osd]
@@ -647,26 +862,104 @@ class BalancedOSDRunner:
             f"--redirect-output {self.osd_be_table['blue']} {','.join(store_devs)} --no-restart"
         )
         test_name = f"{cfg.osd_type}_{num_osd}osd_"
-        self.test_name = test_name
-        self.run_body(cfg, title, test_name, cmd)
+        return [(title, test_name, cmd, None)]
 
-    def run_body(self, cfg, title, test_name, cmd) -> bool:
+    def plan_clusters(self) -> List[Tuple[Any, str, int, str, str, str, Optional[int]]]:
         """
-        Run the test body for a given configuration and parameters
+        The (configuration, test log, number of OSDs, title, test name, vstart
+        command, number of reactors) of every cluster run of the plan, grouped
+        by cluster shape: the runs
+        with the same vstart command (OSD type, backend, store devices,
+        reactors, CPU sets) are made consecutive, so :meth:`run_body` starts
+        the cluster once for all of them.  Otherwise the plan order is kept.
         """
-        self.log_color(f"== Title: {title} Test name: {test_name} ==")
+        groups: Dict[str, List[Tuple[Any, str, int, str, str, str, Optional[int]]]] = {}
+        for cfg_name, cfg in self.test_plan_data.cluster.configurations.items():
+            test_run_log = os.path.join(self.run_dir, f"{cfg_name}_test_run.log")
+            for num_osd in cfg.osd_range:
+                if isinstance(cfg, CrimsonClusterConfiguration):
+                    runs = self.crimson_runs(cfg, num_osd)
+                else:
+                    runs = self.classic_runs(cfg, num_osd)
+                for title, test_name, cmd, num_reactors in runs:
+                    groups.setdefault(cmd, []).append(
+                        (cfg, test_run_log, num_osd, title, test_name, cmd, num_reactors)
+                    )
+        return [run for runs in groups.values() for run in runs]
 
-        # if not self.test_run_log:
-        #     self.test_run_log = os.path.join(self.run_dir, f"{test_name}_test_run.log")
-        with open(self.test_run_log, "a") as f:
-            f.write(f"{cmd}\n")
+    # ------------------------------------------------------------------
+    # Cluster lifecycle
 
-        if self.dry_run:
-            logger.info(f"Test: {test_name}")
-            logger.info(f"Command: {cmd}")
-            return False  # continue
+    def cluster_up(self, num_osd: int) -> bool:
+        """Whether the *num_osd* OSDs of the cluster are up and in."""
+        result = subprocess.run(
+            ["ceph", "osd", "stat", "--format", "json"], capture_output=True, text=True
+        )
+        if result.returncode != 0:
+            return False
+        try:
+            stat = json.loads(result.stdout)
+        except json.JSONDecodeError:
+            return False
+        # Older releases nest the counters under "osdmap"
+        stat = stat.get("osdmap", stat)
+        return (
+            stat.get("num_osds", 0) >= num_osd
+            and stat.get("num_up_osds", 0) >= num_osd
+            and stat.get("num_in_osds", 0) >= num_osd
+        )
+
+    def wait_for_cluster(
+        self, num_osd: int, timeout: float = 300.0, interval: float = 2.0
+    ) -> bool:
+        """
+        Wait until the OSDs are up and in, rather than for a fixed time;
+        returns ``False`` on timeout.
+        """
+        deadline = time.monotonic() + timeout
+        while not self.cluster_up(num_osd):
+            if time.monotonic() >= deadline:
+                logger.error(f"{RED}== Cluster not ready after {timeout}s =={NC}")
+                return False
+            time.sleep(interval)
+        logger.info(f"== Cluster ready: {num_osd} OSD up and in ==")
+        return True
+
+    def wait_for_osds_gone(self, timeout: float = 120.0, interval: float = 1.0) -> bool:
+        """Wait until no OSD process is left; returns ``False`` on timeout."""
+        deadline = time.monotonic() + timeout
+        while subprocess.run(["pgrep", "osd"], capture_output=True).returncode == 0:
+            if time.monotonic() >= deadline:
+                logger.error(f"{RED}== OSD processes left after {timeout}s =={NC}")
+                return False
+            time.sleep(interval)
+        return True
 
-        # Execute vstart.sh command
+    def teardown_cluster(self) -> None:
+        """Stop the cluster left running by :meth:`run_body`, if any."""
+        if self.running_cluster is None:
+            return
+        cfg = self.running_cluster[0]
+        self.running_cluster = None
+        self.cluster_pools.clear()
+        if self.precond_cache is not None and self.cluster_id is not None:
+            self.precond_cache.forget_cluster(self.cluster_id)
+        self.cluster_id = None
+        if isinstance(cfg, ClassicClusterConfiguration):
+            subprocess.run(["/ceph/src/stop.sh"])
+        else:
+            subprocess.run(["/ceph/src/stop.sh", "--crimson"])
+        self.wait_for_osds_gone()
+
+    def start_cluster(self, cfg, cmd: str, num_osd: int, test_name: str) -> bool:
+        """
+        Start a cluster with the vstart *cmd*, and wait until its OSDs are
+        up; it is left running for the next runs of the same shape.  The
+        store devices are preconditioned first, as set by
+        :attr:`precond_mode`.
+        """
+        if self.precond_mode != PRECOND_OFF and needs_precondition(cfg):
+            self.run_precond(test_name, cfg.store_devs[:num_osd])
         logger.info(f"Executing command: {cmd}")
         with open(self.test_run_log, "a") as log_file:
             result = subprocess.run(
@@ -675,6 +968,8 @@ class BalancedOSDRunner:
         if result.returncode != 0:
             logger.error(f"{RED}== Command failed: {cmd} =={NC}")
             return False
+        self.running_cluster = (cfg, cmd)
+        self.cluster_id = f"{test_name}@{time.time()}"
 
         if isinstance(cfg, ClassicClusterConfiguration):
             # Set OSD process affinity
@@ -692,8 +987,9 @@ class BalancedOSDRunner:
                         stderr=subprocess.STDOUT,
                     )
 
-        logger.info(f"{time.strftime('%Y-%m-%d %H:%M:%S')} Sleeping for 20 secs...")
-        time.sleep(20)
+        if not self.wait_for_cluster(num_osd):
+            self.teardown_cluster()
+            return False
 
         # Run cephlogoff.sh
         logger.info("Running cephlogoff.sh")
@@ -702,13 +998,52 @@ class BalancedOSDRunner:
         )
 
         self.show_grid(test_name)
+        return True
+
+    def run_body(
+        self, cfg, title, test_name, cmd, num_osd: int = 1, num_reactors: Optional[int] = None
+    ) -> bool:
+        """
+        Run the test body for a given configuration and parameters.  The
+        cluster is reused when the previous run left one of the same shape
+        running; the caller stops it with :meth:`teardown_cluster`.
+        """
+        self.log_color(f"== Title: {title} Test name: {test_name} ==")
+
+        # if not self.test_run_log:
+        #     self.test_run_log = os.path.join(self.run_dir, f"{test_name}_test_run.log")
+        with open(self.test_run_log, "a") as f:
+            f.write(f"{cmd}\n")
+
+        self.set_cluster_fields(cfg, cmd)
+        keys = self.plan_points(test_name)
+        if keys and all(self.is_done(key) for key in keys):
+            self.log_color(
+                f"== All {len(keys)} points of {test_name} already done, skipping the cluster =="
+            )
+            return True
+
+        if self.dry_run:
+            logger.info(f"Test: {test_name}")
+            logger.info(f"Command: {cmd}")
+            return False  # continue
+
+        self.test_name = test_name
+        self.cluster_shape = cluster_shape(cfg, num_osd, num_reactors)
+        if self.running_cluster is not None and self.running_cluster[1] == cmd:
+            self.log_color(f"== Reusing the running cluster for {test_name} ==")
+        else:
+            self.teardown_cluster()
+            if not self.start_cluster(cfg, cmd, num_osd, test_name):
+                return False
 
         # Create pool, ensure RBD image(s) exist, and generate FIO job
         # files if needed.  This is needed for both Classic and Crimson
         # since the FIO execution is handled by the FioRunner in both
         # cases, and we want to keep the same workloads across them.
-        if cfg.pool_name == "rados":
+        if cfg.pool_name == "rados" and cfg.pool_name not in self.cluster_pools:
             self.mk_pool(cfg.pool_name, cfg.pool_size, replica_size=1)
+            self.cluster_pools.add(cfg.pool_name)
             # self.mk_pool(f"{self.vol_prefix}_pool", 1024)
             # For RBD, might call cephmkrbd.sh to create the image(s) as well
 
@@ -748,19 +1083,28 @@ class BalancedOSDRunner:
                     logger.info(
                         f"FIO catalog file for workload {wk} found: {wk_data.fio_catalog}"
                     )
+                    key = self.point_key(wk_data, wk_data.iodepth, wk_data.numjobs)
+                    if self.is_done(key):
+                        logger.info(f"== Skipping FIO catalog {wk}: already done ==")
+                        continue
+                    start = time.time()
                     self.fio_pid = self.run_fio_catalog(cfg, f"{test_name}_{wk}")
                     logger.info(
                         f"{time.strftime('%Y-%m-%d %H:%M:%S')} FIO catalog started: {test_name}, pid: {self.fio_pid} =="
                     )
-                    self.wait_for_fio()
-
-        # Stop cluster
-        if isinstance(cfg, ClassicClusterConfiguration):
-            subprocess.run(["/ceph/src/stop.sh"])
-        else:
-            subprocess.run(["/ceph/src/stop.sh", "--crimson"])
+                    ok = self.wait_for_fio()
+                    self.record_point(
+                        key,
+                        ok,
+                        test_name=f"{test_name}_{wk}",
+                        rw=wk_data.rw,
+                        bs=wk_data.bs,
+                        runtime=wk_data.runtime,
+                        iodepth=wk_data.iodepth,
+                        numjobs=wk_data.numjobs,
+                        elapsed=time.time() - start,
+                    )
 
-        time.sleep(30)
         return True
 
         # logger.info(f"{GREEN}== OSD type: {osd_type} =={NC}")
@@ -833,25 +1177,43 @@ class BalancedOSDRunner:
 
         # Create run directory and chdir to it
         os.makedirs(self.run_dir, exist_ok=True)
+
+        # Points completed by previous runs of the plan are skipped
+        self.rerun = args.rerun
+        self.result_index = ResultIndex(os.path.join(self.run_dir, INDEX_NAME))
+        self.build_id = build_id()
+        logger.info(f"== Build id: {self.build_id} ==")
+        self.precond_mode = args.precond
+        self.precond_cache = PrecondCache(os.path.join(self.run_dir, STATE_NAME))
+        schedule = make_schedule(
+            expand_plan(self.test_plan_data),
+            history=History.load([self.result_index.path]),
+            precondition=self.precond_mode != PRECOND_OFF,
+        )
+        self.log_color(
+            f"== Estimated plan: {schedule.count(POINT)} points on"
+            f" {schedule.count(START)} clusters, {format_duration(schedule.total)} =="
+        )
         # os.chdir(self.run_dir)
 
         # Change to build directory: this is needed by vstart (due to local dependencies)
         if not self.dry_run:
             os.chdir("/ceph/build/")
 
-        for cfg_name, cfg in self.test_plan_data.cluster.configurations.items():
+        # Runs on the same cluster shape share one cluster
+        test_run_logs: List[str] = []
+        for cfg, test_run_log, num_osd, title, test_name, cmd, num_reactors in self.plan_clusters():
             logger.info(
-                f"Processing cluster configuration: {cfg_name} (OSD type: {cfg.osd_type})"
+                f"{GREEN}== Running {cfg.osd_backend} test: {title} (OSD type: {cfg.osd_type}) =={NC}"
             )
-            self.test_run_log = os.path.join(self.run_dir, f"{cfg_name}_test_run.log")
-            for num_osd in cfg.osd_range:
-                logger.info(f"{GREEN}== {cfg_name} =={NC}")
-                if isinstance(cfg.osd_type, CrimsonClusterConfiguration):
-                    self.run_crimson_config(cfg, num_osd)
-                elif isinstance(cfg.osd_type, ClassicClusterConfiguration):
-                    self.run_classic_config(cfg, num_osd)
-            # Compress log for this configuration
-            subprocess.run(["gzip", "-9fq", self.test_run_log])
+            self.test_run_log = test_run_log
+            if test_run_log not in test_run_logs:
+                test_run_logs.append(test_run_log)
+            self.run_body(cfg, title, test_name, cmd, num_osd, num_reactors)
+        self.teardown_cluster()
+        # Compress the log of each configuration
+        for test_run_log in test_run_logs:
+            subprocess.run(["gzip", "-9fq", test_run_log])
 
         # Regenerate FIO files if needed - we might want to move this to the
         # test plan loading phase, or have a separate method that prepares the
@@ -943,6 +1305,18 @@ def main():
     parser.add_argument(
         "--dry_run", action="store_true", help="Skip execution (dry run)"
     )
+    parser.add_argument(
+        "--precond",
+        choices=[PRECOND_OFF, PRECOND_ALWAYS, PRECOND_ONCE],
+        default=PRECOND_OFF,
+        help="Precondition the store devices before creating each cluster:"
+        " always, or once (while the devices and the job are unchanged)",
+    )
+    parser.add_argument(
+        "--rerun",
+        action="store_true",
+        help="Run every point, even those already in the result index of the run directory",
+    )
 
     args = parser.parse_args()
 
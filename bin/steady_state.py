@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Steady-state detection for FIO runs.
+
+A fixed ramp-up either wastes time (the run settled after a few seconds) or
+is too short (e.g. the SeaStore cleaner kicking in), and the warm-up samples
+then skew the averages of the whole window.  This module detects when the
+signals of a run have settled:
+
+  - online, :class:`SteadyStateDetector` is fed live signals (the IOPS from
+    the FIO status stream) and reports the system settled once the
+    coefficient of variation of the last ``window`` samples of every signal
+    is below ``cv_threshold``; :class:`run_fio.FioRunner` then starts the
+    measurement collectors instead of waiting for the whole ramp-up,
+  - offline, :func:`mser_truncation` implements MSER-m (Marginal Standard
+    Error Rule over batch means) to find the end of the warm-up of a series,
+    so the analysis can exclude warm-up samples of runs without a live
+    marker (e.g. from their reactor utilisation).
+
+The detector timeline is saved as ``<test_name>_steady.json`` along with the
+results, with the wall-clock ``start`` of the run and its ``warmup_end``.
+
+Usage: import steady_state
+
+    det = SteadyStateDetector(window=5, cv_threshold=0.05)
+    if det.update(time.time(), iops=iops):
+        start_measuring()
+    cut = mser_truncation(values)
+"""
+
+import json
+import logging
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+__author__ = "Jose J Palacios-Perez"
+
+logger = logging.getLogger(__name__)
+
+# Batch size of MSER-5
+MSER_BATCH = 5
+
+
+def rolling_cv(values: Sequence[float], window: int) -> np.ndarray:
+    """
+    Coefficient of variation (std / |mean|) of each *window* consecutive
+    values; NaN for the first ``window - 1``.  A constant window has a CV of
+    0, even at 0.
+    """
+    x = np.asarray(values, dtype=np.float64)
+    out = np.full(len(x), np.nan)
+    if window < 1 or len(x) < window:
+        return out
+    view = np.lib.stride_tricks.sliding_window_view(x, window)
+    mean = view.mean(axis=1)
+    std = view.std(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cv = np.where(std == 0, 0.0, std / np.abs(mean))
+    out[window - 1 :] = cv
+    return out
+
+
+def mser_truncation(values: Sequence[float], batch: int = MSER_BATCH) -> int:
+    """
+    MSER-*batch* truncation point of *values*: the number of leading samples
+    to discard as warm-up.
+
+    The series is reduced to the means of batches of *batch* samples, and the
+    truncation ``d`` (in batches, at most half of them) minimises the
+    marginal standard error ``var(means[d:]) / (k - d)``, ``k`` being the
+    number of batches.
+    """
+    x = np.asarray(values, dtype=np.float64)
+    x = x[np.isfinite(x)]
+    k = len(x) // batch
+    if k < 2:
+        return 0
+    means = x[: k * batch].reshape(k, batch).mean(axis=1)
+    best_d = 0
+    best = np.inf
+    for d in range(k // 2 + 1):
+        rest = means[d:]
+        mse = rest.var() / len(rest)
+        if mse < best:
+            best, best_d = mse, d
+    return best_d * batch
+
+
+class SteadyStateDetector:
+    """
+    Online steady-state detection by rolling coefficient of variation.
+
+    Parameters
+    ----------
+    window : int
+        Number of most recent samples of each signal considered.
+    cv_threshold : float
+        The signals are steady once the CV of their last *window* samples is
+        at most this.
+    """
+
+    def __init__(self, window: int = 5, cv_threshold: float = 0.05) -> None:
+        self.window = max(2, window)
+        self.cv_threshold = cv_threshold
+        self.start: Optional[float] = None
+        self.settled_at: Optional[float] = None
+        self.timeline: List[Dict[str, Any]] = []
+        self._signals: Dict[str, List[float]] = {}
+
+    @property
+    def settled(self) -> bool:
+        return self.settled_at is not None
+
+    def cv(self, name: str) -> float:
+        """CV of the last :attr:`window` samples of signal *name* (NaN if fewer)."""
+        values = self._signals.get(name, [])
+        if len(values) < self.window:
+            return float("nan")
+        return float(rolling_cv(values[-self.window :], self.window)[-1])
+
+    def update(self, ts: float, **signals: float) -> bool:
+        """
+        Add the samples *signals* taken at *ts*; returns whether the run has
+        settled (it stays settled once it has).
+        """
+        if self.start is None:
+            self.start = ts
+        for name, value in signals.items():
+            self._signals.setdefault(name, []).append(float(value))
+        self.timeline.append({"timestamp": ts, **signals})
+        if not self.settled and self._signals:
+            cvs = [self.cv(name) for name in self._signals]
+            if all(cv <= self.cv_threshold for cv in cvs):
+                self.settled_at = ts
+                logger.info(
+                    f"== Steady state after {ts - self.start:.1f}s"
+                    f" (CV {max(cvs):.3f} <= {self.cv_threshold}) =="
+                )
+        return self.settled
+
+    def to_dict(self, warmup_end: Optional[float] = None) -> Dict[str, Any]:
+        """The detector state; *warmup_end* defaults to :attr:`settled_at`."""
+        return {
+            "start": self.start,
+            "settled_at": self.settled_at,
+            "warmup_end": self.settled_at if warmup_end is None else warmup_end,
+            "window": self.window,
+            "cv_threshold": self.cv_threshold,
+            "timeline": self.timeline,
+        }
+
+    def save(self, path: str, warmup_end: Optional[float] = None, **extra: Any) -> None:
+        """Write :meth:`to_dict` (plus *extra* fields) as JSON to *path*."""
+        with open(path, "w") as f:
+            json.dump({**extra, **self.to_dict(warmup_end)}, f, indent=2)
@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+"""
+Single event-loop scheduler for the telemetry collectors of a FIO run.
+
+Rather than one ad-hoc thread per collector (perf, top, OSD dumps,
+diskstats), each with its own ``time.sleep`` loop, every collector registers
+a cadence with a :class:`TelemetryScheduler` and a single asyncio loop drives
+them all:
+
+  - ticks are drift-corrected: tick ``k`` of a collector is due at
+    ``start + delay + k * interval`` on the monotonic clock, regardless of
+    how long the previous samples took; a tick an overrunning sample made
+    late by more than half an interval is skipped rather than queued,
+  - every sample receives a :class:`Tick` carrying the scheduled time on the
+    common monotonic clock plus the equivalent wall-clock time, so samples
+    from different sources line up exactly,
+  - blocking collectors (admin socket, subprocesses) run on a small bounded
+    executor, so the number of observer threads stays fixed no matter how
+    many collectors or how high the sampling rate,
+  - *gated* collectors start when :meth:`TelemetryScheduler.release` is
+    called (e.g. once the workload reaches a steady state), their ``delay``
+    being only the latest start.
+
+Usage: import telemetry_scheduler
+
+    sched = TelemetryScheduler()
+    sched.register("rutil", sample_fn, interval=1.0, num_samples=60)
+    sched.register_once("perf", start_perf_fn, delay=30)
+    sched.start()
+    ...  # wait for the workload
+    sched.stop()
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+__author__ = "Jose J Palacios-Perez"
+
+logger = logging.getLogger(__name__)
+
+# Upper bound of executor threads used for blocking collectors
+MAX_WORKERS = 4
+# Fraction of the interval a tick may run late before it is skipped
+LATE_TOLERANCE = 0.5
+
+
+class Tick(NamedTuple):
+    """Timestamp handed to a collector on each sample."""
+
+    index: int  # sample number for this collector, starting at 0
+    mono: float  # scheduled time on the shared monotonic clock
+    wall: float  # same instant as a Unix timestamp (seconds)
+
+
+@dataclass
+class Collector:
+    """
+    A telemetry source driven by the scheduler.
+
+    Attributes:
+        name: label used in logs
+        sample: callable invoked with a :class:`Tick` on every tick
+        interval: seconds between ticks; ``None`` for a one-shot collector
+        num_samples: stop after this many samples (``None``: until stopped)
+        delay: seconds after scheduler start before the first tick
+        blocking: run ``sample`` on the executor instead of the loop thread
+        on_stop: optional callable run once when the collector finishes
+        gated: start on :meth:`TelemetryScheduler.release`, or after
+            ``delay`` if that comes first
+    """
+
+    name: str
+    sample: Callable[[Tick], Any]
+    interval: Optional[float] = None
+    num_samples: Optional[int] = None
+    delay: float = 0.0
+    blocking: bool = True
+    on_stop: Optional[Callable[[], Any]] = None
+    gated: bool = False
+    # Runtime statistics
+    samples_taken: int = 0
+    ticks_missed: int = 0
+    errors: int = 0
+    last_duration: float = 0.0
+    done: bool = field(default=False, repr=False)
+    inflight: Optional[asyncio.Future] = field(default=None, repr=False)
+
+
+class TelemetryScheduler:
+    """
+    Drive a set of :class:`Collector` instances from one asyncio loop.
+
+    The loop runs in a single background thread, so callers (e.g.
+    :meth:`run_fio.FioRunner.run_workload`) can keep waiting on the FIO
+    processes in the main thread.
+    """
+
+    def __init__(self, max_workers: int = MAX_WORKERS) -> None:
+        self.max_workers = max_workers
+        self.collectors: Dict[str, Collector] = {}
+        self.mono_start: float = 0.0
+        self.wall_start: float = 0.0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stop_event: Optional[asyncio.Event] = None
+        self._thread: Optional[threading.Thread] = None
+        self._started = threading.Event()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._stopped = False
+        self._gate: Optional[asyncio.Event] = None
+        self._released = False
+        # Monotonic time the gated collectors were released at
+        self.release_mono: Optional[float] = None
+
+    # ------------------------------------------------------------------
+    # Registration
+    # ------------------------------------------------------------------
+
+    def register(
+        self,
+        name: str,
+        sample: Callable[[Tick], Any],
+        interval: Optional[float] = None,
+        num_samples: Optional[int] = None,
+        delay: float = 0.0,
+        blocking: bool = True,
+        on_stop: Optional[Callable[[], Any]] = None,
+        gated: bool = False,
+    ) -> Collector:
+        """Register a collector; must be called before :meth:`start`."""
+        if self._thread is not None:
+            raise RuntimeError("cannot register collectors on a running scheduler")
+        if name in self.collectors:
+            raise ValueError(f"collector {name} already registered")
+        if interval is not None and interval <= 0:
+            raise ValueError(f"collector {name}: interval must be positive")
+        collector = Collector(
+            name=name,
+            sample=sample,
+            interval=interval,
+            num_samples=1 if interval is None else num_samples,
+            delay=delay,
+            blocking=blocking,
+            on_stop=on_stop,
+            gated=gated,
+        )
+        self.collectors[name] = collector
+        return collector
+
+    def register_once(
+        self,
+        name: str,
+        sample: Callable[[Tick], Any],
+        delay: float = 0.0,
+        blocking: bool = True,
+        gated: bool = False,
+    ) -> Collector:
+        """Register a collector that runs a single time, *delay* seconds in."""
+        return self.register(name, sample, None, 1, delay, blocking, gated=gated)
+
+    def release(self) -> None:
+        """
+        Start the gated collectors now, rather than after their delay.
+
+        Thread safe; may be called before :meth:`start`.
+        """
+        if self._released:
+            return
+        self._released = True
+        self.release_mono = time.monotonic()
+        loop, gate = self._loop, self._gate
+        if loop is not None and gate is not None and not loop.is_closed():
+            try:
+                loop.call_soon_threadsafe(gate.set)
+            except RuntimeError:
+                pass  # the loop already finished
+
+    def gate_wall(self) -> Optional[float]:
+        """Unix time the gated collectors were released at, if they were."""
+        return None if self.release_mono is None else self.wall_time(self.release_mono)
+
+    # ------------------------------------------------------------------
+    # Clock helpers
+    # ------------------------------------------------------------------
+
+    def wall_time(self, mono: float) -> float:
+        """Convert a time on the scheduler's monotonic clock to a Unix timestamp."""
+        return self.wall_start + (mono - self.mono_start)
+
+    def elapsed(self) -> float:
+        """Seconds since the scheduler started."""
+        return time.monotonic() - self.mono_start if self.mono_start else 0.0
+
+    # ------------------------------------------------------------------
+    # Loop
+    # ------------------------------------------------------------------
+
+    async def _inline(self, collector: Collector, tick: Tick) -> None:
+        result = collector.sample(tick)
+        if asyncio.iscoroutine(result):
+            await result
+
+    def _sample_done(
+        self, collector: Collector, t0: float, fut: asyncio.Future
+    ) -> None:
+        if fut.cancelled():
+            return
+        if fut.exception() is not None:
+            collector.errors += 1
+            logger.error(f"== collector {collector.name} failed: {fut.exception()} ==")
+        collector.last_duration = time.monotonic() - t0
+        collector.samples_taken += 1
+
+    async def _call(self, collector: Collector, tick: Tick) -> None:
+        t0 = time.monotonic()
+        if collector.blocking:
+            fut = self._loop.run_in_executor(self._executor, collector.sample, tick)
+        else:
+            fut = asyncio.ensure_future(self._inline(collector, tick))
+        fut.add_done_callback(lambda f: self._sample_done(collector, t0, f))
+        collector.inflight = fut
+        try:
+            # A sample in progress is never interrupted half-written
+            await asyncio.shield(fut)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            pass  # accounted for by _sample_done
+
+    async def _drive(self, collector: Collector) -> None:
+        """Run *collector* on its drift-corrected schedule."""
+        first = self.mono_start + collector.delay
+        index = 0
+        try:
+            if collector.gated and not self._gate.is_set():
+                try:
+                    await asyncio.wait_for(
+                        self._gate.wait(), max(0.0, first - time.monotonic())
+                    )
+                except asyncio.TimeoutError:
+                    pass
+            if collector.gated and self.release_mono is not None:
+                first = min(first, max(self.release_mono, self.mono_start))
+            while collector.num_samples is None or index < collector.num_samples:
+                due = first + index * (collector.interval or 0.0)
+                now = time.monotonic()
+                if due > now:
+                    await asyncio.sleep(due - now)
+                tick = Tick(index, due, self.wall_time(due))
+                await self._call(collector, tick)
+                if collector.interval is None:
+                    break
+                # Skip the ticks an overrunning sample made us miss; one only
+                # slightly late (scheduling jitter) is taken late instead
+                next_index = index + 1
+                behind = time.monotonic() - (first + next_index * collector.interval)
+                tolerance = collector.interval * LATE_TOLERANCE
+                if behind > tolerance:
+                    skipped = int((behind - tolerance) // collector.interval) + 1
+                    if collector.num_samples is not None:
+                        skipped = min(skipped, collector.num_samples - next_index)
+                    collector.ticks_missed += skipped
+                    next_index += skipped
+                index = next_index
+        finally:
+            collector.done = True
+
+    async def _main(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._stop_event = asyncio.Event()
+        self._gate = asyncio.Event()
+        if self._released:
+            self._gate.set()
+        self.mono_start = time.monotonic()
+        self.wall_start = time.time()
+        tasks = [
+            asyncio.create_task(self._drive(c), name=c.name)
+            for c in self.collectors.values()
+        ]
+        self._started.set()
+        stopper = asyncio.create_task(self._stop_event.wait())
+        pending = set(tasks)
+        while pending and not self._stop_event.is_set():
+            _, pending = await asyncio.wait(
+                pending | {stopper}, return_when=asyncio.FIRST_COMPLETED
+            )
+            pending.discard(stopper)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        stopper.cancel()
+        for collector in self.collectors.values():
+            if collector.on_stop is not None:
+                # Let the last sample land before the collector is closed
+                if collector.inflight is not None and not collector.inflight.done():
+                    await asyncio.wait({collector.inflight})
+                try:
+                    await self._loop.run_in_executor(self._executor, collector.on_stop)
+                except Exception as e:
+                    logger.error(f"== collector {collector.name} on_stop failed: {e} ==")
+
+    def _run(self) -> None:
+        try:
+            asyncio.run(self._main())
+        finally:
+            self._started.set()
+
+    def start(self) -> None:
+        """Start the event loop in its own thread; the clock starts now."""
+        if self._thread is not None:
+            raise RuntimeError("scheduler already started")
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="telemetry"
+        )
+        self._thread = threading.Thread(
+            target=self._run, name="telemetry-loop", daemon=True
+        )
+        self._thread.start()
+        self._started.wait()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """
+        Cancel every collector still running, run the ``on_stop`` hooks and
+        wait for the loop to exit.
+
+        Samples already running on the executor are not interrupted (e.g. a
+        ``top`` snapshot), but no new ones are started.
+        """
+        if self._thread is None or self._stopped:
+            return
+        loop, stop_event = self._loop, self._stop_event
+        if loop is not None and stop_event is not None and not loop.is_closed():
+            try:
+                loop.call_soon_threadsafe(stop_event.set)
+            except RuntimeError:
+                pass  # the loop already finished on its own
+        self._thread.join(timeout)
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._stopped = True
+        self._log_summary()
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        """Wait until every bounded collector has finished, then stop."""
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self.stop(0)
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _log_summary(self) -> None:
+        for c in self.collectors.values():
+            logger.info(
+                f"== collector {c.name}: {c.samples_taken} samples,"
+                f" {c.ticks_missed} missed ticks, {c.errors} errors =="
+            )
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """Per-collector statistics, e.g. to embed in the run's keymap."""
+        return [
+            {
+                "name": c.name,
+                "interval": c.interval,
+                "samples": c.samples_taken,
+                "missed": c.ticks_missed,
+                "errors": c.errors,
+            }
+            for c in self.collectors.values()
+        ]
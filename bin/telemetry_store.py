@@ -0,0 +1,772 @@
+#!/usr/bin/env python3
+"""
+Columnar on-disk store for OSD telemetry samples.
+
+The OSD dump collectors used to build ``<test_result>_dump.json`` by writing
+``[``, envelopes and trailing commas as text, and every downstream tool
+re-parsed those large JSON blobs.  Here each sample is flattened once, when
+it is collected, into long-form rows
+
+    (sample, timestamp, osd, shard, metric, labels, value)
+
+and appended to NumPy chunk files (``.npy``) that are read back
+memory-mapped.  Strings are dictionary encoded: the metric names, label sets
+(as canonical JSON), envelope labels and payload layouts are kept once in the
+JSON manifest.
+
+Successive dumps of an OSD hold the same series, most of them unchanged, so
+the rows are not stored as such.  Each distinct ``(metric, shard, labels)``
+series and each distinct list of series (a *schema*) is stored once in the
+manifest; a sample is its schema id plus a vector of values, delta encoded
+against the previous sample of the same OSD and schema (the float64 bits are
+XORed, which is exact and turns unchanged values into zeros).  The first
+sample of a schema in each chunk is stored as is, so every chunk decodes on
+its own.
+
+Files of a store with prefix ``run_dump``:
+
+  - ``run_dump.tlm.json``          manifest: dictionaries, series, schemas,
+                                   samples, chunks
+  - ``run_dump.tlm.0000.npy`` ...  encoded value chunks (``uint64``)
+
+All the files sit next to each other, so they survive ``zip -j``.
+
+Two payload layouts are flattened:
+
+  - ``metrics``: Crimson ``dump_metrics``, ``{"metrics": [{name: {"shard":
+    "N", "value": V, <labels>}}]}``.  Histogram values become one row per
+    field, labelled ``_field`` (and ``le`` for the buckets).
+  - ``tree``: anything else (Classic ``perf dump``, tcmalloc/seastar stats):
+    one row per leaf, the metric being the JSON pointer of the leaf.
+    String leaves are kept in the ``_str`` label with a NaN value.
+
+:func:`TelemetryStore.snapshots` rebuilds the original payloads, and
+:func:`export_json` writes the ``[{"timestamp", "label", "osd", "data"}, ...]``
+file the collectors used to produce, so existing tools keep working.
+
+Usage: import telemetry_store
+
+    store = TelemetryStore("run_dump")
+    store.append(data, ts=time.time(), osd=0, label="dump_before")
+    ...
+    store.close()
+    df = TelemetryStore.open("run_dump").to_dataframe()
+
+Or, from the command line, export a store back to the legacy JSON:
+
+    python3 telemetry_store.py run_dump.tlm.json -o run_dump.json
+"""
+
+import argparse
+import datetime
+import glob
+import io
+import json
+import logging
+import math
+import os
+import sys
+import zipfile
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+__author__ = "Jose J Palacios-Perez"
+
+logger = logging.getLogger(__name__)
+
+STORE_VERSION = 2
+MANIFEST_SUFFIX = ".tlm.json"
+CHUNK_SUFFIX = ".tlm.{:04d}.npy"
+# Values buffered in memory before a chunk file is written
+CHUNK_ROWS = 1 << 16
+
+# Long-form rows, as returned by TelemetryStore.rows()
+ROW_DTYPE = np.dtype(
+    [
+        ("sample", "<i4"),
+        ("timestamp", "<f8"),
+        ("osd", "<i2"),
+        ("shard", "<i2"),
+        ("metric", "<i4"),
+        ("labels", "<i4"),
+        ("value", "<f8"),
+    ]
+)
+
+NO_SHARD = -1
+LAYOUT_METRICS = "metrics"
+LAYOUT_TREE = "tree"
+
+
+def format_timestamp(ts: float) -> str:
+    """Format *ts* as the dump envelopes do (``YYYYMMDD_HHMMSS``, local time)."""
+    return datetime.datetime.fromtimestamp(ts).strftime("%Y%m%d_%H%M%S")
+
+
+def _number(value: Any) -> Optional[float]:
+    if isinstance(value, bool):
+        return float(value)
+    if isinstance(value, (int, float)):
+        return float(value)
+    return None
+
+
+def _restore_number(value: float) -> Any:
+    """Values are stored as float64: give integral ones back as ``int``."""
+    if math.isnan(value):
+        return None
+    if value.is_integer() and abs(value) < 2**53:
+        return int(value)
+    return value
+
+
+def _pointer_escape(key: str) -> str:
+    return key.replace("~", "~0").replace("/", "~1")
+
+
+def _pointer_unescape(part: str) -> str:
+    return part.replace("~1", "/").replace("~0", "~")
+
+
+# ---------------------------------------------------------------------------
+# Flattening
+# ---------------------------------------------------------------------------
+
+
+def detect_layout(data: Any) -> str:
+    """Return :data:`LAYOUT_METRICS` for a ``dump_metrics`` reply, else tree."""
+    if isinstance(data, dict) and isinstance(data.get("metrics"), list):
+        return LAYOUT_METRICS
+    return LAYOUT_TREE
+
+
+def _flatten_value(
+    value: Any, labels: Dict[str, Any]
+) -> Iterator[Tuple[Dict[str, Any], float]]:
+    """Rows of one ``dump_metrics`` value: scalar, or histogram-like dict."""
+    num = _number(value)
+    if num is not None:
+        yield labels, num
+        return
+    if not isinstance(value, dict):
+        yield dict(labels, _str=value), math.nan
+        return
+    for field, item in value.items():
+        if isinstance(item, list):
+            for bucket in item:
+                if not isinstance(bucket, dict):
+                    continue
+                extra = {k: v for k, v in bucket.items() if k != "count"}
+                yield dict(labels, _field=field, **extra), float(
+                    bucket.get("count", 0)
+                )
+        else:
+            num = _number(item)
+            if num is None:
+                yield dict(labels, _field=field, _str=item), math.nan
+            else:
+                yield dict(labels, _field=field), num
+
+
+def flatten_metrics(data: Dict[str, Any]) -> Iterator[Tuple[int, str, Dict, float]]:
+    """
+    Flatten a Crimson ``dump_metrics`` reply into ``(shard, metric, labels,
+    value)`` rows.
+    """
+    for item in data.get("metrics", []):
+        if not isinstance(item, dict):
+            continue
+        for name, entry in item.items():
+            if not isinstance(entry, dict):
+                continue
+            labels = {k: v for k, v in entry.items() if k not in ("shard", "value")}
+            shard_str = entry.get("shard")
+            if shard_str is None:
+                shard = NO_SHARD
+            elif str(shard_str).isdigit():
+                shard = int(shard_str)
+            else:
+                # Keep non numeric shards verbatim, as a label
+                shard = NO_SHARD
+                labels["shard"] = shard_str
+            for row_labels, value in _flatten_value(entry.get("value"), labels):
+                yield shard, name, row_labels, value
+
+
+def flatten_tree(data: Any, path: str = "") -> Iterator[Tuple[int, str, Dict, float]]:
+    """
+    Flatten any JSON value into ``(shard, metric, labels, value)`` rows, one
+    per leaf, the metric being the JSON pointer of the leaf.
+    """
+    if isinstance(data, dict):
+        if not data:
+            yield NO_SHARD, path, {"_empty": "object"}, math.nan
+        for key, item in data.items():
+            yield from flatten_tree(item, f"{path}/{_pointer_escape(str(key))}")
+    elif isinstance(data, list):
+        if not data:
+            yield NO_SHARD, path, {"_empty": "array"}, math.nan
+        for i, item in enumerate(data):
+            yield from flatten_tree(item, f"{path}/{i}")
+    else:
+        num = _number(data)
+        if num is None:
+            yield NO_SHARD, path, {"_str": data}, math.nan
+        else:
+            yield NO_SHARD, path, {}, num
+
+
+# ---------------------------------------------------------------------------
+# Rebuilding
+# ---------------------------------------------------------------------------
+
+
+def _rebuild_metrics(rows: List[Tuple[int, str, Dict, float]]) -> Dict[str, Any]:
+    """Inverse of :func:`flatten_metrics`."""
+    metrics: List[Dict[str, Any]] = []
+    current = None  # (key, entry) of the histogram being rebuilt
+    for shard, name, labels, value in rows:
+        base = {k: v for k, v in labels.items() if k not in ("_field", "_str", "le")}
+        field = labels.get("_field")
+        if field is None:
+            entry: Dict[str, Any] = {}
+            if shard != NO_SHARD:
+                entry["shard"] = str(shard)
+            entry["value"] = (
+                labels["_str"] if "_str" in labels else _restore_number(value)
+            )
+            entry.update({k: v for k, v in labels.items() if k != "_str"})
+            metrics.append({name: entry})
+            current = None
+            continue
+        key = (shard, name, json.dumps(base, sort_keys=True))
+        if current is None or current[0] != key:
+            entry = {}
+            if shard != NO_SHARD:
+                entry["shard"] = str(shard)
+            entry["value"] = {}
+            entry.update(base)
+            metrics.append({name: entry})
+            current = (key, entry)
+        hist = current[1]["value"]
+        extra = {
+            k: v
+            for k, v in labels.items()
+            if k not in base and k not in ("_field", "_str")
+        }
+        if extra:
+            bucket = dict(extra)
+            bucket["count"] = _restore_number(value)
+            hist.setdefault(field, []).append(bucket)
+        elif "_str" in labels:
+            hist[field] = labels["_str"]
+        else:
+            hist[field] = _restore_number(value)
+    return {"metrics": metrics}
+
+
+def _listify(node: Any) -> Any:
+    """Turn the dicts keyed ``"0".."n-1"`` built by :func:`_rebuild_tree` into lists."""
+    if not isinstance(node, dict):
+        return node
+    for key in list(node):
+        node[key] = _listify(node[key])
+    if node and all(k == str(i) for i, k in enumerate(node)):
+        return list(node.values())
+    return node
+
+
+def _rebuild_tree(rows: List[Tuple[int, str, Dict, float]]) -> Any:
+    """Inverse of :func:`flatten_tree`."""
+    root: Dict[str, Any] = {}
+    for _shard, pointer, labels, value in rows:
+        if "_empty" in labels:
+            leaf: Any = {} if labels["_empty"] == "object" else []
+        elif "_str" in labels:
+            leaf = labels["_str"]
+        else:
+            leaf = _restore_number(value)
+        if not pointer:
+            return leaf
+        parts = [_pointer_unescape(p) for p in pointer.split("/")[1:]]
+        node = root
+        for part in parts[:-1]:
+            node = node.setdefault(part, {})
+        node[parts[-1]] = leaf
+    return _listify(root)
+
+
+# ---------------------------------------------------------------------------
+# Store
+# ---------------------------------------------------------------------------
+
+
+class TelemetryStore:
+    """
+    Append-only columnar store of telemetry samples.
+
+    Parameters
+    ----------
+    prefix : str
+        Path prefix of the store files (e.g. ``"run_dump"``).
+    chunk_rows : int
+        Values buffered before a chunk file is written.
+
+    A sample is kept as the id of its *schema*, the ordered list of series
+    ``(metric, shard, labels)`` it holds, and a vector of values.  Series and
+    schemas are stored once per run in the manifest.  The value vectors are
+    delta encoded: the float64 bits of each value are XORed with those of the
+    previous sample of the same OSD and schema, so unchanged values are
+    stored as zeros and the decoding is exact.  The first sample of each
+    schema in a chunk is stored as is, so chunks decode independently.
+
+    A new store truncates any previous one with the same prefix.  Use
+    :meth:`open` (or :meth:`open_zip`) to read an existing store.
+    """
+
+    def __init__(self, prefix: str, chunk_rows: int = CHUNK_ROWS) -> None:
+        self.prefix = prefix
+        self.chunk_rows = chunk_rows
+        self.dicts: Dict[str, List[Any]] = {
+            "metric": [],
+            "labels": [],
+            "label": [],
+            "layout": [],
+        }
+        self._codes: Dict[str, Dict[Any, int]] = {k: {} for k in self.dicts}
+        # series -> [metric code, shard, labels code]
+        self.series: List[List[int]] = []
+        self._series_codes: Dict[Tuple[int, int, int], int] = {}
+        # schema -> list of series
+        self.schemas: List[List[int]] = []
+        self._schema_codes: Dict[Tuple[int, ...], int] = {}
+        # sample -> [timestamp, osd, label code, layout code, schema]
+        self.samples: List[List[Any]] = []
+        self.chunks: List[Dict[str, Any]] = []
+        self._buf: List[np.ndarray] = []
+        self._buf_values = 0
+        # (schema, osd) -> bits of its last sample in the current chunk
+        self._last: Dict[Tuple[int, int], np.ndarray] = {}
+        self._chunk_arrays: Optional[List[np.ndarray]] = None
+        self._decoded: Optional[List[np.ndarray]] = None
+        self._readonly = False
+        self.closed = False
+        for path in glob.glob(glob.escape(prefix) + ".tlm.*"):
+            os.remove(path)
+        self._write_manifest()
+
+    @classmethod
+    def manifest_path(cls, prefix: str) -> str:
+        return prefix + MANIFEST_SUFFIX
+
+    @classmethod
+    def prefix_of(cls, path: str) -> str:
+        """Prefix of the store written in place of the JSON file *path*."""
+        if path.endswith(MANIFEST_SUFFIX):
+            return path[: -len(MANIFEST_SUFFIX)]
+        return os.path.splitext(path)[0]
+
+    @classmethod
+    def exists(cls, prefix: str) -> bool:
+        return os.path.exists(cls.manifest_path(prefix))
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+
+    def _code(self, kind: str, key: Any) -> int:
+        codes = self._codes[kind]
+        code = codes.get(key)
+        if code is None:
+            code = codes[key] = len(self.dicts[kind])
+            self.dicts[kind].append(key)
+        return code
+
+    def _labels_code(self, labels: Dict[str, Any]) -> int:
+        key = json.dumps(labels, sort_keys=True, separators=(",", ":")) if labels else ""
+        return self._code("labels", key)
+
+    def _series_code(self, metric: str, shard: int, labels: Dict[str, Any]) -> int:
+        key = (self._code("metric", metric), shard, self._labels_code(labels))
+        code = self._series_codes.get(key)
+        if code is None:
+            code = self._series_codes[key] = len(self.series)
+            self.series.append(list(key))
+        return code
+
+    def _schema_code(self, series: Tuple[int, ...]) -> int:
+        code = self._schema_codes.get(series)
+        if code is None:
+            code = self._schema_codes[series] = len(self.schemas)
+            self.schemas.append(list(series))
+        return code
+
+    def append(
+        self,
+        data: Any,
+        ts: float,
+        osd: int = 0,
+        label: str = "",
+    ) -> int:
+        """
+        Flatten the payload *data* of one sample and append its values.
+
+        Returns the sample index.
+        """
+        if self._readonly or self.closed:
+            raise ValueError(f"{self.prefix}: store is not open for writing")
+        layout = detect_layout(data)
+        flatten = flatten_metrics if layout == LAYOUT_METRICS else flatten_tree
+        series_code = self._series_code
+        ids: List[int] = []
+        values: List[float] = []
+        for shard, metric, labels, value in flatten(data):
+            ids.append(series_code(metric, shard, labels))
+            values.append(value)
+        schema = self._schema_code(tuple(ids))
+        sample = len(self.samples)
+        self.samples.append(
+            [
+                ts,
+                int(osd),
+                self._code("label", label),
+                self._code("layout", layout),
+                schema,
+            ]
+        )
+        bits = np.array(values, dtype="<f8").view("<u8")
+        prev = self._last.get((schema, int(osd)))
+        self._last[(schema, int(osd))] = bits
+        self._buf.append(bits if prev is None else bits ^ prev)
+        self._buf_values += len(bits)
+        self._decoded = None
+        if self._buf_values >= self.chunk_rows:
+            self.flush()
+        return sample
+
+    def append_json(
+        self, payload: bytes, ts: float, osd: int = 0, label: str = ""
+    ) -> Optional[int]:
+        """Decode the JSON reply *payload* and :meth:`append` it (``None`` if empty)."""
+        if not payload.strip():
+            return None
+        return self.append(json.loads(payload), ts, osd, label)
+
+    def _buffered_samples(self) -> Tuple[int, int]:
+        """``(first, count)`` of the samples not yet written to a chunk."""
+        first = sum(c["samples"][1] for c in self.chunks)
+        return first, len(self.samples) - first
+
+    def flush(self) -> None:
+        """Write the buffered values as a new chunk and update the manifest."""
+        if self._buf:
+            bits = np.concatenate(self._buf).astype("<u8", copy=False)
+            name = os.path.basename(self.prefix) + CHUNK_SUFFIX.format(len(self.chunks))
+            np.save(os.path.join(os.path.dirname(self.prefix), name), bits)
+            self.chunks.append(
+                {"file": name, "samples": list(self._buffered_samples()), "values": len(bits)}
+            )
+            self._buf = []
+            self._buf_values = 0
+            self._last = {}
+            self._chunk_arrays = None
+        self._write_manifest()
+
+    def _write_manifest(self) -> None:
+        manifest = {
+            "version": STORE_VERSION,
+            "columns": list(ROW_DTYPE.names),
+            "dictionaries": self.dicts,
+            "series": self.series,
+            "schemas": self.schemas,
+            "samples": self.samples,
+            "chunks": self.chunks,
+        }
+        path = self.manifest_path(self.prefix)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, separators=(",", ":"))
+        os.replace(tmp, path)
+
+    def close(self) -> None:
+        """Flush the remaining values; the store becomes read-only."""
+        if not self._readonly and not self.closed:
+            self.flush()
+        self.closed = True
+
+    def __enter__(self) -> "TelemetryStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def _from_manifest(cls, prefix: str, manifest: Dict[str, Any]) -> "TelemetryStore":
+        if manifest.get("version") != STORE_VERSION:
+            raise ValueError(
+                f"{prefix}: unsupported store version {manifest.get('version')}"
+            )
+        store = cls.__new__(cls)
+        store.prefix = prefix
+        store.chunk_rows = CHUNK_ROWS
+        store.dicts = manifest["dictionaries"]
+        store._codes = {}
+        store.series = manifest["series"]
+        store._series_codes = {}
+        store.schemas = manifest["schemas"]
+        store._schema_codes = {}
+        store.samples = manifest["samples"]
+        store.chunks = manifest["chunks"]
+        store._buf = []
+        store._buf_values = 0
+        store._last = {}
+        store._chunk_arrays = None
+        store._decoded = None
+        store._readonly = True
+        store.closed = True
+        return store
+
+    @classmethod
+    def open(cls, path: str) -> "TelemetryStore":
+        """Open the store with prefix (or manifest) *path* for reading."""
+        prefix = cls.prefix_of(path)
+        with open(cls.manifest_path(prefix), "r", encoding="utf-8") as f:
+            store = cls._from_manifest(prefix, json.load(f))
+        store._arrays()
+        return store
+
+    @classmethod
+    def open_zip(cls, archive: zipfile.ZipFile, member: str) -> "TelemetryStore":
+        """Open the store whose manifest is *member* of the zip *archive*."""
+        prefix = cls.prefix_of(member)
+        store = cls._from_manifest(prefix, json.loads(archive.read(member)))
+        directory = os.path.dirname(member)
+        store._chunk_arrays = [
+            np.load(io.BytesIO(archive.read(os.path.join(directory, c["file"]))))
+            for c in store.chunks
+        ]
+        return store
+
+    def _arrays(self) -> List[np.ndarray]:
+        """The encoded value chunks, memory-mapped."""
+        if self._chunk_arrays is None:
+            directory = os.path.dirname(self.prefix)
+            self._chunk_arrays = [
+                np.load(os.path.join(directory, c["file"]), mmap_mode="r")
+                for c in self.chunks
+            ]
+        return self._chunk_arrays
+
+    def _decode(self, first: int, count: int, bits: np.ndarray) -> List[np.ndarray]:
+        """Undo the delta encoding of the *count* samples from *first* in *bits*."""
+        last: Dict[Tuple[int, int], np.ndarray] = {}
+        out = []
+        offset = 0
+        for sample in range(first, first + count):
+            osd, schema = self.samples[sample][1], self.samples[sample][4]
+            n = len(self.schemas[schema])
+            seg = np.asarray(bits[offset : offset + n])
+            offset += n
+            prev = last.get((schema, osd))
+            seg = seg.copy() if prev is None else seg ^ prev
+            last[(schema, osd)] = seg
+            out.append(seg.view("<f8"))
+        return out
+
+    def _values(self) -> List[np.ndarray]:
+        if self._decoded is None:
+            decoded: List[np.ndarray] = []
+            for chunk, bits in zip(self.chunks, self._arrays()):
+                decoded.extend(self._decode(*chunk["samples"], bits))
+            if self._buf:
+                first, count = self._buffered_samples()
+                decoded.extend(self._decode(first, count, np.concatenate(self._buf)))
+            self._decoded = decoded
+        return self._decoded
+
+    @property
+    def num_samples(self) -> int:
+        return len(self.samples)
+
+    def values(self, sample: int) -> np.ndarray:
+        """Values of *sample*, in the order of :meth:`sample_series`."""
+        return self._values()[sample]
+
+    def sample_series(self, sample: int) -> np.ndarray:
+        """Series ids held by *sample*."""
+        return np.asarray(self.schemas[self.samples[sample][4]], dtype=np.int64)
+
+    def series_table(self) -> Dict[str, np.ndarray]:
+        """``metric``, ``shard`` and ``labels`` codes of every series."""
+        table = np.asarray(self.series, dtype=np.int64).reshape(-1, 3)
+        return {"metric": table[:, 0], "shard": table[:, 1], "labels": table[:, 2]}
+
+    def series_key(self, series: int) -> Tuple[str, int, Dict[str, Any]]:
+        """``(metric, shard, labels)`` of *series*."""
+        metric, shard, labels = self.series[series]
+        return self.dicts["metric"][metric], shard, self.decode_labels(labels)
+
+    def value_matrix(
+        self, samples: Optional[List[int]] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Values of *samples* (default all) aligned on the union of their series.
+
+        Returns ``(series ids, matrix)``, the matrix having one row per
+        sample and NaN where a sample lacks a series.
+        """
+        samples = list(range(self.num_samples)) if samples is None else list(samples)
+        if not samples:
+            return np.empty(0, dtype=np.int64), np.empty((0, 0))
+        ids = np.unique(np.concatenate([self.sample_series(s) for s in samples]))
+        matrix = np.full((len(samples), len(ids)), np.nan)
+        for row, sample in enumerate(samples):
+            cols = np.searchsorted(ids, self.sample_series(sample))
+            matrix[row, cols] = self.values(sample)
+        return ids, matrix
+
+    def rows(self) -> np.ndarray:
+        """All samples as long-form rows, one structured array."""
+        counts = [len(self.schemas[s[4]]) for s in self.samples]
+        rows = np.empty(sum(counts), dtype=ROW_DTYPE)
+        if not len(rows):
+            return rows
+        table = self.series_table()
+        sample_idx = np.repeat(np.arange(len(self.samples)), counts)
+        meta = np.asarray([s[:2] for s in self.samples], dtype=np.float64)
+        ids = np.concatenate([self.sample_series(i) for i in range(self.num_samples)])
+        rows["sample"] = sample_idx
+        rows["timestamp"] = meta[sample_idx, 0]
+        rows["osd"] = meta[sample_idx, 1]
+        rows["shard"] = table["shard"][ids]
+        rows["metric"] = table["metric"][ids]
+        rows["labels"] = table["labels"][ids]
+        rows["value"] = np.concatenate(self._values())
+        return rows
+
+    def decode_labels(self, code: int) -> Dict[str, Any]:
+        key = self.dicts["labels"][code]
+        return json.loads(key) if key else {}
+
+    def sample_info(self, sample: int) -> Dict[str, Any]:
+        """Timestamp, OSD, envelope label and layout of *sample*."""
+        ts, osd, label, layout, _schema = self.samples[sample]
+        return {
+            "timestamp": ts,
+            "osd": osd,
+            "label": self.dicts["label"][label],
+            "layout": self.dicts["layout"][layout],
+        }
+
+    def to_dataframe(self, expand_labels: bool = False):
+        """
+        Long-form DataFrame: ``sample, timestamp, osd, shard, metric, labels,
+        value``, with the string columns as categoricals.
+
+        With *expand_labels* each label key becomes a column of its own.
+        """
+        import pandas as pd
+
+        rows = self.rows()
+        df = pd.DataFrame({name: rows[name] for name in ROW_DTYPE.names})
+        df["metric"] = pd.Categorical.from_codes(
+            df["metric"], categories=pd.Index(self.dicts["metric"]).astype(object)
+        )
+        df["labels"] = pd.Categorical.from_codes(
+            df["labels"], categories=pd.Index(self.dicts["labels"]).astype(object)
+        )
+        if expand_labels and len(self.dicts["labels"]) > 1:
+            decoded = [self.decode_labels(c) for c in range(len(self.dicts["labels"]))]
+            keys = sorted({k for d in decoded for k in d})
+            codes = rows["labels"]
+            for key in keys:
+                column = np.array([d.get(key) for d in decoded], dtype=object)
+                df[key] = column[codes]
+        return df
+
+    def snapshot(self, sample: int) -> Dict[str, Any]:
+        """
+        ``{"timestamp", "osd", "label", "data"}`` of *sample*, *data* being
+        the payload as it was appended (numbers come back as ``int`` when
+        integral).
+        """
+        info = self.sample_info(sample)
+        metric_names = self.dicts["metric"]
+        label_cache = self._label_cache
+        flat = []
+        for series, value in zip(
+            self.schemas[self.samples[sample][4]], self.values(sample).tolist()
+        ):
+            metric, shard, labels = self.series[series]
+            decoded = label_cache.get(labels)
+            if decoded is None:
+                decoded = label_cache[labels] = self.decode_labels(labels)
+            flat.append((shard, metric_names[metric], decoded, value))
+        if info["layout"] == LAYOUT_METRICS:
+            data = _rebuild_metrics(flat)
+        else:
+            data = _rebuild_tree(flat) if flat else None
+        return {
+            "timestamp": info["timestamp"],
+            "osd": info["osd"],
+            "label": info["label"],
+            "data": data,
+        }
+
+    @property
+    def _label_cache(self) -> Dict[int, Dict[str, Any]]:
+        cache = self.__dict__.get("_labels_decoded")
+        if cache is None:
+            cache = self.__dict__["_labels_decoded"] = {}
+        return cache
+
+    def snapshots(self) -> Iterator[Dict[str, Any]]:
+        """Yield :meth:`snapshot` for every sample."""
+        for sample in range(self.num_samples):
+            yield self.snapshot(sample)
+
+    def export_json(self, path: str) -> None:
+        """
+        Write the store as the legacy JSON array of dump envelopes,
+        ``[{"timestamp": "YYYYMMDD_HHMMSS", "label": ..., "osd": ..., "data": ...}, ...]``.
+        """
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("[\n")
+            for i, snap in enumerate(self.snapshots()):
+                entry = {
+                    "timestamp": format_timestamp(snap["timestamp"]),
+                    "label": snap["label"],
+                    "osd": snap["osd"],
+                    "data": snap["data"],
+                }
+                sep = "," if i < self.num_samples - 1 else ""
+                f.write(f"    {json.dumps(entry)}{sep}\n")
+            f.write("]\n")
+
+
+def export_json(prefix: str, path: Optional[str] = None) -> str:
+    """Export the store *prefix* to the legacy JSON file *path* (default ``<prefix>.json``)."""
+    path = path or f"{TelemetryStore.prefix_of(prefix)}.json"
+    TelemetryStore.open(prefix).export_json(path)
+    return path
+
+
+def main(argv: List[str]) -> None:
+    parser = argparse.ArgumentParser(
+        description="Export a columnar telemetry store to the legacy dump JSON",
+    )
+    parser.add_argument("store", help="Store prefix or .tlm.json manifest")
+    parser.add_argument("-o", "--output", help="Output .json (default <prefix>.json)")
+    options = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    path = export_json(options.store, options.output)
+    logger.info(f"Exported {options.store} to {path}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Unit tests for diskstat_sampler.py
+
+Uses a fake /proc/diskstats file and /sys/class/block tree in a temporary
+directory, rewritten between samples to simulate the counters moving.
+"""
+
+import json
+import math
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+# Add parent directory to path to import the module
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from diskstat_sampler import DISKSTAT_FIELDS, DiskStatSampler, parse_diskstats
+from pp_diskstat import iter_diskstat_series_from_content
+
+SAMPLE = """\
+ 259       0 nvme0n1 1 0 0 0 0 0 0 0 0 0 0 0 0 0 0 0 0
+ 259       2 nvme0n1p2 {r} 0 {rs} {rt} {w} 0 {ws} {wt} 0 {io} {wio} 0 0 0 0 0 0
+ 259       5 nvme1n1p2 100 0 800 50 0 0 0 0 0 10 50 0 0 0 0 0 0
+   8       0 sda 7 1 2 3 4 5 6 7 0 8 9
+"""
+
+
+def _content(r=0, rs=0, rt=0, w=0, ws=0, wt=0, io=0, wio=0):
+    return SAMPLE.format(r=r, rs=rs, rt=rt, w=w, ws=ws, wt=wt, io=io, wio=wio)
+
+
+class TestParseDiskstats(unittest.TestCase):
+    """Tests for parse_diskstats()."""
+
+    def test_filters_devices_by_regex(self):
+        stats = parse_diskstats(_content(), r"nvme\d+n1p2")
+        self.assertEqual(sorted(stats), ["nvme0n1p2", "nvme1n1p2"])
+
+    def test_short_rows_are_zero_padded(self):
+        stats = parse_diskstats(_content())
+        self.assertEqual(len(stats["sda"]), len(DISKSTAT_FIELDS))
+        self.assertEqual(stats["sda"][:8], [7, 1, 2, 3, 4, 5, 6, 7])
+        self.assertEqual(stats["sda"][-1], 0)
+
+
+class TestDiskStatSampler(unittest.TestCase):
+    """Tests for DiskStatSampler."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.proc = os.path.join(self.temp_dir, "diskstats")
+        self.sys_block = os.path.join(self.temp_dir, "block")
+        os.makedirs(os.path.join(self.sys_block, "nvme0n1p2"))
+        self._write(_content())
+        self._inflight("nvme0n1p2", 3, 4)
+        self.sampler = DiskStatSampler(
+            r"nvme\d+n1p2", capacity=2, proc_path=self.proc, sys_block=self.sys_block
+        )
+
+    def tearDown(self):
+        self.sampler.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _write(self, content):
+        with open(self.proc, "w") as f:
+            f.write(content)
+
+    def _inflight(self, dev, reads, writes):
+        with open(os.path.join(self.sys_block, dev, "inflight"), "w") as f:
+            f.write(f"{reads:>8} {writes:>8}\n")
+
+    def test_interval_stats(self):
+        self.sampler.sample(100.0)
+        # 0.5s later: 1000 reads of 8 sectors taking 2000ms in total,
+        # 500 writes taking 500ms, busy 250ms, weighted io time 1000ms
+        self._write(
+            _content(r=1000, rs=8000, rt=2000, w=500, ws=4000, wt=500, io=250, wio=1000)
+        )
+        self.sampler.sample(100.5)
+        stats = self.sampler.interval_stats()
+        self.assertEqual(self.sampler.devices, ["nvme0n1p2", "nvme1n1p2"])
+        self.assertEqual(stats["read_iops"][0, 0], 2000.0)
+        self.assertEqual(stats["write_iops"][0, 0], 1000.0)
+        self.assertEqual(stats["read_bw_bytes"][0, 0], 8000 * 512 / 0.5)
+        self.assertEqual(stats["read_await_ms"][0, 0], 2.0)
+        self.assertEqual(stats["write_await_ms"][0, 0], 1.0)
+        self.assertEqual(stats["queue_depth"][0, 0], 2.0)
+        self.assertEqual(stats["util"][0, 0], 0.5)
+        self.assertEqual(stats["inflight"][0, 0], 7)
+        # The idle device has no await and no inflight file
+        self.assertTrue(math.isnan(stats["read_await_ms"][0, 1]))
+        self.assertEqual(stats["inflight"][0, 1], 0)
+
+    def test_arrays_grow_past_capacity(self):
+        for i in range(5):
+            self._write(_content(r=10 * i))
+            self.sampler.sample(float(i))
+        self.assertEqual(self.sampler.num_samples, 5)
+        self.assertEqual(
+            self.sampler.counter("reads_completed")[:, 0].tolist(), [0, 10, 20, 30, 40]
+        )
+
+    def test_first_last_diff(self):
+        self.sampler.sample()
+        self._write(_content(r=5, rt=7, w=3, wt=9))
+        self.sampler.sample()
+        diff = self.sampler.first_last_diff()
+        self.assertEqual(
+            diff["nvme0n1p2"],
+            {"reads_completed": 5, "read_time_ms": 7, "writes_completed": 3,
+             "write_time_ms": 9},
+        )
+        self.assertEqual(diff["nvme1n1p2"]["reads_completed"], 0)
+
+    def test_save_json_replaces_nan(self):
+        self.sampler.sample(1.0)
+        self.sampler.sample(2.0)
+        path = os.path.join(self.temp_dir, "out.json")
+        self.sampler.save_json(path)
+        with open(path) as f:
+            data = json.load(f)
+        self.assertEqual(data["sample_timestamp"], [1.0, 2.0])
+        self.assertEqual(data["read_await_ms"], [[None, None]])
+
+    def test_samples_kept_across_reopen(self):
+        self.sampler.sample(1.0)
+        self.sampler.close()
+        self.sampler.sample(2.0)
+        self.assertEqual(self.sampler.timestamps[:2].tolist(), [1.0, 2.0])
+
+    def test_series_read_back_per_interval(self):
+        self.sampler.sample(100.0)
+        self._write(_content(r=1000, rt=2000))
+        self.sampler.sample(100.5)
+        self._write(_content(r=1500, rt=2500))
+        self.sampler.sample(101.0)
+        content = json.dumps(self.sampler.to_dict())
+        series = list(iter_diskstat_series_from_content(content, r"nvme0"))
+        self.assertEqual([ts for ts, _ in series], [100.5, 101.0])
+        df = series[1][1]
+        self.assertEqual(df["device"].tolist(), ["nvme0n1p2"])
+        self.assertEqual(df["read_iops"].iloc[0], 1000.0)
+        self.assertEqual(df["read_await_ms"].iloc[0], 1.0)
+        # No writes: the await is missing rather than zero
+        self.assertTrue(math.isnan(df["write_await_ms"].iloc[0]))
+
+
+if __name__ == "__main__":
+    unittest.main()
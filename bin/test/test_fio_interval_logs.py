@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Unit tests for fio_interval_logs.py
+
+Writes the per-interval logs of two FIO processes and checks the merged
+per-second IOPS/latency series.
+"""
+
+import gzip
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+# Add parent directory to path to import the module
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fio_interval_logs import find_fio_logs, load_fio_logs, read_fio_log
+from telemetry_store import format_timestamp
+
+T0 = 1_760_000_000_000
+
+
+def log_lines(samples, t0=T0):
+    """Lines of a FIO log of (second, value) samples."""
+    return "".join(f"{t0 + s * 1000 + 3}, {v}, 0, 0, 0\n" for s, v in samples)
+
+
+class TestFioIntervalLogs(unittest.TestCase):
+    """Tests for the loading and merge of FIO logs."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _write(self, name, text):
+        path = os.path.join(self.temp_dir, name)
+        with open(path, "w") as f:
+            f.write(text)
+        return path
+
+    def test_read_fio_log(self):
+        path = self._write("fio_a_clat.1.log", "1000, 250000, 1, 4096, 0, 0\n2000, 260000, 1, 4096, 0, 0\n")
+        df = read_fio_log(path)
+        self.assertEqual(list(df.columns), ["time_ms", "value", "ddir"])
+        self.assertEqual(df["value"].tolist(), [250000, 260000])
+        self.assertTrue(read_fio_log(b"", "empty.log").empty)
+
+    def test_merge_processes(self):
+        # p0: 1000 IOPS at 1 ms, p1: 3000 IOPS at 2 ms, with a spike at 3s
+        self._write("fio_x_p0_iops.1.log", log_lines((s, 1000) for s in range(5)))
+        self._write("fio_x_p0_clat.1.log", log_lines((s, 1_000_000) for s in range(5)))
+        self._write("fio_x_p1_iops.1.log", log_lines((s, 3000) for s in range(5)))
+        self._write(
+            "fio_x_p1_clat.1.log",
+            log_lines((s, 9_000_000 if s == 3 else 2_000_000) for s in range(5)),
+        )
+        # Ignored: not a FIO log
+        self._write("fio_x.log", "garbage\n")
+        sources = find_fio_logs(self.temp_dir)
+        self.assertEqual(len(sources), 4)
+        series = load_fio_logs(sources)
+        self.assertEqual(len(series), 5)
+        self.assertEqual(series.index[0], T0 // 1000)
+        self.assertEqual(series["timestamp"].iloc[0], format_timestamp(T0 // 1000))
+        self.assertEqual(series["iops"].tolist(), [4000] * 5)
+        self.assertAlmostEqual(series["clat_ms"].iloc[0], 1.75)
+        self.assertAlmostEqual(series["clat_ms"].iloc[3], 7.0)
+        self.assertAlmostEqual(series["clat_max_ms"].iloc[3], 9.0)
+
+    def test_relative_times_and_contents(self):
+        # Zero-based times, shifted by the start of the job; gzipped contents
+        sources = {
+            "fio_y_iops.1.log.gz": gzip.compress(log_lines([(0, 500), (1, 600)], t0=0).encode()),
+            "fio_y_lat.1.log": log_lines([(0, 4_000_000), (1, 5_000_000)], t0=0).encode(),
+        }
+        series = load_fio_logs(sources, start_ms={"fio_y": T0})
+        self.assertEqual(series.index.tolist(), [T0 // 1000, T0 // 1000 + 1])
+        self.assertEqual(series["iops"].tolist(), [500, 600])
+        self.assertEqual(series["clat_ms"].tolist(), [4.0, 5.0])
+
+    def test_latency_only(self):
+        sources = {"fio_z_clat.1.log": log_lines([(0, 2_000_000)]).encode()}
+        series = load_fio_logs(sources)
+        self.assertEqual(series["clat_ms"].tolist(), [2.0])
+        self.assertTrue(series["iops"].isna().all())
+
+    def test_empty(self):
+        self.assertTrue(load_fio_logs({}).empty)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Unit tests for fio_parse_jsons.py
+
+Writes small FIO JSON outputs to a temporary directory and checks that the
+batched ingestion gives the same rows serially and on a process pool.
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+# Add parent directory to path to import the module
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fio_parse_jsons
+
+
+def fio_json(iodepth, numjobs=2, rw="randread"):
+    """A FIO JSON output of *numjobs* jobs."""
+    io = "read" if "read" in rw else "write"
+    jobs = []
+    for j in range(numjobs):
+        jobs.append(
+            {
+                "jobname": f"job{j}",
+                "job_start": 1700000000000 + j,
+                "job options": {"rw": rw, "runtime": "60"},
+                "usr_cpu": 10.0,
+                "sys_cpu": 5.0,
+                io: {
+                    "bw": 4000 * iodepth,
+                    "iops": 1000.0 * iodepth + j,
+                    "total_ios": 60000 * iodepth,
+                    "clat_ns": {
+                        "N": 60000 * iodepth,
+                        "mean": 250000.0 * iodepth,
+                        "stddev": 10000.0,
+                        "max": 9000000,
+                        "percentile": {"50.000000": 240000, "99.000000": 800000},
+                    },
+                },
+            }
+        )
+    return {
+        "fio version": "fio-3.36",
+        "timestamp": 1700000000 + iodepth,
+        "global options": {"bs": "4k", "iodepth": str(iodepth), "rw": rw, "numjobs": str(numjobs)},
+        "jobs": jobs,
+    }
+
+
+class TestLoadFioColumns(unittest.TestCase):
+    """Tests for the batched ingestion of FIO JSON files."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.files = []
+        for i in range(40):
+            path = os.path.join(self.temp_dir, f"fio_1job_{i + 1}io_4k_randread.json")
+            with open(path, "w") as f:
+                json.dump(fio_json(i + 1), f)
+            self.files.append(path)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_rows_columns_roundtrip(self):
+        rows = [{"a": 1, "b": 2}, {"a": 3, "c": 4}]
+        columns = fio_parse_jsons.rows_to_columns(rows)
+        self.assertEqual(columns, {"a": [1, 3], "b": [2, None], "c": [None, 4]})
+        self.assertEqual(
+            fio_parse_jsons.columns_to_rows(columns),
+            [{"a": 1, "b": 2, "c": None}, {"a": 3, "b": None, "c": 4}],
+        )
+
+    def test_serial(self):
+        columns = fio_parse_jsons.load_fio_columns(self.files + self.files[:3], workers=0)
+        # Two jobs per file, duplicates parsed once
+        self.assertEqual(len(columns["iops"]), 80)
+        self.assertEqual(columns["filename"][:2], [self.files[0]] * 2)
+        self.assertEqual(columns["iops"][:2], [1000.0, 1001.0])
+        self.assertIn("clat_p99_ms", columns)
+
+    def test_pool_matches_serial(self):
+        serial = fio_parse_jsons.process_list_fio_json_files(self.files, workers=0)
+        pooled = fio_parse_jsons.process_list_fio_json_files(self.files, workers=2)
+        self.assertEqual(pooled, serial)
+
+    def test_invalid_file_skipped(self):
+        path = os.path.join(self.temp_dir, "empty.json")
+        open(path, "w").close()
+        rows = fio_parse_jsons.process_list_fio_json_files([path] + self.files[:2], workers=0)
+        self.assertEqual(len(rows), 4)
+
+    def test_reduced_file(self):
+        # The jobs of a file combined into a single row
+        row = fio_parse_jsons._process_fio_json_file(self.files[0], [])
+        self.assertEqual(row["iops"], 2001.0)
+        self.assertEqual(row["total_ios"], 120000)
+        self.assertAlmostEqual(row["clat_ms"], 0.25)
+        self.assertAlmostEqual(row["clat_p99_ms"], 0.8, delta=0.8 / 64)
+
+    def test_streamed_jobs(self):
+        # Keys after the jobs skipped; a truncated file discarded
+        data = fio_json(4, numjobs=3)
+        data["disk_util"] = [{"name": "rbd0", "util": 99.0}]
+        path = os.path.join(self.temp_dir, "fio_disk_util.json")
+        with open(path, "w") as f:
+            json.dump(data, f)
+        rows = fio_parse_jsons.process_fio_json_file(path)
+        self.assertEqual([r["jobname"] for r in rows], ["job0", "job1", "job2"])
+        self.assertEqual(rows[0]["iodepth"], "4")
+        with open(path, "r+") as f:
+            f.truncate(os.path.getsize(path) // 2)
+        self.assertEqual(fio_parse_jsons.process_fio_json_file(path), [])
+        self.assertEqual(fio_parse_jsons._process_fio_json_file(path, []), {})
+
+    def test_dataframe(self):
+        try:
+            import pandas  # noqa: F401
+        except ImportError:
+            self.skipTest("pandas not available")
+        df = fio_parse_jsons.load_fio_dataframe(self.files, workers=2)
+        self.assertEqual(len(df), 80)
+        self.assertAlmostEqual(df["clat_ms"].iloc[0], 0.25)
+
+
+class TestLoadFioPoints(unittest.TestCase):
+    """Tests for the rows of the results table, one per point."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _write(self, name, data):
+        path = os.path.join(self.temp_dir, name)
+        with open(path, "w") as f:
+            json.dump(data, f)
+        return path
+
+    def _process(self, proc, bins):
+        # A json+ output of a single job, whose latencies are *bins* (ns -> count)
+        data = fio_json(4, numjobs=1)
+        clat = data["jobs"][0]["read"]["clat_ns"]
+        clat["bins"] = {str(v): c for v, c in bins.items()}
+        data["jobs"][0]["read"]["total_ios"] = sum(bins.values())
+        return self._write(f"fio_t_1job_4io_4k_randread_p{proc}.json", data)
+
+    def test_processes_of_a_point_merged(self):
+        # p0 is fast; p1 has a 4% tail at 10ms: the p99 of the point is in the
+        # tail of p1, not the mean of the p99 of each process
+        files = [
+            self._process(0, {100000: 1000}),
+            self._process(1, {100000: 960, 10000000: 40}),
+        ]
+        files.append(self._write("fio_t_1job_8io_4k_randread_p0.json", fio_json(8)))
+        points = fio_parse_jsons.load_fio_points(files, workers=0)
+        name = os.path.join(self.temp_dir, "fio_t_1job_4io_4k_randread.json")
+        self.assertEqual(len(points), 2)
+        self.assertEqual(list(points)[0], name)
+        row = points[name]
+        self.assertEqual(row["iops"], 2 * 4000.0)
+        self.assertEqual(row["total_ios"], 2000)
+        self.assertAlmostEqual(row["clat_p99_ms"], 10.0, delta=10.0 / 64)
+        per_process = [
+            fio_parse_jsons._process_fio_json_file(f, [])["clat_p99_ms"] for f in files[:2]
+        ]
+        self.assertAlmostEqual(sum(per_process) / 2, 5.05, delta=0.1)
+
+    def test_multi_table_average(self):
+        files = [self._process(i, {100000 * (i + 1): 1000}) for i in range(2)]
+        files.append(self._write("fio_t_1job_8io_4k_randread_p0.json", fio_json(8, numjobs=1)))
+        points = fio_parse_jsons.load_fio_points(files, workers=0)
+        table, avg = fio_parse_jsons.initial_fio_table(points, multi=True)
+        self.assertEqual(table["iops"], [8000.0, 8000.0])
+        self.assertEqual(avg["iops"], 8000.0)
+        self.assertEqual(avg["iodepth"], 6.0)
+
+
+class TestSortRowsByIodepth(unittest.TestCase):
+    """Tests for the row order of the results table."""
+
+    def test_search_order_sorted(self):
+        # Measured in the order of an adaptive iodepth search
+        names = [
+            f"fio_t_{job}job_{io}io_4k_randread_p0.json"
+            for job, io in [(1, 1), (1, 64), (1, 8), (1, 16), (16, 4), (16, 2)]
+        ]
+        dict_files = {name: {"iodepth": i} for i, name in enumerate(names)}
+        table = {
+            "iodepth": [1, 64, 8, 16, 4, 2],
+            "iops": [10.0, 640.0, 80.0, 160.0, 40.0, 20.0],
+            "OSD_cpu": [1.0, 6.4, 0.8, 1.6, 0.4, 0.2],
+        }
+        dict_files, table = fio_parse_jsons.sort_rows_by_iodepth(dict_files, table)
+        self.assertEqual(table["iodepth"], [1, 8, 16, 64, 2, 4])
+        self.assertEqual(table["iops"], [10.0, 80.0, 160.0, 640.0, 20.0, 40.0])
+        self.assertEqual(table["OSD_cpu"], [1.0, 0.8, 1.6, 6.4, 0.2, 0.4])
+        self.assertEqual([v["iodepth"] for v in dict_files.values()], [0, 2, 3, 1, 5, 4])
+
+    def test_sorted_unchanged(self):
+        dict_files = {f"fio_t_1job_{io}io_4k_rr.json": {} for io in (1, 2, 4)}
+        table = {"iodepth": [1, 2, 4], "avg_cpu": [5.0]}
+        self.assertEqual(
+            fio_parse_jsons.sort_rows_by_iodepth(dict_files, table), (dict_files, table)
+        )
+
+if __name__ == "__main__":
+    unittest.main()
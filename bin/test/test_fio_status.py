@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Unit tests for fio_status.py
+
+Feeds concatenated FIO JSON status reports to a FioStatusMonitor and checks
+the interval latencies, the abort callback and the saved final report.
+"""
+
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# Add parent directory to path to import the module
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fio_status import FioStatusMonitor, clat_totals
+
+
+def report(n, mean_ms, mode="write"):
+    """A minimal FIO JSON report with cumulative clat_ns statistics."""
+    return {"jobs": [{"jobname": "j", mode: {"clat_ns": {"N": n, "mean": mean_ms * 1e6}}}]}
+
+
+def stream(*reports):
+    return "\n".join(json.dumps(r, indent=2) for r in reports).encode()
+
+
+class TestClatTotals(unittest.TestCase):
+    def test_sums_over_jobs(self):
+        data = report(10, 2.0)
+        data["jobs"].append(report(30, 1.0)["jobs"][0])
+        self.assertEqual(clat_totals(data, "write"), (40.0, 50.0 * 1e6))
+        self.assertEqual(clat_totals(data, "read"), (0.0, 0.0))
+
+
+class TestFioStatusMonitor(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.outfile = os.path.join(self.temp_dir, "fio.json")
+        self.aborts = []
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _monitor(self, data, abort_intervals=2):
+        mon = FioStatusMonitor(
+            io.BytesIO(data),
+            self.outfile,
+            "write",
+            max_latency=5.0,
+            abort_intervals=abort_intervals,
+            on_abort=self.aborts.append,
+        )
+        mon.start()
+        mon.join(5)
+        return mon
+
+    def test_interval_latencies_from_cumulative_stats(self):
+        # 100 ops at 1ms, then 100 more at 3ms: cumulative mean 2ms
+        mon = self._monitor(stream(report(100, 1.0), report(200, 2.0)))
+        self.assertEqual(mon.num_reports, 2)
+        self.assertAlmostEqual(mon.latencies[1], 3.0)
+        self.assertFalse(mon.aborted)
+
+    def test_aborts_after_consecutive_intervals_over(self):
+        mon = self._monitor(
+            stream(report(100, 1.0), report(200, 6.0), report(300, 7.0), report(400, 8.0))
+        )
+        self.assertTrue(mon.aborted)
+        self.assertEqual(self.aborts, [mon])
+
+    def test_single_spike_does_not_abort(self):
+        mon = self._monitor(
+            stream(report(100, 1.0), report(200, 6.0), report(300, 4.0))
+        )
+        self.assertFalse(mon.aborted)
+
+    def test_last_report_saved_and_stray_lines_skipped(self):
+        data = b"fio: some warning\n" + stream(report(1, 1.0), report(2, 1.0))
+        self._monitor(data)
+        with open(self.outfile) as f:
+            self.assertEqual(json.load(f), report(2, 1.0))
+
+    def test_reports_split_across_reads(self):
+        mon = FioStatusMonitor(io.BytesIO(), self.outfile, "write", 5.0)
+        data = stream(report(1, 1.0), report(2, 1.0)).decode()
+        for i in range(0, len(data), 7):
+            mon.feed(data[i : i + 7])
+        self.assertEqual(mon.num_reports, 2)
+
+    def test_braces_and_escapes_in_strings(self):
+        # Job names with braces, quotes and backslashes, cut at every size
+        first = dict(report(1, 1.0), **{"fio version": 'a}{"\\'})
+        second = dict(report(2, 1.0), **{"error": "\\\"}}"})
+        data = stream(first, second).decode()
+        for size in range(1, 12):
+            mon = FioStatusMonitor(io.BytesIO(), self.outfile, "write", 5.0)
+            for i in range(0, len(data), size):
+                mon.feed(data[i : i + size])
+            self.assertEqual(mon.num_reports, 2)
+            self.assertEqual(mon.latest, second)
+
+    def test_report_decoded_once(self):
+        mon = FioStatusMonitor(io.BytesIO(), self.outfile, "write", 5.0)
+        data = stream(report(1, 1.0)).decode()
+        with patch("fio_status.json.loads", wraps=json.loads) as loads:
+            for i in range(0, len(data), 3):
+                mon.feed(data[i : i + 3])
+        self.assertEqual(loads.call_count, 1)
+        self.assertEqual(mon.num_reports, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
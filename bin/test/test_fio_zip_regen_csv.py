@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Unit tests for fio_zip_regen_csv.py
+
+Builds small benchmark archives and checks that the CSV regeneration only
+parses the JSONs that changed, and only writes the CSVs that changed.
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+import zipfile
+from unittest.mock import patch
+
+# Add parent directory to path to import the module
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fio_zip_regen_csv
+from test_fio_parse_jsons import fio_json
+
+NAMES = [f"fio_1job_{i}io_4k_randread.json" for i in (1, 2, 4)]
+
+
+def fio_bytes(iodepth):
+    return json.dumps(fio_json(iodepth)).encode()
+
+
+class TestRegenCsvInZip(unittest.TestCase):
+    """Tests for the incremental regeneration."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.zip_path = self._make_zip("run.zip")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _make_zip(self, name, iodepths=(1, 2, 4)):
+        path = os.path.join(self.temp_dir, name)
+        with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr("FIO/run_list", "\n".join(NAMES) + "\n")
+            for basename, iodepth in zip(NAMES, iodepths):
+                zf.writestr(f"FIO/{basename}", fio_bytes(iodepth))
+            zf.writestr("other/big.log", "x" * 10000)
+        return path
+
+    def _regen(self, **kwargs):
+        """Regenerate, returning the updated CSVs and the JSONs parsed."""
+        with patch.object(
+            fio_zip_regen_csv, "_parse_fio_json", wraps=fio_zip_regen_csv._parse_fio_json
+        ) as parse:
+            updated = fio_zip_regen_csv.regen_csv_in_zip(self.zip_path, **kwargs)
+        return updated, [c.args[1] for c in parse.call_args_list]
+
+    def _csv(self):
+        with zipfile.ZipFile(self.zip_path) as zf:
+            self.assertIsNone(zf.testzip())
+            names = zf.namelist()
+            self.assertEqual(len(names), len(set(names)))
+            return zf.read("FIO/run.csv").decode()
+
+    def test_incremental(self):
+        updated, parsed = self._regen()
+        self.assertEqual(updated, ["FIO/run.csv"])
+        self.assertEqual(parsed, NAMES)
+        first = self._csv()
+        self.assertEqual(len(first.splitlines()), 1 + 2 * len(NAMES))
+        self.assertTrue(os.path.exists(fio_zip_regen_csv.manifest_path(self.zip_path)))
+
+        # Nothing changed: nothing parsed, nor written
+        size = os.path.getsize(self.zip_path)
+        self.assertEqual(self._regen(), ([], []))
+        self.assertEqual(os.path.getsize(self.zip_path), size)
+
+        # One JSON changed: only that one parsed again
+        with zipfile.ZipFile(self.zip_path) as zf:
+            log_offset = zf.getinfo("other/big.log").header_offset
+        fio_zip_regen_csv._replace_members(self.zip_path, {f"FIO/{NAMES[1]}": fio_bytes(8)})
+        updated, parsed = self._regen()
+        self.assertEqual((updated, parsed), (["FIO/run.csv"], [NAMES[1]]))
+        csv = self._csv()
+        self.assertNotEqual(csv, first)
+        self.assertEqual(csv.splitlines()[:3], first.splitlines()[:3])
+        # The other entries were not rewritten
+        with zipfile.ZipFile(self.zip_path) as zf:
+            self.assertEqual(zf.getinfo("other/big.log").header_offset, log_offset)
+
+    def test_parser_version_change(self):
+        self._regen()
+        with patch.object(fio_zip_regen_csv, "PARSER_VERSION", -1):
+            self.assertEqual(self._regen()[1], NAMES)
+        self.assertEqual(self._regen(full=True)[1], NAMES)
+
+    def test_dry_run(self):
+        with patch("builtins.print"):
+            updated, _ = self._regen(dry_run=True)
+        self.assertEqual(updated, ["FIO/run.csv"])
+        with zipfile.ZipFile(self.zip_path) as zf:
+            self.assertNotIn("FIO/run.csv", zf.namelist())
+        self.assertFalse(os.path.exists(fio_zip_regen_csv.manifest_path(self.zip_path)))
+
+    def test_compact(self):
+        self._regen()
+        fio_zip_regen_csv._replace_members(self.zip_path, {f"FIO/{NAMES[0]}": fio_bytes(16)})
+        size = os.path.getsize(self.zip_path)
+        self._regen(compact=True)
+        # The space of the replaced entries reclaimed
+        self.assertLess(os.path.getsize(self.zip_path), size)
+        self.assertIn(",16000.0,", self._csv())
+
+    def test_archives_on_pool(self):
+        os.makedirs(os.path.join(self.temp_dir, "sub"))
+        other = self._make_zip("sub/other.zip")
+        archives = fio_zip_regen_csv.find_archives([self.temp_dir])
+        self.assertEqual(sorted(archives), sorted([self.zip_path, other]))
+        with patch("builtins.print"):
+            results = fio_zip_regen_csv.regen_csv_in_archives(archives, workers=2)
+        self.assertEqual(results, {a: ["FIO/run.csv"] for a in archives})
+        self.assertEqual(self._csv().count("\n"), 1 + 2 * len(NAMES))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Unit tests for iodepth_search.py
+
+Drives an IodepthSearch over a synthetic hockey-stick response curve and
+checks the coarse grid, the refinement around the knee and the stop at the
+latency target.
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+# Add parent directory to path to import the module
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from iodepth_search import PHASE_COARSE, PHASE_REFINE, IodepthSearch, point_stats
+
+
+def hockey(io):
+    """IOPS saturate at iodepth 24; latency then grows linearly."""
+    iops = 1000.0 * min(io, 24)
+    latency = io * 1000.0 / iops
+    return iops, latency
+
+
+def run(search, curve=hockey):
+    io = search.next_point()
+    while io is not None:
+        search.record(io, *curve(io))
+        io = search.next_point()
+    return [p["iodepth"] for p in search.points]
+
+
+class TestPointStats(unittest.TestCase):
+    def test_aggregates_processes(self):
+        reports = [
+            {"jobs": [{"write": {"iops": 100.0, "clat_ns": {"N": 10, "mean": 1e6}}}]},
+            {"jobs": [{"write": {"iops": 300.0, "clat_ns": {"N": 30, "mean": 3e6}}}]},
+        ]
+        iops, latency = point_stats(reports, "write")
+        self.assertEqual(iops, 400.0)
+        self.assertAlmostEqual(latency, 2.5)
+
+
+class TestIodepthSearch(unittest.TestCase):
+    def test_coarse_grid_first_then_refine(self):
+        search = IodepthSearch([1, 8, 32, 64], max_latency=100.0)
+        run(search)
+        phases = [p["phase"] for p in search.points]
+        self.assertEqual(phases[:4], [PHASE_COARSE] * 4)
+        self.assertTrue(all(p == PHASE_REFINE for p in phases[4:]))
+
+    def test_knee_found_with_fewer_points(self):
+        grid = list(range(1, 65))
+        search = IodepthSearch([1, 8, 32, 64], max_latency=100.0, min_step=2)
+        measured = run(search)
+        self.assertLess(len(measured), len(grid) / 3)
+        self.assertTrue(20 <= search.knee()["iodepth"] <= 28)
+
+    def test_stops_at_latency_target(self):
+        search = IodepthSearch([1, 8, 32, 64, 128], max_latency=1.5)
+        measured = run(search)
+        # Latency reaches 1.5ms at iodepth 36: the crossing is bisected
+        self.assertNotIn(128, measured)
+        over = [p["iodepth"] for p in search.points if search.over_target(p)]
+        under = [p["iodepth"] for p in search.points if not search.over_target(p)]
+        self.assertEqual((max(under), min(over)), (36, 37))
+        self.assertTrue(any("latency target" in p["reason"] for p in search.points))
+
+    def test_aborted_points_are_over_target(self):
+        search = IodepthSearch([1, 4, 16], max_latency=100.0)
+        search.next_point()
+        search.record(1, 1000.0, 1.0)
+        search.next_point()
+        search.record(4, 4000.0, 1.0, aborted=True)
+        self.assertNotEqual(search.next_point(), 16)
+
+    def test_max_points(self):
+        search = IodepthSearch([1, 8, 32, 64], max_latency=100.0, max_points=5)
+        self.assertEqual(len(run(search)), 5)
+
+    def test_save(self):
+        temp_dir = tempfile.mkdtemp()
+        try:
+            search = IodepthSearch([1, 8], max_latency=100.0)
+            run(search)
+            path = os.path.join(temp_dir, "search.json")
+            search.save(path, numjobs=1)
+            with open(path) as f:
+                data = json.load(f)
+            self.assertEqual(data["numjobs"], 1)
+            self.assertEqual(len(data["points"]), len(search.points))
+            self.assertIn("reason", data["points"][0])
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    unittest.main()
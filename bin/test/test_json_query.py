@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Unit tests for json_query.py
+
+Checks the compiled steps against the path syntax of predef_dict, and the
+single traversal of a query dictionary over a FIO job.
+"""
+
+import os
+import sys
+import unittest
+
+# Add parent directory to path to import the module
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fio_parse_jsons
+from gen_json_xtractor import JsonFioXtractor
+from json_query import JsonQuery, compile_path, compile_step
+
+REPORT = {
+    "jobs": [
+        {"jobname": "a", "read": {"iops": 10, "clat_ns": {"mean": 1e6}}},
+        {"jobname": "b", "read": {"iops": 20, "clat_ns": {"mean": 3e6}}},
+    ]
+}
+
+
+class TestCompileStep(unittest.TestCase):
+    """Tests for compile_step and compile_path."""
+
+    def test_key(self):
+        self.assertEqual(compile_step("jobs")([REPORT]), [REPORT["jobs"]])
+        self.assertEqual(compile_step("missing")([REPORT]), [])
+
+    def test_wildcard(self):
+        self.assertEqual(compile_path("jobs/jobname=*/read/iops")([REPORT]), [10, 20])
+
+    def test_predicate(self):
+        self.assertEqual(compile_path("jobs/jobname=b/read/iops")([REPORT]), [20])
+        self.assertEqual(compile_path("jobs/jobname=c/read/iops")([REPORT]), [])
+
+    def test_bad_syntax(self):
+        self.assertEqual(compile_step("a=b=c")([REPORT]), [])
+
+    def test_cached(self):
+        self.assertIs(compile_step("read"), compile_step("read"))
+
+
+class TestJsonQuery(unittest.TestCase):
+    """Tests for JsonQuery."""
+
+    def test_shared_prefix(self):
+        query = JsonQuery(
+            {"iops": "read/iops", "clat_ms": "read/clat_ns", "clat_stdev": "read/clat_ns"}
+        )
+        job = REPORT["jobs"][0]
+        found = query(job)
+        self.assertEqual(list(found), ["iops", "clat_ms", "clat_stdev"])
+        self.assertEqual(found["iops"], [10])
+        self.assertIs(found["clat_ms"][0], job["read"]["clat_ns"])
+        self.assertIs(found["clat_stdev"][0], job["read"]["clat_ns"])
+
+    def test_missing_branch(self):
+        found = JsonQuery({"bw": "write/bw", "iops": "read/iops"})(REPORT["jobs"][1])
+        self.assertEqual(found, {"bw": [], "iops": [20]})
+
+    def test_matches_filter_json_node(self):
+        job = {
+            "read": {"iops": 5, "total_ios": 50, "clat_ns": {"mean": 2e6, "stddev": 1e5, "N": 50}},
+            "usr_cpu": 1.0,
+            "sys_cpu": 2.0,
+        }
+        query_dict = fio_parse_jsons.predef_dict["randread"]
+        found = fio_parse_jsons.compiled_query("randread")(job)
+        for k, path in query_dict.items():
+            nodes = [job]
+            for step in path.split("/"):
+                nodes = fio_parse_jsons.filter_json_node(step, nodes)
+            self.assertEqual(found[k], nodes)
+        self.assertIs(
+            JsonFioXtractor().compiled_query("randread"), JsonFioXtractor().compiled_query("randread")
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Unit tests for json_stream.py
+
+Decodes documents with a chunk size small enough for every value to span
+several reads, and checks the results against json.loads.
+"""
+
+import io
+import json
+import os
+import random
+import sys
+import unittest
+
+# Add parent directory to path to import the module
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from json_stream import iter_array, iter_elements, load_keys, scan_object
+
+SNAPSHOTS = [
+    {
+        "timestamp": f"20260420_2012{i:02d}",
+        "label": "fio_test",
+        "data": {"metrics": [{"reactor_utilization": {"shard": "0", "value": 12.5 + i}}]},
+    }
+    for i in range(5)
+]
+
+FIO = {
+    "fio version": "fio-3.36",
+    "timestamp": 1700000000,
+    "global options": {"rw": "randread", "iodepth": "8"},
+    "jobs": [{"jobname": f"job{j}", "read": {"iops": 1000.0 + j}} for j in range(3)],
+    "disk_util": [{"name": "rbd0", "util": 99.5, "note": 'a "quoted" ] } [ {'}],
+}
+
+
+def text(doc, indent=None):
+    return io.StringIO(json.dumps(doc, indent=indent))
+
+
+class TestJsonStream(unittest.TestCase):
+    """Tests for the incremental decoding."""
+
+    def test_iter_elements(self):
+        for chunk in (1, 7, 1 << 16):
+            self.assertEqual(list(iter_elements(text(SNAPSHOTS, 2), chunk)), SNAPSHOTS)
+        # Not an array: yielded whole
+        self.assertEqual(list(iter_elements(text(FIO), 5)), [FIO])
+        self.assertEqual(list(iter_elements(io.StringIO("[ ]"))), [])
+        self.assertEqual(list(iter_elements(io.StringIO(""))), [])
+
+    def test_binary(self):
+        data = json.dumps(SNAPSHOTS, ensure_ascii=False).replace("fio_test", "fío").encode()
+        self.assertEqual(list(iter_elements(io.BytesIO(data), 3)), json.loads(data))
+
+    def test_scalars_across_chunks(self):
+        doc = [123456789, -1.5e10, True, None, "str", 0]
+        self.assertEqual(list(iter_elements(text(doc), 2)), doc)
+
+    def test_floats_cut_at_any_boundary(self):
+        # A chunk boundary after the "." or "e" of a number
+        self.assertEqual(list(iter_elements(io.StringIO("[-2.5, 1]"), 2)), [-2.5, 1])
+        self.assertEqual(list(iter_elements(io.StringIO("-2.5"), 2)), [-2.5])
+        self.assertEqual(list(iter_elements(io.StringIO("[1e-3,2E+2]"), 2)), [1e-3, 2e2])
+
+    def test_small_chunks_fuzz(self):
+        rng = random.Random(1234)
+
+        def number():
+            return rng.choice(
+                [
+                    rng.randint(-10**6, 10**6),
+                    rng.uniform(-1e3, 1e3),
+                    rng.uniform(-1, 1) * 10 ** rng.randint(-20, 20),
+                ]
+            )
+
+        def doc(depth=0):
+            kind = rng.randrange(5 if depth < 3 else 2)
+            if kind == 0:
+                return number()
+            if kind == 1:
+                return rng.choice([True, False, None, "s", 'q"]'])
+            if kind == 2:
+                return [doc(depth + 1) for _ in range(rng.randrange(4))]
+            return {f"k{i}": doc(depth + 1) for i in range(rng.randrange(4))}
+
+        for _ in range(200):
+            items = [doc() for _ in range(rng.randrange(1, 6))]
+            content = json.dumps(items, indent=rng.choice([None, 1]))
+            expected = json.loads(content)
+            for chunk in range(1, 9):
+                self.assertEqual(
+                    list(iter_elements(io.StringIO(content), chunk)), expected, content
+                )
+            obj = json.dumps({"a": items, "b": items[0]})
+            self.assertEqual(
+                load_keys(io.StringIO(obj), ("b",), chunk_size=rng.randint(1, 8)),
+                {"b": expected[0]},
+            )
+
+    def test_iter_array_path(self):
+        self.assertEqual(list(iter_array(text(FIO, 1), ("jobs",), 4)), FIO["jobs"])
+        with self.assertRaises(KeyError):
+            list(iter_array(text(FIO), ("client_stats",)))
+
+    def test_load_keys(self):
+        for chunk in (3, 1 << 16):
+            found = load_keys(text(FIO, 4), ("timestamp", "disk_util"), chunk_size=chunk)
+            self.assertEqual(found, {"timestamp": FIO["timestamp"], "disk_util": FIO["disk_util"]})
+        self.assertEqual(load_keys(text(SNAPSHOTS[0]), ("rw",), ("data",)), {})
+
+    def test_scan_object_stream(self):
+        seen = []
+        for key, value in scan_object(text(FIO), keys=("timestamp",), stream=("jobs",), chunk_size=5):
+            if key == "jobs":
+                seen.append([job["jobname"] for job in value])
+            else:
+                seen.append(value)
+        self.assertEqual(seen, [1700000000, ["job0", "job1", "job2"]])
+
+    def test_stream_partially_consumed(self):
+        # The rest of the array is skipped before the next member
+        members = scan_object(text({"jobs": FIO["jobs"], "after": 1}), stream=("jobs",), chunk_size=3)
+        key, jobs = next(members)
+        self.assertEqual(next(jobs)["jobname"], "job0")
+        self.assertEqual(next(members), ("after", 1))
+
+    def test_truncated(self):
+        content = json.dumps(SNAPSHOTS)[:-40]
+        with self.assertRaises(json.JSONDecodeError):
+            list(iter_elements(io.StringIO(content), 16))
+        with self.assertRaises(json.JSONDecodeError):
+            load_keys(io.StringIO(json.dumps(FIO)[:-10]), ("timestamp",), chunk_size=16)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Unit tests for latency_histogram.py
+
+Checks the bucketing against the one of FIO, the merge of the histograms of
+several processes and the percentiles read from them, both from the ``bins``
+of the json+ output and from the ``percentile`` section.
+"""
+
+import os
+import random
+import sys
+import unittest
+
+# Add parent directory to path to import the module
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fio_parse_jsons
+from latency_histogram import CLAT_PERCENTILES, LatencyHistogram, merge_histograms
+
+
+def exact_percentile(values, q):
+    values = sorted(values)
+    rank = max(1, -(-len(values) * q // 100))
+    return values[int(rank) - 1]
+
+
+def fio_clat(values, bins=True):
+    """A FIO ``clat_ns`` section of the latencies *values* (ns)."""
+    hist = LatencyHistogram()
+    for v in values:
+        hist.add(v)
+    clat = {
+        "N": len(values),
+        "min": min(values),
+        "max": max(values),
+        "mean": sum(values) / len(values),
+        "stddev": 0.0,
+        "percentile": {
+            f"{q:.6f}": exact_percentile(values, q) for q in (1.0, 50.0, 90.0, 99.0, 99.9)
+        },
+    }
+    if bins:
+        clat["bins"] = {
+            str(int(hist._value(i))): c for i, c in enumerate(hist.counts) if c
+        }
+    return clat
+
+
+class TestLatencyHistogram(unittest.TestCase):
+    """Tests for LatencyHistogram."""
+
+    def test_small_values_exact(self):
+        hist = LatencyHistogram()
+        for v in range(1, 101):
+            hist.add(v)
+        self.assertEqual(hist.total, 100)
+        self.assertEqual(hist.percentile(50), 50)
+        self.assertEqual(hist.percentile(99), 99)
+        self.assertEqual(hist.percentile(100), 100)
+
+    def test_bucket_boundaries(self):
+        hist = LatencyHistogram()
+        # Linear up to 2**(bits+1), then 64 buckets per power of two
+        self.assertEqual(hist._index(127), 127)
+        self.assertEqual(hist._index(128), 128)
+        self.assertEqual(hist._index(129), 128)
+        self.assertEqual(hist._index(256), 192)
+        # The midpoint of a bucket falls in the bucket
+        for i in range(128, 1856):
+            self.assertEqual(hist._index(int(hist._value(i))), i)
+
+    def test_relative_error(self):
+        rng = random.Random(7)
+        values = [int(rng.lognormvariate(13, 1)) for _ in range(20000)]
+        hist = LatencyHistogram()
+        for v in values:
+            hist.add(v)
+        for q in (50, 99, 99.9):
+            exact = exact_percentile(values, q)
+            self.assertLess(abs(hist.percentile(q) - exact) / exact, 2**-6)
+
+    def test_empty(self):
+        self.assertEqual(LatencyHistogram().percentile(99), 0.0)
+        self.assertEqual(LatencyHistogram.from_fio({}).total, 0)
+
+    def test_merge_bits_mismatch(self):
+        with self.assertRaises(ValueError):
+            LatencyHistogram(6).merge(LatencyHistogram(5))
+
+
+class TestMergeFio(unittest.TestCase):
+    """Tests for merging the clat_ns of several FIO processes."""
+
+    def setUp(self):
+        rng = random.Random(11)
+        # A fast process and a slow one: the tail is the slow one's
+        self.fast = [int(rng.gauss(200_000, 20_000)) for _ in range(9000)]
+        self.slow = [int(rng.gauss(5_000_000, 500_000)) for _ in range(1000)]
+
+    def test_from_bins(self):
+        merged = merge_histograms(
+            LatencyHistogram.from_fio(fio_clat(v)) for v in (self.fast, self.slow)
+        )
+        self.assertFalse(merged.approximate)
+        self.assertEqual(merged.total, 10000)
+        for q in (50, 99, 99.9):
+            exact = exact_percentile(self.fast + self.slow, q)
+            self.assertLess(abs(merged.percentile(q) - exact) / exact, 2**-6)
+
+    def test_from_percentiles(self):
+        merged = merge_histograms(
+            LatencyHistogram.from_fio(fio_clat(v, bins=False)) for v in (self.fast, self.slow)
+        )
+        self.assertTrue(merged.approximate)
+        self.assertEqual(merged.total, 10000)
+        # The p99 of the union is in the slow process, not the max of the p99s
+        exact = exact_percentile(self.fast + self.slow, 99)
+        self.assertLess(abs(merged.percentile(99) - exact) / exact, 0.2)
+
+    def test_apply_reductor(self):
+        result = {
+            k: [fio_parse_jsons.process_fio_item(k, [fio_clat(v)]) for v in (self.fast, self.slow)]
+            for k in CLAT_PERCENTILES
+        }
+        for k, q in CLAT_PERCENTILES.items():
+            exact = exact_percentile(self.fast + self.slow, q) / 1e6
+            got = fio_parse_jsons.apply_reductor(result, k)
+            self.assertLess(abs(got - exact) / exact, 2**-6)
+
+
+if __name__ == "__main__":
+    unittest.main()
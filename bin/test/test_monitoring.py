@@ -81,6 +81,26 @@ class TestMonPerf(unittest.TestCase):
         self.assertIn("9999", cmd)
 
 
+class TestMonPerfRecord(unittest.TestCase):
+    """Tests for mon_perf_record() and mon_perf_stop()."""
+
+    @patch("subprocess.Popen")
+    def test_record_uses_wall_clock(self, mock_popen):
+        monitoring.mon_perf_record("1234,1235", "run_perf.data", freq=49)
+        cmd = mock_popen.call_args[0][0]
+        self.assertEqual(cmd[cmd.index("-k") + 1], "realtime")
+        self.assertEqual(cmd[cmd.index("-F") + 1], "49")
+        self.assertEqual(cmd[cmd.index("-p") + 1], "1234,1235")
+        self.assertNotIn("sleep", cmd)
+
+    def test_stop_sends_sigint(self):
+        proc = Mock()
+        proc.poll.return_value = None
+        monitoring.mon_perf_stop(proc)
+        proc.send_signal.assert_called_once_with(monitoring.signal.SIGINT)
+        proc.wait.assert_called_once()
+
+
 class TestMonMeasure(unittest.TestCase):
     """Tests for mon_measure()."""
 
@@ -218,46 +238,35 @@ class TestMonDiskstats(unittest.TestCase):
     """Tests for mon_diskstats()."""
 
     @patch("time.sleep")
-    @patch("builtins.open", new_callable=mock_open)
-    @patch("subprocess.run")
-    def test_calls_jc_num_samples_times(self, mock_run, mock_file, mock_sleep):
-        mock_run.return_value = Mock(returncode=0)
+    @patch("monitoring.DiskStatSampler")
+    def test_samples_num_samples_times(self, mock_sampler, mock_sleep):
         monitoring.mon_diskstats("test", 3, 1)
-        # subprocess.run should be called once per sample
-        self.assertEqual(mock_run.call_count, 3)
+        self.assertEqual(mock_sampler.return_value.sample.call_count, 3)
 
     @patch("time.sleep")
-    @patch("builtins.open", new_callable=mock_open)
-    @patch("subprocess.run")
-    def test_sleeps_between_samples(self, mock_run, mock_file, mock_sleep):
-        mock_run.return_value = Mock(returncode=0)
-        monitoring.mon_diskstats("test", 2, 5)
+    @patch("monitoring.DiskStatSampler")
+    def test_sleeps_between_samples(self, mock_sampler, mock_sleep):
+        monitoring.mon_diskstats("test", 2, 0.5)
         # sleep should be called once per sample
         self.assertEqual(mock_sleep.call_count, 2)
         for c in mock_sleep.call_args_list:
-            self.assertEqual(c[0][0], 5)
+            self.assertEqual(c[0][0], 0.5)
 
     @patch("time.sleep")
-    @patch("builtins.open", new_callable=mock_open)
-    @patch("subprocess.run")
-    def test_zero_samples_does_nothing(self, mock_run, mock_file, mock_sleep):
-        mock_run.return_value = Mock(returncode=0)
+    @patch("monitoring.DiskStatSampler")
+    def test_zero_samples_does_nothing(self, mock_sampler, mock_sleep):
         monitoring.mon_diskstats("test", 0, 1)
-        mock_run.assert_not_called()
+        mock_sampler.assert_not_called()
         mock_sleep.assert_not_called()
 
     @patch("time.sleep")
-    @patch("builtins.open", new_callable=mock_open)
-    @patch("subprocess.run")
-    def test_output_file_uses_test_name(self, mock_run, mock_file, mock_sleep):
-        mock_run.return_value = Mock(returncode=0)
+    @patch("monitoring.DiskStatSampler")
+    def test_output_file_uses_test_name(self, mock_sampler, mock_sleep):
         monitoring.mon_diskstats("mytest", 1, 0)
-        # The file opened should contain the test_name prefix
-        opened_files = [c[0][0] for c in mock_file.call_args_list]
-        self.assertTrue(
-            any("mytest" in str(f) for f in opened_files),
-            f"test_name not in opened files: {opened_files}",
+        mock_sampler.return_value.save_json.assert_called_once_with(
+            "mytest_diskstats.json"
         )
+        mock_sampler.return_value.close.assert_called_once()
 
 
 if __name__ == "__main__":
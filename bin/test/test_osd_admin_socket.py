@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Unit tests for osd_admin_socket.py
+
+Runs the client against a local Unix-socket stand-in that speaks the admin
+socket protocol (NUL-terminated JSON request, length-prefixed reply).
+"""
+
+import io
+import json
+import os
+import shutil
+import socket
+import struct
+import sys
+import tempfile
+import threading
+import unittest
+
+# Add parent directory to path to import the module
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from osd_admin_socket import (
+    AdminSocketClient,
+    AdminSocketError,
+    OSDAdminSockets,
+    find_osd_asok,
+)
+from run_fio import FioRunner
+from telemetry_store import TelemetryStore
+
+
+class FakeAdminSocket:
+    """Minimal admin socket server: replies with the JSON of the request."""
+
+    def __init__(
+        self, path: str, close_after_reply: bool = False, silent: bool = False
+    ):
+        self.path = path
+        self.close_after_reply = close_after_reply
+        self.silent = silent
+        self.requests = []
+        self.connections = 0
+        self._srv = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._srv.bind(path)
+        self._srv.listen(4)
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+
+    def _reply(self, request: dict) -> bytes:
+        if request["prefix"] == "empty":
+            return b""
+        return json.dumps({"echo": request, "pad": "x" * 1000}).encode()
+
+    def _serve(self):
+        while True:
+            try:
+                conn, _ = self._srv.accept()
+            except OSError:
+                return
+            self.connections += 1
+            with conn:
+                buf = b""
+                while True:
+                    data = conn.recv(4096)
+                    if not data:
+                        break
+                    buf += data
+                    while b"\0" in buf:
+                        raw, buf = buf.split(b"\0", 1)
+                        request = json.loads(raw)
+                        self.requests.append(request)
+                        if self.silent:
+                            continue
+                        payload = self._reply(request)
+                        conn.sendall(struct.pack(">I", len(payload)) + payload)
+                        if self.close_after_reply:
+                            break
+                    if self.close_after_reply and self.requests:
+                        break
+
+    def close(self):
+        self._srv.close()
+
+
+class TestAdminSocketClient(unittest.TestCase):
+    """Tests for AdminSocketClient against the stand-in server."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, "osd.0.asok")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_command_json_round_trip(self):
+        srv = FakeAdminSocket(self.path)
+        with AdminSocketClient(self.path, timeout=2) as client:
+            reply = client.command_json("dump_metrics", group="reactor_utilization")
+        srv.close()
+        self.assertEqual(
+            reply["echo"],
+            {"prefix": "dump_metrics", "group": "reactor_utilization"},
+        )
+
+    def test_empty_arguments_are_omitted(self):
+        self.assertEqual(
+            AdminSocketClient.encode_command("dump_metrics", group=""),
+            b'{"prefix": "dump_metrics"}\0',
+        )
+
+    def test_connection_is_reused(self):
+        srv = FakeAdminSocket(self.path)
+        with AdminSocketClient(self.path, timeout=2) as client:
+            for _ in range(5):
+                client.command("perf dump")
+        srv.close()
+        self.assertEqual(len(srv.requests), 5)
+        self.assertEqual(srv.connections, 1)
+
+    def test_reconnects_when_daemon_closes(self):
+        srv = FakeAdminSocket(self.path, close_after_reply=True)
+        with AdminSocketClient(self.path, timeout=2) as client:
+            for _ in range(3):
+                self.assertIn(b"perf dump", client.command("perf dump"))
+        srv.close()
+        self.assertEqual(len(srv.requests), 3)
+        self.assertEqual(srv.connections, 3)
+
+    def test_timeout_is_not_retried(self):
+        srv = FakeAdminSocket(self.path, silent=True)
+        with AdminSocketClient(self.path, timeout=0.2) as client:
+            with self.assertRaises(AdminSocketError):
+                client.command("perf dump")
+        srv.close()
+        self.assertEqual(len(srv.requests), 1)
+        self.assertEqual(srv.connections, 1)
+
+    def test_command_into_streams_payload(self):
+        srv = FakeAdminSocket(self.path)
+        out = io.BytesIO()
+        with AdminSocketClient(self.path, timeout=2) as client:
+            n = client.command_into(out, "dump_seastar_stats")
+        srv.close()
+        self.assertEqual(n, len(out.getvalue()))
+        self.assertEqual(
+            json.loads(out.getvalue())["echo"]["prefix"], "dump_seastar_stats"
+        )
+
+    def test_empty_reply_decodes_to_none(self):
+        srv = FakeAdminSocket(self.path)
+        with AdminSocketClient(self.path, timeout=2) as client:
+            self.assertIsNone(client.command_json("empty"))
+        srv.close()
+
+    def test_missing_socket_raises(self):
+        client = AdminSocketClient(self.path, timeout=1)
+        with self.assertRaises(AdminSocketError):
+            client.command("perf dump")
+
+
+class TestFindOsdAsok(unittest.TestCase):
+    """Tests for find_osd_asok() and OSDAdminSockets."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.pattern = os.path.join(self.temp_dir, "osd.{osd}.asok")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_returns_none_when_absent(self):
+        self.assertIsNone(find_osd_asok(0, [self.pattern]))
+
+    def test_ignores_regular_files(self):
+        open(self.pattern.format(osd=0), "w").close()
+        self.assertIsNone(find_osd_asok(0, [self.pattern]))
+
+    def test_finds_socket(self):
+        srv = FakeAdminSocket(self.pattern.format(osd=1))
+        self.assertEqual(
+            find_osd_asok(1, [self.pattern]), self.pattern.format(osd=1)
+        )
+        sockets = OSDAdminSockets([self.pattern])
+        self.assertIsNotNone(sockets.get(1))
+        self.assertIsNone(sockets.get(0))
+        sockets.close()
+        srv.close()
+
+
+class TestFioRunnerAsokDump(unittest.TestCase):
+    """FioRunner.osd_dump_generic() sampling through the admin socket."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.pattern = os.path.join(self.temp_dir, "osd.{osd}.asok")
+        self.srv = FakeAdminSocket(self.pattern.format(osd=0))
+        self.runner = FioRunner("/root/bin", self.temp_dir)
+        self.runner.asok = OSDAdminSockets([self.pattern], timeout=2)
+        self.outfile = os.path.join(self.temp_dir, "test_dump.json")
+
+    def tearDown(self):
+        self.runner.asok.close()
+        self.srv.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _load(self, path):
+        if not self.runner.use_store:
+            with open(path) as f:
+                return json.load(f)
+        return list(TelemetryStore.open(path).snapshots())
+
+    def test_dump_is_valid_json_array(self):
+        self.runner.osd_type = "classic"
+        self.runner.osd_dump_start(self.outfile)
+        self.runner.osd_dump_generic("label", 3, 0, self.outfile, "none")
+        self.runner.osd_dump_end(self.outfile)
+        entries = self._load(self.outfile)
+        self.assertEqual(len(entries), 3)
+        self.assertEqual(entries[0]["label"], "label")
+        self.assertEqual(entries[0]["data"]["echo"], {"prefix": "perf dump"})
+
+    def test_crimson_dumps_stats_and_metrics_group(self):
+        self.runner.osd_dump_start(self.outfile)
+        self.runner.osd_dump_stats_start(self.outfile)
+        self.runner.osd_dump_generic("label", 2, 0, self.outfile, "none")
+        self.runner.osd_dump_metrics(
+            "label", 1, 0, self.outfile.replace("_dump", "_rutil"),
+            "reactor_utilization",
+        )
+        self.runner.osd_dump_end(self.outfile)
+        self.runner.osd_dump_stats_end(self.outfile)
+        self.assertEqual(len(self._load(self.outfile)), 2)
+        seastar = self.outfile.replace("_dump.json", "_dump_seastar_stats.json")
+        self.assertEqual(
+            self._load(seastar)[1]["data"]["echo"]["prefix"], "dump_seastar_stats"
+        )
+        self.assertIn(
+            {"prefix": "dump_metrics", "group": "reactor_utilization"},
+            self.srv.requests,
+        )
+        # All samples went over a single persistent connection
+        self.assertEqual(self.srv.connections, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
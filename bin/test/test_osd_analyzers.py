@@ -143,6 +143,37 @@ def test_single_file_analysis():
     
     print()
 
+def test_compare_osd_rates(tmp_path):
+    """Test the cross-OSD rate comparison from a telemetry store."""
+    from osd_rate_analyzers import (
+        compare_osd_rates,
+        create_rate_analyzers_from_store,
+        generate_osd_comparison_report,
+    )
+    from telemetry_store import TelemetryStore
+
+    def perf_dump(msgs):
+        return {
+            "AsyncMessenger::Worker-0": {"msgr_recv_messages": msgs},
+            "bluestore": {"allocated": 0},
+        }
+
+    prefix = str(tmp_path / "run_dump")
+    with TelemetryStore(prefix) as store:
+        # OSD 1 receives three times the messages of OSD 0
+        for osd, rate in ((0, 100), (1, 300)):
+            store.append(perf_dump(0), ts=10.0, osd=osd)
+            store.append(perf_dump(rate * 10), ts=20.0, osd=osd)
+
+    analyzers = create_rate_analyzers_from_store(TelemetryStore.open(prefix), "classic")
+    assert sorted(analyzers) == [0, 1]
+    comparison = compare_osd_rates(analyzers)
+    recv = comparison["imbalance"]["messenger.messages_recv_per_sec"]
+    assert (recv["min"], recv["max"], recv["max_osd"]) == (100.0, 300.0, 1)
+    assert recv["max_over_mean"] == 1.5
+    assert "messenger.messages_recv_per_sec" in generate_osd_comparison_report(comparison)
+
+
 def main():
     """Run all tests."""
     print("\n" + "=" * 80)
@@ -7,7 +7,9 @@ Tests the type-specific parser hierarchy with example dumps.
 
 import json
 import os
+import shutil
 import sys
+import tempfile
 import unittest
 from pathlib import Path
 
@@ -22,7 +24,10 @@ from osd_dump_parsers import (
     OSDType,
     detect_osd_type,
     create_parser,
+    DumpSnapshotReader,
+    MetricColumns,
 )
+from telemetry_store import TelemetryStore
 
 
 class TestOSDTypeDetection(unittest.TestCase):
@@ -113,6 +118,54 @@ class TestCrimsonSeaStoreParser(unittest.TestCase):
         self.assertIsInstance(metrics, set)
 
 
+class TestMetricColumns(unittest.TestCase):
+    """Test the column arrays emitted by the Crimson parsers."""
+
+    DATA = {
+        "metrics": [
+            {"reactor_polls": {"shard": "0", "value": 10}},
+            {"cache_committed_delta_bytes": {"shard": "1", "src": "MUTATE", "value": 5.5}},
+            {"reactor_polls": {"shard": "1", "value": 20}},
+            {"cache_committed_delta_bytes": {"shard": "0", "src": "READ", "value": 1}},
+            {"seastore_op_lat": {"shard": "0", "latency": "READ",
+                                 "value": {"sum": 8, "count": 2, "buckets": []}}},
+            {"reactor_stalls": {"shard": "0", "value": None}},
+        ]
+    }
+
+    def test_seastore_columns(self):
+        parser = CrimsonSeaStoreParser()
+        columns = parser.parse_columns(self.DATA)
+        self.assertEqual(len(columns), 4)
+        self.assertEqual(list(columns.metrics), ["reactor_polls", "cache_committed_delta_bytes"])
+        self.assertEqual(list(columns.metric_codes), [0, 1, 0, 1])
+        self.assertEqual(list(columns.values), [10.0, 5.5, 20.0, 1.0])
+        shard, categories = columns.shard_column()
+        self.assertIsNone(categories)
+        self.assertEqual(shard.dtype.name, "int16")
+        self.assertEqual(shard.tolist(), [0, 1, 1, 0])
+        # A label missing from a sample has code -1, up to the last sample
+        codes, categories = columns.label_columns()["src"]
+        self.assertEqual(codes.tolist(), [-1, 0, -1, 1])
+        self.assertEqual(categories, ["MUTATE", "READ"])
+        self.assertEqual(list(parser.get_parsed_data()[2]), ["seastore_op_lat"])
+
+    def test_bluestore_histogram_count(self):
+        columns = CrimsonBlueStoreParser().parse_columns(self.DATA)
+        self.assertEqual(list(columns.values), [10.0, 5.5, 20.0, 1.0, 2.0])
+
+    def test_classic_has_no_columns(self):
+        self.assertIsNone(ClassicOSDParser().parse_columns({"osd": {"op_r": 1}}))
+
+    def test_non_numeric_shards(self):
+        columns = MetricColumns()
+        columns.append("m", "0", 1.0)
+        columns.append("m", "bluestore", 2.0)
+        codes, categories = columns.shard_column()
+        self.assertEqual(codes.tolist(), [0, 1])
+        self.assertEqual(categories, ["0", "bluestore"])
+
+
 class TestCrimsonBlueStoreParser(unittest.TestCase):
     """Test Crimson BlueStore parser."""
     
@@ -292,6 +345,53 @@ def main():
     unittest.main(verbosity=2)
 
 
+class TestDumpSnapshotReader(unittest.TestCase):
+    """Test snapshot reconstruction and counter rates from a store."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.prefix = os.path.join(self.temp_dir, "run_dump")
+        self.dumps = []
+        with TelemetryStore(self.prefix) as store:
+            for i in range(4):
+                data = {
+                    "metrics": [
+                        {"reactor_utilization": {"shard": "0", "value": 50}},
+                        {"reactor_polls": {"shard": "0", "value": 100 * i * i}},
+                    ]
+                }
+                self.dumps.append(data)
+                store.append(data, ts=10.0 + 2 * i, osd=0, label=f"s{i}")
+                store.append(data, ts=10.0 + 2 * i, osd=1, label=f"s{i}")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_snapshots_rebuilt_per_osd(self):
+        reader = DumpSnapshotReader(self.prefix)
+        snaps = list(reader.snapshots(osd=1))
+        self.assertEqual([s["data"] for s in snaps], self.dumps)
+        self.assertTrue(all(s["osd"] == 1 for s in snaps))
+
+    def test_parser_from_store(self):
+        reader = DumpSnapshotReader(self.prefix)
+        self.assertIsInstance(reader.parser(), CrimsonSeaStoreParser)
+
+    def test_counter_rates(self):
+        reader = DumpSnapshotReader(self.prefix)
+        ts, keys, rates = reader.counter_rates(osd=0, metrics=["reactor_polls"])
+        self.assertEqual(ts.tolist(), [12.0, 14.0, 16.0])
+        self.assertEqual(keys, [("reactor_polls", 0, {})])
+        # 100 * i^2 sampled every 2 seconds
+        self.assertEqual(rates[:, 0].tolist(), [50.0, 150.0, 250.0])
+
+    def test_counter_rates_single_sample(self):
+        reader = DumpSnapshotReader(self.prefix)
+        ts, keys, rates = reader.counter_rates(osd=0, label="s0")
+        self.assertEqual(len(ts), 0)
+        self.assertEqual(rates.shape, (0, 2))
+
+
 if __name__ == "__main__":
     main()
 
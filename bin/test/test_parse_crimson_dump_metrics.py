@@ -290,5 +290,176 @@ class TestRunWithTempFile(unittest.TestCase):
                     self.assertTrue(os.path.exists(fname), f"Missing: {fname}")
 
 
+class TestLoadFromStore(unittest.TestCase):
+    """load_crimson_dump_dataframes_from_store() matches the JSON loader."""
+
+    def test_frames_match_json_loader(self):
+        from parse_crimson_dump_metrics import (
+            load_crimson_dump_dataframe_from_content,
+            load_crimson_dump_dataframes_from_store,
+        )
+        from telemetry_store import TelemetryStore
+
+        samples = [SIMPLE_METRICS, MULTI_METRICS, SEASTORE_OP_LAT]
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with TelemetryStore(os.path.join(tmpdir, "r_dump")) as store:
+                for i, data in enumerate(samples):
+                    store.append(data, ts=float(i), osd=0, label="x")
+            loaded = load_crimson_dump_dataframes_from_store(
+                TelemetryStore.open(os.path.join(tmpdir, "r_dump"))
+            )
+        self.assertEqual([r[0] for r in loaded], [0.0, 1.0, 2.0])
+        for data, (_ts, _osd, osd_type, df, histo) in zip(samples, loaded):
+            exp_type, exp_df, exp_histo = load_crimson_dump_dataframe_from_content(
+                json.dumps(data)
+            )
+            self.assertEqual(osd_type, exp_type)
+            self.assertEqual(sorted(histo), sorted(exp_histo))
+            cols = ["metric", "group", "shard", "value"]
+            if exp_df.empty:
+                self.assertTrue(df.empty)
+                continue
+            pd.testing.assert_frame_equal(
+                df[cols].reset_index(drop=True),
+                exp_df[cols].reset_index(drop=True),
+                check_dtype=False,
+            )
+
+
+class TestDumpDataframeColumns(unittest.TestCase):
+    """load_crimson_dump_dataframe_from_content() builds typed columns."""
+
+    def test_dtypes(self):
+        from parse_crimson_dump_metrics import load_crimson_dump_dataframe_from_content
+
+        data = {"metrics": SIMPLE_METRICS["metrics"] + MULTI_METRICS["metrics"]}
+        _osd_type, df, _histo = load_crimson_dump_dataframe_from_content(json.dumps(data))
+        self.assertEqual(len(df), 8)
+        for col in ("metric", "group", "ext", "src"):
+            self.assertEqual(df[col].dtype.name, "category", col)
+        self.assertEqual(df["shard"].dtype.name, "int16")
+        self.assertEqual(df["value"].dtype.name, "float64")
+        self.assertEqual(df["shard"].tolist(), [0, 1] * 4)
+        self.assertEqual(df["value"].iloc[6], 512.0)
+        self.assertTrue(df["src"].iloc[:6].isna().all())
+        self.assertEqual(df["src"].iloc[6], "CLEANER_MAIN")
+
+
+class TestDumpDataframeBaseline(unittest.TestCase):
+    """The column-built frames hold the rows of the former row-based loader."""
+
+    DUMP = os.path.join(
+        os.path.dirname(__file__), "..", "examples", "20260420_201205_seastore_dump.json"
+    )
+
+    @staticmethod
+    def _baseline_frame(data):
+        """The frame built one dict per row, as before the typed columns."""
+        from osd_dump_parsers import create_parser, detect_osd_type
+        from parse_crimson_dump_metrics import _group_for_metric
+
+        parser = create_parser(detect_osd_type(data))
+        parser.parse(data)
+        raw, multi, _histo, _shards, _metrics = parser.get_parsed_data()
+        groups = parser.get_metric_groups()
+        rows = []
+        for metric_name, shard_data in raw.items():
+            group = _group_for_metric(metric_name, groups)
+            for shard, values in shard_data.items():
+                for value in values:
+                    rows.append(
+                        {"metric": metric_name, "group": group, "shard": int(shard), "value": float(value)}
+                    )
+        for metric_name, entries in multi.items():
+            group = _group_for_metric(metric_name, groups)
+            for entry in entries:
+                row = {"metric": metric_name, "group": group}
+                row.update(entry)
+                row["shard"] = int(row["shard"])
+                rows.append(row)
+        return pd.DataFrame(rows)
+
+    @staticmethod
+    def _normalise(df):
+        df = df.astype(object).where(df.notna(), None)
+        df = df.astype(str)
+        return df.sort_values(list(df.columns)).reset_index(drop=True)
+
+    def test_rows_match_baseline(self):
+        from parse_crimson_dump_metrics import load_crimson_dump_dataframe_from_data
+
+        with open(self.DUMP, encoding="utf-8") as f:
+            data = json.load(f)
+        _osd_type, df, _histo = load_crimson_dump_dataframe_from_data(data)
+        baseline = self._baseline_frame(data)
+
+        # The rows of the reactor metrics labelled with a scheduling group
+        # kept it in "group", overwriting the metric group; it is now in
+        # "sched_group"
+        self.assertEqual(set(df["sched_group"].dropna()), {"atexit", "main"})
+        self.assertNotIn("sched_group", baseline.columns)
+        labelled = df["sched_group"].notna()
+        self.assertFalse(df.loc[labelled, "group"].isin(["atexit", "main"]).any())
+        legacy = df.drop(columns="sched_group")
+        legacy["group"] = df["sched_group"].astype(object).where(labelled, df["group"].astype(object))
+
+        # Samples without a numeric value are no longer rows
+        numeric = pd.to_numeric(baseline["value"], errors="coerce").notna()
+        baseline = baseline[numeric].astype({"value": "float64"})
+        self.assertEqual(len(legacy), len(baseline))
+        self.assertEqual(sorted(legacy.columns), sorted(baseline.columns))
+        pd.testing.assert_frame_equal(
+            self._normalise(legacy),
+            self._normalise(baseline[legacy.columns]),
+        )
+
+    def test_store_frames_keep_sched_group(self):
+        from parse_crimson_dump_metrics import (
+            load_crimson_dump_dataframe_from_data,
+            load_crimson_dump_dataframes_from_store,
+        )
+        from telemetry_store import TelemetryStore
+
+        with open(self.DUMP, encoding="utf-8") as f:
+            data = json.load(f)
+        _osd_type, exp_df, _histo = load_crimson_dump_dataframe_from_data(data)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with TelemetryStore(os.path.join(tmpdir, "r_dump")) as store:
+                store.append(data, ts=0.0, osd=0, label="x")
+            loaded = load_crimson_dump_dataframes_from_store(
+                TelemetryStore.open(os.path.join(tmpdir, "r_dump"))
+            )
+        df = loaded[0][3]
+        cols = ["metric", "group", "shard", "value", "sched_group"]
+        pd.testing.assert_frame_equal(
+            self._normalise(df[cols]), self._normalise(exp_df[cols])
+        )
+
+
+class TestIterDumpDataframes(unittest.TestCase):
+    """iter_crimson_dump_dataframes() streams the snapshots of a run."""
+
+    def test_envelopes_and_single_dump(self):
+        import io
+        from parse_crimson_dump_metrics import (
+            iter_crimson_dump_dataframes,
+            load_crimson_dump_dataframe_from_content,
+        )
+
+        envelopes = [
+            {"timestamp": f"20260420_20120{i}", "label": "x", "data": data}
+            for i, data in enumerate([SIMPLE_METRICS, MULTI_METRICS])
+        ]
+        loaded = list(iter_crimson_dump_dataframes(io.StringIO(json.dumps(envelopes))))
+        self.assertEqual([r[0] for r in loaded], ["20260420_201200", "20260420_201201"])
+        for data, (_ts, osd_type, df, _histo) in zip([SIMPLE_METRICS, MULTI_METRICS], loaded):
+            exp_type, exp_df, _ = load_crimson_dump_dataframe_from_content(json.dumps(data))
+            self.assertEqual(osd_type, exp_type)
+            pd.testing.assert_frame_equal(df, exp_df)
+        single = list(iter_crimson_dump_dataframes(io.BytesIO(json.dumps(SIMPLE_METRICS).encode())))
+        self.assertEqual(len(single), 1)
+        self.assertIsNone(single[0][0])
+
+
 if __name__ == "__main__":
     unittest.main()
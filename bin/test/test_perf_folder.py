@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Unit tests for perf_folder.py
+
+Folds a small ``perf script`` output and checks the stacks, the function
+tables and the differential output against hand computed values.
+"""
+
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+# Add parent directory to path to import the module
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from perf_folder import (
+    Demangler,
+    IntervalFolder,
+    PerfScriptFolder,
+    StackTrie,
+    compact_frames,
+    diff_folded,
+    diff_table,
+    fio_slices,
+    load_folded,
+    main,
+    tidy_symbol,
+    write_folded,
+)
+from pp_crimson_flamegraphs import compact_line
+
+PERF_SCRIPT = """\
+# ========
+# captured on: today
+reactor-3  1234/1236 [003] 100.000001:     250000 cycles:
+\t    7f0000000010 seastar::future<void>::then(int)+0x10 (/usr/bin/crimson-osd)
+\t    7f0000000020 seastar::future<void>::then(int)+0x20 (/usr/bin/crimson-osd)
+\t    7f0000000030 _ZN7seastar7reactor3runEv+0x30 (/usr/bin/crimson-osd)
+
+reactor-5  1234/1240 [005] 100.000002:     250000 cycles:
+\t    7f0000000030 _ZN7seastar7reactor3runEv+0x30 (/usr/bin/crimson-osd)
+
+msgr-worker-1  1234/1250 [007] 100.000003:     250000 cycles:
+\t    7f0000000040 [unknown] (/usr/lib64/libc.so.6)
+\t    7f0000000050 start_thread+0x50 (/usr/lib64/libc.so.6)
+"""
+
+
+def fold(text, demangle=None):
+    return PerfScriptFolder(demangle).fold(io.StringIO(text))
+
+
+class TestHelpers(unittest.TestCase):
+    """Tests for the symbol and stack helpers."""
+
+    def test_compact_frames_matches_compact_line(self):
+        frames = ["reactor", "f", "g", "f", "f", "h"]
+        self.assertEqual(
+            ";".join(compact_frames(frames)) + " 7",
+            compact_line(0, ";".join(frames) + " 7"),
+        )
+
+    def test_tidy_symbol(self):
+        self.assertEqual(tidy_symbol("ns::f(int, char)"), "ns::f")
+        self.assertEqual(
+            tidy_symbol("(anonymous namespace)::g(int)"), "(anonymous namespace)::g"
+        )
+
+    def test_demangler_caches(self):
+        if shutil.which("c++filt") is None:
+            self.skipTest("c++filt not available")
+        with Demangler() as demangle:
+            self.assertEqual(demangle("_ZN7seastar7reactor3runEv"), "seastar::reactor::run()")
+            self.assertEqual(demangle("plain"), "plain")
+            self.assertEqual(list(demangle.cache), ["_ZN7seastar7reactor3runEv"])
+
+
+class TestPerfScriptFolder(unittest.TestCase):
+    """Tests for PerfScriptFolder and StackTrie."""
+
+    def test_folded_stacks(self):
+        names = {"_ZN7seastar7reactor3runEv": "seastar::reactor::run()"}
+        trie = fold(PERF_SCRIPT, lambda symbol: names.get(symbol, symbol))
+        self.assertEqual(
+            dict(trie.folded()),
+            {
+                "reactor[0];seastar::reactor::run[0];seastar::future<void>::then[1]": 1,
+                "reactor[0];seastar::reactor::run[0]": 1,
+                "msgr-worker[0];start_thread[0];[libc.so.6][0]": 1,
+            },
+        )
+        self.assertEqual(trie.total, 3)
+
+    def test_function_table(self):
+        trie = fold(PERF_SCRIPT)
+        table = trie.function_table()
+        self.assertEqual(table["reactor"], {"self": 0, "total": 2})
+        self.assertEqual(table["_ZN7seastar7reactor3runEv"], {"self": 1, "total": 2})
+        top = trie.top(1, "total")
+        self.assertEqual(top[0]["function"], "reactor")
+        self.assertAlmostEqual(top[0]["total_pct"], 200.0 / 3)
+
+    def test_total_counts_recursion_once(self):
+        trie = StackTrie()
+        trie.add(["a", "b", "a", "c"], 4)
+        trie.add(["a"], 1)
+        table = trie.function_table()
+        self.assertEqual(table["a"], {"self": 1, "total": 5})
+        self.assertEqual(table["c"], {"self": 4, "total": 4})
+
+    def test_load_folded_roundtrip(self):
+        trie = fold(PERF_SCRIPT)
+        out = io.StringIO()
+        write_folded(trie, out)
+        again = load_folded(io.StringIO(out.getvalue()))
+        self.assertEqual(dict(again.folded()), dict(trie.folded()))
+
+
+class TestIntervalFolder(unittest.TestCase):
+    """Tests for IntervalFolder and fio_slices()."""
+
+    def test_samples_split_per_slice(self):
+        folder = IntervalFolder(
+            [("io2", 100.5, 101.0), ("io1", 99.0, 100.0000015), ("all", 0.0, 1000.0)]
+        )
+        folder.fold(io.StringIO(PERF_SCRIPT.replace("100.000003", "200.000003")))
+        self.assertEqual(folder.samples, 3)
+        self.assertEqual(folder.tries["io1"].total, 1)
+        self.assertEqual(folder.tries["io2"].total, 0)
+        self.assertEqual(folder.tries["all"].total, 3)
+        folder = IntervalFolder([("io1", 99.0, 100.0000015)])
+        folder.fold(io.StringIO(PERF_SCRIPT))
+        self.assertEqual(folder.outside, 2)
+
+    def test_fio_slices(self):
+        temp_dir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(temp_dir, "r_1job_4io_p0.json")
+            with open(path, "w") as f:
+                json.dump(
+                    {
+                        "timestamp": 1000,
+                        "global options": {"iodepth": "4", "bs": "4k"},
+                        "jobs": [
+                            {
+                                "jobname": "randwrite",
+                                "job options": {"rw": "randwrite"},
+                                "write": {"runtime": 30000, "iops": 1.0},
+                            }
+                        ],
+                    },
+                    f,
+                )
+            missing = os.path.join(temp_dir, "missing.json")
+            self.assertEqual(fio_slices([path, missing]), [(path, 970.0, 1000.0)])
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+class TestDiff(unittest.TestCase):
+    """Tests for diff_folded() and diff_table()."""
+
+    def setUp(self):
+        self.a = load_folded(["t;f 6", "t;g 2"])
+        self.b = load_folded(["t;f 2", "t;h 2"])
+
+    def test_diff_folded(self):
+        self.assertEqual(
+            sorted(diff_folded(self.a, self.b)),
+            [("t;f", 6, 2), ("t;g", 2, 0), ("t;h", 0, 2)],
+        )
+        self.assertEqual(
+            sorted(diff_folded(self.a, self.b, normalize=True)),
+            [("t;f", 3, 2), ("t;g", 1, 0), ("t;h", 0, 2)],
+        )
+
+    def test_diff_table(self):
+        rows = diff_table(self.a, self.b, n=2)
+        self.assertEqual(rows[0]["function"], "h")
+        self.assertAlmostEqual(rows[0]["self_delta"], 50.0)
+        self.assertAlmostEqual(rows[1]["self_delta"], -25.0)
+        rows = diff_table(self.a, self.b, n=1, key="total")
+        self.assertEqual(rows[0]["function"], "h")
+
+    def test_cli_diff(self):
+        temp_dir = tempfile.mkdtemp()
+        try:
+            paths = []
+            for name, lines in (("a", "t;f 6\nt;g 2\n"), ("b", "t;f 2\nt;h 2\n")):
+                path = os.path.join(temp_dir, name)
+                with open(path, "w") as f:
+                    f.write(lines)
+                paths.append(path)
+            out = os.path.join(temp_dir, "diff.folded")
+            with redirect_stdout(io.StringIO()):
+                main(["-d", *paths, "-o", out])
+            with open(out) as f:
+                self.assertEqual(f.read().splitlines()[0], "t;f 6 2")
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    unittest.main()
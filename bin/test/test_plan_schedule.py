@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Unit tests for plan_schedule.py
+
+Expands a small plan built from the perf_test_plan dataclasses, and checks
+the grouping of the cluster shapes, the estimates and the history.
+"""
+
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+# Add parent directory to path to import the module
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from perf_test_plan import (
+    Benchmarks,
+    ClassicClusterConfiguration,
+    Cluster,
+    CrimsonClusterConfiguration,
+    FioEngine,
+    FioWorkload,
+    PerfTestPlan,
+)
+from plan_schedule import (
+    POINT,
+    PRECONDITION,
+    START,
+    STOP,
+    CostModel,
+    History,
+    expand_plan,
+    make_schedule,
+    parse_duration,
+    print_schedule,
+)
+from result_index import ResultIndex
+
+
+def make_plan():
+    common = dict(
+        store_devs=["/dev/nvme0n1", "/dev/nvme1n1"], vstart_cpu_set=["0-7"],
+        pool_name="rados", pool_size=128, rbd_num_images=1, rbd_image_size="1G",
+    )
+    configurations = {
+        "sea": CrimsonClusterConfiguration(
+            osd_type="crimson", osd_backend="seastore", osd_range=[1, 2],
+            reactor_range=[1, 4], **common,
+        ),
+        "classic": ClassicClusterConfiguration(
+            osd_type="classic", osd_backend="bluestore", osd_range=[1], **common
+        ),
+    }
+    workloads = {
+        "randread": FioWorkload(rw="randread", bs="4k", runtime=60, iodepth=[1, 8], numjobs=[1]),
+        "seqwrite": FioWorkload(rw="write", bs="64k", runtime=120, iodepth=[4], numjobs=[2]),
+    }
+    cluster = Cluster(
+        name="ceph", user="root", head="localhost", ceph_conf="", ceph_keyring="",
+        clients=[], osds=[], configurations=configurations,
+    )
+    engine = FioEngine(cmd_path="/ceph/build/fio", fio_cpu_set=["8-15"], workloads=workloads)
+    return PerfTestPlan(cluster=cluster, benchmarks=Benchmarks(benchmarks={"librbdfio": engine}))
+
+
+class TestExpandPlan(unittest.TestCase):
+    """Tests for expand_plan()."""
+
+    def test_all_points(self):
+        points = expand_plan(make_plan())
+        # (2 osd x 2 reactors + 1 classic) x 3 workload points
+        self.assertEqual(len(points), 15)
+        self.assertEqual(len({p.shape for p in points}), 5)
+        self.assertEqual(points[0].label, "sea_1osd_1reactor_randread_1job_1io")
+        self.assertEqual(points[-1].label, "classic_1osd_seqwrite_2job_4io")
+        self.assertTrue(all(p.precondition for p in points))
+
+
+class TestSchedule(unittest.TestCase):
+    """Tests for make_schedule() and the History."""
+
+    def setUp(self):
+        self.model = CostModel(
+            cluster_start=10, cluster_stop=5, precondition=100, ramp_up=1, dump=2
+        )
+        self.points = expand_plan(make_plan())
+
+    def test_estimate(self):
+        sched = make_schedule(self.points, self.model)
+        self.assertEqual(sched.count(START), 5)
+        self.assertEqual(sched.count(STOP), 5)
+        self.assertEqual(sched.count(PRECONDITION), 5)
+        per_cluster = 10 + 5 + 100 + (60 + 3) * 2 + (120 + 3)
+        self.assertEqual(sched.total, 5 * per_cluster)
+        self.assertEqual(sched.steps[1].offset, 10)
+        self.assertFalse(sched.fits(sched.total - 1))
+        self.assertTrue(sched.fits(sched.total))
+        self.assertEqual(len(sched.cut(10 + 100 + 63)), 1)
+
+    def test_reorder_groups_shapes(self):
+        interleaved = self.points[0::3] + self.points[1::3] + self.points[2::3]
+        kept = make_schedule(interleaved, self.model, reorder=False, precondition=False)
+        grouped = make_schedule(interleaved, self.model, precondition=False)
+        self.assertEqual(grouped.count(START), 5)
+        self.assertGreater(kept.count(START), grouped.count(START))
+        self.assertLess(grouped.total, kept.total)
+        self.assertEqual(grouped.count(POINT), kept.count(POINT))
+
+    def test_history_overrides_the_runtime(self):
+        temp_dir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(temp_dir, "result_index.jsonl")
+            index = ResultIndex(path)
+            point = dict(rw="randread", bs="4k", runtime=60, iodepth=8, numjobs=1)
+            shape = self.points[1].shape
+            for key, elapsed in (("a", 80.0), ("b", 90.0), ("c", 100.0)):
+                index.record(key, cluster=shape, elapsed=elapsed, **point)
+            index.record("d", "failed", cluster=shape, elapsed=1.0, **dict(point, iodepth=1))
+            index.record("e", rw="write", bs="64k", iodepth=[4], numjobs=[2], elapsed=1.0)
+            # The same FIO point on another cluster shape, or for another runtime
+            index.record("f", cluster=self.points[3].shape, elapsed=500.0, **point)
+            index.record("g", cluster=shape, elapsed=500.0, **dict(point, runtime=120))
+            history = History.load([path, os.path.join(temp_dir, "missing.jsonl")])
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+        self.assertNotEqual(self.points[3].shape, shape)
+        self.assertEqual(len(history.timings), 3)
+        sched = make_schedule(self.points[:3], self.model, history)
+        points = [s for s in sched.steps if s.kind == POINT]
+        self.assertEqual([(s.seconds, s.measured) for s in points],
+                         [(63, False), (90.0, True), (123, False)])
+        out = io.StringIO()
+        print_schedule(sched, out)
+        self.assertIn("1 timings from previous runs", out.getvalue())
+        json.dumps(sched.to_dict())
+
+    def test_parse_duration(self):
+        self.assertEqual(parse_duration("90"), 90)
+        self.assertEqual(parse_duration("1h30m"), 5400)
+        self.assertEqual(parse_duration("2d"), 172800)
+        with self.assertRaises(ValueError):
+            parse_duration("8 hours")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Unit tests for postproc_dag.py
+
+Runs small graphs of stages on the pools and serially, and the in-process
+stages of the post-processing on files in a temporary directory.
+"""
+
+import gzip
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+# Add parent directory to path to import the module
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from postproc_dag import (
+    PROCESS,
+    PostProcessDAG,
+    archive_perf,
+    parse_fio_jsons,
+    strip_fio_lines,
+)
+
+
+def fio_json(iodepth):
+    """A FIO JSON output of a single randread job."""
+    return {
+        "fio version": "fio-3.36",
+        "timestamp": 1700000000 + iodepth,
+        "global options": {"bs": "4k", "iodepth": str(iodepth), "rw": "randread"},
+        "jobs": [
+            {
+                "jobname": "job0",
+                "job options": {"rw": "randread", "runtime": "60"},
+                "usr_cpu": 10.0,
+                "sys_cpu": 5.0,
+                "read": {
+                    "bw": 4000 * iodepth,
+                    "iops": 1000.0 * iodepth,
+                    "total_ios": 60000 * iodepth,
+                    "clat_ns": {
+                        "N": 60000 * iodepth,
+                        "mean": 250000.0 * iodepth,
+                        "stddev": 10000.0,
+                        "max": 9000000,
+                        "percentile": {"50.000000": 240000, "99.000000": 800000},
+                    },
+                },
+            }
+        ],
+    }
+
+
+def square(x):
+    return x * x
+
+
+def fail():
+    raise RuntimeError("boom")
+
+
+class TestPostProcessDAG(unittest.TestCase):
+    """Tests for PostProcessDAG."""
+
+    def test_dependencies_complete_first(self):
+        order = []
+        lock = threading.Lock()
+
+        def step(name, delay=0.0):
+            time.sleep(delay)
+            with lock:
+                order.append(name)
+            return name
+
+        dag = PostProcessDAG(workers=4)
+        dag.add("a", step, "a", 0.05)
+        dag.add("b", step, "b")
+        dag.add("c", step, "c", after=["a", "b"])
+        self.assertEqual(dag.run(), {"a": "a", "b": "b", "c": "c"})
+        # b does not wait for a, c waits for both
+        self.assertEqual(order, ["b", "a", "c"])
+
+    def test_independent_stages_overlap(self):
+        barrier = threading.Barrier(3, timeout=5)
+        dag = PostProcessDAG(workers=3)
+        for i in range(3):
+            dag.add(f"s{i}", barrier.wait)
+        dag.run()
+        self.assertEqual(dag.errors, {})
+
+    def test_process_stages(self):
+        dag = PostProcessDAG(workers=2)
+        dag.add("sq", square, 7, kind=PROCESS)
+        self.assertEqual(dag.run(), {"sq": 49})
+
+    def test_failure_skips_dependents(self):
+        for workers in (0, 2):
+            dag = PostProcessDAG(workers=workers)
+            dag.add("bad", fail)
+            dag.add("child", square, 2, after=["bad"])
+            dag.add("grandchild", square, 3, after=["child"])
+            dag.add("other", square, 4)
+            self.assertEqual(dag.run(), {"other": 16})
+            self.assertIsInstance(dag.errors["bad"], RuntimeError)
+            self.assertEqual(dag.skipped, ["child", "grandchild"])
+
+    def test_unknown_dependency_rejected(self):
+        dag = PostProcessDAG()
+        with self.assertRaises(ValueError):
+            dag.add("a", square, 1, after=["missing"])
+        dag.add("a", square, 1)
+        with self.assertRaises(ValueError):
+            dag.add("a", square, 1)
+
+
+class TestStages(unittest.TestCase):
+    """Tests for the in-process post-processing stages."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _path(self, name, content=None):
+        path = os.path.join(self.temp_dir, name)
+        if content is not None:
+            with open(path, "w") as f:
+                f.write(content)
+        return path
+
+    def test_strip_fio_lines(self):
+        path = self._path("out.json", 'fio: warning\n{"jobs": []}\nfio: x\n')
+        strip_fio_lines(path)
+        with open(path) as f:
+            self.assertEqual(f.read(), '{"jobs": []}\n')
+
+    def test_parse_fio_jsons_table(self):
+        names = []
+        for io in (4, 8):
+            for proc in range(2):
+                name = f"fio_t_1job_{io}io_4k_randread_p{proc}.json"
+                self._path(name, json.dumps(fio_json(io)))
+                names.append(name)
+        self._path("t_list", "\n".join(names) + "\n")
+        run = {
+            "user": [10.0, 20.0],
+            "sys": [1.0, 2.0],
+            "wait": [0.0, 0.0],
+            "idle": [0.0, 0.0],
+        }
+        cpu_avg = json.dumps({"OSD": {"avg_per_run": run}})
+        cpu_avg = self._path("t_cpu_avg.json", cpu_avg)
+        out = self._path("t_json.out")
+        cwd = os.getcwd()
+        self.assertTrue(parse_fio_jsons("t_list", out, cpu_avg, "t", self.temp_dir))
+        self.assertEqual(os.getcwd(), cwd)
+        with open(self._path("t.json")) as f:
+            table = json.load(f)
+        # One row per point, the two processes of each summed
+        self.assertEqual(table["iodepth"], ["4", "8"])
+        self.assertEqual(table["iops"], [2 * 4000.0, 2 * 8000.0])
+        self.assertEqual(table["OSD_user"], [10.0, 20.0])
+        self.assertTrue(os.path.exists(self._path("t.plot")))
+
+    def test_parse_fio_jsons_needs_cpu_avg(self):
+        self.assertFalse(
+            parse_fio_jsons("t_list", self._path("out"), self._path("none.json"))
+        )
+
+    def test_archive_perf(self):
+        perf = self._path("x_perf.out", "raw")
+        folded = self._path("x_perf.out_folded", "stacks 1\n")
+        archive_perf(perf, folded)
+        self.assertEqual(os.listdir(self.temp_dir), ["x_perf.out_folded.gz"])
+        with gzip.open(f"{folded}.gz", "rt") as f:
+            self.assertEqual(f.read(), "stacks 1\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Unit tests for precond_cache.py
+
+Records the preconditioned state of devices and images, and checks it is
+matched by fingerprint, persisted, and forgotten with its cluster.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+# Add parent directory to path to import the module
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from precond_cache import PrecondCache, device_fingerprint, image_fingerprint
+
+
+class TestPrecondCache(unittest.TestCase):
+    """Tests for PrecondCache and the fingerprints."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, "precond_state.json")
+        self.job = os.path.join(self.temp_dir, "randwrite64k.fio")
+        with open(self.job, "w") as f:
+            f.write("[global]\nbs=64K\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_devices(self):
+        devs = ["/dev/nvme0n1p2", "/dev/nvme1n1p2"]
+        fp = device_fingerprint(devs, self.job)
+        self.assertEqual(fp, device_fingerprint(reversed(devs), self.job))
+        cache = PrecondCache(self.path)
+        self.assertFalse(cache.devices_ready(devs, fp))
+        cache.record_devices(devs, fp, test_name="t")
+        cache = PrecondCache(self.path)
+        self.assertTrue(cache.devices_ready(devs, fp))
+        self.assertTrue(cache.devices_ready(devs[:1], fp))
+        self.assertFalse(cache.devices_ready(devs + ["/dev/nvme2n1p2"], fp))
+        self.assertFalse(cache.devices_ready([], fp))
+        # A different job invalidates the state
+        with open(self.job, "w") as f:
+            f.write("[global]\nbs=128K\n")
+        self.assertFalse(cache.devices_ready(devs, device_fingerprint(devs, self.job)))
+        cache.forget_devices(devs[:1])
+        self.assertFalse(PrecondCache(self.path).devices_ready(devs, fp))
+
+    def test_images_forgotten_with_the_cluster(self):
+        cache = PrecondCache(self.path)
+        fp_a = image_fingerprint("a@1", "rbd", 4, "400gb", "seastore")
+        fp_b = image_fingerprint("b@2", "rbd", 4, "400gb", "seastore")
+        self.assertNotEqual(fp_a, fp_b)
+        self.assertNotEqual(fp_a, image_fingerprint("a@1", "rbd", 4, "1tb", "seastore"))
+        cache.record_images(fp_a, "a@1", "rbd_a")
+        cache.record_images(fp_b, "b@2", "rbd_b")
+        self.assertEqual(PrecondCache(self.path).images_for(fp_a), "rbd_a")
+        cache.forget_cluster("a@1")
+        cache = PrecondCache(self.path)
+        self.assertIsNone(cache.images_for(fp_a))
+        self.assertEqual(cache.images_for(fp_b), "rbd_b")
+
+    def test_corrupt_state_is_ignored(self):
+        with open(self.path, "w") as f:
+            f.write("{")
+        self.assertEqual(PrecondCache(self.path).devices, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
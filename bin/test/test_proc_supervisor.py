@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Unit tests for proc_supervisor.py
+
+Supervises short-lived child processes (``sh``, ``sleep``) and checks the
+exit statuses recorded, the teardown on failure and the JSON summary.
+"""
+
+import json
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import unittest
+
+# Add parent directory to path to import the module
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from proc_supervisor import FIO, OSD, ProcExit, ProcessSupervisor
+
+
+def spawn(cmd):
+    return subprocess.Popen(["sh", "-c", cmd])
+
+
+class TestProcExit(unittest.TestCase):
+    """Tests for ProcExit.failed."""
+
+    def test_failed(self):
+        self.assertFalse(ProcExit("fio_0", 1, FIO, rc=0).failed)
+        self.assertTrue(ProcExit("fio_0", 1, FIO, rc=1).failed)
+        self.assertTrue(ProcExit("fio_0", 1, FIO, sig=signal.SIGKILL).failed)
+        self.assertFalse(ProcExit("fio_0", 1, FIO, sig=2, expected=True).failed)
+        self.assertTrue(ProcExit("osd.0", 1, OSD).failed)
+        self.assertFalse(ProcExit("osd.0", 1, OSD, expected=True).failed)
+
+
+class TestProcessSupervisor(unittest.TestCase):
+    """Tests for ProcessSupervisor."""
+
+    def setUp(self):
+        self.failures = []
+        self.sup = ProcessSupervisor(self.failures.append, poll_interval=0.05)
+        self.procs = []
+
+    def tearDown(self):
+        for proc in self.procs:
+            if proc.poll() is None:
+                proc.kill()
+                proc.wait()
+
+    def _watch(self, name, cmd):
+        proc = spawn(cmd)
+        self.procs.append(proc)
+        self.sup.watch(name, proc.pid)
+        return proc
+
+    def _run(self):
+        self.sup.start()
+        self.assertTrue(self.sup.wait(timeout=10))
+        self.sup.close()
+
+    def test_exit_codes(self):
+        self._watch("fio_0", "exit 0")
+        self._watch("fio_1", "exit 0")
+        self._run()
+        self.assertEqual(self.sup.exit_codes(), {"fio_0": 0, "fio_1": 0})
+        self.assertIsNone(self.sup.failed)
+        self.assertEqual(self.failures, [])
+
+    def test_failure_kills_survivors(self):
+        self._watch("fio_0", "sleep 30")
+        self._watch("fio_1", "sleep 0.2; exit 3")
+        self._run()
+        self.assertEqual(self.sup.failed.name, "fio_1")
+        self.assertEqual(self.sup.exits["fio_1"].rc, 3)
+        self.assertEqual(self.sup.exits["fio_0"].signal, signal.SIGKILL)
+        self.assertEqual([ex.name for ex in self.failures], ["fio_1"])
+
+    def test_stop_makes_exits_expected(self):
+        self._watch("fio_0", "sleep 30")
+        self.sup.start()
+        self.sup.stop(signal.SIGTERM)
+        self.assertTrue(self.sup.wait(timeout=10))
+        self.sup.close()
+        self.assertEqual(self.sup.exits["fio_0"].signal, signal.SIGTERM)
+        self.assertIsNone(self.sup.failed)
+
+    def test_osd_exit_fails(self):
+        osd = spawn("sleep 0.2")
+        self.procs.append(osd)
+        self._watch("fio_0", "sleep 30")
+        # Not reaped by the supervisor, as for an OSD started elsewhere
+        self.sup.watch("osd.0", osd.pid, kind=OSD, child=False)
+        self.sup.start()
+        osd.wait()
+        self.assertTrue(self.sup.wait(timeout=10))
+        self.sup.close()
+        self.assertEqual(self.sup.failed.name, "osd.0")
+        self.assertEqual(self.sup.exits["fio_0"].signal, signal.SIGKILL)
+
+    def test_polling_fallback(self):
+        self.sup.use_pidfd = False
+        self._watch("fio_0", "sleep 0.1; exit 2")
+        self._run()
+        self.assertEqual(self.sup.exits["fio_0"].rc, 2)
+
+    def test_not_a_child(self):
+        self.sup.watch("fio_0", os.getppid())
+        self.assertEqual(self.sup.exits["fio_0"].rc, None)
+        self._run()
+
+    def test_save(self):
+        self._watch("fio_0", "exit 0")
+        self._run()
+        temp_dir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(temp_dir, "procs.json")
+            self.sup.save(path, workload="randread")
+            with open(path) as f:
+                data = json.load(f)
+            self.assertEqual(data["workload"], "randread")
+            self.assertEqual(data["exits"][0]["name"], "fio_0")
+            self.assertFalse(data["exits"][0]["failed"])
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Unit tests for result_index.py
+
+Checks the point keys are content hashes, and that the index survives a
+reload (including a truncated last line) with the last entry of a key winning.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest.mock import Mock, patch
+
+# Add parent directory to path to import the module
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from perf_test_plan import FioWorkload
+from result_index import FAILED, ResultIndex, build_id, file_digest, point_key
+
+
+def workload(**kwargs):
+    fields = dict(rw="randread", bs="4k", runtime=60, iodepth=[1, 2], numjobs=[1])
+    fields.update(kwargs)
+    return FioWorkload(**fields)
+
+
+class TestPointKey(unittest.TestCase):
+    """Tests for point_key() and its inputs."""
+
+    def test_key_is_content_hash(self):
+        a = point_key(cluster={"cmd": "vstart", "osd": 1}, workload=workload(), iodepth=2)
+        b = point_key(iodepth=2, workload=workload(), cluster={"osd": 1, "cmd": "vstart"})
+        self.assertEqual(a, b)
+        self.assertNotEqual(
+            a, point_key(cluster={"cmd": "vstart", "osd": 1}, workload=workload(bs="8k"), iodepth=2)
+        )
+        self.assertNotEqual(
+            a, point_key(cluster={"cmd": "vstart", "osd": 1}, workload=workload(), iodepth=4)
+        )
+
+    def test_file_digest(self):
+        temp_dir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(temp_dir, "job.fio")
+            with open(path, "w") as f:
+                f.write("[global]\nbs=4k\n")
+            digest = file_digest(path)
+            with open(path, "w") as f:
+                f.write("[global]\nbs=8k\n")
+            self.assertNotEqual(digest, file_digest(path))
+            self.assertIsNone(file_digest(os.path.join(temp_dir, "missing.fio")))
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+    @patch("subprocess.run")
+    def test_build_id(self, mock_run):
+        mock_run.return_value = Mock(returncode=0, stdout="ceph version 20.0 (abc123) dev\n")
+        self.assertEqual(build_id(), "ceph version 20.0 (abc123) dev")
+        mock_run.side_effect = FileNotFoundError
+        self.assertEqual(build_id(), "unknown")
+
+
+class TestResultIndex(unittest.TestCase):
+    """Tests for ResultIndex."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, "result_index.jsonl")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_record_and_reload(self):
+        index = ResultIndex(self.path)
+        index.record("a", test_name="t_a")
+        index.record("b", FAILED)
+        self.assertTrue(index.done("a"))
+        self.assertFalse(index.done("b"))
+        with open(self.path, "a") as f:
+            f.write('{"key": "c", "sta')
+        again = ResultIndex(self.path)
+        self.assertEqual(again.entries["a"]["test_name"], "t_a")
+        self.assertEqual(again.pending(["a", "b", "c"]), ["b", "c"])
+        again.record("c")
+        self.assertTrue(ResultIndex(self.path).done("c"))
+
+    def test_last_entry_wins(self):
+        index = ResultIndex(self.path)
+        index.record("a", FAILED)
+        index.record("a")
+        self.assertTrue(ResultIndex(self.path).done("a"))
+
+
+if __name__ == "__main__":
+    unittest.main()
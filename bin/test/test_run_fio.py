@@ -6,11 +6,13 @@ Tests the Python translation of run_fio.sh using mocks to avoid
 actual process execution or filesystem side effects.
 """
 
+import io
 import json
 import os
 import signal
 import sys
 import tempfile
+import time
 import unittest
 from unittest.mock import MagicMock, Mock, call, mock_open, patch
 import pytest
@@ -32,6 +34,7 @@ from run_fio import (
     RAND_IODEPTH_RANGE,
     SEQ_IODEPTH_RANGE,
 )
+from telemetry_store import TelemetryStore
 
 
 class TestWorkloadTables(unittest.TestCase):
@@ -144,6 +147,8 @@ class TestOsdDumpHelpers(unittest.TestCase):
         self.temp_dir = tempfile.mkdtemp()
         self.runner = FioRunner("/root/bin", "/tmp")
         self.runner.osd_type = "crimson"
+        # Concatenated JSON text; the store is covered by TestOsdDumpStore
+        self.runner.use_store = False
 
     def tearDown(self):
         import shutil
@@ -388,6 +393,121 @@ class TestSignalHandler(unittest.TestCase):
         mock_tidyup.assert_called_once()
 
 
+class TestOsdDumpStore(unittest.TestCase):
+    """Tests for the columnar store behind the OSD dump helpers."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.runner = FioRunner("/root/bin", "/tmp")
+        self.runner.use_asok = False
+        self.dump = os.path.join(self.temp_dir, "t_dump.json")
+
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    @patch("subprocess.run")
+    def test_samples_appended_to_store_not_exported(self, mock_run):
+        payload = {"metrics": [{"reactor_utilization": {"shard": "0", "value": 50}}]}
+        mock_run.return_value = Mock(returncode=0, stdout=json.dumps(payload))
+        self.runner.osd_dump_start(self.dump)
+        self.assertIn(self.dump, self.runner.stores)
+        self.runner.osd_dump_sample("label", self.dump, "reactor_utilization", ts=1.0)
+        self.runner.osd_dump_sample("label", self.dump, "reactor_utilization", ts=2.0)
+        self.assertTrue(os.path.exists(os.path.join(self.temp_dir, "t_dump.tlm.json")))
+        self.runner.osd_dump_end(self.dump)
+        self.assertEqual(self.runner.stores, {})
+        # The legacy JSON is exported on demand, not archived with the store
+        self.assertFalse(os.path.exists(self.dump))
+        entries = list(TelemetryStore.open(self.dump).snapshots())
+        self.assertEqual(len(entries), 2)
+        self.assertEqual(entries[0]["data"], payload)
+        self.assertEqual(entries[0]["label"], "label")
+
+    def test_stats_stores_for_crimson(self):
+        self.runner.osd_dump_stats_start(self.dump)
+        self.assertEqual(
+            sorted(os.path.basename(k) for k in self.runner.stores),
+            ["t_dump_seastar_stats.json", "t_dump_tcmalloc_stats.json"],
+        )
+        self.runner.osd_dump_stats_end(self.dump)
+        self.assertEqual(self.runner.stores, {})
+
+    @patch("subprocess.run")
+    def test_tidyup_closes_open_stores(self, mock_run):
+        self.runner.osd_dump_start(self.dump)
+        self.runner.tidyup("t")
+        self.assertTrue(os.path.exists(os.path.join(self.temp_dir, "t_dump.tlm.json")))
+        self.assertFalse(os.path.exists(self.dump))
+        self.assertEqual(self.runner.stores, {})
+
+
+class TestOsdDumpMultiOSD(unittest.TestCase):
+    """Tests for the concurrent sampling of every OSD."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.runner = FioRunner("/root/bin", "/tmp")
+        self.runner.use_asok = False
+        self.runner.osd_type = "classic"
+        self.runner.osd_id = {"osd.2": 300, "osd.0": 100, "osd.1": 200}
+        self.dump = os.path.join(self.temp_dir, "t_dump.json")
+
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    @staticmethod
+    def _tell(cmd, **kwargs):
+        osd = int(cmd.split("osd.")[1].split()[0])
+        return Mock(returncode=0, stdout=json.dumps({"osd": {"id": osd}}))
+
+    def test_dump_osds(self):
+        self.assertEqual(self.runner.dump_osds(), [0, 1, 2])
+        self.runner.osd_id = {}
+        self.assertEqual(self.runner.dump_osds(), [0])
+
+    @patch("subprocess.run")
+    def test_every_osd_sampled_into_store(self, mock_run):
+        mock_run.side_effect = self._tell
+        self.runner.osd_dump_start(self.dump)
+        self.runner.osd_dump_sample("label", self.dump, ts=5.0)
+        self.runner.osd_dump_end(self.dump)
+        cmds = sorted(c.args[0] for c in mock_run.call_args_list)
+        self.assertEqual(
+            cmds, [f"/ceph/build/bin/ceph tell osd.{i} perf dump" for i in range(3)]
+        )
+        snaps = list(TelemetryStore.open(self.dump).snapshots())
+        self.assertEqual([s["osd"] for s in snaps], [0, 1, 2])
+        self.assertEqual([s["data"]["osd"]["id"] for s in snaps], [0, 1, 2])
+        self.assertTrue(all(s["timestamp"] == 5.0 for s in snaps))
+
+    @patch("subprocess.run")
+    def test_one_pool_per_run(self, mock_run):
+        mock_run.side_effect = self._tell
+        self.runner.osd_dump_start(self.dump)
+        self.runner.osd_dump_sample("label", self.dump, ts=1.0)
+        pool = self.runner._dump_pool
+        self.assertIsNotNone(pool)
+        self.runner.osd_dump_sample("label", self.dump, ts=2.0)
+        self.assertIs(self.runner._dump_pool, pool)
+        self.runner.osd_dump_end(self.dump)
+        self.assertIsNone(self.runner._dump_pool)
+        self.assertTrue(pool._shutdown)
+
+    @patch("subprocess.run")
+    def test_json_envelopes_tagged_with_osd(self, mock_run):
+        mock_run.side_effect = self._tell
+        self.runner.use_store = False
+        self.runner.osd_dump_start(self.dump)
+        self.runner.osd_dump_sample("label", self.dump, end="notyet")
+        self.runner.osd_dump_sample("label", self.dump, end="end")
+        self.runner.osd_dump_end(self.dump)
+        with open(self.dump) as f:
+            entries = json.load(f)
+        self.assertEqual([e["osd"] for e in entries], [0, 1, 2, 0, 1, 2])
+
+
 class TestOsdDumpGeneric(unittest.TestCase):
     """Tests for osd_dump_generic()."""
 
@@ -535,6 +655,96 @@ class TestRunWorkload(unittest.TestCase):
         self.assertIn("fio_", content)
         self.assertIn(".json", content)
 
+    @patch("os.waitpid", return_value=(0, 0))
+    @patch("time.sleep")
+    @patch("subprocess.run")
+    @patch("subprocess.Popen")
+    def test_diskstats_time_series_saved(
+        self, mock_popen, mock_run, mock_sleep, mock_waitpid
+    ):
+        mock_popen.return_value = Mock(pid=33333)
+        mock_run.return_value = Mock(returncode=0, stdout="")
+
+        self.runner.run_workload("rw", True, False, "pfx", job=1, io=2)
+        with open(f"{self.runner.test_name}_diskstats.json") as f:
+            series = json.load(f)
+        # One sample before FIO starts and one after it completes
+        self.assertGreaterEqual(len(series["sample_timestamp"]), 2)
+
+    @patch("os.kill")
+    @patch("os.waitpid", return_value=(0, 0))
+    @patch("time.sleep")
+    @patch("subprocess.run")
+    @patch("subprocess.Popen")
+    def test_live_status_aborts_over_max_latency(
+        self, mock_popen, mock_run, mock_sleep, mock_waitpid, mock_kill
+    ):
+        reports = [
+            {"jobs": [{"write": {"clat_ns": {"N": 100 * i, "mean": 50e6}}}]}
+            for i in range(1, 5)
+        ]
+        mock_popen.return_value = Mock(
+            pid=44444, stdout=io.BytesIO("\n".join(map(json.dumps, reports)).encode())
+        )
+        mock_run.return_value = Mock(returncode=0, stdout="")
+        self.runner.response_curve = True
+        self.runner.abort_intervals = 2
+
+        rc = self.runner.run_workload("rw", True, False, "pfx", job=1, io=64)
+        self.assertEqual(rc, FioRunner.ABORTED)
+        cmd = mock_popen.call_args[0][0]
+        self.assertIn("--status-interval=1", cmd)
+        self.assertFalse(any(c.startswith("--output=") for c in cmd))
+        mock_kill.assert_any_call(44444, signal.SIGINT)
+        # The last status report becomes the FIO JSON output
+        with open(f"fio_{self.runner.test_name}.json") as f:
+            self.assertEqual(json.load(f), reports[-1])
+
+    @patch("os.waitpid", return_value=(0, 0))
+    @patch("time.sleep")
+    @patch("subprocess.run")
+    @patch("subprocess.Popen")
+    def test_steady_state_follows_status_and_saves_warmup(
+        self, mock_popen, mock_run, mock_sleep, mock_waitpid
+    ):
+        report = {"timestamp_ms": 1000, "jobs": []}
+        mock_popen.return_value = Mock(
+            pid=55555, stdout=io.BytesIO(json.dumps(report).encode())
+        )
+        mock_run.return_value = Mock(returncode=0, stdout="")
+        self.runner.steady_state = True
+
+        rc = self.runner.run_workload("rw", True, False, "pfx", job=1, io=2)
+        self.assertEqual(rc, FioRunner.SUCCESS)
+        self.assertIn("--status-interval=1", mock_popen.call_args[0][0])
+        with open(f"{self.runner.test_name}_steady.json") as f:
+            steady = json.load(f)
+        # Never settled: the warm-up lasts the whole ramp-up
+        self.assertIsNone(steady["settled_at"])
+        self.assertAlmostEqual(
+            steady["warmup_end"] - steady["start"], self.runner.ramp_up, places=0
+        )
+
+    @patch("os.waitpid", return_value=(0, 0))
+    @patch("time.sleep")
+    @patch("subprocess.run")
+    @patch("subprocess.Popen")
+    def test_log_name_per_process_and_point(
+        self, mock_popen, mock_run, mock_sleep, mock_waitpid
+    ):
+        mock_popen.return_value = Mock(pid=66666)
+        mock_run.return_value = Mock(returncode=0, stdout="")
+        self.runner.response_curve = True
+        self.runner.live_status = False
+        self.runner.num_procs = 2
+
+        for io_depth in (2, 4):
+            self.runner.run_workload("rw", True, False, "pfx", job=1, io=io_depth)
+        names = [c.kwargs["env"]["LOG_NAME"] for c in mock_popen.call_args_list]
+        self.assertEqual(len(set(names)), 4)
+        self.assertEqual(names[0], "pfx_1job_2io_4k_randwrite_p0")
+        self.assertEqual(names[3], "pfx_1job_4io_4k_randwrite_p1")
+
     @patch("subprocess.run")
     def test_returns_failure_when_no_fio_procs(self, mock_run):
         mock_run.return_value = Mock(returncode=0, stdout="")
@@ -543,6 +753,97 @@ class TestRunWorkload(unittest.TestCase):
         self.assertEqual(rc, FioRunner.FAILURE)
 
 
+class TestRegisterCollectors(unittest.TestCase):
+    """Tests for register_collectors()."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.runner = FioRunner("/root/bin", "/tmp")
+        self.runner.run_dir = self.temp_dir
+        self.runner.osd_id = {"osd.0": 1234}
+        self.runner.fio_id = {"fio_0": 5678}
+        self.runner.test_name = "tname"
+        self.runner.test_result = "tresult"
+        self.runner.top_out_list = os.path.join(self.temp_dir, "top_list")
+        self.runner.top_pid_list = os.path.join(self.temp_dir, "top_pid_list")
+        self.runner.top_pid_json = os.path.join(self.temp_dir, "top_pid.json")
+        self.orig_dir = os.getcwd()
+        os.chdir(self.temp_dir)
+
+    def tearDown(self):
+        os.chdir(self.orig_dir)
+        import shutil
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _register(self, disk_sampler=None):
+        from telemetry_scheduler import TelemetryScheduler
+        sched = TelemetryScheduler()
+        self.runner.register_collectors(sched, False, disk_sampler)
+        return sched
+
+    def test_crimson_registers_all_collectors(self):
+        sched = self._register(Mock())
+        self.assertEqual(
+            set(sched.collectors), {"perf", "threads", "rutil", "diskstats"}
+        )
+        rutil = sched.collectors["rutil"]
+        self.assertEqual(rutil.interval, self.runner.rutil_interval)
+        self.assertEqual(rutil.delay, self.runner.ramp_up)
+
+    def test_diskstats_sampled_from_the_start(self):
+        sched = self._register(Mock())
+        diskstats = sched.collectors["diskstats"]
+        self.assertEqual(diskstats.interval, self.runner.disk_interval)
+        self.assertEqual(diskstats.delay, 0)
+        self.assertFalse(diskstats.blocking)
+
+    def test_classic_has_no_reactor_utilization(self):
+        self.runner.osd_type = "classic"
+        self.assertNotIn("rutil", self._register().collectors)
+
+    def test_skip_osd_mon_only_runs_threads_and_diskstats(self):
+        self.runner.skip_osd_mon = True
+        self.assertEqual(set(self._register().collectors), {"threads"})
+        self.assertEqual(
+            set(self._register(Mock()).collectors), {"threads", "diskstats"}
+        )
+
+    def test_threads_sampled_every_delay_samples(self):
+        threads = self._register().collectors["threads"]
+        self.assertEqual(threads.interval, self.runner.delay_samples)
+        # One extra sample for the baseline
+        self.assertEqual(threads.num_samples, self.runner.num_samples + 1)
+        self.assertEqual(threads.delay, self.runner.ramp_up)
+
+    def test_use_top_registers_top_instead(self):
+        self.runner.use_top = True
+        collectors = self._register().collectors
+        self.assertIn("top", collectors)
+        self.assertNotIn("threads", collectors)
+
+    @patch.object(FioRunner, "get_json_from_cmd")
+    def test_rutil_file_is_valid_json_when_stopped_early(self, mock_cmd):
+        def _append(test_name, cmd, outfile, end="", ts=None, osd=0):
+            with open(outfile, "a") as f:
+                f.write('{"data": 1}\n')
+
+        mock_cmd.side_effect = _append
+        self.runner.use_asok = False
+        self.runner.use_store = False
+        self.runner.skip_osd_mon = False
+        self.runner.ramp_up = 0
+        self.runner.rutil_interval = 0.01
+        self.runner.rutil_samples = 1000
+        with patch("monitoring.mon_perf"), patch("monitoring.mon_measure"):
+            sched = self._register()
+            sched.start()
+            time.sleep(0.05)
+            sched.stop(timeout=2)
+        with open("tresult_rutil.json") as f:
+            samples = json.load(f)
+        self.assertEqual(len(samples), sched.collectors["rutil"].samples_taken)
+
+
 class TestRunWorkloadLoop(unittest.TestCase):
     """Tests for run_workload_loop()."""
 
@@ -581,6 +882,53 @@ class TestRunWorkloadLoop(unittest.TestCase):
         with self.assertRaises(SystemExit):
             self.runner.run_workload_loop("rw", True, False, "pfx")
 
+    @patch.object(FioRunner, "post_process")
+    @patch.object(FioRunner, "run_workload", return_value=FioRunner.ABORTED)
+    def test_aborted_point_skips_deeper_iodepths(self, mock_rw, mock_pp):
+        self.runner.num_attempts = 3
+        self.runner.run_workload_loop("rw", True, False, "pfx")
+        # Neither retried nor followed by the remaining iodepths
+        mock_rw.assert_called_once()
+        mock_pp.assert_called_once()
+
+    @patch.object(FioRunner, "post_process")
+    @patch.object(FioRunner, "point_stats", return_value=(1000.0, 1.0))
+    @patch.object(FioRunner, "run_workload", return_value=FioRunner.SUCCESS)
+    def test_adaptive_iodepth_search(self, mock_rw, mock_stats, mock_pp):
+        self.runner.adaptive_iodepth = True
+        self.runner.run_workload_loop("rw", True, False, "pfx")
+        iodepths = [c.args[6] for c in mock_rw.call_args_list]
+        # The coarse grid comes first, then the refinement
+        self.assertEqual(iodepths[:10], [int(i) for i in RAND_IODEPTH_RANGE.split()])
+        with open(f"{self.runner.test_result}_1job_iodepth_search.json") as f:
+            points = json.load(f)["points"]
+        self.assertEqual([p["iodepth"] for p in points], iodepths)
+
+    @patch("monitoring.mon_perf_stop")
+    @patch.object(FioRunner, "post_process")
+    @patch.object(FioRunner, "run_workload", return_value=FioRunner.SUCCESS)
+    def test_perf_recording_spans_the_loop(self, mock_rw, mock_pp, mock_stop):
+        proc = Mock()
+        with patch.object(FioRunner, "start_perf_recording", return_value=proc) as mock_start:
+            self.runner.run_workload_loop("rw", True, True, "pfx")
+        mock_start.assert_called_once_with(True)
+        mock_stop.assert_called_once_with(proc)
+        # Stopped before the post-processing folds the recording
+        self.assertEqual(mock_pp.call_count, 1)
+
+    @patch("monitoring.mon_perf_record")
+    def test_start_perf_recording(self, mock_record):
+        self.runner.osd_id = {"osd.0": 1234, "osd.1": 1235}
+        self.runner.test_result = "tresult"
+        self.runner.skip_osd_mon = False
+        self.assertIsNone(self.runner.start_perf_recording(True))
+        self.runner.perf_continuous = True
+        self.assertIsNone(self.runner.start_perf_recording(False))
+        self.runner.start_perf_recording(True)
+        mock_record.assert_called_once_with(
+            "1234,1235", "tresult_perf.data", self.runner.perf_freq
+        )
+
     @patch.object(FioRunner, "post_process")
     @patch.object(FioRunner, "run_workload", return_value=FioRunner.SUCCESS)
     def test_single_mode_uses_single_tables(self, mock_rw, mock_pp):
@@ -645,12 +993,81 @@ class TestPostProcess(unittest.TestCase):
         self, mock_run, mock_filter, mock_tidyup
     ):
         mock_run.return_value = Mock(returncode=0, stdout="")
+        self.runner.use_top = True
         self.runner.response_curve = True
         self.runner.osd_id = {}
         self.runner.global_fio_id = []
         self.runner.post_process()
         mock_filter.assert_called_once()
 
+    @patch.object(FioRunner, "tidyup")
+    @patch("monitoring.mon_filter_top")
+    @patch("subprocess.run")
+    def test_thread_sampler_skips_top_filter(
+        self, mock_run, mock_filter, mock_tidyup
+    ):
+        mock_run.return_value = Mock(returncode=0, stdout="")
+        self.runner.response_curve = True
+        self.runner.osd_id = {}
+        self.runner.global_fio_id = []
+        self.runner.post_process()
+        mock_filter.assert_not_called()
+
+    @patch.object(FioRunner, "tidyup")
+    @patch("subprocess.run")
+    def test_flamegraph_stages(self, mock_run, mock_tidyup):
+        def fake_fold(perf_file, folded, table):
+            with open(folded, "w") as f:
+                f.write("reactor[0];f[1] 3\n")
+            with open(table, "w") as f:
+                f.write("{}")
+            return 3
+
+        mock_run.return_value = Mock(returncode=0, stdout="")
+        with open("osd_perf.out", "w") as f:
+            f.write("raw")
+        self.runner.with_flamegraphs = True
+        self.runner.post_workers = 0
+        with patch("run_fio.fold_perf", side_effect=fake_fold) as mock_fold:
+            self.runner.post_process()
+        mock_fold.assert_called_once_with(
+            "osd_perf.out", "osd_perf.out_folded", "osd_fg_top.json"
+        )
+        self.assertEqual(mock_run.call_args.args[0][1:], ["--title", "osd_"])
+        self.assertEqual(
+            sorted(os.listdir(".")),
+            ["osd_fg.svg", "osd_fg_top.json", "osd_perf.out_folded.gz"],
+        )
+
+    @patch.object(FioRunner, "tidyup")
+    @patch("subprocess.run")
+    def test_continuous_recording_one_flamegraph_per_point(self, mock_run, mock_tidyup):
+        def fake_slices(perf_file, fio_jsons, index):
+            for fio_json in fio_jsons:
+                with open(fio_json.replace(".json", "_perf.folded"), "w") as f:
+                    f.write("reactor[0];f[0] 1\n")
+            return []
+
+        mock_run.return_value = Mock(returncode=0, stdout="")
+        fio_jsons = ["r_1job_1io_p0.json", "r_1job_2io_p0.json"]
+        for name in fio_jsons + ["testresult_perf.data"]:
+            with open(name, "w") as f:
+                f.write("{}")
+        with open(self.runner.osd_test_list, "w") as f:
+            f.write("\n".join(fio_jsons) + "\n")
+        self.runner.with_flamegraphs = True
+        self.runner.post_workers = 0
+        with patch("run_fio.fold_perf_slices", side_effect=fake_slices) as mock_slices:
+            self.runner.post_process()
+        mock_slices.assert_called_once_with(
+            "testresult_perf.data", fio_jsons, "testresult_perf_slices.json"
+        )
+        titles = [c.args[0][2] for c in mock_run.call_args_list]
+        self.assertEqual(titles, fio_jsons)
+        self.assertTrue(os.path.exists("r_1job_2io_p0_fg.svg"))
+        self.assertTrue(os.path.exists("r_1job_2io_p0_perf.folded.gz"))
+        self.assertFalse(os.path.exists("testresult_perf.data"))
+
 
 class TestSetOsdPids(unittest.TestCase):
     """Tests for set_osd_pids()."""
@@ -621,5 +621,243 @@ class TestMainFunction(unittest.TestCase):
         self.assertTrue(args.skip_exec)
 
 
+class TestResumePlan(unittest.TestCase):
+    """Points already in the result index are skipped."""
+
+    def setUp(self):
+        from perf_test_plan import FioWorkload
+        from result_index import ResultIndex
+
+        self.temp_dir = tempfile.mkdtemp()
+        self.runner = BalancedOSDRunner(self.temp_dir)
+        self.runner.run_dir = self.temp_dir
+        self.runner.test_run_log = os.path.join(self.temp_dir, "test_run.log")
+        self.runner.result_index = ResultIndex(os.path.join(self.temp_dir, "idx.jsonl"))
+        self.workload = FioWorkload(
+            rw="randread", bs="4k", runtime=60, iodepth=[1, 2], numjobs=[1],
+            fio_name="job.fio",
+        )
+        self.runner.set_cluster_fields(Mock(), "vstart.sh --crimson")
+
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    @patch("run_test_plan.FioRunnerCustom")
+    def test_run_fio_custom_skips_done_points(self, mock_runner):
+        done = self.runner.point_key(self.workload, 1, 1)
+        self.runner.result_index.record(done)
+        with patch.object(self.runner, "wait_for_fio", return_value=False):
+            self.runner.run_fio_custom(Mock(), self.workload, Mock(), "t")
+        self.assertEqual(mock_runner.call_count, 1)
+        self.assertEqual(mock_runner.call_args[0][0]["iodepth"], 2)
+        # The failed point is run again next time
+        self.assertFalse(
+            self.runner.is_done(self.runner.point_key(self.workload, 2, 1))
+        )
+        self.runner.rerun = True
+        self.assertFalse(self.runner.is_done(done))
+
+    @patch("subprocess.run")
+    def test_failing_catalog_is_not_done(self, mock_run):
+        mock_run.return_value = Mock(returncode=0)
+        self.runner.test_plan_data = Mock()
+        self.runner.test_plan_data.benchmarks.librbdfio.runtime = 60
+        self.runner.test_plan_data.benchmarks.librbdfio.fio_cpu_range = ["28-55"]
+        # Legacy catalog settings, not set by the constructor
+        self.runner.latency_target = False
+        self.runner.multi_job_vol = False
+        self.runner.vol_prefix = "fio_rbd_vol"
+        cfg = Mock(fio_opts="", osd_type="crimson")
+        with patch.object(self.runner, "watchdog"), patch(
+            "run_fio.FioRunner.run_workload_loop", side_effect=SystemExit(1)
+        ):
+            self.runner.run_fio_catalog(cfg, "t_rr")
+            self.assertFalse(self.runner.wait_for_fio())
+        # The thread of the failed run is not waited for again
+        self.assertIsNone(self.runner._fio_thread)
+        with patch.object(self.runner, "watchdog"), patch(
+            "run_fio.FioRunner.run_workload_loop"
+        ):
+            self.runner.run_fio_catalog(cfg, "t_rr")
+            self.assertTrue(self.runner.wait_for_fio())
+
+    def test_point_key_follows_the_definition(self):
+        key = self.runner.point_key(self.workload, 1, 1)
+        self.assertEqual(key, self.runner.point_key(self.workload, 1, 1))
+        with open(os.path.join(self.temp_dir, "job.fio"), "w") as f:
+            f.write("[global]\n")
+        self.assertNotEqual(key, self.runner.point_key(self.workload, 1, 1))
+        self.runner.set_cluster_fields(Mock(), "vstart.sh --crimson --crimson-smp 2")
+        self.assertNotEqual(key, self.runner.point_key(self.workload, 1, 1))
+
+    @patch("subprocess.run")
+    def test_run_body_skips_completed_cluster(self, mock_run):
+        with patch.object(self.runner, "plan_points", return_value=["a", "b"]):
+            self.runner.result_index.record("a")
+            self.runner.result_index.record("b")
+            self.assertTrue(self.runner.run_body(Mock(), "title", "t", "vstart.sh"))
+        mock_run.assert_not_called()
+
+
+class TestClusterReuse(unittest.TestCase):
+    """Runs of the same cluster shape share one cluster."""
+
+    def setUp(self):
+        from perf_test_plan import CrimsonClusterConfiguration
+
+        self.temp_dir = tempfile.mkdtemp()
+        self.runner = BalancedOSDRunner(self.temp_dir)
+        self.runner.run_dir = self.temp_dir
+        self.runner.test_run_log = os.path.join(self.temp_dir, "test_run.log")
+        self.runner.test_plan_data = Mock()
+        self.runner.test_plan_data.benchmarks.items.return_value = []
+
+        def crimson(reactors, pool_size=128):
+            return CrimsonClusterConfiguration(
+                osd_type="cyan", osd_backend="seastore", osd_range=[1],
+                store_devs=["/dev/nvme0n1"], vstart_cpu_set=["0-7"],
+                pool_name="rados", pool_size=pool_size, rbd_num_images=1,
+                rbd_image_size="1G", reactor_range=reactors,
+            )
+
+        self.runner.test_plan_data.cluster.configurations = {
+            "a": crimson([2, 4]),
+            "b": crimson([4], pool_size=256),
+        }
+
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_plan_clusters_groups_by_shape(self):
+        runs = self.runner.plan_clusters()
+        self.assertEqual(
+            [(os.path.basename(log), title) for _, log, _, title, _, _, _ in runs],
+            [
+                ("a_test_run.log", "(cyan) 1 OSD crimson, 2 reactor"),
+                ("a_test_run.log", "(cyan) 1 OSD crimson, 4 reactor"),
+                ("b_test_run.log", "(cyan) 1 OSD crimson, 4 reactor"),
+            ],
+        )
+        self.assertEqual(runs[1][5], runs[2][5])
+
+    @patch("subprocess.run")
+    def test_run_body_reuses_the_cluster(self, mock_run):
+        from plan_schedule import cluster_shape
+
+        mock_run.return_value = Mock(returncode=0)
+        cfg = self.runner.test_plan_data.cluster.configurations["a"]
+
+        def start(cfg, cmd, num_osd, test_name):
+            self.runner.running_cluster = (cfg, cmd)
+            return True
+
+        with patch.object(self.runner, "start_cluster", side_effect=start) as mock_start, \
+                patch.object(self.runner, "wait_for_osds_gone") as mock_gone, \
+                patch.object(self.runner, "mk_pool") as mock_pool:
+            self.assertTrue(self.runner.run_body(cfg, "t", "t1", "vstart A", 1, 2))
+            self.assertEqual(self.runner.cluster_shape, cluster_shape(cfg, 1, 2))
+            self.assertTrue(self.runner.run_body(cfg, "t", "t2", "vstart A"))
+            self.assertEqual(mock_start.call_count, 1)
+            self.assertEqual(mock_pool.call_count, 1)
+            mock_gone.assert_not_called()
+            self.runner.run_body(cfg, "t", "t3", "vstart B")
+            self.assertEqual(mock_start.call_count, 2)
+            self.assertEqual(mock_pool.call_count, 2)
+            mock_gone.assert_called_once()
+            self.runner.teardown_cluster()
+        self.assertIsNone(self.runner.running_cluster)
+        mock_run.assert_called_with(["/ceph/src/stop.sh", "--crimson"])
+
+    @patch("time.sleep")
+    @patch("subprocess.run")
+    def test_wait_for_cluster(self, mock_run, mock_sleep):
+        mock_run.side_effect = [
+            Mock(returncode=1, stdout=""),
+            Mock(returncode=0, stdout=json.dumps({"num_osds": 2, "num_up_osds": 1, "num_in_osds": 2})),
+            Mock(returncode=0, stdout=json.dumps({"osdmap": {"num_osds": 2, "num_up_osds": 2, "num_in_osds": 2}})),
+        ]
+        self.assertTrue(self.runner.wait_for_cluster(2))
+        self.assertEqual(mock_sleep.call_count, 2)
+        mock_run.side_effect = None
+        mock_run.return_value = Mock(returncode=1, stdout="")
+        self.assertFalse(self.runner.wait_for_cluster(2, timeout=0))
+
+
+class TestPrecondCache(unittest.TestCase):
+    """Preconditioning is skipped when the recorded state matches."""
+
+    def setUp(self):
+        from precond_cache import PrecondCache
+
+        self.temp_dir = tempfile.mkdtemp()
+        self.runner = BalancedOSDRunner(self.temp_dir)
+        self.runner.run_dir = self.temp_dir
+        self.runner.precond_cache = PrecondCache(os.path.join(self.temp_dir, "state.json"))
+        os.makedirs(self.runner.fio_jobs)
+        self.template = os.path.join(self.runner.fio_jobs, "randwrite64k.fio")
+        with open(self.template, "w") as f:
+            f.write(
+                "[global]\nbs=64K\nrw=randwrite\n\n"
+                "[nvme0n1p2]\nfilename=/dev/nvme0n1p2\nsize=3550G\n\n"
+                "[nvme3n1p2]\nfilename=/dev/nvme3n1p2\nsize=3550G\n"
+            )
+
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_precond_job_covers_the_devices(self):
+        job = self.runner.precond_job("t", ["/dev/nvme5n1p2", "/dev/nvme1n1p2"])
+        with open(job) as f:
+            self.assertEqual(
+                f.read(),
+                "[global]\nbs=64K\nrw=randwrite\n\n"
+                "[nvme1n1p2]\nfilename=/dev/nvme1n1p2\n\n"
+                "[nvme5n1p2]\nfilename=/dev/nvme5n1p2\n",
+            )
+        self.assertEqual(self.runner.precond_job("t"), self.template)
+
+    @patch("subprocess.run")
+    def test_precond_runs_the_device_job(self, mock_run):
+        mock_run.return_value = Mock(returncode=0, stdout="", stderr="")
+        devs = ["/dev/nvme1n1p2"]
+        self.runner.precond_mode = "once"
+        self.assertTrue(self.runner.run_precond("t", devs))
+        fio_cmd = next(c.args[0] for c in mock_run.call_args_list if c.args[0][0] == "fio")
+        self.assertEqual(fio_cmd[1], os.path.join(self.temp_dir, "precond_t.fio"))
+        self.assertEqual(list(self.runner.precond_cache.devices), devs)
+        # A change of the [global] section of the template is a new job
+        with open(self.template) as f:
+            template = f.read()
+        with open(self.template, "w") as f:
+            f.write(template.replace("bs=64K", "bs=128K"))
+        self.assertTrue(self.runner.run_precond("t", devs))
+
+    @patch("subprocess.run")
+    def test_precondition_once(self, mock_run):
+        mock_run.return_value = Mock(returncode=0, stdout="", stderr="")
+        devs = ["/dev/nvme0n1p2"]
+        self.runner.precond_mode = "once"
+        self.assertTrue(self.runner.run_precond("t", devs))
+        calls = mock_run.call_count
+        self.assertFalse(self.runner.run_precond("t", devs))
+        self.assertEqual(mock_run.call_count, calls)
+        self.assertTrue(self.runner.run_precond("t", ["/dev/nvme1n1p2"]))
+        self.runner.precond_mode = "always"
+        self.assertTrue(self.runner.run_precond("t", devs))
+
+    @patch("subprocess.run")
+    def test_teardown_forgets_the_images(self, mock_run):
+        self.runner.running_cluster = (Mock(), "vstart")
+        self.runner.cluster_id = "t@1"
+        self.runner.precond_cache.record_images("fp", "t@1", "rbd_t")
+        with patch.object(self.runner, "wait_for_osds_gone"):
+            self.runner.teardown_cluster()
+        self.assertIsNone(self.runner.precond_cache.images_for("fp"))
+        self.assertIsNone(self.runner.cluster_id)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Unit tests for steady_state.py
+
+Checks the rolling coefficient of variation, MSER-5 truncation on synthetic
+warm-up series, and the online SteadyStateDetector.
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+
+import numpy as np
+
+# Add parent directory to path to import the module
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from steady_state import SteadyStateDetector, mser_truncation, rolling_cv
+from fio_job_parser import WorkloadInterval
+from telemetry_store import format_timestamp
+
+try:
+    from perf_reporter import PerfReporter
+except ImportError:  # its optional dependencies (polars) are missing
+    PerfReporter = None
+
+
+def warmup_series(warmup=30, steady=120, seed=1):
+    """Ramp from 0 to 1000 then noisy steady values around 1000."""
+    rng = np.random.default_rng(seed)
+    ramp = np.linspace(0, 1000, warmup, endpoint=False)
+    return np.concatenate([ramp, 1000 + rng.normal(0, 10, steady)])
+
+
+class TestRollingCV(unittest.TestCase):
+    def test_values(self):
+        cv = rolling_cv([1, 1, 1, 2, 4], 3)
+        self.assertTrue(np.isnan(cv[:2]).all())
+        self.assertEqual(cv[2], 0.0)
+        self.assertAlmostEqual(cv[4], np.std([1, 2, 4]) / np.mean([1, 2, 4]))
+
+    def test_constant_zero_is_steady(self):
+        self.assertEqual(rolling_cv([0, 0, 0], 3)[-1], 0.0)
+
+
+class TestMSER(unittest.TestCase):
+    def test_cuts_the_ramp(self):
+        cut = mser_truncation(warmup_series())
+        self.assertTrue(25 <= cut <= 40, cut)
+
+    def test_steady_series_not_cut(self):
+        rng = np.random.default_rng(2)
+        self.assertLessEqual(mser_truncation(1000 + rng.normal(0, 10, 100)), 10)
+
+    def test_short_series(self):
+        self.assertEqual(mser_truncation([1, 2, 3]), 0)
+        self.assertEqual(mser_truncation([]), 0)
+
+
+class TestSteadyStateDetector(unittest.TestCase):
+    def test_settles_after_ramp(self):
+        det = SteadyStateDetector(window=5, cv_threshold=0.05)
+        settled_at = None
+        for i, v in enumerate(warmup_series()):
+            if det.update(100.0 + i, iops=v) and settled_at is None:
+                settled_at = i
+        self.assertEqual(det.start, 100.0)
+        self.assertTrue(30 <= settled_at <= 40, settled_at)
+        self.assertEqual(det.settled_at, 100.0 + settled_at)
+
+    def test_all_signals_must_settle(self):
+        det = SteadyStateDetector(window=3, cv_threshold=0.05)
+        for i in range(10):
+            det.update(float(i), iops=1000.0, rutil=float(10 * i))
+        self.assertFalse(det.settled)
+
+    def test_save(self):
+        temp_dir = tempfile.mkdtemp()
+        try:
+            det = SteadyStateDetector(window=2)
+            det.update(1.0, iops=5.0)
+            det.update(2.0, iops=5.0)
+            path = os.path.join(temp_dir, "steady.json")
+            det.save(path, test_name="t")
+            with open(path) as f:
+                data = json.load(f)
+            self.assertEqual(data["warmup_end"], 2.0)
+            self.assertEqual(data["test_name"], "t")
+            self.assertEqual(len(data["timeline"]), 2)
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+@unittest.skipIf(PerfReporter is None, "perf_reporter cannot be imported")
+class TestEntryTimestamp(unittest.TestCase):
+    """The envelope timestamps are matched against the warm-up windows."""
+
+    def setUp(self):
+        self.tz = os.environ.get("TZ")
+        os.environ["TZ"] = "America/New_York"
+        time.tzset()
+
+    def tearDown(self):
+        if self.tz is None:
+            os.environ.pop("TZ", None)
+        else:
+            os.environ["TZ"] = self.tz
+        time.tzset()
+
+    def test_local_time_roundtrip(self):
+        ts = 1700000000.0
+        entry = {"timestamp": format_timestamp(ts)}
+        self.assertEqual(PerfReporter._entry_unix_ts(entry), ts)
+        self.assertIsNone(PerfReporter._entry_unix_ts({"timestamp": "unknown_ts"}))
+
+    def test_interval_filter_local_time(self):
+        ts = 1700000000.0
+        interval = WorkloadInterval(
+            "randread", 16, ts - 1, ts + 1, 2000, 2, 0, "4k", 0, 0.0, 0, 0.0, 0.0
+        )
+        entries = [
+            {"timestamp": format_timestamp(ts)},
+            {"timestamp": format_timestamp(ts + 3600)},
+            {"timestamp": "unknown_ts"},
+        ]
+        reporter = PerfReporter.__new__(PerfReporter)
+        self.assertEqual(
+            reporter._filter_telemetry_by_interval(entries, interval), entries[:1]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Unit tests for telemetry_scheduler.py
+
+Runs the real event loop.  The intervals (100 ms where the tick counts are
+checked) leave scheduling jitter well within the late tolerance, so the
+counts are exact.
+"""
+
+import os
+import sys
+import threading
+import time
+import unittest
+
+# Add parent directory to path to import the module
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from telemetry_scheduler import TelemetryScheduler, Tick
+
+
+class TestRegistration(unittest.TestCase):
+    """Tests for collector registration."""
+
+    def test_register_once_sets_single_sample(self):
+        sched = TelemetryScheduler()
+        c = sched.register_once("perf", lambda tick: None, delay=5)
+        self.assertIsNone(c.interval)
+        self.assertEqual(c.num_samples, 1)
+        self.assertEqual(c.delay, 5)
+
+    def test_duplicate_name_rejected(self):
+        sched = TelemetryScheduler()
+        sched.register("a", lambda tick: None, interval=1)
+        with self.assertRaises(ValueError):
+            sched.register("a", lambda tick: None, interval=1)
+
+    def test_non_positive_interval_rejected(self):
+        sched = TelemetryScheduler()
+        with self.assertRaises(ValueError):
+            sched.register("a", lambda tick: None, interval=0)
+
+
+class TestScheduling(unittest.TestCase):
+    """Tests for the drift-corrected scheduling loop."""
+
+    def test_bounded_collector_takes_num_samples(self):
+        ticks = []
+        sched = TelemetryScheduler()
+        sched.register("a", ticks.append, interval=0.05, num_samples=5)
+        sched.start()
+        sched.join(timeout=2)
+        self.assertEqual([t.index for t in ticks], [0, 1, 2, 3, 4])
+        self.assertFalse(sched.running)
+
+    def test_ticks_are_aligned_on_the_shared_clock(self):
+        ticks = {"a": [], "b": []}
+        sched = TelemetryScheduler()
+        sched.register("a", ticks["a"].append, interval=0.02, num_samples=4)
+        sched.register("b", ticks["b"].append, interval=0.04, num_samples=2)
+        sched.start()
+        sched.join(timeout=2)
+        # Scheduled times are exact multiples of the interval from the start
+        for k, tick in enumerate(ticks["a"]):
+            self.assertAlmostEqual(tick.mono - sched.mono_start, 0.02 * k, places=9)
+        self.assertEqual(ticks["a"][2].mono, ticks["b"][1].mono)
+        self.assertAlmostEqual(
+            ticks["a"][0].wall, sched.wall_time(ticks["a"][0].mono), places=9
+        )
+
+    def test_slow_sample_does_not_drift_the_schedule(self):
+        ticks = []
+
+        def slow(tick: Tick) -> None:
+            ticks.append(tick)
+            if tick.index == 0:
+                time.sleep(0.26)  # overruns the next two ticks
+
+        sched = TelemetryScheduler()
+        c = sched.register("slow", slow, interval=0.1, num_samples=6)
+        sched.start()
+        sched.join(timeout=5)
+        # Ticks 1 and 2 are skipped, the rest stay on the original grid
+        self.assertEqual([t.index for t in ticks], [0, 3, 4, 5])
+        self.assertEqual(c.ticks_missed, 2)
+        for tick in ticks:
+            self.assertAlmostEqual(
+                tick.mono - sched.mono_start, 0.1 * tick.index, places=9
+            )
+
+    def test_slightly_late_tick_is_not_missed(self):
+        ticks = []
+
+        def slow(tick: Tick) -> None:
+            ticks.append(tick)
+            if tick.index == 0:
+                time.sleep(0.12)  # tick 1 is late by less than half an interval
+
+        sched = TelemetryScheduler()
+        c = sched.register("slow", slow, interval=0.1, num_samples=3)
+        sched.start()
+        sched.join(timeout=5)
+        self.assertEqual([t.index for t in ticks], [0, 1, 2])
+        self.assertEqual(c.ticks_missed, 0)
+
+    def test_delay_postpones_first_tick(self):
+        ticks = []
+        sched = TelemetryScheduler()
+        sched.register_once("late", ticks.append, delay=0.05)
+        sched.start()
+        sched.join(timeout=2)
+        self.assertEqual(len(ticks), 1)
+        self.assertAlmostEqual(ticks[0].mono - sched.mono_start, 0.05, places=9)
+
+    def test_stop_cancels_unbounded_collectors_and_runs_on_stop(self):
+        ticks = []
+        stopped = threading.Event()
+        sched = TelemetryScheduler()
+        sched.register("forever", ticks.append, interval=0.01, on_stop=stopped.set)
+        sched.register_once("never", ticks.append, delay=60)
+        sched.start()
+        time.sleep(0.05)
+        sched.stop(timeout=2)
+        self.assertFalse(sched.running)
+        self.assertTrue(stopped.is_set())
+        self.assertGreater(len(ticks), 0)
+        self.assertEqual(sched.collectors["never"].samples_taken, 0)
+
+    def test_failing_collector_is_counted_not_fatal(self):
+        ticks = []
+
+        def boom(tick: Tick) -> None:
+            raise RuntimeError("boom")
+
+        sched = TelemetryScheduler()
+        sched.register("boom", boom, interval=0.1, num_samples=3)
+        sched.register("ok", ticks.append, interval=0.1, num_samples=3)
+        sched.start()
+        sched.join(timeout=5)
+        boom_c, ok_c = sched.collectors["boom"], sched.collectors["ok"]
+        self.assertEqual((boom_c.errors, boom_c.samples_taken), (3, 3))
+        self.assertEqual(len(ticks), 3)
+        self.assertEqual(boom_c.ticks_missed + ok_c.ticks_missed, 0)
+
+    def test_non_blocking_coroutine_collector(self):
+        ticks = []
+
+        async def coro(tick: Tick) -> None:
+            ticks.append(tick)
+
+        sched = TelemetryScheduler()
+        sched.register("coro", coro, interval=0.01, num_samples=2, blocking=False)
+        sched.start()
+        sched.join(timeout=2)
+        self.assertEqual(len(ticks), 2)
+        self.assertEqual(sched.summary()[0]["samples"], 2)
+
+
+class TestGate(unittest.TestCase):
+    """Tests for gated collectors."""
+
+    def test_release_starts_gated_collectors_early(self):
+        ticks = []
+        sched = TelemetryScheduler()
+        sched.register(
+            "gated", ticks.append, interval=0.01, num_samples=2, delay=5, gated=True
+        )
+
+        def _release(tick: Tick) -> None:
+            sched.release()
+
+        sched.register_once("trigger", _release, delay=0.02, blocking=False)
+        sched.start()
+        sched.join(timeout=2)
+        self.assertEqual(len(ticks), 2)
+        self.assertLess(ticks[0].mono - sched.mono_start, 1)
+        self.assertAlmostEqual(ticks[0].mono, sched.release_mono, places=2)
+        self.assertIsNotNone(sched.gate_wall())
+
+    def test_gated_collector_starts_after_delay_without_release(self):
+        ticks = []
+        sched = TelemetryScheduler()
+        sched.register_once("gated", ticks.append, delay=0.03, gated=True)
+        sched.start()
+        sched.join(timeout=2)
+        self.assertAlmostEqual(ticks[0].mono - sched.mono_start, 0.03, places=9)
+        self.assertIsNone(sched.gate_wall())
+
+
+if __name__ == "__main__":
+    unittest.main()
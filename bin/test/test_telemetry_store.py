@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+Unit tests for telemetry_store.py
+
+Appends dump_metrics / perf dump style payloads to a store in a temporary
+directory and checks they come back, as columns and as the legacy JSON.
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+import zipfile
+
+import numpy as np
+
+# Add parent directory to path to import the module
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from telemetry_store import (
+    LAYOUT_METRICS,
+    LAYOUT_TREE,
+    NO_SHARD,
+    TelemetryStore,
+    export_json,
+    flatten_metrics,
+    flatten_tree,
+)
+
+CRIMSON = {
+    "metrics": [
+        {"reactor_utilization": {"shard": "0", "value": 97.5}},
+        {"reactor_utilization": {"shard": "1", "value": 12}},
+        {"io_queue_total_operations": {"shard": "0", "class": "default", "value": 7}},
+        {
+            "seastore_op_lat": {
+                "shard": "1",
+                "stage": "commit",
+                "value": {
+                    "count": 3,
+                    "sum": 0.25,
+                    "buckets": [{"le": "0.1", "count": 2}, {"le": "1.0", "count": 1}],
+                },
+            }
+        },
+    ]
+}
+
+CLASSIC = {
+    "osd": {"op_r": 10, "op_r_latency": {"avgcount": 2, "sum": 0.5}},
+    "throttle-msgr": {"val": 0, "name": "msgr"},
+    "bluefs": {"files": [1, 2], "empty": {}},
+}
+
+
+class TestFlatten(unittest.TestCase):
+    """Tests for flatten_metrics() and flatten_tree()."""
+
+    def test_scalar_metrics(self):
+        rows = list(flatten_metrics(CRIMSON))
+        self.assertEqual(rows[0], (0, "reactor_utilization", {}, 97.5))
+        self.assertEqual(rows[2], (0, "io_queue_total_operations", {"class": "default"}, 7.0))
+
+    def test_histogram_one_row_per_field(self):
+        rows = [r for r in flatten_metrics(CRIMSON) if r[1] == "seastore_op_lat"]
+        self.assertEqual(
+            [r[2] for r in rows],
+            [
+                {"stage": "commit", "_field": "count"},
+                {"stage": "commit", "_field": "sum"},
+                {"stage": "commit", "_field": "buckets", "le": "0.1"},
+                {"stage": "commit", "_field": "buckets", "le": "1.0"},
+            ],
+        )
+        self.assertEqual([r[3] for r in rows], [3.0, 0.25, 2.0, 1.0])
+
+    def test_tree_uses_json_pointers(self):
+        rows = {r[1]: r for r in flatten_tree(CLASSIC)}
+        self.assertEqual(rows["/osd/op_r_latency/avgcount"][3], 2.0)
+        self.assertEqual(rows["/throttle-msgr/name"][2], {"_str": "msgr"})
+        self.assertEqual(rows["/bluefs/files/1"][3], 2.0)
+        self.assertEqual(rows["/osd/op_r"][0], NO_SHARD)
+
+
+class TestTelemetryStore(unittest.TestCase):
+    """Tests for TelemetryStore."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.prefix = os.path.join(self.temp_dir, "run_dump")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _write(self, payloads, chunk_rows=1000):
+        with TelemetryStore(self.prefix, chunk_rows=chunk_rows) as store:
+            for i, data in enumerate(payloads):
+                store.append(data, ts=1000.0 + i, osd=i % 2, label=f"s{i}")
+        return TelemetryStore.open(self.prefix)
+
+    def test_roundtrip_crimson(self):
+        store = self._write([CRIMSON, CRIMSON])
+        snaps = list(store.snapshots())
+        self.assertEqual(len(snaps), 2)
+        self.assertEqual(snaps[1]["data"], CRIMSON)
+        self.assertEqual(snaps[1]["osd"], 1)
+        self.assertEqual(snaps[1]["label"], "s1")
+        self.assertEqual(store.sample_info(0)["layout"], LAYOUT_METRICS)
+
+    def test_roundtrip_tree(self):
+        store = self._write([CLASSIC])
+        self.assertEqual(next(store.snapshots())["data"], CLASSIC)
+        self.assertEqual(store.sample_info(0)["layout"], LAYOUT_TREE)
+
+    def test_dictionaries_hold_strings_once(self):
+        store = self._write([CRIMSON] * 5)
+        self.assertEqual(
+            store.dicts["metric"],
+            ["reactor_utilization", "io_queue_total_operations", "seastore_op_lat"],
+        )
+        self.assertEqual(len(store.rows()), 5 * 7)
+
+    def test_chunks_are_memory_mapped(self):
+        store = self._write([CRIMSON] * 5, chunk_rows=10)
+        self.assertGreater(len(store.chunks), 1)
+        self.assertTrue(all(isinstance(a, np.memmap) for a in store._arrays()))
+        self.assertEqual(
+            [s["data"] for s in store.snapshots()], [CRIMSON] * 5
+        )
+
+    def test_to_dataframe_long_form(self):
+        df = self._write([CRIMSON]).to_dataframe(expand_labels=True)
+        self.assertEqual(
+            list(df.columns[:7]),
+            ["sample", "timestamp", "osd", "shard", "metric", "labels", "value"],
+        )
+        row = df[df["metric"] == "io_queue_total_operations"].iloc[0]
+        self.assertEqual(row["class"], "default")
+        self.assertEqual(row["value"], 7.0)
+        self.assertEqual(str(df["metric"].dtype), "category")
+
+    def test_export_json_matches_legacy_envelopes(self):
+        self._write([CRIMSON, CLASSIC])
+        path = export_json(self.prefix)
+        self.assertEqual(path, f"{self.prefix}.json")
+        with open(path) as f:
+            entries = json.load(f)
+        self.assertEqual([e["label"] for e in entries], ["s0", "s1"])
+        self.assertEqual(entries[1]["data"], CLASSIC)
+        self.assertRegex(entries[0]["timestamp"], r"^\d{8}_\d{6}$")
+
+    def test_export_json_two_osds(self):
+        with TelemetryStore(self.prefix) as store:
+            for ts in (1000.0, 1001.0):
+                for osd in (0, 1):
+                    store.append(CRIMSON, ts=ts, osd=osd, label="rutil")
+        path = export_json(self.prefix)
+        with open(path) as f:
+            entries = json.load(f)
+        self.assertEqual([e["osd"] for e in entries], [0, 1, 0, 1])
+        self.assertEqual(entries[0]["timestamp"], entries[1]["timestamp"])
+        self.assertEqual(list(entries[3]), ["timestamp", "label", "osd", "data"])
+        self.assertEqual(entries[3]["data"], CRIMSON)
+
+    def test_new_store_truncates_previous(self):
+        self._write([CRIMSON, CRIMSON], chunk_rows=4)
+        store = self._write([CLASSIC])
+        self.assertEqual(store.num_samples, 1)
+        self.assertEqual(len(os.listdir(self.temp_dir)), 2)
+
+    def test_open_zip(self):
+        self._write([CRIMSON])
+        zpath = os.path.join(self.temp_dir, "run.zip")
+        with zipfile.ZipFile(zpath, "w") as z:
+            for name in os.listdir(self.temp_dir):
+                if name.startswith("run_dump"):
+                    z.write(os.path.join(self.temp_dir, name), name)
+        with zipfile.ZipFile(zpath) as z:
+            store = TelemetryStore.open_zip(z, "run_dump.tlm.json")
+            self.assertEqual(next(store.snapshots())["data"], CRIMSON)
+
+    def test_successive_samples_are_delta_encoded(self):
+        first = {"metrics": [{"reactor_polls": {"shard": str(s), "value": 1.5}} for s in range(8)]}
+        second = {"metrics": [{"reactor_polls": {"shard": str(s), "value": 1.5 + (s == 3)}} for s in range(8)]}
+        with TelemetryStore(self.prefix) as store:
+            store.append(first, ts=1.0)
+            store.append(second, ts=2.0)
+        store = TelemetryStore.open(self.prefix)
+        self.assertEqual(len(store.schemas), 1)
+        self.assertEqual(len(store.series), 8)
+        bits = np.asarray(store._arrays()[0])
+        # Only the changed value of the second sample is non-zero
+        self.assertEqual(np.count_nonzero(bits[8:]), 1)
+        self.assertEqual([s["data"] for s in store.snapshots()], [first, second])
+
+    def test_delta_chains_are_per_osd(self):
+        payloads = [
+            {"metrics": [{"reactor_polls": {"shard": "0", "value": v}}]}
+            for v in (1, 100, 2, 200, 3)
+        ]
+        store = self._write(payloads, chunk_rows=2)
+        self.assertEqual([s["data"] for s in store.snapshots()], payloads)
+
+    def test_value_matrix_aligns_series(self):
+        store = self._write([CRIMSON, CLASSIC, CRIMSON])
+        ids, matrix = store.value_matrix([0, 1])
+        self.assertEqual(matrix.shape, (2, len(store.series)))
+        self.assertEqual(len(ids), len(store.series))
+        self.assertTrue(np.isnan(matrix[1, 0]))
+        self.assertEqual(matrix[0, 0], 97.5)
+
+    def test_append_after_close_fails(self):
+        store = TelemetryStore(self.prefix)
+        store.close()
+        with self.assertRaises(ValueError):
+            store.append(CRIMSON, ts=1.0)
+
+
+class TestStoreReaders(unittest.TestCase):
+    """The dump readers find the stores written in place of the _dump.json."""
+
+    SEASTORE = {
+        "metrics": [
+            {
+                "seastore_concurrent_transactions": {
+                    "shard": "0",
+                    "shard_store_index": "0",
+                    "value": 3,
+                }
+            }
+        ]
+    }
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.cwd = os.getcwd()
+        os.chdir(self.temp_dir)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _store(self, prefix, payload):
+        with TelemetryStore(prefix) as store:
+            store.append(payload, ts=1000.0, label="before")
+            store.append(payload, ts=1010.0, label="after")
+
+    def test_perf_osd_metrics_prefers_the_store(self):
+        from perf_osd_metrics import find_dump_files, load_dump_entries
+
+        self._store("run_dump", CRIMSON)
+        export_json("run_dump")
+        with open("old_dump.json", "w") as f:
+            json.dump([], f)
+        files = find_dump_files("_dump")
+        self.assertEqual(files, ["old_dump.json", "run_dump.tlm.json"])
+        entries = load_dump_entries("run_dump.tlm.json")
+        self.assertEqual([e["label"] for e in entries], ["before", "after"])
+        self.assertEqual(entries[0]["data"], CRIMSON)
+        self.assertRegex(entries[0]["timestamp"], r"^\d{8}_\d{6}$")
+
+    def test_seastore_histograms_read_the_store(self):
+        from parse_seastore_histograms import SeastoreHistogramAnalyzer
+
+        prefix = "20260716_215944_4qd_dump"
+        self._store(prefix, self.SEASTORE)
+        with zipfile.ZipFile("run.zip", "w") as archive:
+            for name in os.listdir("."):
+                if name.startswith(prefix):
+                    archive.write(name)
+        for analyser in (
+            SeastoreHistogramAnalyzer([prefix + ".tlm.json"]),
+            SeastoreHistogramAnalyzer([]),
+        ):
+            if analyser.file_paths:
+                analyser.load()
+            else:
+                analyser.load_from_zip("run.zip")
+            self.assertEqual(len(analyser.samples), 2)
+            self.assertEqual({r.qd for r in analyser.samples}, {4})
+            self.assertEqual(len(analyser.df_concurrent), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
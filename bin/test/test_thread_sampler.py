@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Unit tests for thread_sampler.py
+
+Builds a fake /proc/<pid>/task tree in a temporary directory and rewrites
+the stat/schedstat files between samples to simulate the threads running.
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+# Add parent directory to path to import the module
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import thread_sampler
+from thread_sampler import (
+    ThreadCPUSampler,
+    append_avg_per_run,
+    parse_task_stat,
+    thread_class,
+)
+
+
+def _stat(tid, comm, utime, stime, cpu):
+    # pid (comm) state, then fields 4..52 of proc(5): utime is field 14,
+    # stime field 15 and processor field 39
+    fields = ["0"] * 50
+    fields[0] = "S"
+    fields[11] = str(utime)
+    fields[12] = str(stime)
+    fields[36] = str(cpu)
+    return f"{tid} ({comm}) " + " ".join(fields) + "\n"
+
+
+class TestParsers(unittest.TestCase):
+    """Tests for parse_task_stat() and thread_class()."""
+
+    def test_parse_task_stat(self):
+        self.assertEqual(
+            parse_task_stat(_stat(7, "reactor-0", 120, 30, 5)),
+            ("reactor-0", 120, 30, 5),
+        )
+
+    def test_comm_with_spaces_and_parens(self):
+        comm, utime, _, _ = parse_task_stat(_stat(7, "a (b) c", 9, 0, 0))
+        self.assertEqual(comm, "a (b) c")
+        self.assertEqual(utime, 9)
+
+    def test_thread_classes(self):
+        for comm, expected in (
+            ("reactor-3", "reactor"),
+            ("alien-store-tp", "alien"),
+            ("msgr-worker-1", "msgr-worker"),
+            ("bstore_kv_sync", "bstore"),
+            ("log", "other"),
+        ):
+            with self.subTest(comm=comm):
+                self.assertEqual(thread_class(comm), expected)
+
+
+class TestThreadCPUSampler(unittest.TestCase):
+    """Tests for ThreadCPUSampler against a fake /proc."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.orig_tck = thread_sampler.CLK_TCK
+        thread_sampler.CLK_TCK = 100
+        self.sampler = ThreadCPUSampler(
+            {"OSD": [100], "FIO": [200]}, proc_root=self.temp_dir
+        )
+
+    def tearDown(self):
+        thread_sampler.CLK_TCK = self.orig_tck
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _task(self, pid, tid, comm, utime, stime, run_ns, wait_ns=0, cpu=0):
+        task = os.path.join(self.temp_dir, str(pid), "task", str(tid))
+        os.makedirs(task, exist_ok=True)
+        with open(os.path.join(task, "stat"), "w") as f:
+            f.write(_stat(tid, comm, utime, stime, cpu))
+        with open(os.path.join(task, "schedstat"), "w") as f:
+            f.write(f"{run_ns} {wait_ns} 1\n")
+
+    def test_first_sample_is_baseline(self):
+        self._task(100, 100, "reactor-0", 0, 0, 0)
+        self.sampler.sample(1.0)
+        self.assertEqual(self.sampler.columns["tid"], [])
+        self.assertEqual(self.sampler.num_samples, 1)
+
+    def test_exact_deltas(self):
+        self._task(100, 100, "reactor-0", 0, 0, 0)
+        self._task(200, 201, "fio", 0, 0, 0)
+        self.sampler.sample(10.0)
+        # 2 seconds: the reactor ran 1.5s (120 user + 30 sys ticks)
+        self._task(100, 100, "reactor-0", 120, 30, 1_500_000_000, 100_000_000, cpu=3)
+        self._task(200, 201, "fio", 20, 20, 400_000_000)
+        self.sampler.sample(12.0)
+        cols = self.sampler.columns
+        i = cols["comm"].index("reactor-0")
+        self.assertEqual(cols["group"][i], "OSD")
+        self.assertEqual(cols["thread_class"][i], "reactor")
+        self.assertAlmostEqual(cols["cpu"][i], 75.0)
+        self.assertAlmostEqual(cols["utime"][i], 60.0)
+        self.assertAlmostEqual(cols["stime"][i], 15.0)
+        self.assertAlmostEqual(cols["wait"][i], 5.0)
+        self.assertEqual(cols["last_cpu"][i], 3)
+        averages = self.sampler.averages()
+        self.assertAlmostEqual(averages["OSD"]["cpu"], 75.0)
+        self.assertAlmostEqual(averages["FIO"]["cpu"], 20.0)
+
+    def test_threads_sharing_a_name_are_summed(self):
+        for tid in (201, 202):
+            self._task(200, tid, "fio", 0, 0, 0)
+        self.sampler.sample(0.0)
+        for tid in (201, 202):
+            self._task(200, tid, "fio", 0, 0, 250_000_000)
+        self.sampler.sample(1.0)
+        self.assertAlmostEqual(self.sampler.by_thread()["fio"]["cpu"], 50.0)
+
+    def test_exited_thread_is_dropped(self):
+        self._task(100, 101, "bstore_aio", 0, 0, 0)
+        self.sampler.sample(0.0)
+        shutil.rmtree(os.path.join(self.temp_dir, "100", "task", "101"))
+        self.sampler.sample(1.0)
+        self.assertEqual(self.sampler.columns["tid"], [])
+        self.assertEqual(self.sampler._prev, {})
+
+    def test_save_json_and_append_avg_per_run(self):
+        self._task(100, 100, "reactor-0", 0, 0, 0)
+        self.sampler.sample(0.0)
+        self._task(100, 100, "reactor-0", 50, 0, 500_000_000)
+        self.sampler.sample(1.0)
+        path = os.path.join(self.temp_dir, "threads.json")
+        self.sampler.save_json(path)
+        with open(path) as f:
+            data = json.load(f)
+        self.assertEqual(data["threads"]["reactor-0"]["cpu"], 50.0)
+        avg = os.path.join(self.temp_dir, "avg.json")
+        append_avg_per_run(avg, self.sampler.averages())
+        append_avg_per_run(avg, {"OSD": {"cpu": 10.0}})
+        with open(avg) as f:
+            self.assertEqual(json.load(f)["OSD"]["avg_per_run"]["cpu"], [50.0, 10.0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Per-thread CPU sampler reading ``/proc/<pid>/task/<tid>/{stat,schedstat}``.
+
+Replaces ``top -w 512 -b -H`` and the later regex scraping of its text
+output (``tools/top_parser.py``, ``parse-top.py``): the kernel counters of
+every thread of the OSD and FIO processes are read directly, so
+
+  - utilisation comes from exact deltas (``schedstat`` run time in ns, and
+    ``utime``/``stime`` clock ticks) rather than top's rounded percentages,
+  - a sample costs a few small reads per thread, with no process launched,
+  - the samples are stored columnar (one list per field), ready for a
+    DataFrame, with no text parsing stage at all.
+
+Threads are keyed by name (``comm``) and classified by
+:data:`THREAD_CLASSES` (reactor, alien, msgr-worker, bstore, ...).
+Percentages are relative to one CPU: a fully busy thread reports 100.
+
+Usage: import thread_sampler
+
+    sampler = ThreadCPUSampler({"OSD": [1234], "FIO": [5678]})
+    sampler.sample()
+    ...
+    sampler.sample()
+    sampler.save_json("run_threads.json")
+"""
+
+import json
+import logging
+import os
+import re
+import time
+from typing import Dict, List, Optional, Tuple
+
+__author__ = "Jose J Palacios-Perez"
+
+logger = logging.getLogger(__name__)
+
+PROC_ROOT = "/proc"
+CLK_TCK = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+# Thread classes, first match wins (thread names are at most 15 chars)
+THREAD_CLASSES: List[Tuple[str, str]] = [
+    ("reactor", r"^reactor-\d+|^crimson-osd"),
+    ("alien", r"^alien"),
+    ("msgr-worker", r"^msgr-worker"),
+    ("bstore", r"^bstore"),
+    ("osd-tp", r"^tp_osd"),
+    ("fio", r"^fio"),
+]
+_CLASS_RES = [(name, re.compile(regex)) for name, regex in THREAD_CLASSES]
+
+# Columns of the samples, in order
+COLUMNS: List[str] = [
+    "timestamp",
+    "group",
+    "pid",
+    "tid",
+    "comm",
+    "thread_class",
+    "cpu",
+    "utime",
+    "stime",
+    "wait",
+    "last_cpu",
+]
+
+# Per process group metrics reported by averages()
+AVG_METRICS: List[str] = ["cpu", "utime", "stime"]
+
+
+def thread_class(comm: str) -> str:
+    """Classify thread name *comm* by :data:`THREAD_CLASSES` (else ``other``)."""
+    for name, regex in _CLASS_RES:
+        if regex.search(comm):
+            return name
+    return "other"
+
+
+def parse_task_stat(text: str) -> Tuple[str, int, int, int]:
+    """
+    Parse ``/proc/<pid>/task/<tid>/stat``.
+
+    Returns ``(comm, utime, stime, processor)``; the times are in clock ticks.
+    The name is enclosed in parentheses and may itself contain spaces or
+    parentheses, so the remaining fields are split after the last ``)``.
+    """
+    lparen = text.index("(")
+    rparen = text.rindex(")")
+    comm = text[lparen + 1 : rparen]
+    # rest[0] is field 3 (state) of proc(5)
+    rest = text[rparen + 2 :].split()
+    return comm, int(rest[11]), int(rest[12]), int(rest[36])
+
+
+def parse_schedstat(text: str) -> Tuple[int, int]:
+    """Parse ``schedstat``: ``(run_ns, wait_ns)`` on the CPU and run queue."""
+    fields = text.split()
+    return int(fields[0]), int(fields[1])
+
+
+class ThreadCPUSampler:
+    """
+    Sample the CPU utilisation of every thread of a set of processes.
+
+    Parameters
+    ----------
+    groups : dict
+        Process group name (e.g. ``"OSD"``, ``"FIO"``) to list of pids.
+    proc_root : str
+        Overridable for testing.
+
+    The first sample of a thread only sets its baseline, so a thread
+    contributes rows from its second sample on.  Threads that exit are
+    dropped.
+    """
+
+    def __init__(
+        self, groups: Dict[str, List[int]], proc_root: str = PROC_ROOT
+    ) -> None:
+        self.groups = {pg: [int(p) for p in pids] for pg, pids in groups.items()}
+        self.proc_root = proc_root
+        self.columns: Dict[str, list] = {c: [] for c in COLUMNS}
+        self.num_samples = 0
+        # tid -> (timestamp, utime, stime, run_ns, wait_ns) of the last sample
+        self._prev: Dict[int, Tuple[float, int, int, int, int]] = {}
+
+    def _read(self, path: str) -> Optional[str]:
+        try:
+            with open(path, "rb") as f:
+                return f.read().decode(errors="replace")
+        except OSError:
+            return None  # the thread exited
+
+    def _tasks(self, pid: int) -> List[int]:
+        try:
+            return [int(t) for t in os.listdir(f"{self.proc_root}/{pid}/task")]
+        except OSError:
+            return []
+
+    def sample(self, ts: Optional[float] = None) -> None:
+        """Take one sample of every thread, timestamped *ts* (default now)."""
+        ts = time.time() if ts is None else ts
+        cols = self.columns
+        seen = set()
+        for group, pids in self.groups.items():
+            for pid in pids:
+                for tid in self._tasks(pid):
+                    task = f"{self.proc_root}/{pid}/task/{tid}"
+                    stat = self._read(f"{task}/stat")
+                    sched = self._read(f"{task}/schedstat")
+                    if stat is None:
+                        continue
+                    comm, utime, stime, last_cpu = parse_task_stat(stat)
+                    run_ns, wait_ns = parse_schedstat(sched) if sched else (0, 0)
+                    seen.add(tid)
+                    prev = self._prev.get(tid)
+                    self._prev[tid] = (ts, utime, stime, run_ns, wait_ns)
+                    if prev is None or ts <= prev[0]:
+                        continue
+                    dt = ts - prev[0]
+                    tick_pct = 100.0 / (CLK_TCK * dt)
+                    ns_pct = 100.0 / (dt * 1e9)
+                    cols["timestamp"].append(ts)
+                    cols["group"].append(group)
+                    cols["pid"].append(pid)
+                    cols["tid"].append(tid)
+                    cols["comm"].append(comm)
+                    cols["thread_class"].append(thread_class(comm))
+                    cols["cpu"].append((run_ns - prev[3]) * ns_pct)
+                    cols["utime"].append((utime - prev[1]) * tick_pct)
+                    cols["stime"].append((stime - prev[2]) * tick_pct)
+                    cols["wait"].append((wait_ns - prev[4]) * ns_pct)
+                    cols["last_cpu"].append(last_cpu)
+        for tid in set(self._prev) - seen:
+            del self._prev[tid]
+        self.num_samples += 1
+
+    # ------------------------------------------------------------------
+    # Aggregation
+    # ------------------------------------------------------------------
+
+    def _rows(self):
+        return zip(*(self.columns[c] for c in COLUMNS))
+
+    def by_thread(self) -> Dict[str, Dict]:
+        """
+        Mean utilisation per thread name, e.g. ``{"reactor-0": {"cpu": 97.5,
+        ...}}``.  Threads sharing a name (``bstore_aio``, FIO workers) are
+        summed within a sample, then averaged over the samples.
+        """
+        acc: Dict[str, Dict] = {}
+        for row in self._rows():
+            r = dict(zip(COLUMNS, row))
+            entry = acc.setdefault(
+                r["comm"],
+                {
+                    "group": r["group"],
+                    "thread_class": r["thread_class"],
+                    "timestamps": set(),
+                    "cpu": 0.0,
+                    "utime": 0.0,
+                    "stime": 0.0,
+                    "wait": 0.0,
+                    "last_cpu": r["last_cpu"],
+                },
+            )
+            entry["timestamps"].add(r["timestamp"])
+            for m in ("cpu", "utime", "stime", "wait"):
+                entry[m] += r[m]
+            entry["last_cpu"] = r["last_cpu"]
+        for entry in acc.values():
+            n = len(entry.pop("timestamps"))
+            for m in ("cpu", "utime", "stime", "wait"):
+                entry[m] /= n
+        return acc
+
+    def averages(self) -> Dict[str, Dict[str, float]]:
+        """
+        Mean total utilisation per process group over the samples, e.g.
+        ``{"OSD": {"cpu": 310.2, "utime": 250.0, "stime": 60.0}}``.
+        """
+        sums: Dict[str, Dict[str, float]] = {}
+        stamps: Dict[str, set] = {}
+        for row in self._rows():
+            r = dict(zip(COLUMNS, row))
+            pg = sums.setdefault(r["group"], {m: 0.0 for m in AVG_METRICS})
+            stamps.setdefault(r["group"], set()).add(r["timestamp"])
+            for m in AVG_METRICS:
+                pg[m] += r[m]
+        return {
+            group: {m: v / len(stamps[group]) for m, v in pg.items()}
+            for group, pg in sums.items()
+        }
+
+    def to_dict(self) -> Dict:
+        """Columnar samples plus the per-thread and per-group means."""
+        return {
+            "groups": self.groups,
+            "columns": self.columns,
+            "threads": self.by_thread(),
+            "averages": self.averages(),
+        }
+
+    def save_json(self, path: str) -> None:
+        """Save :meth:`to_dict` as JSON."""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f)
+
+
+def append_avg_per_run(path: str, averages: Dict[str, Dict[str, float]]) -> None:
+    """
+    Append the per group *averages* of one run to the CPU average file *path*.
+
+    The file uses the layout ``fio_parse_jsons.load_avg_cpu_json`` reads
+    from ``tools/top_parser.py``, ``{"OSD": {"avg_per_run": {"cpu": [..]}}}``,
+    with one value per run, so each FIO run gets its ``OSD_cpu``, ``FIO_cpu``
+    ... columns in the results table.
+    """
+    data: Dict = {}
+    if os.path.exists(path) and os.path.getsize(path) > 0:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    for group, metrics in averages.items():
+        per_run = data.setdefault(group, {}).setdefault("avg_per_run", {})
+        for m, v in metrics.items():
+            per_run.setdefault(m, []).append(v)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=4, sort_keys=True)